@@ -1,21 +1,51 @@
 import os
 import re
-from typing import Dict, List, Optional, Any
-from src.lexer import lexer
-from src.parser import parser, reset_parser
-from src.qwen_api import QWENAPI
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Sequence, Tuple
 from src.executor import ASTExecutor
+from src.profiling import BranchProfiler, ProfilingExecutor, reorder
+from src.explain import Explainer, ExplainExecutor
+from src.symbols import SymbolTable
+from src.intent_rules import COMPOUND_INTENTS, RuleIntentClassifier
+from src.intent_model import DistilledIntentClassifier, append_intent_log
+from src.dsl_registry import DSLRegistry
+from src.compiler import compile_script, default_backend, is_thread_safe
+from src.artifacts import DEFAULT_CACHE_DIRNAME
+from src.response_cache import DEFAULT_MAX_ENTRIES, ResponseCache, canonical_intent
+from src.session import SessionStore, resolve_follow_up
+from src.inventory import CatalogInventory, InventoryBackend, product_sku
+from src.fuzzy_index import CatalogIndex
+from src.lexicon import CatalogLexicon, compact
+from src.deadline import expired as deadline_expired
+
+# 原始输入中决定库存/价格意图覆盖的关键词
+STOCK_KEYWORDS = ('库存', '还剩', '有货', '存货')
+PRICE_KEYWORDS = ('多少钱', '价格', '价位')
+# 参数未给出的标记（None 是有效的查询结果）
+UNSET = object()
 
 
 class DSLManager:
-    def __init__(self, dsl_directory: str = "src/dsl"):
-        self.dsl_directory = dsl_directory
-        self.recognizer = QWENAPI()
-        self.dsl_cache = {}
-        self.sym_tbl = {}
+    def __init__(self, dsl_directory: str = "src/dsl", hot_reload_interval: Optional[float] = None,
+                 parser_backend: Optional[str] = None, artifact_dir: Optional[str] = None,
+                 recognizer: Optional[Any] = None, inventory: Optional[InventoryBackend] = None,
+                 product_catalog: Optional[Sequence[Dict]] = None, registry: Optional[DSLRegistry] = None):
+        """:param registry: 与其他实例共用的脚本注册表（如服务的各工作线程）；给出时不再加载脚本、不启动热加载"""
+        self.dsl_directory = registry.directory if registry is not None else dsl_directory
+        self.parser_backend = parser_backend or default_backend()  # 'ply' 或 'rd'
+        # 意图识别器可注入（测试桩等）；未注入时在首次识别时才创建 QWENAPI
+        self._recognizer = recognizer
+        self.error_reply = '系统正忙，请稍后再试。'
+        self.sym_tbl = SymbolTable()  # 槽位化符号表，每轮请求原地清空后复用
+        self.optimize_scripts = os.getenv("DSL_OPTIMIZE", "1") != "0"  # 执行按事实优化后的AST
         
-        # 简化的产品目录 (数据层)
-        self.product_catalog = [
+        # 简化的产品目录 (数据层)；每次赋值递增 catalog_version
+        self.catalog_version = 0
+        self._catalog_index: Optional[Tuple[int, CatalogIndex]] = None  # (目录版本, 近似匹配索引)
+        self._catalog_lexicon: Optional[Tuple[int, CatalogLexicon]] = None  # (目录版本, 品牌/型号词表)
+        self.intent_fast_path: Optional[RuleIntentClassifier] = None
+        # 可传入共享内存中的只读目录（SharedCatalog），多进程部署时各进程不再各自持有一份
+        self.product_catalog = product_catalog if product_catalog is not None else [
             {"category": "手机", "brand": "小米", "model": "小米14", "budget": 4500, "performance": 9, "context_desc": "高性能、高性价比"},
             {"category": "手机", "brand": "苹果", "model": "iPhone 15 Pro", "budget": 8500, "performance": 10, "context_desc": "顶级性能、专业摄影"},
             {"category": "手机", "brand": "苹果", "model": "iPhone SE", "budget": 3500, "performance": 6, "context_desc": "小屏旗舰，性价比之选"}, # <-- 新增：确保预算匹配
@@ -32,32 +62,124 @@ class DSLManager:
             {"category": "书籍", "brand": "人教版出版社", "model": "高中英语", "budget": 20, "flavor": "有趣", "context_desc": "令人爱不释手的英语读物"},
         ]
 
-        # 意图到DSL文件的映射
-        self.intent_to_dsl = {
-            '商品推荐': 'generic_recommendation.dsl',
-            '价格查询': 'price_query.dsl', 
-            '库存查询': 'stock_query.dsl', 
-            '自然沟通': 'natural_chat.dsl'
-        }
-        
-        # 场景到DSL文件的映射
-        self.scene_to_dsl = {
-            # 不重要
-        }
+        if registry is None:
+            # DSL脚本注册表：启动时扫描目录、读取 SCENE/ON_INTENT 头部并预编译全部脚本
+            # 编译产物（.dslc）默认放在脚本目录的 __dslcache__ 下，DSL_ARTIFACTS=0 可关闭
+            if artifact_dir is None and os.getenv("DSL_ARTIFACTS", "1") != "0":
+                artifact_dir = os.getenv("DSL_ARTIFACT_DIR") or os.path.join(dsl_directory, DEFAULT_CACHE_DIRNAME)
+            registry = DSLRegistry(
+                dsl_directory,
+                compile_fn=lambda source: compile_script(source, self.parser_backend),
+                parallel_compile=is_thread_safe(self.parser_backend),
+                artifact_dir=artifact_dir)
+            report = registry.load_all()
+            print(f"DSL脚本预编译完成：成功{len(report['compiled'])}个，失败{len(report['failed'])}个，"
+                  f"编译产物{report['artifacts']}，耗时{report['elapsed_ms']}ms")
+            for name, error in report['failed'].items():
+                print(f"DSL脚本编译失败 {name}: {error}")
+            # 热加载：后台检查脚本目录，变更的脚本校验通过后原子替换
+            if hot_reload_interval is None and os.getenv("DSL_HOT_RELOAD_INTERVAL"):
+                hot_reload_interval = float(os.getenv("DSL_HOT_RELOAD_INTERVAL"))
+            if hot_reload_interval:
+                registry.start_watching(hot_reload_interval)
+        self.registry = registry
+
+        # 库存后端（可替换为真实库存系统，通常包一层 CachedInventory）；默认按商品目录模拟
+        self.inventory = inventory or CatalogInventory(lambda: self.product_catalog, lambda: self.catalog_version)
+        # 推荐时过滤缺货商品（DSL_FILTER_OUT_OF_STOCK=1），候选商品的库存一次批量查询
+        self.filter_out_of_stock = os.getenv("DSL_FILTER_OUT_OF_STOCK") == "1"
+
+        # 本地规则预分类器：置信度达到阈值时跳过 LLM 调用
+        self.intent_fast_path = RuleIntentClassifier(self.product_catalog, lexicon=self.catalog_lexicon)
+
+        # 蒸馏意图分类器（由 LLM 日志离线训练，python -m src.intent_model train）
+        self.intent_model = None
+        model_path = os.getenv("DSL_INTENT_MODEL")
+        if model_path and os.path.exists(model_path):
+            self.intent_model = DistilledIntentClassifier.load(model_path)
+            self.intent_model.entity_extractor = self.intent_fast_path
+        # LLM 意图识别日志（作为蒸馏分类器的训练数据）
+        self.intent_log_path = os.getenv("DSL_INTENT_LOG")
+
+        # 分支统计（DSL_PROFILE_BRANCHES=1）：记录各分支命中次数，供 reorder_branches 重排 ELSE IF 链
+        self.branch_profiler = BranchProfiler() if os.getenv("DSL_PROFILE_BRANCHES") == "1" else None
+        # 逐节点剖析（DSL_EXPLAIN=1）：所有请求的节点统计聚合到同一个 Explainer；单次请求见 explain()
+        self.explainer = Explainer() if os.getenv("DSL_EXPLAIN") == "1" else None
+
+        # 完整回复缓存（DSL_RESPONSE_CACHE_SIZE=0 关闭）：键含脚本与目录版本，变化后自动失效
+        cache_size = int(os.getenv("DSL_RESPONSE_CACHE_SIZE", DEFAULT_MAX_ENTRIES))
+        self.response_cache = ResponseCache(cache_size) if cache_size > 0 else None
+
+        # 多轮会话：按会话 ID 保存上一轮的意图与槽位，短追问在本地解析
+        self.sessions = SessionStore(max_sessions=int(os.getenv("DSL_SESSION_MAX", "10000")),
+                                     ttl=float(os.getenv("DSL_SESSION_TTL", "1800")))
+
+        # 运行统计（意图识别来源、回复缓存命中等）
+        self.stats = {'fast_path_hits': 0, 'model_hits': 0, 'llm_calls': 0, 'session_follow_ups': 0,
+                      'compound_queries': 0, 'fuzzy_matches': 0, 'deadline_skips': 0,
+                      'response_cache_hits': 0, 'response_cache_misses': 0}
+        self._fanout_pool: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def recognizer(self):
+        """LLM 意图识别器，首次使用时才导入并构造"""
+        if self._recognizer is None:
+            from src.qwen_api import QWENAPI
+            self._recognizer = QWENAPI()
+        return self._recognizer
+
+    @recognizer.setter
+    def recognizer(self, recognizer) -> None:
+        self._recognizer = recognizer
+
+    @property
+    def product_catalog(self) -> Sequence[Dict]:
+        return self._product_catalog
+
+    @product_catalog.setter
+    def product_catalog(self, catalog: Sequence[Dict]) -> None:
+        self._product_catalog = catalog
+        self.catalog_changed()
+
+    def catalog_changed(self) -> None:
+        """商品目录变化（重新赋值或原地修改后调用），已缓存的回复随之失效"""
+        self.catalog_version += 1
+        # 规则预分类器按商品位置引用目录，需随目录一起更新
+        if self.intent_fast_path:
+            self.intent_fast_path.rebuild(self.product_catalog, lexicon=self.catalog_lexicon)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """回复缓存的条目数与命中率（库存缓存的统计放在 inventory 下）"""
+        stats = self.response_cache.snapshot() if self.response_cache else {}
+        if hasattr(self.inventory, 'snapshot'):
+            stats['inventory'] = self.inventory.snapshot()
+        return stats
 
     #  搜索目录的辅助函数：必须依赖 LLM 识别的 category 进行筛选
     def search_catalog(self, category: str, sym_tbl: Dict) -> Optional[Dict]:
         """根据 LLM 识别的类别和参数搜索最佳匹配产品"""
-        
-        # 1. 筛选出与用户查询类别匹配的候选产品
-        candidates = [p for p in self.product_catalog if p.get('category') == category]
+        user_budget = sym_tbl.get('预算')
+        user_brand = sym_tbl.get('品牌')
+
+        # 1. 筛选出与用户查询类别匹配的候选产品（给出品牌时通过词表只取该品牌的商品）
+        if user_brand:
+            candidates = self._brand_products(category, user_brand)
+        elif not self.filter_out_of_stock and hasattr(self.product_catalog, 'budgets'):
+            return self._closest_budget_product(category, user_budget)
+        else:
+            candidates = self._category_products(category)
+        if self.filter_out_of_stock and candidates:
+            try:
+                stock = self.inventory.get_stock([product_sku(p) for p in candidates])
+            except Exception as e:
+                # 库存系统不可用时不过滤缺货商品，推荐照常进行
+                print(f"库存查询失败，推荐时不过滤缺货商品: {e}")
+            else:
+                candidates = [p for p in candidates if stock.get(product_sku(p), 0) > 0]
         
         best_match = None
         min_diff = float('inf')
         
-        user_budget = sym_tbl.get('预算')
-        user_brand = sym_tbl.get('品牌')
-        
         for product in candidates:
             # 检查品牌
             if user_brand and product['brand'] != user_brand:
@@ -74,25 +196,102 @@ class DSLManager:
                 best_match = product
                     
         return best_match
+
+    def _closest_budget_product(self, category: str, user_budget: Optional[float]) -> Optional[Dict]:
+        """共享目录上的 search_catalog（不限品牌）：按镜像中的预算列挑选，只解码选中的商品"""
+        budgets = self.product_catalog.budgets
+        best_position = None
+        min_diff = float('inf')
+        for position in self.product_catalog.categories.get(category, ()):
+            budget = budgets[position]
+            if user_budget and budget > user_budget:
+                continue
+            current_diff = (user_budget if user_budget is not None else budget) - budget
+            if current_diff >= 0 and current_diff < min_diff:
+                min_diff = current_diff
+                best_position = position
+        return self.product_catalog[best_position] if best_position is not None else None
     #  查询目录函数（区别于推荐的搜索逻辑）
     def search_catalog_for_query(self, category: str, brand: Optional[str], model: Optional[str]) -> Optional[Dict]:
         """为价格/库存查询提供精确搜索，只返回第一个精确匹配项"""
         brand = brand.replace(' ', '').strip() if brand else None
         model = model.replace(' ', '').strip() if model else None
         
-        for p in self.product_catalog:
-            if p.get('category') != category:
-                continue
-
-            # 优先级 1: 精确型号匹配
-            if model and p.get('model') == model:
-                return p
-            
-            # 优先级 2: 仅品牌匹配 (返回该品牌下的第一个产品作为示例)
-            if not model and brand and p.get('brand') == brand:
-                return p
+        # 优先级 1: 精确型号匹配
+        if model:
+            products = self._model_products(category, model)
+            if products:
+                return products[0]
+        # 优先级 2: 仅品牌匹配 (返回该品牌下的第一个产品作为示例)
+        elif brand:
+            products = self._brand_products(category, brand)
+            if products:
+                return products[0]
         
+        # 优先级 3: 近似匹配（写法不同或有错别字，如 "iphone15pro"、"Pura70"），不再调用 LLM
+        return self._fuzzy_query(category, brand, model)
+
+    def _catalog_categories(self) -> set:
+        """目录中的全部类别（共享目录直接读取类别索引）"""
+        categories = getattr(self.product_catalog, 'categories', None)
+        if categories is not None:
+            return set(categories)
+        return set(p['category'] for p in self.product_catalog)
+
+    def _category_products(self, category: str) -> List[Dict]:
+        """某个类别下的商品（共享目录按类别索引只解码该类别的记录）"""
+        if hasattr(self.product_catalog, 'in_category'):
+            return self.product_catalog.in_category(category)
+        return [p for p in self.product_catalog if p.get('category') == category]
+
+    def _brand_products(self, category: str, brand: str) -> List[Dict]:
+        """某个类别下该品牌的商品（通过词表只取该品牌的商品，不扫描整个类别）"""
+        products = (self.product_catalog[i] for i in self.catalog_lexicon.brands.positions(compact(brand)))
+        return [p for p in products if p.get('category') == category and p.get('brand') == brand]
+
+    def _model_products(self, category: str, model: str) -> List[Dict]:
+        """某个类别下型号完全相同的商品（通过词表查找）"""
+        products = (self.product_catalog[i] for i in self.catalog_lexicon.models.positions(compact(model)))
+        return [p for p in products if p.get('category') == category and p.get('model') == model]
+
+    def _fuzzy_query(self, category: str, brand: Optional[str], model: Optional[str]) -> Optional[Dict]:
+        """按字符三元组相似度查找型号（或仅给出品牌时查找品牌）"""
+        index = self.catalog_index
+        if model:
+            match = index.best_product(model, category)
+            if match:
+                product, score = match
+                self.stats['fuzzy_matches'] += 1
+                print(f"型号近似匹配 {model} -> {product['model']}（相似度 {score}）")
+                return product
+        elif brand:
+            match = index.best_brand(brand)
+            if match:
+                for p in self._brand_products(category, match[0]):
+                    self.stats['fuzzy_matches'] += 1
+                    print(f"品牌近似匹配 {brand} -> {match[0]}（相似度 {match[1]}）")
+                    return p
         return None
+
+    @property
+    def catalog_index(self) -> CatalogIndex:
+        """商品目录的近似匹配索引，目录版本变化后重建"""
+        if self._catalog_index is None or self._catalog_index[0] != self.catalog_version:
+            # 共享目录自带在镜像上构建好的索引
+            shared = getattr(self.product_catalog, 'catalog_index', None)
+            index = shared() if shared else CatalogIndex(self.product_catalog)
+            self._catalog_index = (self.catalog_version, index)
+        return self._catalog_index[1]
+
+    @property
+    def catalog_lexicon(self) -> CatalogLexicon:
+        """商品目录的品牌/型号词表（精确子串匹配，耗时与目录大小无关），目录版本变化后重建"""
+        if self._catalog_lexicon is None or self._catalog_lexicon[0] != self.catalog_version:
+            # 共享目录自带在镜像上构建好的词表
+            shared = getattr(self.product_catalog, 'lexicon', None)
+            lexicon = shared() if shared else CatalogLexicon(self.product_catalog)
+            self._catalog_lexicon = (self.catalog_version, lexicon)
+        return self._catalog_lexicon[1]
     # 模板处理函数
     def _process_recommendation(self, final_reply: str, intent_result: Dict) -> str:
         """
@@ -135,7 +334,12 @@ class DSLManager:
         except Exception as e:
             print(f"模板填充错误: {e}")
             return "系统错误：无法生成最终推荐回复。"
-    def _process_price_query(self, final_reply: str) -> str:
+    def _query_product(self) -> Optional[Dict]:
+        """按符号表中的类别、品牌、型号查询目录（价格/库存查询共用）"""
+        category = self.sym_tbl.get('scene', '商品')
+        return self.search_catalog_for_query(category, self.sym_tbl.get('品牌'), self.sym_tbl.get('型号'))
+
+    def _process_price_query(self, final_reply: str, product: Any = UNSET) -> str:
         """处理 PRICE_QUERY_TEMPLATE，执行价格查询"""
         if not final_reply.startswith("PRICE_QUERY_TEMPLATE:"):
             return final_reply
@@ -145,7 +349,8 @@ class DSLManager:
         brand = self.sym_tbl.get('品牌')
         model = self.sym_tbl.get('型号')
 
-        product = self.search_catalog_for_query(category, brand, model) 
+        if product is UNSET:
+            product = self._query_product()
         
         if not product:
             return f"抱歉，产品目录中没有找到 {brand if brand else ''}{model if model else ''} 这款{category}。"
@@ -155,8 +360,8 @@ class DSLManager:
             return f"您查询的 {product['brand']} {product['model']} 的当前价格是 {price} 元。"
         else:
             return f"抱歉，暂无 {product['model']} 的价格信息。"
-    def _process_stock_query(self, final_reply: str) -> str:
-        """处理 STOCK_QUERY_TEMPLATE，执行库存查询（模拟）"""
+    def _process_stock_query(self, final_reply: str, product: Any = UNSET) -> str:
+        """处理 STOCK_QUERY_TEMPLATE，向库存后端查询库存"""
         if not final_reply.startswith("STOCK_QUERY_TEMPLATE:"):
             return final_reply
         
@@ -164,30 +369,38 @@ class DSLManager:
         brand = self.sym_tbl.get('品牌')
         model = self.sym_tbl.get('型号')
 
-        product = self.search_catalog_for_query(category, brand, model) 
+        if product is UNSET:
+            product = self._query_product()
         
         if not product:
             return f"抱歉，产品目录中没有找到 {brand if brand else ''}{model if model else ''} 这款{category}。"
 
-        # 模拟库存逻辑：高端机型（如 iPhone 15 Pro）或热门食物（如麻辣小龙虾）缺货
-        is_high_demand = product.get('budget', 0) > 8000 or product.get('model') == '麻辣小龙虾'
-        has_stock = not is_high_demand
-        
-        stock_status = "有充足现货，您可以立即下单" if has_stock else "暂时缺货，预计三天内到货"
+        sku = product_sku(product)
+        try:
+            quantity = self.inventory.get_stock([sku]).get(sku)
+        except Exception as e:
+            print(f"库存查询失败 {sku}: {e}")
+            return "库存系统繁忙，请稍后再试。"
+
+        if quantity is None:
+            stock_status = "暂未查询到库存信息，请稍后再试"
+        elif quantity > 0:
+            stock_status = "有充足现货，您可以立即下单"
+        else:
+            stock_status = "暂时缺货，预计三天内到货"
         
         return f"{product['brand']} {product['model']} 的当前库存状态是：{stock_status}。"
-    # ... (load_dsl_script 保持不变) ...
     def load_dsl_script(self, script_name: str) -> Optional[str]:
-        """加载DSL脚本文件"""
-        if script_name in self.dsl_cache:
-            return self.dsl_cache[script_name]
-            
+        """加载DSL脚本文件（优先使用注册表中当前版本的源码）"""
+        entry = self.registry.get(script_name)
+        if entry:
+            return entry.source
+
+        # 注册表之外的脚本（如编译失败的文件）直接读取，不做缓存，修改后立即生效
         script_path = os.path.join(self.dsl_directory, script_name)
         try:
             with open(script_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                self.dsl_cache[script_name] = content
-                return content
+                return f.read()
         except FileNotFoundError:
             print(f"DSL脚本文件不存在: {script_path}")
             return None
@@ -199,28 +412,28 @@ class DSLManager:
         
         print(f"正在根据意图[{intent}]选择脚本...") # 调试信息
 
-        # 1. 优先根据意图映射选择 (包括 '自然沟通')
-        if intent in self.intent_to_dsl:
-            return self.load_dsl_script(self.intent_to_dsl[intent])
-        
-        # 2. 其次根据商品类别选择
-        elif category in self.scene_to_dsl:
-            return self.load_dsl_script(self.scene_to_dsl[category])
-        
-        # 3. 如果都匹配不到，默认使用自然沟通
-        else:
-            return self.load_dsl_script('natural_chat.dsl')
+        # 按 (意图, 类别) -> 意图 -> 类别 的顺序查注册表索引；都匹配不到时默认使用自然沟通
+        script_name = self.registry.lookup(intent, category) or 'natural_chat.dsl'
+        return self.load_dsl_script(script_name)
     
-    def execute_dsl(self, user_input: str) -> str:
-        """执行完整的DSL处理流程"""
+    def execute_dsl(self, user_input: str, session_id: Optional[str] = None) -> str:
+        """
+        执行完整的DSL处理流程
+        :param session_id: 会话 ID；给出时短追问沿用上一轮的意图与槽位
+        """
         try:
             # 1. 重置状态
-            reset_parser()
             self.sym_tbl.clear()
             
-            # 2. 意图识别
-            print("正在进行意图识别...")
-            intent_result = self.recognizer.recognize_intent(user_input)        
+            # 2. 意图识别（会话追问优先，其次本地规则，置信度不足时再调用 LLM）
+            intent_result = None
+            if session_id is not None:
+                intent_result = resolve_follow_up(user_input, self.sessions.get(session_id), self.intent_fast_path)
+                if intent_result:
+                    self.stats['session_follow_ups'] += 1
+                    print(f"会话追问沿用上一轮槽位，意图[{intent_result['intent']}]，跳过意图识别")
+            if not intent_result:
+                intent_result = self._recognize_intent(user_input)
             # 意图识别为空的兜底逻辑
             if not intent_result:
                 print("意图识别为空，切换至默认自然沟通模式...")
@@ -238,78 +451,56 @@ class DSLManager:
             problem_type = params.get('问题', '')
             
             # 优先级 1: 明确的库存查询关键词 - 覆盖所有意图，包括错误的“价格查询”
-            if '库存' in user_input or '还剩' in user_input or '有货' in user_input or '存货' in user_input or problem_type == '库存':
+            if any(word in user_input for word in STOCK_KEYWORDS) or problem_type == '库存':
                  intent_result['intent'] = '库存查询'           
             # 优先级 2: 明确的价格查询关键词
-            elif '多少钱' in user_input or '价格' in user_input or '价位' in user_input or problem_type == '价格':
+            elif any(word in user_input for word in PRICE_KEYWORDS) or problem_type == '价格':
                  intent_result['intent'] = '价格查询'
             # 优先级 3: 通用商品查询的兜底逻辑
             elif raw_intent in ['商品查询', '查询']:
                  # 如果是通用查询，默认还是价格查询
                  intent_result['intent'] = '价格查询'
                  
+            # 复合查询（如“小米14多少钱，有货吗”）：并发执行多个意图的脚本并合并回复
+            intents = self._compound_intents(intent_result, user_input)
+            if len(intents) > 1:
+                return self._execute_compound(intents, intent_result, user_input, session_id)
+
             # 3. 选择合适的DSL脚本
             dsl_content = self.select_dsl_script(intent_result)
             
             if not dsl_content:
                 # ... (缺少DSL脚本的逻辑) ...
                 return "抱歉，系统暂时无法处理您的请求。"
-            
+            # 取得编译好的脚本（预编译脚本直接命中，不再重复解析）
+            compiled = self.registry.compile_source(dsl_content)
 
-            # 4. 提取参数
-            self.extract_parameters(intent_result)
-            # 品牌兜底提取：如果LLM没识别，从用户输入中提取
-            if '品牌' not in self.sym_tbl:
-                self._extract_brand_from_raw_input(user_input)
-            
-            # 品牌兜底提取：
-            if '品牌' not in self.sym_tbl:
-                self._extract_brand_from_raw_input(user_input)
-            
-            #  商品识别兜底：推导缺失的 scene 和 model (必须在归一化之前)
-            # 只有在 scene 缺失或型号缺失时才运行
-            if self.sym_tbl.get('scene') in ['无', None] or self.sym_tbl.get('型号') is None:
-                 self._identify_specific_product_fallback(user_input)
-
-            #  类别归一化：将 '零食'/'三只松鼠' 映射为 '食物'
-            raw_scene = self.sym_tbl.get('scene')
-            if raw_scene:
-                self.sym_tbl['scene'] = self._normalize_category(raw_scene)
-            
-            print(f"符号表参数: {self.sym_tbl}")
+            # 回复缓存：之后的流程只取决于意图结果、输入特征、脚本与目录版本
+            cache_key = None
+            if self.response_cache is not None and self._response_cacheable(intent_result.get('intent')):
+                cache_key = self._response_key(intent_result, user_input, compiled.version)
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    self.stats['response_cache_hits'] += 1
+                    final_reply, symbols = cached
+                    self.sym_tbl.clear()
+                    self.sym_tbl.update(symbols)
+                    self._save_session(session_id)
+                    return final_reply
+                self.stats['response_cache_misses'] += 1
 
+            # 4. 提取参数
+            self._build_symbols(intent_result, user_input)
 
-            # 5. 解析生成AST
-            ast = parser.parse(dsl_content, lexer=lexer)
-            
-            # 6. 执行AST
-            executor = ASTExecutor(self.sym_tbl)
-            result = executor.execute(ast)          
-            final_reply = result.get('reply', '抱歉，没有找到合适的结果')
+            # 5~6. 执行AST
+            final_reply = self._execute_script(compiled, self.sym_tbl)
 
-            # 7. 处理模板
-            intent = self.sym_tbl.get('intent')
-            
-            if intent == '价格查询':
-                final_reply = self._process_price_query(final_reply)
-            elif intent == '库存查询':
-                final_reply = self._process_stock_query(final_reply)
-            elif intent == '商品推荐':
-                 final_reply = self._process_recommendation(final_reply, intent_result)# 8. 通用占位符替换（针对非 SEARCH_TEMPLATE 的纯文本回复）
-         
-             # 解决像 "请提供更多需求...{category}" 这种在 ELSE 块中出现的占位符
-            if '{category}' in final_reply:
-                # 尝试获取LLM识别的类别
-                specific_category = self.sym_tbl.get('scene', '商品')
-                
-                # 尝试获取通用类别（如果存在 _get_general_category）
-                try:
-                    general_category = self._get_general_category(specific_category)
-                except AttributeError:
-                    general_category = specific_category
-                    
-                final_reply = final_reply.replace('{category}', general_category)
+            # 7~8. 处理模板
+            final_reply = self._fill_reply(final_reply, self.sym_tbl.get('intent'), intent_result)
 
+            if cache_key is not None:
+                self.response_cache.put(cache_key, (final_reply, tuple(self.sym_tbl.items())))
+            self._save_session(session_id)
             return final_reply
             
             
@@ -326,6 +517,224 @@ class DSLManager:
             
         return self._process_reply_template(raw_reply)
 
+    def _build_symbols(self, intent_result: Dict, user_input: str) -> None:
+        """由意图结果与原始输入填充符号表（含品牌、商品兜底与类别归一化）"""
+        self.extract_parameters(intent_result)
+        # 品牌兜底提取：如果LLM没识别，从用户输入中提取
+        if '品牌' not in self.sym_tbl:
+            self._extract_brand_from_raw_input(user_input)
+
+        #  商品识别兜底：推导缺失的 scene 和 model (必须在归一化之前)
+        # 只有在 scene 缺失或型号缺失时才运行
+        if self.sym_tbl.get('scene') in ['无', None] or self.sym_tbl.get('型号') is None:
+             self._identify_specific_product_fallback(user_input)
+
+        #  类别归一化：将 '零食'/'三只松鼠' 映射为 '食物'
+        raw_scene = self.sym_tbl.get('scene')
+        if raw_scene:
+            self.sym_tbl['scene'] = self._normalize_category(raw_scene)
+
+        print(f"符号表参数: {self.sym_tbl}")
+
+    def _execute_script(self, compiled, sym_tbl) -> str:
+        """执行编译好的脚本，返回 DSL 回复"""
+        # 符号表满足脚本的 ON_INTENT/SCENE 事实时使用优化后的AST
+        ast = compiled.ast_for(sym_tbl) if self.optimize_scripts else compiled.ast
+        if self.explainer is not None:
+            executor = ExplainExecutor(sym_tbl, self.explainer)
+        elif self.branch_profiler:
+            executor = ProfilingExecutor(sym_tbl, self.branch_profiler)
+        else:
+            executor = ASTExecutor(sym_tbl)
+        result = executor.execute(ast)
+        return result.get('reply', '抱歉，没有找到合适的结果')
+
+    def _fill_reply(self, final_reply: str, intent: Optional[str], intent_result: Dict,
+                    product: Any = UNSET) -> str:
+        """
+        处理回复模板（目录查询、模板填充与 {category} 占位符）
+        :param product: 已查到的查询商品；未给出时按符号表查询目录
+        """
+        if intent == '价格查询':
+            final_reply = self._process_price_query(final_reply, product)
+        elif intent == '库存查询':
+            final_reply = self._process_stock_query(final_reply, product)
+        elif intent == '商品推荐':
+             final_reply = self._process_recommendation(final_reply, intent_result)
+        # 通用占位符替换（针对非 SEARCH_TEMPLATE 的纯文本回复）
+        # 解决像 "请提供更多需求...{category}" 这种在 ELSE 块中出现的占位符
+        if '{category}' in final_reply:
+            # 尝试获取LLM识别的类别
+            specific_category = self.sym_tbl.get('scene', '商品')
+            
+            # 尝试获取通用类别（如果存在 _get_general_category）
+            try:
+                general_category = self._get_general_category(specific_category)
+            except AttributeError:
+                general_category = specific_category
+                
+            final_reply = final_reply.replace('{category}', general_category)
+        return final_reply
+
+    def _compound_intents(self, intent_result: Dict, user_input: str) -> List[str]:
+        """
+        复合查询涉及的意图（按在输入中出现的顺序）；识别器也可以直接给出 intents 列表
+        只有 COMPOUND_INTENTS 中的意图参与并发，问候、推荐等其余意图不拆分
+        """
+        intents = []
+        for intent in intent_result.get('intents') or []:
+            if intent in COMPOUND_INTENTS and intent not in intents:
+                intents.append(intent)
+        text = user_input.lower().replace(' ', '')
+        keyword_intents = self.intent_fast_path.match_keyword_intents(text) if self.intent_fast_path else []
+        for intent in keyword_intents:
+            if intent in COMPOUND_INTENTS and intent not in intents:
+                intents.append(intent)
+        return intents if len(intents) > 1 else []
+
+    def _execute_compound(self, intents: List[str], intent_result: Dict, user_input: str,
+                          session_id: Optional[str]) -> str:
+        """并发执行多个意图的脚本：共享同一份参数与一次目录查询，按意图顺序合并回复"""
+        self.stats['compound_queries'] += 1
+        print(f"复合查询，意图{intents}")
+        intent_result['intent'] = intents[0]
+        self._build_symbols(intent_result, user_input)
+        product = self._query_product() if any(i in ('价格查询', '库存查询') for i in intents) else None
+
+        jobs = []
+        for intent in intents:
+            dsl_content = self.select_dsl_script(dict(intent_result, intent=intent))
+            if not dsl_content:
+                continue
+            symbols = SymbolTable(self.sym_tbl)  # 每个脚本使用参数的副本，只有 intent 不同
+            symbols['intent'] = intent
+            jobs.append((intent, self.registry.compile_source(dsl_content), symbols))
+        if not jobs:
+            return "抱歉，系统暂时无法处理您的请求。"
+
+        def run(job):
+            intent, compiled, symbols = job
+            return self._fill_reply(self._execute_script(compiled, symbols), intent, intent_result, product)
+        replies = list(self.fanout_pool.map(run, jobs))
+        self._save_session(session_id)
+        return '\n'.join(replies)
+
+    @property
+    def fanout_pool(self) -> ThreadPoolExecutor:
+        """复合查询使用的线程池（首次使用时创建）"""
+        if self._fanout_pool is None:
+            self._fanout_pool = ThreadPoolExecutor(max_workers=len(COMPOUND_INTENTS) + 2,
+                                                   thread_name_prefix='dsl-fanout')
+        return self._fanout_pool
+
+    def _save_session(self, session_id: Optional[str]) -> None:
+        if session_id is not None:
+            self.sessions.save(session_id, self.sym_tbl.get('intent'), self.sym_tbl)
+
+    def _response_cacheable(self, intent: Optional[str]) -> bool:
+        """
+        库存会随时间变化时，依赖库存的回复（库存查询、过滤缺货的推荐）不缓存；
+        分支统计或逐节点统计开启时不读写缓存，每次请求都执行脚本，统计反映真实的流量分布
+        """
+        if self.branch_profiler or self.explainer is not None:
+            return False
+        if not self.inventory.volatile:
+            return True
+        return not (intent == '库存查询' or (intent == '商品推荐' and self.filter_out_of_stock))
+
+    def _response_key(self, intent_result: Dict, user_input: str, script_version: str) -> tuple:
+        """
+        回复缓存键：原始输入只通过关键词、品牌与型号匹配影响结果
+        品牌与型号取自当前目录版本的词表（同一输入只扫描一次），只用商品位置，不解码商品，命中时不做目录查询
+        """
+        lexicon, text = self.catalog_lexicon, compact(user_input)
+        features = (any(word in user_input for word in STOCK_KEYWORDS),
+                    any(word in user_input for word in PRICE_KEYWORDS),
+                    lexicon.unspaced_brand_position(text),
+                    lexicon.first_product(text))
+        return canonical_intent(intent_result), features, script_version, self.catalog_version
+
+    def _recognize_intent(self, user_input: str) -> Optional[Dict]:
+        """意图识别：先走本地规则预分类，置信度不足时再调用 LLM"""
+        if self.intent_fast_path:
+            local_result = self.intent_fast_path.classify(user_input)
+            if local_result and local_result['confidence'] >= self.intent_fast_path.threshold:
+                self.stats['fast_path_hits'] += 1
+                print(f"本地规则识别意图[{local_result['intent']}]（置信度 {local_result['confidence']}），跳过LLM调用")
+                return local_result
+
+        if self.intent_model:
+            model_result = self.intent_model.classify(user_input)
+            if model_result and model_result['confidence'] >= self.intent_model.threshold:
+                self.stats['model_hits'] += 1
+                print(f"本地模型识别意图[{model_result['intent']}]（置信度 {model_result['confidence']}），跳过LLM调用")
+                return model_result
+
+        if deadline_expired():
+            # 服务端请求已超过截止时间：不再调用 LLM，按意图识别为空处理
+            self.stats['deadline_skips'] += 1
+            print("请求已超过截止时间，跳过LLM调用")
+            return None
+
+        print("正在进行意图识别...")
+        self.stats['llm_calls'] += 1
+        intent_result = self.recognizer.recognize_intent(user_input)
+        if self.intent_log_path:
+            append_intent_log(self.intent_log_path, user_input, intent_result)
+        return intent_result
+
+    def reorder_branches(self, min_samples: int = 100) -> Dict[str, int]:
+        """
+        按分支统计前移热门分支（只交换可证明互斥的分支），返回 {脚本名: 移动的分支数}
+        同时丢弃已不在注册表当前快照中的 AST（热加载替换掉的旧版本）的统计
+        """
+        if not self.branch_profiler and self.explainer is None:
+            return {}
+        scripts = self.registry.scripts
+        report = {}
+        if self.branch_profiler:
+            for name, entry in scripts.items():
+                for ast in (entry.ast, entry.optimized.ast):
+                    profile = self.branch_profiler.profiles.get(ast.if_blocks)
+                    if not profile or profile.samples < min_samples:
+                        continue
+                    reordered, moved = reorder(ast, profile)
+                    if moved:
+                        entry.reordered[id(ast)] = reordered
+                        report[name] = report.get(name, 0) + moved
+        live = self._live_asts(scripts)
+        if self.branch_profiler:
+            self.branch_profiler.prune(live)
+            print(f"分支重排完成：{report}")
+        if self.explainer is not None:
+            self.explainer.prune(live)
+        return report
+
+    @staticmethod
+    def _live_asts(scripts) -> List:
+        """快照中各脚本可能执行的 AST：原始、优化后与重排后的版本"""
+        asts = []
+        for entry in scripts.values():
+            asts.append(entry.ast)
+            if entry.optimized is not None:
+                asts.append(entry.optimized.ast)
+            asts.extend(entry.reordered.values())
+        return asts
+
+    def explain(self, user_input: str, session_id: Optional[str] = None) -> Tuple[str, Explainer]:
+        """
+        执行一次请求并记录逐节点统计（不读写回复缓存，保证脚本真正执行）
+        :return: (回复, Explainer)，Explainer.trace() / listing() 输出 JSON 跟踪或带注释的脚本清单
+        """
+        explainer = Explainer()
+        saved = self.explainer, self.response_cache
+        self.explainer, self.response_cache = explainer, None
+        try:
+            reply = self.execute_dsl(user_input, session_id)
+        finally:
+            self.explainer, self.response_cache = saved
+        return reply, explainer
+
     def extract_parameters(self, intent_result: Dict) -> None:
         self.sym_tbl.clear()
         self.sym_tbl['scene'] = intent_result.get('category', '')
@@ -371,7 +780,7 @@ class DSLManager:
     def _get_general_category(self, specific_category: str) -> str:
         """从具体类别（如'耐克衣服'）中解析出通用类别（如'衣服'）"""
         # 假设产品目录中的 category 列表是所有通用类别的权威来源
-        all_categories = set(p['category'] for p in self.product_catalog)
+        all_categories = self._catalog_categories()
         
         for category in all_categories:
             if category in specific_category:
@@ -391,44 +800,44 @@ class DSLManager:
 
     def _extract_brand_from_raw_input(self, text: str) -> None:
         """从原始输入中提取品牌，作为符号表的兜底"""
-        all_brands = [p['brand'] for p in self.product_catalog] # 从产品目录中动态获取品牌
-        unique_brands = list(set(all_brands))
-        
-        cleaned_text = text.replace(' ', '').lower()
-        
-        for brand in unique_brands:
-            if brand.lower() in cleaned_text:
-                self.sym_tbl['品牌'] = brand
-                return
+        brand = self._find_brand_in_text(text)
+        if brand:
+            self.sym_tbl['品牌'] = brand
+
+    def _find_brand_in_text(self, text: str) -> Optional[str]:
+        """返回原始输入中出现的目录品牌（出现多个时取最长的）"""
+        return self.catalog_lexicon.unspaced_brand(compact(text))
             
     def _identify_specific_product_fallback(self, user_input: str) -> None:
         """
         [兜底逻辑] 通过匹配品牌/型号来推导正确的 scene 和 model。
         """
-        input_lower = user_input.lower().replace(' ', '')
-        
-        for p in self.product_catalog:
-            # 优先级 1: 检查用户输入是否包含产品型号 (如：'高中数学'、'小米14')
-            if p['model'].lower() in input_lower:
-                self.sym_tbl['scene'] = p['category']
-                self.sym_tbl['型号'] = p['model']
-                self.sym_tbl['品牌'] = p['brand']
-                return
-            
-            # 优先级 2: 检查用户输入是否包含品牌，且当前 scene 错误地设置为品牌名 (如：scene='三只松鼠')
-            # 只要识别出品牌，并且当前符号表中的 scene 与其不一致，我们就用产品的 category 覆盖 scene。
-            if p['brand'].lower() in input_lower:
-                 # 修正错误的 scene：用产品的 category 覆盖错误的 scene/品牌名
-                 if self.sym_tbl.get('scene') == self.sym_tbl.get('品牌'):
-                     self.sym_tbl['scene'] = p['category'] # 修正为 '食物'
-                     
-                 # 补充型号：如果用户没说型号，就用该品牌最热门的型号（第一个匹配到的）
-                 if '型号' not in self.sym_tbl:
-                      self.sym_tbl['型号'] = p['model'] # 补充为 '坚果礼盒'
-                 
-                 # 如果找到了品牌，就可以停止了，让后续逻辑处理
-                 return
-            
+        match = self._match_product(user_input)
+        if match is None:
+            return
+        index, by_model = match
+        p = self.product_catalog[index]
+        # 优先级 1: 检查用户输入是否包含产品型号 (如：'高中数学'、'小米14')
+        if by_model:
+            self.sym_tbl['scene'] = p['category']
+            self.sym_tbl['型号'] = p['model']
+            self.sym_tbl['品牌'] = p['brand']
+            return
+
+        # 优先级 2: 检查用户输入是否包含品牌，且当前 scene 错误地设置为品牌名 (如：scene='三只松鼠')
+        # 只要识别出品牌，并且当前符号表中的 scene 与其不一致，我们就用产品的 category 覆盖 scene。
+        # 修正错误的 scene：用产品的 category 覆盖错误的 scene/品牌名
+        if self.sym_tbl.get('scene') == self.sym_tbl.get('品牌'):
+            self.sym_tbl['scene'] = p['category'] # 修正为 '食物'
+
+        # 补充型号：如果用户没说型号，就用该品牌最热门的型号（第一个匹配到的）
+        if '型号' not in self.sym_tbl:
+            self.sym_tbl['型号'] = p['model'] # 补充为 '坚果礼盒'
+
+    def _match_product(self, user_input: str) -> Optional[Tuple[int, bool]]:
+        """按目录顺序找到第一个型号或品牌出现在输入中的商品，返回 (下标, 是否按型号匹配)"""
+        return self.catalog_lexicon.first_product(compact(user_input))
+
     def _normalize_category(self, raw_category: str) -> str:
         """
         将LLM识别的原始类别名称映射到产品目录中的通用类别。
@@ -463,7 +872,7 @@ class DSLManager:
         }
         
         # 如果 raw_category 是目录中已有的，直接返回
-        all_catalog_categories = set(p['category'] for p in self.product_catalog)
+        all_catalog_categories = self._catalog_categories()
         if raw_category in all_catalog_categories:
             return raw_category
             
@@ -1,16 +1,56 @@
 #!/usr/bin/env python3
+import argparse
 import sys
 import io
 from DSLManager import DSLManager
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="智能商品推荐系统")
+    parser.add_argument('--serve', action='store_true', help="以 HTTP/JSON 服务方式运行（默认为命令行交互）")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=4, help="每个进程的工作线程数（每个线程一个 DSLManager）")
+    parser.add_argument('--processes', type=int, default=1, help="工作进程数；大于 1 时目录放进共享内存，各进程共享（会话只在各自进程内有效）")
+    parser.add_argument('--queue', type=int, default=64, help="排队上限，超过后返回 429")
+    parser.add_argument('--timeout', type=float, default=10.0, help="请求截止时间（秒）")
+    parser.add_argument('--record', metavar='FILE', help="把 LLM 意图识别的输入、输出与耗时追加写入录制文件")
+    parser.add_argument('--replay', metavar='FILE', help="回放录制文件中的意图识别结果，不调用 LLM")
+    return parser.parse_args()
+
+def make_recognizer(args):
+    """按命令行参数创建各 DSLManager 共用的意图识别器；None 表示由 DSLManager 按需创建 QWENAPI"""
+    if args.replay:
+        from src.recording import ReplayRecognizer
+        return ReplayRecognizer(args.replay)
+    if args.record:
+        from src.qwen_api import QWENAPI
+        from src.recording import RecordingRecognizer
+        return RecordingRecognizer(QWENAPI(), args.record)
+    return None
+
 def main():
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    args = parse_args()
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', line_buffering=True)
+    recognizer = make_recognizer(args)
+    if args.serve:
+        from src.server import serve, serve_prefork
+        options = dict(concurrency=args.workers, max_queue=args.queue, timeout=args.timeout,
+                       host=args.host, port=args.port)
+        if args.processes > 1:
+            catalog = DSLManager().product_catalog
+            serve_prefork(lambda shared, registry=None: DSLManager(recognizer=recognizer, product_catalog=shared,
+                                                                   registry=registry),
+                          catalog, args.processes, **options)
+        else:
+            serve(lambda registry=None: DSLManager(recognizer=recognizer, registry=registry), **options)
+        return
+
     print("===== 智能商品推荐系统 =====")
     print("支持：商品推荐、价格查询、库存查询、自然沟通")
     print("输入'退出'结束程序")
     print("=" * 40)
     
-    dsl_manager = DSLManager()
+    dsl_manager = DSLManager(recognizer=recognizer)
     
     while True:
         user_input = input("\n请输入您的需求: ").strip()
@@ -22,8 +62,8 @@ def main():
         if not user_input:
             continue
             
-        # 执行DSL处理流程
-        result = dsl_manager.execute_dsl(user_input)
+        # 执行DSL处理流程（同一个会话，追问可沿用上一轮的商品与预算）
+        result = dsl_manager.execute_dsl(user_input, session_id="cli")
         print(f"\n【系统回复】: {result}")
 
 if __name__ == "__main__":
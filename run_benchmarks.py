@@ -0,0 +1,38 @@
+import os
+import sys
+from src.bench import bench_parser, bench_scaling, bench_artifacts, bench_startup, bench_memory, bench_symbols, bench_reorder, bench_set_ops, bench_decision_table, bench_batch_eval, bench_response_cache, bench_inventory, bench_fuzzy_index, bench_shared_catalog, bench_shared_requests
+
+# 基准测试套件：每个模块的 run() 打印结果，并返回是否满足预算要求
+BENCHMARKS = [
+    ('解析器', bench_parser),
+    ('大脚本扩展性', bench_scaling),
+    ('冷启动编译产物', bench_artifacts),
+    ('启动耗时', bench_startup),
+    ('AST 内存占用', bench_memory),
+    ('槽位化符号表', bench_symbols),
+    ('分支重排', bench_reorder),
+    ('IN / BETWEEN 运算符', bench_set_ops),
+    ('决策表', bench_decision_table),
+    ('批量求值', bench_batch_eval),
+    ('回复缓存', bench_response_cache),
+    ('库存缓存', bench_inventory),
+    ('型号近似匹配', bench_fuzzy_index),
+    ('多进程共享目录', bench_shared_catalog),
+    ('共享目录请求耗时', bench_shared_requests),
+]
+
+if __name__ == "__main__":
+    print("===================== 开始执行性能基准测试 ===================")
+    selected = set(sys.argv[1:])
+    failed = []
+    for name, module in BENCHMARKS:
+        if selected and module.__name__.rsplit('.', 1)[-1] not in selected:
+            continue
+        if not module.run():
+            failed.append(name)
+
+    if failed:
+        print(f"\n====================== 未达到预算: {', '.join(failed)} ========================")
+        os._exit(1)
+    print("\n====================== 所有基准测试达标！========================")
+    os._exit(0)
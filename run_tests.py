@@ -2,9 +2,34 @@ import os
 import unittest
 import json
 from src.test.test_driver import TestDSLManagerDriver, TestASTExecutorDriver
+from src.test.test_intent_rules import TestRuleIntentClassifier
+from src.test.test_intent_model import TestDistilledIntentClassifier
+from src.test.test_model_router import TestModelRouter
+from src.test.test_dsl_registry import TestDSLRegistry, TestDSLHotReload
+from src.test.test_rd_parser import TestRDParser
+from src.test.test_large_scripts import TestLargeScripts
+from src.test.test_artifacts import TestArtifacts
+from src.test.test_startup import TestLazyStartup
+from src.test.test_ast_nodes import TestCompactAST
+from src.test.test_symbols import TestSymbolTable
+from src.test.test_optimizer import TestOptimizer
+from src.test.test_profiling import TestBranchReordering
+from src.test.test_set_ops import TestSetRangeOperators
+from src.test.test_decision_table import TestDecisionTable
+from src.test.test_batch_eval import TestBatchEvaluation
+from src.test.test_response_cache import TestResponseCache
+from src.test.test_session import TestSessions
+from src.test.test_compound import TestCompoundIntents
+from src.test.test_inventory import TestInventory
+from src.test.test_fuzzy_index import TestFuzzyIndex
+from src.test.test_server import TestServer
+from src.test.test_shared_catalog import TestSharedCatalog
+from src.test.test_explain import TestExplain
+from src.test.test_recording import TestRecording
 from DSLManager import DSLManager
 from src.test.stubs.qwen_stub import QWENAPIStub
 from src.test.stubs.dsl_stub import load_mock_dsl
+from src.recording import offline_recognizer
 
 def load_test_data(file_path: str) -> dict:
     """加载测试数据文件"""
@@ -18,6 +43,31 @@ def run_unit_tests():
     # 添加测试用例（现代写法，兼容所有Python 3版本）
     test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestDSLManagerDriver))
     test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestASTExecutorDriver))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestRuleIntentClassifier))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestDistilledIntentClassifier))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestModelRouter))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestDSLRegistry))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestDSLHotReload))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestRDParser))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestLargeScripts))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestArtifacts))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestLazyStartup))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestCompactAST))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestSymbolTable))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestOptimizer))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestBranchReordering))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestSetRangeOperators))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestDecisionTable))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestBatchEvaluation))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestResponseCache))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestSessions))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestCompoundIntents))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestInventory))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestFuzzyIndex))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestServer))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestSharedCatalog))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestExplain))
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestRecording))
     # 执行测试
     runner = unittest.TextTestRunner(verbosity=2)
     result = runner.run(test_suite)
@@ -27,8 +77,8 @@ def run_unit_tests():
 def run_data_driven_tests():
     """执行数据驱动的测试（基于测试数据文件）"""
     intent_test_data = load_test_data("src/test/data/intent_test_data.json")
-    dsl_manager = DSLManager()
-    dsl_manager.recognizer = QWENAPIStub()
+    # DSL_REPLAY=录制文件 时回放录制的真实意图识别结果，录制中没有的输入仍由测试桩识别
+    dsl_manager = DSLManager(recognizer=offline_recognizer(QWENAPIStub()))
     dsl_manager.load_dsl_script = load_mock_dsl
 
     passed = 0
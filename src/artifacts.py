@@ -0,0 +1,216 @@
+"""
+DSL 脚本编译产物（.dslc）：预先编译好的 AST，启动时一次读取即可还原，无需重新词法/语法分析
+
+文件格式（小端）：
+    magic      4 字节  b'DSLC'
+    header     struct '<HHH32sII'：格式版本、编译器版本、marshal 版本、源码 SHA-256、负载长度、负载 CRC32
+    payload    marshal 序列化的扁平元组（条件表达式为后缀序列，任意深度都不会触发 marshal 的嵌套限制）
+
+预编译命令：
+    python -m src.artifacts build [脚本目录] [--cache-dir 目录] [--backend ply|rd]
+"""
+import argparse
+import hashlib
+import marshal
+import os
+import struct
+import sys
+import zlib
+from typing import Callable, List, Optional, Tuple
+
+from .ast_nodes import *
+from .compiler import compile_script
+
+MAGIC = b'DSLC'
+FORMAT_VERSION = 1
+# AST 结构或编译器语义变化时递增，旧产物会被自动判定为过期并重建
+COMPILER_VERSION = 3
+HEADER = struct.Struct('<HHH32sII')
+ARTIFACT_SUFFIX = '.dslc'
+DEFAULT_CACHE_DIRNAME = '__dslcache__'
+
+
+class ArtifactError(Exception):
+    """产物不可用：kind 为 stale（版本或源码已变化）或 corrupt（文件损坏）"""
+    def __init__(self, message: str, kind: str = 'corrupt'):
+        super().__init__(message)
+        self.kind = kind
+
+
+def source_digest(source: str) -> bytes:
+    return hashlib.sha256(source.encode('utf-8')).digest()
+
+
+def encode_condition(node: ASTNode) -> List[tuple]:
+    """将条件表达式编码为后缀序列"""
+    code, stack = [], [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, BinaryOpNode):
+            stack.append(('B', item.op))
+            stack.append(item.right)
+            stack.append(item.left)
+        elif isinstance(item, tuple):
+            code.append(item)
+        elif isinstance(item, CompareNode):
+            code.append(('C', item.ident, item.op, item.value))
+        elif isinstance(item, ExistsNode):
+            code.append(('E', item.ident))
+        elif isinstance(item, InNode):
+            code.append(('I', item.ident, item.items))
+        elif isinstance(item, BetweenNode):
+            code.append(('R', item.ident, item.low, item.high))
+        else:
+            raise ValueError(f"未知节点类型: {type(item)}")
+    return code
+
+
+def decode_condition(code: List[tuple]) -> ASTNode:
+    values = []
+    for item in code:
+        kind = item[0]
+        if kind == 'C':
+            values.append(CompareNode(item[1], item[2], item[3]))
+        elif kind == 'E':
+            values.append(ExistsNode(item[1]))
+        elif kind == 'I':
+            values.append(InNode(item[1], item[2]))
+        elif kind == 'R':
+            values.append(BetweenNode(item[1], item[2], item[3]))
+        elif kind == 'B':
+            right = values.pop()
+            left = values.pop()
+            values.append(BinaryOpNode(left, item[1], right))
+        else:
+            raise ArtifactError(f"未知的指令: {kind}")
+    if len(values) != 1:
+        raise ArtifactError("条件表达式编码不完整")
+    return values[0]
+
+
+def encode_script(ast: ScriptNode) -> tuple:
+    blocks = ast.if_blocks
+    return (
+        ast.scene.name,
+        ast.intent.name,
+        (encode_condition(blocks.if_block.condition), blocks.if_block.reply),
+        [(encode_condition(b.condition), b.reply) for b in blocks.else_if_blocks],
+        blocks.else_block.reply if blocks.else_block else None,
+    )
+
+
+def decode_script(data: tuple) -> ScriptNode:
+    scene, intent, (if_code, if_reply), else_ifs, else_reply = data
+    return ScriptNode(
+        SceneNode(scene),
+        IntentNode(intent),
+        IfBlocksNode(
+            IfBlockNode(decode_condition(if_code), if_reply),
+            [ElseIfBlockNode(decode_condition(code), reply) for code, reply in else_ifs],
+            ElseBlockNode(else_reply) if else_reply is not None else None,
+        ),
+    )
+
+
+def dumps(ast: ScriptNode, source: str) -> bytes:
+    payload = marshal.dumps(encode_script(ast))
+    header = HEADER.pack(FORMAT_VERSION, COMPILER_VERSION, marshal.version,
+                         source_digest(source), len(payload), zlib.crc32(payload))
+    return MAGIC + header + payload
+
+
+def loads(data: bytes, source: str) -> ScriptNode:
+    """从产物字节还原 AST，格式/版本/源码哈希/校验和任一不符即抛出 ArtifactError"""
+    if data[:4] != MAGIC:
+        raise ArtifactError("文件头不匹配")
+    try:
+        fmt, compiler, marshal_version, digest, length, crc = HEADER.unpack_from(data, 4)
+    except struct.error as e:
+        raise ArtifactError(f"文件头损坏: {e}") from e
+    if (fmt, compiler, marshal_version) != (FORMAT_VERSION, COMPILER_VERSION, marshal.version):
+        raise ArtifactError(f"版本不匹配: format={fmt} compiler={compiler}", 'stale')
+    if digest != source_digest(source):
+        raise ArtifactError("源码已变化", 'stale')
+    payload = data[4 + HEADER.size:]
+    if len(payload) != length or zlib.crc32(payload) != crc:
+        raise ArtifactError("负载损坏")
+    try:
+        return decode_script(marshal.loads(payload))
+    except (ValueError, EOFError, TypeError, IndexError) as e:
+        raise ArtifactError(f"负载解码失败: {e}") from e
+
+
+def artifact_path(cache_dir: str, script_name: str) -> str:
+    return os.path.join(cache_dir, script_name + ARTIFACT_SUFFIX)
+
+
+def write_artifact(path: str, ast: ScriptNode, source: str) -> None:
+    """原子写入：先写临时文件再替换，读者不会看到写了一半的产物"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(dumps(ast, source))
+    os.replace(tmp_path, path)
+
+
+def load_or_compile(script_name: str, source: str, cache_dir: str,
+                    compile_fn: Callable[[str], ScriptNode] = compile_script) -> Tuple[ScriptNode, str]:
+    """
+    优先加载编译产物，缺失/过期/损坏时重新编译并写回
+    :return: (AST, 状态)，状态为 hit / missing / stale / corrupt 之一
+    """
+    path = artifact_path(cache_dir, script_name)
+    try:
+        with open(path, 'rb') as f:
+            return loads(f.read(), source), 'hit'
+    except FileNotFoundError:
+        status = 'missing'
+    except ArtifactError as e:
+        status = e.kind
+
+    ast = compile_fn(source)
+    try:
+        write_artifact(path, ast, source)
+    except OSError as e:
+        # 产物目录不可写时仍可正常使用编译结果
+        print(f"写入编译产物失败 {path}: {e}")
+    return ast, status
+
+
+def build_directory(dsl_directory: str, cache_dir: Optional[str] = None,
+                    backend: Optional[str] = None) -> dict:
+    """预编译目录下的全部脚本并写出产物"""
+    cache_dir = cache_dir or os.path.join(dsl_directory, DEFAULT_CACHE_DIRNAME)
+    built, failed = [], {}
+    for name in sorted(os.listdir(dsl_directory)):
+        if not name.endswith('.dsl'):
+            continue
+        with open(os.path.join(dsl_directory, name), 'r', encoding='utf-8') as f:
+            source = f.read()
+        try:
+            write_artifact(artifact_path(cache_dir, name), compile_script(source, backend), source)
+        except SyntaxError as e:
+            failed[name] = str(e)
+            continue
+        built.append(name)
+    return {'cache_dir': cache_dir, 'built': built, 'failed': failed}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(description="DSL 脚本预编译")
+    sub = arg_parser.add_subparsers(dest='command', required=True)
+    build_cmd = sub.add_parser('build', help='编译目录下全部脚本并写出 .dslc 产物')
+    build_cmd.add_argument('directory', nargs='?', default='src/dsl')
+    build_cmd.add_argument('--cache-dir', default=None)
+    build_cmd.add_argument('--backend', default=None, choices=['ply', 'rd'])
+    args = arg_parser.parse_args(argv)
+
+    report = build_directory(args.directory, args.cache_dir, args.backend)
+    print(f"已写出 {len(report['built'])} 个编译产物到 {report['cache_dir']}")
+    for name, error in report['failed'].items():
+        print(f"编译失败 {name}: {error}")
+    return 1 if report['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
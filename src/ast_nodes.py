@@ -1,32 +1,71 @@
+import operator
+import sys
 from typing import List, Optional, Union
 
+from .symbols import LAYOUT
+
+# ON_INTENT 支持的意图
+VALID_INTENTS = ['自然沟通','商品推荐', '价格查询', '功能对比', '库存查询']
+
+# 比较运算符 -> 比较函数（未知运算符恒为 False）
+COMPARE_OPS = {
+    '<=': operator.le,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '>': operator.gt,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+
+def _never(left, right) -> bool:
+    return False
+
+
+def number_literal(text: str) -> Union[int, float]:
+    """NUMBER 字面量保持精确类型：不含小数点为 int，否则为 float"""
+    return float(text) if '.' in text else int(text)
+
+
 class ASTNode:
-    """AST节点基类"""
-    pass
+    """AST节点基类（各节点使用 __slots__，不创建实例 __dict__）"""
+    __slots__ = ()
 
 class SceneNode(ASTNode):
+    __slots__ = ('name',)
+
     def __init__(self, name: str):
-        self.name = name
+        self.name = sys.intern(name)
 
 class IntentNode(ASTNode):
+    __slots__ = ('name',)
+
     def __init__(self, name: str):
-        self.name = name
+        self.name = sys.intern(name)
 
 class IfBlockNode(ASTNode):
+    __slots__ = ('condition', 'reply')
+
     def __init__(self, condition: ASTNode, reply: str):
         self.condition = condition
         self.reply = reply
 
 class ElseIfBlockNode(ASTNode):
+    __slots__ = ('condition', 'reply')
+
     def __init__(self, condition: ASTNode, reply: str):
         self.condition = condition
         self.reply = reply
 
 class ElseBlockNode(ASTNode):
+    __slots__ = ('reply',)
+
     def __init__(self, reply: str):
         self.reply = reply
 
 class IfBlocksNode(ASTNode):
+    __slots__ = ('if_block', 'else_if_blocks', 'else_block')
+
     def __init__(self, if_block: IfBlockNode, 
                  else_if_blocks: List[ElseIfBlockNode] = None,
                  else_block: Optional[ElseBlockNode] = None):
@@ -35,23 +74,166 @@ class IfBlocksNode(ASTNode):
         self.else_block = else_block
 
 class BinaryOpNode(ASTNode):
+    __slots__ = ('left', 'op', 'right')
+
     def __init__(self, left: ASTNode, op: str, right: ASTNode):
         self.left = left
-        self.op = op
+        self.op = sys.intern(op)
         self.right = right
 
 class CompareNode(ASTNode):
+    """比较节点：op 在构造时即解析为比较函数 fn，ident 分配符号表槽位 slot"""
+    __slots__ = ('ident', 'slot', '_op', 'fn', 'value')
+
     def __init__(self, ident: str, op: str, value: Union[str, int, float]):
-        self.ident = ident
+        self.ident = sys.intern(ident)
+        self.slot = LAYOUT.slot(self.ident)
         self.op = op
         self.value = value
 
+    @property
+    def op(self) -> str:
+        return self._op
+
+    @op.setter
+    def op(self, op: str) -> None:
+        self._op = sys.intern(op)
+        self.fn = COMPARE_OPS.get(op, _never)
+
 class ExistsNode(ASTNode):
+    __slots__ = ('ident', 'slot')
+
     def __init__(self, ident: str):
-        self.ident = ident
+        self.ident = sys.intern(ident)
+        self.slot = LAYOUT.slot(self.ident)
+
+class InNode(ASTNode):
+    """集合成员判断：ident IN (v1, v2, ...)，items 保留书写顺序，values 为查找用的 frozenset"""
+    __slots__ = ('ident', 'slot', 'items', 'values')
+
+    def __init__(self, ident: str, items):
+        self.ident = sys.intern(ident)
+        self.slot = LAYOUT.slot(self.ident)
+        self.items = tuple(items)
+        self.values = frozenset(self.items)
+
+class BetweenNode(ASTNode):
+    """区间判断：ident BETWEEN low AND high（闭区间），求值为一次链式比较"""
+    __slots__ = ('ident', 'slot', 'low', 'high')
+
+    def __init__(self, ident: str, low: Union[str, int, float], high: Union[str, int, float]):
+        self.ident = sys.intern(ident)
+        self.slot = LAYOUT.slot(self.ident)
+        self.low = low
+        self.high = high
+
+class ConstNode(ASTNode):
+    """常量条件（由优化器折叠得到）"""
+    __slots__ = ('value',)
+
+    def __init__(self, value: bool):
+        self.value = value
+
+class SharedNode(ASTNode):
+    """公共子表达式：同一请求内只求值一次，结果按 index 缓存（由优化器生成）"""
+    __slots__ = ('index', 'node')
+
+    def __init__(self, index: int, node: ASTNode):
+        self.index = index
+        self.node = node
+
+class GuardedIfBlocksNode(ASTNode):
+    """
+    按分支命中率重排后的 IF 链（由 profiling.reorder 生成）
+    guards 中的排序比较与 IN 判断取值类型都匹配（不会抛出异常）时执行 reordered，否则按原顺序执行 original
+    """
+    __slots__ = ('original', 'reordered', 'guards')
+
+    def __init__(self, original: IfBlocksNode, reordered: IfBlocksNode, guards: tuple):
+        self.original = original
+        self.reordered = reordered
+        self.guards = guards  # ((标识符, 槽位, 允许的取值类型), ...)
+
+class DecisionTableNode(ASTNode):
+    """
+    编译为决策表的 IF 链（由 decision_table.tabulate 生成）
+    按等值键取值哈希定位分桶，再按区间标识符的取值二分查找命中的回复；取值类型不适合查表时执行 original
+    """
+    __slots__ = ('original', 'keys', 'range_key', 'buckets', 'else_reply')
+
+    def __init__(self, original: IfBlocksNode, keys: tuple, range_key: Optional[tuple],
+                 buckets: dict, else_reply: Optional[str]):
+        self.original = original
+        self.keys = keys            # ((标识符, 槽位), ...)
+        self.range_key = range_key  # (标识符, 槽位)，没有区间条件时为 None
+        self.buckets = buckets      # 键取值元组 -> (端点, 各区间段的回复, 区间标识符缺失时的回复)
+        self.else_reply = else_reply
 
 class ScriptNode(ASTNode):
+    __slots__ = ('scene', 'intent', 'if_blocks')
+
     def __init__(self, scene: SceneNode, intent: IntentNode, if_blocks: IfBlocksNode):
         self.scene = scene
         self.intent = intent
-        self.if_blocks = if_blocks
\ No newline at end of file
+        self.if_blocks = if_blocks
+
+def dump(node) -> tuple:
+    """将AST转换为嵌套元组（用于比较两棵树是否结构相同；迭代实现，支持超深表达式）"""
+    if isinstance(node, ScriptNode):
+        return ('Script', node.scene.name, node.intent.name, dump(node.if_blocks))
+    if isinstance(node, GuardedIfBlocksNode):
+        return ('Guarded', dump(node.original), dump(node.reordered))
+    if isinstance(node, DecisionTableNode):
+        return ('Table', tuple(ident for ident, _ in node.keys), dump(node.original))
+    if isinstance(node, IfBlocksNode):
+        return ('IfBlocks',
+                (dump(node.if_block.condition), node.if_block.reply),
+                tuple((dump(b.condition), b.reply) for b in node.else_if_blocks),
+                node.else_block.reply if node.else_block else None)
+
+    # 表达式：后序遍历，显式栈代替递归
+    stack, values = [node], []
+    while stack:
+        item = stack.pop()
+        if isinstance(item, BinaryOpNode):
+            stack.append((item.op,))
+            stack.append(item.right)
+            stack.append(item.left)
+        elif isinstance(item, tuple):
+            right = values.pop()
+            left = values.pop()
+            values.append(('BinaryOp', left, item[0], right))
+        elif isinstance(item, CompareNode):
+            values.append(('Compare', item.ident, item.op, type(item.value).__name__, item.value))
+        elif isinstance(item, ExistsNode):
+            values.append(('Exists', item.ident))
+        elif isinstance(item, InNode):
+            values.append(('In', item.ident, tuple((type(v).__name__, v) for v in item.items)))
+        elif isinstance(item, BetweenNode):
+            values.append(('Between', item.ident, type(item.low).__name__, item.low,
+                           type(item.high).__name__, item.high))
+        elif isinstance(item, ConstNode):
+            values.append(('Const', item.value))
+        elif isinstance(item, SharedNode):
+            stack.append(item.node)
+        else:
+            raise ValueError(f"未知节点类型: {type(item)}")
+    return values[0]
+
+
+def iter_nodes(root: ASTNode):
+    """遍历 root 下的全部节点（含优化器生成的节点；共用的子树只产出一次）"""
+    seen, stack = set(), [root]
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        yield node
+        for cls in type(node).__mro__:
+            for name in getattr(cls, '__slots__', ()):
+                value = getattr(node, name, None)
+                if isinstance(value, ASTNode):
+                    stack.append(value)
+                elif isinstance(value, list):
+                    stack.extend(item for item in value if isinstance(item, ASTNode))
@@ -0,0 +1,265 @@
+"""
+批量求值：一次把脚本应用到大量符号表上（离线影响分析，如“新脚本会怎样回复上周的请求”）
+
+    Columns       列式符号表：每个标识符一列取值，附带缺失掩码
+    evaluate      每个条件节点按整列做 NumPy 数组运算，返回每行命中的分支下标与回复
+
+结果与逐行执行 ASTExecutor 完全一致：
+    缺失（None）的取值使比较、IN、BETWEEN 为假；空字符串视为不存在；
+    AND / OR 两侧都会求值；排序比较遇到类型不匹配时该行记为异常（逐行执行会抛出 TypeError），
+    与先命中先返回的顺序一致：前面的分支已命中的行不受后面分支的异常影响。
+数值、字符串以外的取值（极少出现）逐行交给 ASTExecutor 求值。
+
+依赖 NumPy，只在离线分析时导入：
+    python -m src.batch_eval 脚本.dsl 请求记录.jsonl
+"""
+import json
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .ast_nodes import *
+from .executor import ASTExecutor
+
+NUMPY_COMPARE = {
+    '<=': np.less_equal,
+    '>=': np.greater_equal,
+    '<': np.less,
+    '>': np.greater,
+    '==': np.equal,
+    '!=': np.not_equal,
+}
+ORDERING_OPS = frozenset(('<', '<=', '>', '>='))
+
+# 求值结果：(条件为真的行, 抛出异常的行)
+Mask = Tuple[np.ndarray, np.ndarray]
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class Column:
+    """一个标识符的取值：按类型拆分为数值部分与字符串部分，其他类型的行单独记录"""
+    __slots__ = ('present', 'is_num', 'num', 'is_str', 'text', 'others')
+
+    def __init__(self, values, missing: Optional[np.ndarray] = None):
+        values = np.asarray(values)
+        rows = len(values)
+        present = np.ones(rows, bool) if missing is None else ~np.asarray(missing, bool)
+        self.others: Dict[int, object] = {}  # 行号 -> 取值（数值、字符串以外的类型）
+        if values.dtype.kind in 'biuf':
+            self.is_num, self.num = present.copy(), values.astype(np.float64)
+            self.is_str, self.text = np.zeros(rows, bool), np.full(rows, '')
+        elif values.dtype.kind in 'US':
+            self.is_num, self.num = np.zeros(rows, bool), np.zeros(rows)
+            self.is_str, self.text = present.copy(), values.astype(str)
+        else:
+            # object 列逐个分类：None 视为缺失
+            self.is_num, self.num = np.zeros(rows, bool), np.zeros(rows)
+            self.is_str, text = np.zeros(rows, bool), [''] * rows
+            for row, value in enumerate(values):
+                if value is None or not present[row]:
+                    present[row] = False
+                elif isinstance(value, str):
+                    self.is_str[row], text[row] = True, value
+                elif isinstance(value, (int, float)):
+                    self.is_num[row], self.num[row] = True, value
+                else:
+                    self.others[row] = value
+            self.text = np.array(text, dtype=str)
+        self.present = present
+
+    @classmethod
+    def missing(cls, rows: int) -> 'Column':
+        return cls(np.zeros(rows), np.ones(rows, bool))
+
+
+class Columns:
+    """列式符号表：标识符 -> Column，所有列行数相同"""
+    def __init__(self, columns: Dict[str, object], rows: Optional[int] = None):
+        """
+        :param columns: 标识符 -> 取值数组，或 (取值数组, 缺失掩码)
+        """
+        self.columns: Dict[str, Column] = {}
+        for ident, data in columns.items():
+            values, missing = data if isinstance(data, tuple) else (data, None)
+            self.columns[ident] = Column(values, missing)
+        sizes = {len(column.present) for column in self.columns.values()}
+        if rows is not None:
+            sizes.add(rows)
+        if len(sizes) > 1:
+            raise ValueError(f"各列行数不一致: {sorted(sizes)}")
+        self.rows = sizes.pop() if sizes else 0
+
+    @classmethod
+    def from_records(cls, records: List[Dict]) -> 'Columns':
+        """由逐行的符号表构造（缺失的键与 None 均视为缺失）"""
+        idents = sorted({ident for record in records for ident in record})
+        columns = {}
+        for ident in idents:
+            values = np.empty(len(records), dtype=object)
+            values[:] = [record.get(ident) for record in records]
+            columns[ident] = values
+        return cls(columns, len(records))
+
+    def column(self, ident: str) -> Column:
+        column = self.columns.get(ident)
+        if column is None:
+            column = self.columns[ident] = Column.missing(self.rows)
+        return column
+
+
+class BatchResult:
+    """
+    批量求值结果（每行一个元素）
+        branches  命中的分支下标：0 为 IF，其后依次为 ELSE IF，len(分支) 为 ELSE，-1 为没有回复或异常
+        replies   回复文本（没有回复或异常时为 None）
+        errors    逐行执行会抛出 TypeError 的行
+    """
+    def __init__(self, branches: np.ndarray, replies: np.ndarray, errors: np.ndarray):
+        self.branches = branches
+        self.replies = replies
+        self.errors = errors
+
+    def counts(self) -> Dict[int, int]:
+        """各分支命中的行数"""
+        indexes, counts = np.unique(self.branches, return_counts=True)
+        return dict(zip(indexes.tolist(), counts.tolist()))
+
+
+class _BatchEvaluator:
+    def __init__(self, columns: Columns):
+        self.columns = columns
+        self.rows = columns.rows
+        self.memo: Dict[int, Mask] = {}  # SharedNode 的求值结果
+
+    def compare(self, column: Column, op: str, literal) -> Mask:
+        value = np.zeros(self.rows, bool)
+        error = np.zeros(self.rows, bool)
+        fn = NUMPY_COMPARE.get(op)
+        if fn is None:
+            return value, error
+        if _is_number(literal):
+            same, data, other = column.is_num, column.num, column.is_str
+        else:
+            same, data, other = column.is_str, column.text, column.is_num
+        value[same] = fn(data[same], literal)
+        if op in ORDERING_OPS:
+            error |= other  # 数值与字符串做排序比较
+        elif op == '!=':
+            value |= other
+        return value, error
+
+    def leaf(self, node: ASTNode) -> Mask:
+        column = self.columns.column(node.ident)
+        if isinstance(node, CompareNode):
+            value, error = self.compare(column, node.op, node.value)
+        elif isinstance(node, ExistsNode):
+            value = column.present & ~(column.is_str & (column.text == ''))
+            error = np.zeros(self.rows, bool)
+        elif isinstance(node, InNode):
+            numbers = [item for item in node.values if _is_number(item)]
+            texts = [item for item in node.values if isinstance(item, str)]
+            value = np.zeros(self.rows, bool)
+            value[column.is_num] = np.isin(column.num[column.is_num], numbers)
+            value[column.is_str] = np.isin(column.text[column.is_str], texts)
+            error = np.zeros(self.rows, bool)
+        elif isinstance(node, BetweenNode):
+            # low <= v <= high：第一次比较为假时不再做第二次比较
+            low, low_error = self.compare(column, '>=', node.low)
+            high, high_error = self.compare(column, '<=', node.high)
+            value, error = low & high, low_error | (low & high_error)
+        else:
+            raise ValueError(f"未知节点类型: {type(node)}")
+        for row, item in column.others.items():
+            try:
+                value[row] = ASTExecutor({node.ident: item}).execute(node)
+            except TypeError:
+                value[row], error[row] = False, True
+        return value, error
+
+    def condition(self, root: ASTNode) -> Mask:
+        """后序遍历求值条件表达式（显式栈，支持超深表达式）"""
+        stack, results = [(root, False)], []
+        while stack:
+            node, visited = stack.pop()
+            if isinstance(node, BinaryOpNode):
+                if not visited:
+                    stack.append((node, True))
+                    stack.append((node.right, False))
+                    stack.append((node.left, False))
+                    continue
+                right_value, right_error = results.pop()
+                left_value, left_error = results.pop()
+                if node.op == 'AND':
+                    value = left_value & right_value
+                elif node.op == 'OR':
+                    value = left_value | right_value
+                else:
+                    value = np.zeros(self.rows, bool)
+                results.append((value, left_error | right_error))
+            elif isinstance(node, SharedNode):
+                if node.index not in self.memo:
+                    self.memo[node.index] = self.condition(node.node)
+                results.append(self.memo[node.index])
+            elif isinstance(node, ConstNode):
+                results.append((np.full(self.rows, bool(node.value)), np.zeros(self.rows, bool)))
+            else:
+                results.append(self.leaf(node))
+        return results[0]
+
+    def if_blocks(self, blocks: ASTNode) -> BatchResult:
+        # 重排与决策表的结果都与原始 IF 链一致，按原始 IF 链求值
+        while isinstance(blocks, (GuardedIfBlocksNode, DecisionTableNode)):
+            blocks = blocks.original
+        branches = [blocks.if_block] + blocks.else_if_blocks
+        chosen = np.full(self.rows, -1)
+        errors = np.zeros(self.rows, bool)
+        pending = np.ones(self.rows, bool)
+        for index, block in enumerate(branches):
+            value, error = self.condition(block.condition)
+            errors |= pending & error
+            hit = pending & value & ~error
+            chosen[hit] = index
+            pending &= ~(hit | error)
+        replies = np.full(self.rows, None, dtype=object)
+        for index, block in enumerate(branches):
+            replies[chosen == index] = block.reply
+        if blocks.else_block:
+            chosen[pending] = len(branches)
+            replies[pending] = blocks.else_block.reply
+        return BatchResult(chosen, replies, errors)
+
+
+def evaluate(ast: ScriptNode, columns: Columns) -> BatchResult:
+    """对列式符号表的每一行执行脚本"""
+    return _BatchEvaluator(columns).if_blocks(ast.if_blocks)
+
+
+def read_records(lines: Iterable[str]) -> List[Dict]:
+    """读取 JSON Lines 格式的请求记录（每行一个符号表）"""
+    return [json.loads(line) for line in lines if line.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from .compiler import compile_script
+
+    argv = argv if argv is not None else sys.argv[1:]
+    if len(argv) != 2:
+        print("用法: python -m src.batch_eval 脚本.dsl 请求记录.jsonl")
+        return 2
+    with open(argv[0], encoding='utf-8') as f:
+        ast = compile_script(f.read())
+    with open(argv[1], encoding='utf-8') as f:
+        records = read_records(f)
+    result = evaluate(ast, Columns.from_records(records))
+    print(f"共 {len(records)} 条请求，异常 {int(result.errors.sum())} 条")
+    for index, count in sorted(result.counts().items()):
+        print(f"  分支 {index}: {count} 条")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
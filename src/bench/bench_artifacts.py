@@ -0,0 +1,32 @@
+# src/bench/bench_artifacts.py
+
+import os
+import shutil
+import tempfile
+
+from src.bench.bench_parser import generate_script
+from src.bench.common import measure_import, fmt_time, section
+from src.artifacts import build_directory
+
+
+def run() -> bool:
+    section("冷启动：重新解析 vs 加载编译产物")
+    tmp = tempfile.mkdtemp()
+    try:
+        for name in os.listdir('src/dsl'):
+            if name.endswith('.dsl'):
+                shutil.copy(os.path.join('src/dsl', name), tmp)
+        with open(os.path.join(tmp, 'generated_rules.dsl'), 'w', encoding='utf-8') as f:
+            f.write(generate_script(2000))
+        cache_dir = os.path.join(tmp, '__dslcache__')
+        build_directory(tmp, cache_dir)
+
+        load = "from src.dsl_registry import DSLRegistry; DSLRegistry({!r}, artifact_dir={!r}).load_all()"
+        parse_time = measure_import(load.format(tmp, None))
+        artifact_time = measure_import(load.format(tmp, cache_dir))
+        print(f"启动加载 {len(os.listdir(tmp)) - 1} 个脚本（含 2000 分支大脚本）  "
+              f"重新解析={fmt_time(parse_time)}  编译产物={fmt_time(artifact_time)}  "
+              f"加速 {parse_time / artifact_time:.1f}x")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return artifact_time < parse_time
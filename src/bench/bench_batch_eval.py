@@ -0,0 +1,46 @@
+# src/bench/bench_batch_eval.py
+
+import random
+
+from src.bench.common import measure, fmt_time, section
+from src.compiler import compile_script
+from src.executor import ASTExecutor
+
+ROWS = 20000
+
+
+def generate_records(rows: int, seed: int = 41):
+    """模拟请求日志中的符号表：部分参数缺失或为空"""
+    rng = random.Random(seed)
+    records = []
+    for _ in range(rows):
+        record = {'scene': rng.choice(['手机', '电脑', '']), 'intent': '商品推荐'}
+        if rng.random() < 0.6:
+            record['预算'] = float(rng.randrange(10000))
+        if rng.random() < 0.5:
+            record['品牌'] = rng.choice(['小米', '华为', '苹果', ''])
+        records.append(record)
+    return records
+
+
+def run() -> bool:
+    try:
+        from src.batch_eval import Columns, evaluate
+    except ImportError:
+        section("批量求值")
+        print("未安装 NumPy，跳过")
+        return True
+    section(f"批量求值：generic_recommendation.dsl × {ROWS} 行")
+    with open('src/dsl/generic_recommendation.dsl', encoding='utf-8') as f:
+        ast = compile_script(f.read())
+    records = generate_records(ROWS)
+    columns = Columns.from_records(records)
+
+    expected = [ASTExecutor(dict(record)).execute(ast)['reply'] for record in records]
+    identical = evaluate(ast, columns).replies.tolist() == expected
+    per_row = measure(lambda: [ASTExecutor(record).execute(ast) for record in records], rounds=3) / ROWS
+    batch = measure(lambda: evaluate(ast, columns), rounds=3) / ROWS
+    convert = measure(lambda: Columns.from_records(records), rounds=1) / ROWS
+    print(f"逐行执行={fmt_time(per_row)}/行  批量求值={fmt_time(batch)}/行（转为列式 {fmt_time(convert)}/行）  "
+          f"加速 {per_row / batch:.1f}x  结果一致={identical}")
+    return identical and batch < per_row
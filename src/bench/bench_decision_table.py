@@ -0,0 +1,25 @@
+# src/bench/bench_decision_table.py
+
+from src.bench.bench_reorder import generate_ladder, generate_traffic, replay
+from src.bench.common import measure, fmt_time, section
+from src.compiler import compile_script
+from src.optimizer import optimize
+from src.symbols import SymbolTable
+
+BRANCHES = 300
+REQUESTS = 3000
+
+
+def run() -> bool:
+    section(f"决策表：{BRANCHES} 个分支，回放 {REQUESTS} 个请求")
+    ast = compile_script(generate_ladder(BRANCHES), 'rd')
+    optimized = optimize(ast, {'intent': '商品推荐'})
+    traffic = [dict(symbols, intent='商品推荐') for symbols in generate_traffic(BRANCHES, REQUESTS)]
+
+    table = SymbolTable()
+    identical = replay(ast, traffic, table) == replay(optimized.ast, traffic, table)
+    linear = measure(lambda: replay(ast, traffic, table), rounds=3) / REQUESTS
+    indexed = measure(lambda: replay(optimized.ast, traffic, table), rounds=3) / REQUESTS
+    print(f"建表分支 {optimized.stats['tabulated']} 个  逐个求值={fmt_time(linear)}/请求  "
+          f"查表={fmt_time(indexed)}/请求  加速 {linear / indexed:.1f}x  回复一致={identical}")
+    return identical and optimized.stats['tabulated'] == BRANCHES and indexed < linear
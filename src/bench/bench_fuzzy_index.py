@@ -0,0 +1,66 @@
+# src/bench/bench_fuzzy_index.py
+
+import random
+import statistics
+import string
+import time
+
+from src.bench.common import fmt_time, section
+from src.fuzzy_index import TrigramIndex
+
+SKUS = 1_000_000
+QUERIES = 300
+# 查询延迟中位数预算：归一化后完全相同的写法 / 一处错别字
+EXACT_BUDGET = 0.00005
+TYPO_BUDGET = 0.001
+
+
+def synthetic_catalog(rng: random.Random):
+    """由音节拼成的品牌、系列与编号构成的型号，如 "kotame vasu 417K" """
+    syllables = [a + b for a in 'bcdfghjklmnpqrstvwxz' for b in 'aeiou']
+    brands = [''.join(rng.choice(syllables) for _ in range(rng.randrange(2, 4))) for _ in range(3000)]
+    series = [''.join(rng.choice(syllables) for _ in range(2)) for _ in range(500)]
+    return [f"{rng.choice(brands)} {rng.choice(series)} {rng.randrange(1000)}{rng.choice(string.ascii_uppercase)}"
+            for _ in range(SKUS)]
+
+
+def typo(rng: random.Random, model: str) -> str:
+    """去掉空格后做一处交换、删除或替换"""
+    chars = list(model.replace(' ', ''))
+    i = rng.randrange(1, len(chars) - 1)
+    kind = rng.randrange(3)
+    if kind == 0:
+        chars[i], chars[i + 1] = chars[i + 1], chars[i]
+    elif kind == 1:
+        del chars[i]
+    else:
+        chars[i] = 'y'
+    return ''.join(chars)
+
+
+def median_latency(index, queries):
+    latencies, found = [], 0
+    for query, expected in queries:
+        start = time.perf_counter()
+        result = index.search(query)
+        latencies.append(time.perf_counter() - start)
+        found += bool(result) and result[0][0] == expected
+    return statistics.median(latencies), found
+
+
+def run() -> bool:
+    section(f"型号近似匹配：{SKUS} 个 SKU 的三元组索引")
+    rng = random.Random(46)
+    models = synthetic_catalog(rng)
+    start = time.perf_counter()
+    index = TrigramIndex()
+    for position, model in enumerate(models):
+        index.add(model, position)
+    build = time.perf_counter() - start
+
+    picks = [rng.randrange(SKUS) for _ in range(QUERIES)]
+    exact, exact_found = median_latency(index, [(models[i].upper(), i) for i in picks])
+    fuzzy, fuzzy_found = median_latency(index, [(typo(rng, models[i]), i) for i in picks])
+    print(f"建索引 {build:.1f}s  大小写/空格不同={fmt_time(exact)}（命中 {exact_found}/{QUERIES}）  "
+          f"一处错别字={fmt_time(fuzzy)}（命中 {fuzzy_found}/{QUERIES}）  （中位数）")
+    return exact < EXACT_BUDGET and fuzzy < TYPO_BUDGET and fuzzy_found >= QUERIES * 0.95
@@ -0,0 +1,36 @@
+# src/bench/bench_inventory.py
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.bench.common import fmt_time, section
+from src.inventory import CachedInventory, FakeInventory
+
+SKUS = [f'sku{i}' for i in range(8)]
+LATENCY = 0.005   # 后端每次批量查询 5ms
+REQUESTS = 400
+WORKERS = 16
+
+
+def replay(inventory) -> float:
+    """WORKERS 个线程并发发出 REQUESTS 次单个 sku 查询，返回总耗时（秒）"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(WORKERS) as pool:
+        results = list(pool.map(lambda i: inventory.get_stock([SKUS[i % len(SKUS)]]), range(REQUESTS)))
+    elapsed = time.perf_counter() - start
+    assert all(result == {SKUS[i % len(SKUS)]: i % len(SKUS)} for i, result in enumerate(results))
+    return elapsed
+
+
+def run() -> bool:
+    section(f"库存缓存：{WORKERS} 线程并发查询 {len(SKUS)} 个 sku 共 {REQUESTS} 次，后端延迟 {fmt_time(LATENCY)}")
+    stock = {sku: i for i, sku in enumerate(SKUS)}
+    direct = FakeInventory(stock, latency=LATENCY)
+    cached_backend = FakeInventory(stock, latency=LATENCY)
+    cached = CachedInventory(cached_backend)
+    before = replay(direct)
+    after = replay(cached)
+    print(f"直连后端={fmt_time(before / REQUESTS)}/请求（后端调用 {direct.calls} 次）  "
+          f"读穿透缓存={fmt_time(after / REQUESTS)}/请求（后端调用 {cached_backend.calls} 次，"
+          f"合并 {cached.coalesced} 次）  加速 {before / after:.1f}x")
+    return cached_backend.calls <= len(SKUS) and after < before
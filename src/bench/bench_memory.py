@@ -0,0 +1,63 @@
+# src/bench/bench_memory.py
+
+import gc
+import os
+import tracemalloc
+
+from src.ast_nodes import *
+from src.bench.bench_parser import generate_script
+from src.bench.common import section
+from src.compiler import compile_script
+
+TENANTS = 1000
+# 每个 AST 节点的平均内存预算（字节，含回复文本等字符串）
+NODE_BUDGET = 150
+
+
+def tenant_sources(tenants: int):
+    """模拟多租户：每个租户加载一份回复文案不同的脚本"""
+    base = []
+    for name in sorted(os.listdir('src/dsl')):
+        if name.endswith('.dsl'):
+            with open(os.path.join('src/dsl', name), encoding='utf-8') as f:
+                base.append(f.read())
+    base.append(generate_script(20))
+    for tenant in range(tenants):
+        for source in base:
+            yield source.replace('REPLY "', f'REPLY "[租户{tenant}]')
+
+
+def count_nodes(ast: ScriptNode) -> int:
+    blocks = ast.if_blocks
+    count = 6 + bool(blocks.else_block)
+    for block in [blocks.if_block] + blocks.else_if_blocks:
+        count += 1
+        stack = [block.condition]
+        while stack:
+            node = stack.pop()
+            count += 1
+            if isinstance(node, BinaryOpNode):
+                stack.append(node.left)
+                stack.append(node.right)
+    return count
+
+
+def run() -> bool:
+    section(f"AST 内存占用：{TENANTS} 个租户的脚本")
+    sources = list(tenant_sources(TENANTS))
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    scripts = [compile_script(source, 'rd') for source in sources]
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    nodes = sum(count_nodes(ast) for ast in scripts)
+    idents = {id(ast.if_blocks.if_block.condition.left.ident) for ast in scripts
+              if isinstance(ast.if_blocks.if_block.condition, BinaryOpNode)
+              and isinstance(ast.if_blocks.if_block.condition.left, (CompareNode, ExistsNode))}
+    print(f"脚本 {len(scripts)} 个，节点 {nodes} 个，共 {used / 1024 / 1024:.1f}MB，"
+          f"平均每个脚本 {used / len(scripts) / 1024:.1f}KB，每个节点 {used / nodes:.0f}B（预算 {NODE_BUDGET}B）")
+    print(f"首个条件的标识符字符串对象数：{len(idents)}（已驻留，跨脚本共享）")
+    return used / nodes < NODE_BUDGET
@@ -0,0 +1,39 @@
+# src/bench/bench_parser.py
+
+from src.bench.common import measure, measure_import, fmt_time, section
+from src.compiler import compile_script
+
+
+def generate_script(branches: int) -> str:
+    """生成含指定数量 ELSE IF 分支的大脚本（模拟由营销规则批量生成的脚本）"""
+    lines = ['SCENE 通用', 'ON_INTENT 商品推荐', 'IF 预算 < 0 AND 品牌 == "无"', '    REPLY "无效预算"']
+    for i in range(branches):
+        lines.append(f'ELSE IF 预算 >= {i * 10} AND (品牌 == "品牌{i}" OR 型号 == "型号{i}")')
+        lines.append(f'    REPLY "规则{i}"')
+    lines.append('ELSE')
+    lines.append('    REPLY "默认回复"')
+    return '\n'.join(lines)
+
+
+def run() -> bool:
+    section("解析器：PLY vs 手写递归下降")
+    ply_import = measure_import("import src.parser")
+    rd_import = measure_import("import src.rd_parser")
+    print(f"导入耗时（含 PLY 建表）  ply={fmt_time(ply_import)}  rd={fmt_time(rd_import)}")
+
+    with open('src/dsl/natural_chat.dsl', encoding='utf-8') as f:
+        tiny = f.read()
+    results = {}
+    for backend in ('ply', 'rd'):
+        results[backend] = measure(lambda: compile_script(tiny, backend), repeat=2000)
+    print(f"小脚本解析 natural_chat.dsl  ply={fmt_time(results['ply'])}  rd={fmt_time(results['rd'])}"
+          f"  加速 {results['ply'] / results['rd']:.1f}x")
+
+    for branches in (100, 2000):
+        large = generate_script(branches)
+        ply_time = measure(lambda: compile_script(large, 'ply'), rounds=1)
+        rd_time = measure(lambda: compile_script(large, 'rd'), rounds=1)
+        print(f"大脚本解析 {branches} 个分支 ({len(large) // 1024}KB)  ply={fmt_time(ply_time)}  "
+              f"rd={fmt_time(rd_time)}  加速 {ply_time / rd_time:.1f}x")
+
+    return results['rd'] < results['ply']
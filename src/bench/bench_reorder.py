@@ -0,0 +1,63 @@
+# src/bench/bench_reorder.py
+
+import random
+
+from src.bench.common import measure, fmt_time, section
+from src.compiler import compile_script
+from src.executor import ASTExecutor
+from src.profiling import BranchProfiler, ProfilingExecutor, reorder
+from src.symbols import SymbolTable
+
+BRANCHES = 300
+REQUESTS = 3000
+
+
+def generate_ladder(branches: int) -> str:
+    """按品牌与预算区间分流的规则链（各分支互斥）"""
+    lines = ['SCENE 通用', 'ON_INTENT 商品推荐']
+    for i in range(branches):
+        keyword = 'IF' if i == 0 else 'ELSE IF'
+        lines.append(f'{keyword} 品牌 == "品牌{i // 3}" AND 预算 >= {i % 3 * 1000} AND 预算 < {i % 3 * 1000 + 1000}')
+        lines.append(f'    REPLY "规则{i}"')
+    lines.append('ELSE REPLY "默认回复"')
+    return '\n'.join(lines)
+
+
+def generate_traffic(branches: int, requests: int, seed: int = 38):
+    """模拟线上流量：少数靠后的分支承接大部分请求"""
+    rng = random.Random(seed)
+    hot = [branches - 1 - i * 7 for i in range(5)]
+    traffic = []
+    for _ in range(requests):
+        rule = rng.choice(hot) if rng.random() < 0.9 else rng.randrange(branches)
+        traffic.append({'品牌': f'品牌{rule // 3}', '预算': float(rule % 3 * 1000 + rng.randrange(1000))})
+    return traffic
+
+
+def replay(ast, traffic, table):
+    replies = []
+    for symbols in traffic:
+        table.clear()
+        table.update(symbols)
+        replies.append(ASTExecutor(table).execute(ast)['reply'])
+    return replies
+
+
+def run() -> bool:
+    section(f"分支重排：{BRANCHES} 个分支，回放 {REQUESTS} 个请求")
+    ast = compile_script(generate_ladder(BRANCHES), 'rd')
+    traffic = generate_traffic(BRANCHES, REQUESTS)
+
+    # 用前 1/3 的流量采集分支统计，再重排
+    profiler = BranchProfiler()
+    for symbols in traffic[:REQUESTS // 3]:
+        ProfilingExecutor(dict(symbols), profiler).execute(ast)
+    reordered, moved = reorder(ast, profiler.profiles[ast.if_blocks])
+
+    table = SymbolTable()
+    identical = replay(ast, traffic, table) == replay(reordered, traffic, table)
+    before = measure(lambda: replay(ast, traffic, table), rounds=3) / REQUESTS
+    after = measure(lambda: replay(reordered, traffic, table), rounds=3) / REQUESTS
+    print(f"移动分支 {moved} 个  原顺序={fmt_time(before)}/请求  重排后={fmt_time(after)}/请求  "
+          f"加速 {before / after:.1f}x  回复一致={identical}")
+    return identical and after < before
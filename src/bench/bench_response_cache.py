@@ -0,0 +1,39 @@
+# src/bench/bench_response_cache.py
+
+import contextlib
+import io
+import os
+
+from DSLManager import DSLManager
+from src.bench.common import measure, fmt_time, section
+from src.recording import load_recording, offline_recognizer
+from src.response_cache import ResponseCache
+from src.test.stubs.qwen_stub import QWENAPIStub
+
+INPUTS = ["查询小米14的价格", "王小二麻辣小龙虾有货吗？", "你好，想聊聊天", "推荐5000元的小米手机",
+          "推荐3000元的华为手机", "推荐一本书用于学习", "苹果手机多少钱", "三只松鼠还剩多少"]
+ROUNDS = 50
+
+
+def run() -> bool:
+    # DSL_REPLAY=录制文件 时改用录制的真实流量
+    inputs = [record.input for record in load_recording(os.environ['DSL_REPLAY'])] \
+        if os.getenv('DSL_REPLAY') else INPUTS
+    section(f"回复缓存：{len(inputs)} 条输入重复 {ROUNDS} 轮")
+    with contextlib.redirect_stdout(io.StringIO()):
+        cached = DSLManager(recognizer=offline_recognizer(QWENAPIStub()))
+        cached.response_cache = ResponseCache()
+        uncached = DSLManager(recognizer=offline_recognizer(QWENAPIStub()))
+        uncached.response_cache = None
+
+        def replay(manager):
+            return [manager.execute_dsl(text) for _ in range(ROUNDS) for text in inputs]
+
+        identical = replay(cached) == replay(uncached)
+        requests = ROUNDS * len(inputs)
+        before = measure(lambda: replay(uncached), rounds=3) / requests
+        after = measure(lambda: replay(cached), rounds=3) / requests
+    stats = cached.cache_stats()
+    print(f"无缓存={fmt_time(before)}/请求  有缓存={fmt_time(after)}/请求  加速 {before / after:.1f}x  "
+          f"命中率 {stats['hit_rate']:.1%}  回复一致={identical}")
+    return identical and after < before
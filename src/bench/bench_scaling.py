@@ -0,0 +1,46 @@
+# src/bench/bench_scaling.py
+
+from src.bench.bench_parser import generate_script
+from src.bench.common import measure, fmt_time, section
+from src.compiler import compile_script
+from src.executor import ASTExecutor
+
+SIZES = (10, 1000, 10000, 100000)
+PLY_MAX_BRANCHES = 10000  # PLY 在 10 万分支时耗时过长，只测到 1 万
+
+
+def run() -> bool:
+    section("大脚本扩展性：ELSE IF 分支数 10 / 1k / 10k / 100k")
+    rows = []
+    for branches in SIZES:
+        source = generate_script(branches)
+        rd_parse = measure(lambda: compile_script(source, 'rd'), rounds=1)
+        ply_parse = (measure(lambda: compile_script(source, 'ply'), rounds=1)
+                     if branches <= PLY_MAX_BRANCHES else None)
+        ast = compile_script(source, 'rd')
+        # 最坏情况：命中最后一个分支
+        symbols = {'预算': float(branches * 10), '型号': f'型号{branches - 1}'}
+        execute = measure(lambda: ASTExecutor(symbols).execute(ast), rounds=1)
+        rows.append((branches, rd_parse, execute))
+        print(f"{branches:>7} 分支  rd解析={fmt_time(rd_parse):>9}  "
+              f"ply解析={fmt_time(ply_parse) if ply_parse else '-':>9}  执行(最坏)={fmt_time(execute):>9}  "
+              f"每分支解析={fmt_time(rd_parse / max(branches, 1))}")
+
+    section("栈安全：超长 AND 链与深层括号")
+    chain = 100000
+    source = 'SCENE 通用\nON_INTENT 商品推荐\nIF ' + ' AND '.join(['预算 >= 0'] * chain) + ' REPLY "ok"'
+    chain_parse = measure(lambda: compile_script(source, 'rd'), rounds=1)
+    ast = compile_script(source, 'rd')
+    chain_exec = measure(lambda: ASTExecutor({'预算': 1.0}).execute(ast), rounds=1)
+    print(f"{chain} 项 AND 链  解析={fmt_time(chain_parse)}  执行={fmt_time(chain_exec)}")
+    depth = 20000
+    source = 'SCENE 通用\nON_INTENT 商品推荐\nIF ' + '(' * depth + '品牌' + ')' * depth + ' REPLY "ok"'
+    nested_parse = measure(lambda: compile_script(source, 'rd'), rounds=1)
+    print(f"{depth} 层括号  解析={fmt_time(nested_parse)}")
+
+    # 预算：解析与执行都应近似线性（10k -> 100k 的耗时增长不超过 20 倍）
+    (_, parse_10k, exec_10k), (_, parse_100k, exec_100k) = rows[-2], rows[-1]
+    linear = parse_100k / parse_10k < 20 and exec_100k / exec_10k < 20
+    print(f"线性度检查 10k->100k  解析 x{parse_100k / parse_10k:.1f}  执行 x{exec_100k / exec_10k:.1f}  "
+          f"{'达标' if linear else '未达标'}")
+    return linear
@@ -0,0 +1,51 @@
+# src/bench/bench_set_ops.py
+
+import random
+
+from src.bench.common import measure, fmt_time, section
+from src.compiler import compile_script
+from src.executor import ASTExecutor
+from src.symbols import SymbolTable
+
+BRANDS = 200
+REQUESTS = 2000
+
+
+def generate_scripts(brands: int):
+    """同一条规则的两种写法：IN 集合与 OR 链 + 区间比较"""
+    names = [f'品牌{i}' for i in range(brands)]
+    header = 'SCENE 通用\nON_INTENT 商品推荐\n'
+    in_list = ', '.join(f'"{name}"' for name in names)
+    or_chain = ' OR '.join(f'品牌 == "{name}"' for name in names)
+    compact = header + f'IF 品牌 IN ({in_list}) AND 预算 BETWEEN 1000 AND 5000 REPLY "命中" ELSE REPLY "默认"'
+    expanded = header + f'IF ({or_chain}) AND 预算 >= 1000 AND 预算 <= 5000 REPLY "命中" ELSE REPLY "默认"'
+    return compact, expanded
+
+
+def generate_traffic(brands: int, requests: int, seed: int = 39):
+    rng = random.Random(seed)
+    return [{'品牌': f'品牌{rng.randrange(brands * 2)}', '预算': float(rng.randrange(8000))}
+            for _ in range(requests)]
+
+
+def replay(ast, traffic, table):
+    replies = []
+    for symbols in traffic:
+        table.clear()
+        table.update(symbols)
+        replies.append(ASTExecutor(table).execute(ast)['reply'])
+    return replies
+
+
+def run() -> bool:
+    section(f"IN / BETWEEN：{BRANDS} 个品牌，回放 {REQUESTS} 个请求")
+    compact, expanded = (compile_script(source, 'rd') for source in generate_scripts(BRANDS))
+    traffic = generate_traffic(BRANDS, REQUESTS)
+
+    table = SymbolTable()
+    identical = replay(compact, traffic, table) == replay(expanded, traffic, table)
+    chain = measure(lambda: replay(expanded, traffic, table), rounds=3) / REQUESTS
+    lookup = measure(lambda: replay(compact, traffic, table), rounds=3) / REQUESTS
+    print(f"OR 链={fmt_time(chain)}/请求  IN 集合={fmt_time(lookup)}/请求  "
+          f"加速 {chain / lookup:.1f}x  回复一致={identical}")
+    return identical and lookup < chain
@@ -0,0 +1,116 @@
+# src/bench/bench_shared_catalog.py
+
+import json
+import os
+import random
+import time
+
+from src.bench.common import section
+from src.fuzzy_index import CatalogIndex
+from src.shared_catalog import SharedCatalog, publish
+
+PRODUCTS = 200_000
+QUERIES = 200
+THROUGHPUT_SECONDS = 1.0
+# 附加共享目录的进程私有内存不超过各自构建目录与索引的该比例
+PRIVATE_RATIO_BUDGET = 0.25
+
+
+def synthetic_catalog(rng: random.Random, count: int = PRODUCTS):
+    syllables = [a + b for a in 'bcdfghjklmnpqrstvwxz' for b in 'aeiou']
+    brands = [''.join(rng.choice(syllables) for _ in range(3)) for _ in range(2000)]
+    return [{'category': rng.choice(['手机', '衣服', '食物']), 'brand': rng.choice(brands),
+             'model': f"{''.join(rng.choice(syllables) for _ in range(2))} {rng.randrange(1000)}",
+             'budget': rng.randrange(100, 10000), 'price': rng.randrange(100, 10000)}
+            for _ in range(count)]
+
+
+def private_bytes() -> int:
+    """当前进程的私有内存（Private_Clean + Private_Dirty）"""
+    total = 0
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            if line.startswith(('Private_Clean:', 'Private_Dirty:')):
+                total += int(line.split()[1]) * 1024
+    return total
+
+
+def lookups(index: CatalogIndex, queries):
+    for query in queries:
+        index.best_product(query)
+
+
+def in_children(count: int, work) -> list:
+    """fork 出 count 个子进程同时执行 work()，收集各自返回的数值"""
+    pipes = []
+    for _ in range(count):
+        read, write = os.pipe()
+        if os.fork() == 0:
+            os.close(read)
+            try:
+                os.write(write, json.dumps(work()).encode())
+            finally:
+                os._exit(0)
+        os.close(write)
+        pipes.append(read)
+    results = []
+    for read in pipes:
+        with os.fdopen(read) as f:
+            results.append(json.loads(f.read()))
+    for _ in pipes:
+        os.wait()
+    return results
+
+
+def run() -> bool:
+    cores = os.cpu_count() or 1
+    counts = sorted({1, 2, max(2, min(cores, 4))})
+    section(f"多进程共享目录：{PRODUCTS} 个商品，{cores} 个 CPU 核")
+    if not hasattr(os, 'fork') or not os.path.exists('/proc/self/smaps_rollup'):
+        print("当前平台不支持 fork 或 /proc/self/smaps_rollup，跳过")
+        return True
+    rng = random.Random(48)
+    catalog_json = json.dumps(synthetic_catalog(rng), ensure_ascii=False)
+    catalog = json.loads(catalog_json)
+    queries = [catalog[rng.randrange(PRODUCTS)]['model'].replace(' ', '')[:-1] for _ in range(QUERIES)]
+    start = time.perf_counter()
+    block = publish(catalog)
+    print(f"发布镜像 {block.size / 2**20:.1f}MB，耗时 {time.perf_counter() - start:.1f}s")
+    del catalog
+    shared = SharedCatalog(block.buf)
+    try:
+        def private_build():
+            before = private_bytes()
+            index = CatalogIndex(json.loads(catalog_json))
+            lookups(index, queries)
+            return private_bytes() - before
+
+        def attached():
+            before = private_bytes()
+            lookups(shared.catalog_index(), queries)
+            return private_bytes() - before
+
+        def throughput():
+            index, done, deadline = shared.catalog_index(), 0, time.perf_counter() + THROUGHPUT_SECONDS
+            while time.perf_counter() < deadline:
+                index.best_product(queries[done % QUERIES])
+                done += 1
+            return done / THROUGHPUT_SECONDS
+
+        ok = True
+        baseline = None
+        for count in counts:
+            own = max(in_children(count, private_build))
+            mapped = max(in_children(count, attached))
+            rate = sum(in_children(count, throughput))
+            baseline = baseline or rate
+            ok = ok and mapped <= own * PRIVATE_RATIO_BUDGET
+            print(f"{count}个进程：每进程私有内存 自建={own / 2**20:.1f}MB 共享={mapped / 2**20:.1f}MB  "
+                  f"吞吐={rate:.0f} 次/秒（{rate / baseline:.2f}x）")
+        if cores < max(counts):
+            print(f"只有 {cores} 个 CPU 核，吞吐不会随进程数增长")
+        return ok
+    finally:
+        shared.close()
+        block.close()
+        block.unlink()
@@ -0,0 +1,42 @@
+# src/bench/bench_shared_requests.py
+
+import contextlib
+import io
+import random
+import time
+
+from DSLManager import DSLManager
+from src.bench.bench_response_cache import INPUTS
+from src.bench.bench_shared_catalog import synthetic_catalog
+from src.bench.common import fmt_time, measure, section
+from src.shared_catalog import SharedCatalog, build_image
+from src.test.stubs.qwen_stub import QWENAPIStub
+
+PRODUCTS = 50_000
+ROUNDS = 20
+# 大目录下每个请求的耗时上限（不含意图识别的 LLM 调用）：品牌/型号匹配与目录查询不随目录大小增长
+REQUEST_BUDGET = 0.005
+
+
+def run() -> bool:
+    section(f"共享目录上的请求耗时：{PRODUCTS} 个商品，{len(INPUTS)} 条输入")
+    with contextlib.redirect_stdout(io.StringIO()):
+        catalog = DSLManager(recognizer=QWENAPIStub()).product_catalog
+    catalog = catalog + synthetic_catalog(random.Random(48), PRODUCTS)
+    shared = SharedCatalog(build_image(catalog))
+
+    timings, replies = {}, {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name, products in (('列表', catalog), ('共享', shared)):
+            start = time.perf_counter()
+            manager = DSLManager(recognizer=QWENAPIStub(), product_catalog=products)
+            built = time.perf_counter() - start
+            manager.response_cache = None  # 测量每个请求的完整处理
+            replies[name] = [manager.execute_dsl(text) for text in INPUTS]  # 预热（列表目录首次构建近似匹配索引）
+            worst = max(measure(lambda: manager.execute_dsl(text), repeat=ROUNDS) for text in INPUTS)
+            timings[name] = (built, worst)
+    for name, (built, worst) in timings.items():
+        print(f"{name}目录：构建 DSLManager {fmt_time(built)}  最慢输入 {fmt_time(worst)}/请求")
+    identical = replies['列表'] == replies['共享']
+    print(f"回复一致={identical}  预算 {fmt_time(REQUEST_BUDGET)}/请求")
+    return identical and timings['共享'][1] <= REQUEST_BUDGET
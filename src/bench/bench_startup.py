@@ -0,0 +1,31 @@
+# src/bench/bench_startup.py
+
+from src.bench.common import import_breakdown, loaded_modules, measure_import, fmt_time, section
+
+# 启动预算：导入 DSLManager 并用测试桩构造实例（不含 LLM 客户端）
+IMPORT_BUDGET = 0.25
+STARTUP_BUDGET = 0.3
+# 启动阶段不应加载的重型依赖
+DEFERRED_MODULES = ('openai', 'ply')
+
+STARTUP = ("from DSLManager import DSLManager; "
+           "from src.test.stubs.qwen_stub import QWENAPIStub; "
+           "DSLManager(recognizer=QWENAPIStub())")
+
+
+def run() -> bool:
+    section("启动耗时")
+    total, deps = import_breakdown('DSLManager')
+    print(f"import DSLManager  {fmt_time(total)}（预算 {fmt_time(IMPORT_BUDGET)}）")
+    for name, cost in deps[:8]:
+        print(f"    {name:<24}{fmt_time(cost):>10}")
+
+    # 首次构造会写出编译产物，之后的启动不再需要 PLY
+    startup = measure_import(STARTUP)
+    print(f"导入并构造 DSLManager  {fmt_time(startup)}（预算 {fmt_time(STARTUP_BUDGET)}）")
+
+    loaded = loaded_modules(STARTUP)
+    eager = [name for name in DEFERRED_MODULES if name in loaded]
+    print(f"启动阶段加载的重型依赖：{', '.join(eager) or '无'}")
+    return total < IMPORT_BUDGET and startup < STARTUP_BUDGET and not eager
+
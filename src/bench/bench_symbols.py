@@ -0,0 +1,86 @@
+# src/bench/bench_symbols.py
+
+import tracemalloc
+
+from src.bench.bench_parser import generate_script
+from src.bench.common import measure, fmt_time, section
+from src.compiler import compile_script
+from src.executor import ASTExecutor
+from src.symbols import SymbolTable
+
+PARAMS = {'scene': '手机', 'intent': '商品推荐', '预算': 1990.0, '品牌': '品牌199', '功能': '拍照'}
+
+
+class CountingDict(dict):
+    """统计按名称查找符号表的次数"""
+    lookups = 0
+
+    def get(self, key, default=None):
+        CountingDict.lookups += 1
+        return super().get(key, default)
+
+
+class CountingSymbolTable(SymbolTable):
+    """统计槽位化符号表上按名称查找的次数（条件求值按槽位取值时不经过 get）"""
+    lookups = 0
+
+    def get(self, key, default=None):
+        CountingSymbolTable.lookups += 1
+        return super().get(key, default)
+
+
+def fill(table) -> None:
+    table.clear()
+    for key, value in PARAMS.items():
+        table[key] = value
+
+
+def turn_profile(table, ast, turns: int = 20):
+    """每轮请求的名称查找次数与临时内存分配峰值（字节，tracemalloc）"""
+    def turn():
+        fill(table)
+        return ASTExecutor(table).execute(ast)
+    turn()  # 预热：符号表扩容到布局长度
+    counter = type(table)
+    counter.lookups = 0
+    for _ in range(turns):
+        turn()
+    lookups = counter.lookups / turns
+    tracemalloc.start()
+    turn()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    turn()
+    peak = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return lookups, peak
+
+
+def run() -> bool:
+    section("符号表：名称查找 vs 编译期槽位")
+    ok = True
+    for branches in (10, 200):
+        ast = compile_script(generate_script(branches), 'rd')
+        expected = '规则199' if branches == 200 else '默认回复'
+        counting = CountingDict()
+        fill(counting)
+        assert ASTExecutor(counting).execute(ast)['reply'] == expected
+
+        # 每轮请求：清空并填充符号表，再执行脚本
+        times = {}
+        for kind, table in (('dict', {}), ('slots', SymbolTable())):
+            def turn():
+                fill(table)
+                return ASTExecutor(table).execute(ast)
+            assert turn()['reply'] == expected
+            times[kind] = measure(turn, repeat=2000 if branches == 10 else 200, rounds=7)
+        dict_lookups, dict_peak = turn_profile(CountingDict(), ast)
+        slot_lookups, slot_peak = turn_profile(CountingSymbolTable(), ast)
+        print(f"{branches:>4} 个分支  dict={fmt_time(times['dict'])}  槽位={fmt_time(times['slots'])}  "
+              f"加速 {times['dict'] / times['slots']:.2f}x  "
+              f"每轮名称查找 dict={dict_lookups:.0f} 槽位={slot_lookups:.0f}  "
+              f"每轮临时分配峰值 dict={dict_peak}B 槽位={slot_peak}B")
+        # 预算：名称查找至少减少 90%，临时分配不多于 dict，且不应变慢（允许 10% 的计时抖动）
+        ok = (ok and slot_lookups <= dict_lookups * 0.1 and slot_peak <= dict_peak
+              and times['slots'] <= times['dict'] * 1.1)
+    return ok
@@ -0,0 +1,67 @@
+# src/bench/common.py
+
+import subprocess
+import sys
+import time
+from typing import Callable, List, Set, Tuple
+
+
+def measure(fn: Callable[[], object], repeat: int = 1, rounds: int = 3) -> float:
+    """执行 fn repeat 次为一轮，取多轮中最快一轮的平均耗时（秒/次）"""
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best
+
+
+def measure_import(statement: str) -> float:
+    """在全新的解释器进程中测量一条导入语句的耗时（秒）"""
+    code = ("import time; _t = time.perf_counter(); "
+            f"{statement}; print(time.perf_counter() - _t)")
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def loaded_modules(statement: str) -> Set[str]:
+    """在全新的解释器进程中执行语句，返回之后已加载的顶层包名"""
+    code = f"import sys; {statement}; print(' '.join({{m.split('.')[0] for m in sys.modules}}))"
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return set(output.stdout.strip().splitlines()[-1].split())
+
+
+def import_breakdown(module: str) -> Tuple[float, List[Tuple[str, float]]]:
+    """
+    用 -X importtime 在全新进程中导入模块
+    :return: (总耗时, [(直接依赖模块, 含子依赖的耗时)])，耗时单位为秒，依赖按耗时降序
+    """
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, check=True)
+    # importtime 按“先子后父”的顺序输出，缩进表示层级：遇到父模块时收拢其下一层的子模块
+    pending = {}
+    for line in output.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        level = (len(name) - len(name.lstrip()) + 1) // 2
+        children = pending.pop(level + 1, [])
+        pending.setdefault(level, []).append((name.strip(), int(cumulative) / 1e6, children))
+    for name, total, children in pending.get(1, []):
+        if name == module:
+            deps = sorted(((child, cost) for child, cost, _ in children), key=lambda item: item[1], reverse=True)
+            return total, deps
+    raise ValueError(f"未找到模块 {module} 的导入记录")
+
+
+def fmt_time(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f}µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds:.2f}s"
+
+
+def section(title: str) -> None:
+    print(f"\n----- {title} -----")
@@ -0,0 +1,34 @@
+import os
+from typing import Optional
+
+from .ast_nodes import ScriptNode
+from . import rd_parser
+
+# 可选的解析器后端：ply（PLY LALR 解析器）/ rd（手写扫描器 + 递归下降解析器，无第三方依赖）
+PARSER_BACKENDS = ('ply', 'rd')
+
+
+def default_backend() -> str:
+    return os.getenv('DSL_PARSER', 'ply')
+
+
+def compile_script(source: str, backend: Optional[str] = None) -> ScriptNode:
+    """将脚本文本编译为 AST，语法错误时抛出 SyntaxError"""
+    backend = backend or default_backend()
+    if backend == 'rd':
+        return rd_parser.parse(source)
+    if backend == 'ply':
+        # 仅在选择 PLY 后端时才导入（导入时会生成词法/语法分析表）
+        from .lexer import lexer
+        from .parser import parser, reset_parser
+        reset_parser()
+        ast = parser.parse(source, lexer=lexer)
+        if not isinstance(ast, ScriptNode):
+            raise SyntaxError('脚本解析失败')
+        return ast
+    raise ValueError(f"未知的解析器后端: {backend}，支持: {PARSER_BACKENDS}")
+
+
+def is_thread_safe(backend: Optional[str] = None) -> bool:
+    """PLY 解析器是全局单例，不能并发使用；递归下降解析器每次新建实例，可并行编译"""
+    return (backend or default_backend()) == 'rd'
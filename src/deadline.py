@@ -0,0 +1,37 @@
+"""
+请求截止时间：服务端为每个请求设置截止时间，意图识别（LLM 调用、模型路由升级）按剩余时间设置超时或直接放弃
+
+截止时间保存在线程局部变量中，由处理请求的工作线程通过 deadline_scope 设置。
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+_local = threading.local()
+
+
+class DeadlineExceeded(Exception):
+    """请求的截止时间已过"""
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[float]) -> Iterator[None]:
+    """在当前线程内设置截止时间（time.monotonic() 时刻，None 表示不限）"""
+    previous = getattr(_local, 'deadline', None)
+    _local.deadline = deadline
+    try:
+        yield
+    finally:
+        _local.deadline = previous
+
+
+def remaining() -> Optional[float]:
+    """当前请求剩余的秒数（可能为负）；没有截止时间时返回 None"""
+    deadline = getattr(_local, 'deadline', None)
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
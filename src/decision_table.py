@@ -0,0 +1,179 @@
+"""
+决策表：把“等值键 + 数值区间”形状的 IF 链编译为索引分发
+
+    适用形状  每个分支都是若干原子条件的 AND：
+              对 1~2 个键标识符的 == / IN（每个分支都必须约束全部键），
+              以及对另一个标识符的数值区间比较（<、<=、>、>=、BETWEEN，可省略）
+    查表      等值键取值组成的元组 -> 分桶（哈希查找），桶内按区间端点二分查找命中的分支
+
+桶内每个区间段预先算好“第一个命中的分支”，查表结果与逐个分支求值的先命中先返回完全一致。
+等值判断与 IN 不会抛出异常；区间标识符的取值不是数值时，排序比较会抛出 TypeError，
+此时（以及键取值不可哈希等情况）执行原始 IF 链，异常与回复都与原脚本相同。
+"""
+import math
+from itertools import product
+from typing import Dict, List, Optional, Tuple
+
+from .ast_nodes import *
+from .symbols import LAYOUT
+
+# 分支数少于该值时逐个求值已经足够快
+MIN_BRANCHES = 4
+MAX_KEYS = 2
+# 等值键组合（分桶条目）数上限，IN 列表的笛卡尔积超过后不建表
+MAX_ENTRIES = 65536
+
+ORDERING_OPS = frozenset(('<', '<=', '>', '>='))
+
+# 区间：(下界, 是否含下界, 上界, 是否含上界)；None 表示分支不约束区间标识符
+Interval = Tuple[object, bool, object, bool]
+
+
+class _Unsupported(Exception):
+    """条件不符合决策表形状"""
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _conjuncts(condition: ASTNode) -> List[ASTNode]:
+    """展开 AND 链为原子条件列表，遇到其他运算符时不符合形状"""
+    stack, atoms = [condition], []
+    while stack:
+        node = stack.pop()
+        if isinstance(node, SharedNode):
+            stack.append(node.node)
+        elif isinstance(node, BinaryOpNode):
+            if node.op != 'AND':
+                raise _Unsupported(node.op)
+            stack.append(node.right)
+            stack.append(node.left)
+        else:
+            atoms.append(node)
+    return atoms
+
+
+class _Branch:
+    """一个分支的约束：键标识符 -> 允许的取值集合，区间标识符 -> 区间"""
+    def __init__(self, condition: ASTNode):
+        self.equals: Dict[str, frozenset] = {}
+        self.ranges: Dict[str, List] = {}
+        self.dead = False  # 条件恒假（不会抛出异常，可以直接跳过）
+        for atom in _conjuncts(condition):
+            self.add(atom)
+
+    def add(self, atom: ASTNode) -> None:
+        if isinstance(atom, ConstNode):
+            self.dead = self.dead or not atom.value
+        elif isinstance(atom, CompareNode) and atom.op == '==':
+            self.restrict(atom.ident, frozenset((atom.value,)))
+        elif isinstance(atom, InNode):
+            self.restrict(atom.ident, atom.values)
+        elif isinstance(atom, CompareNode) and atom.op in ORDERING_OPS and _is_number(atom.value):
+            self.bound(atom.ident, atom.op, atom.value)
+        elif isinstance(atom, BetweenNode) and _is_number(atom.low) and _is_number(atom.high):
+            self.bound(atom.ident, '>=', atom.low)
+            self.bound(atom.ident, '<=', atom.high)
+        else:
+            raise _Unsupported(type(atom).__name__)
+
+    def restrict(self, ident: str, values: frozenset) -> None:
+        allowed = self.equals.get(ident)
+        self.equals[ident] = values if allowed is None else allowed & values
+
+    def bound(self, ident: str, op: str, value) -> None:
+        interval = self.ranges.setdefault(ident, [-math.inf, False, math.inf, False])
+        if op in ('>', '>='):
+            if value > interval[0] or (value == interval[0] and op == '>'):
+                interval[0], interval[1] = value, op == '>='
+        elif value < interval[2] or (value == interval[2] and op == '<'):
+            interval[2], interval[3] = value, op == '<='
+
+    def interval(self, ident: Optional[str]) -> Optional[Interval]:
+        bounds = self.ranges.get(ident)
+        return tuple(bounds) if bounds else None
+
+
+def _empty(interval: Interval) -> bool:
+    low, low_closed, high, high_closed = interval
+    return low > high or (low == high and not (low_closed and high_closed))
+
+
+def _contains_point(interval: Interval, point) -> bool:
+    low, low_closed, high, high_closed = interval
+    if point < low or (point == low and not low_closed):
+        return False
+    return point < high or (point == high and high_closed)
+
+
+def _contains_gap(interval: Interval, left, right) -> bool:
+    """开区间 (left, right) 是否整体落在 interval 内（端点都取自区间端点，不会部分重叠）"""
+    return interval[0] <= left and right <= interval[2]
+
+
+def _bucket(rules: List[Tuple[Optional[Interval], str]]) -> tuple:
+    """
+    为一个分桶预先计算每个区间段的命中回复
+    :param rules: 按分支顺序排列的 (区间, 回复)，区间为 None 表示不约束
+    :return: (端点列表, 各区间段的回复, 区间标识符缺失时的回复)
+    """
+    points = sorted({bound for interval, _ in rules if interval
+                     for bound in (interval[0], interval[2]) if -math.inf < bound < math.inf})
+    # 区间段 2i 为 (points[i-1], points[i])，2i+1 为端点 points[i]
+    segments = []
+    for i in range(len(points) + 1):
+        left = points[i - 1] if i else -math.inf
+        right = points[i] if i < len(points) else math.inf
+        segments.append((False, left, right))
+        if i < len(points):
+            segments.append((True, right, right))
+    winners = []
+    for is_point, left, right in segments:
+        winner = None
+        for interval, reply in rules:
+            if interval is None or (_contains_point(interval, left) if is_point
+                                    else _contains_gap(interval, left, right)):
+                winner = reply
+                break
+        winners.append(winner)
+    missing = next((reply for interval, reply in rules if interval is None), None)
+    return tuple(points), tuple(winners), missing
+
+
+def tabulate(blocks: IfBlocksNode) -> Optional[DecisionTableNode]:
+    """把符合形状的 IF 链编译为决策表，不符合时返回 None"""
+    conditions = [blocks.if_block.condition] + [block.condition for block in blocks.else_if_blocks]
+    replies = [blocks.if_block.reply] + [block.reply for block in blocks.else_if_blocks]
+    if len(conditions) < MIN_BRANCHES:
+        return None
+    try:
+        branches = [_Branch(condition) for condition in conditions]
+    except _Unsupported:
+        return None
+
+    keys = sorted({ident for branch in branches for ident in branch.equals})
+    range_idents = {ident for branch in branches for ident in branch.ranges}
+    if not 0 < len(keys) <= MAX_KEYS or len(range_idents) > 1 or range_idents & set(keys):
+        return None
+    if any(len(branch.equals) != len(keys) for branch in branches if not branch.dead):
+        return None  # 每个分支都必须约束全部键
+    range_ident = next(iter(range_idents), None)
+
+    rules: Dict[tuple, List[Tuple[Optional[Interval], str]]] = {}
+    entries = 0
+    for branch, reply in zip(branches, replies):
+        interval = branch.interval(range_ident)
+        if branch.dead or (interval is not None and _empty(interval)):
+            continue
+        value_sets = [branch.equals[ident] for ident in keys]
+        entries += math.prod(len(values) for values in value_sets)
+        if entries > MAX_ENTRIES:
+            return None
+        for key in product(*value_sets):
+            rules.setdefault(key, []).append((interval, reply))
+
+    buckets = {key: _bucket(bucket_rules) for key, bucket_rules in rules.items()}
+    range_key = (range_ident, LAYOUT.slot(range_ident)) if range_ident else None
+    return DecisionTableNode(blocks, tuple((ident, LAYOUT.slot(ident)) for ident in keys), range_key,
+                             buckets, blocks.else_block.reply if blocks.else_block else None)
@@ -0,0 +1,302 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .ast_nodes import ScriptNode
+from .compiler import compile_script
+from .artifacts import load_or_compile
+from .optimizer import OptimizedScript, optimize
+
+# 脚本头部：SCENE xxx / ON_INTENT xxx（不必完整解析即可建立索引）
+HEADER_PATTERN = re.compile(r'^\s*(SCENE|ON_INTENT)\s+(\S+)', re.M)
+
+# 通用场景的脚本不参与“仅按类别”的匹配
+GENERIC_SCENE = '通用'
+
+
+def read_header(source: str) -> Tuple[Optional[str], Optional[str]]:
+    """读取脚本头部的 (SCENE, ON_INTENT)"""
+    header = {}
+    for keyword, value in HEADER_PATTERN.findall(source):
+        header.setdefault(keyword, value)
+    return header.get('SCENE'), header.get('ON_INTENT')
+
+
+class CompiledScript:
+    """预编译的 DSL 脚本：源码、AST 及其版本信息"""
+    def __init__(self, name: Optional[str], source: str, ast: Optional[ScriptNode],
+                 path: Optional[str] = None, stat_key: Optional[Tuple[int, int]] = None):
+        self.name = name
+        self.source = source
+        self.ast = ast
+        self.path = path
+        self.stat_key = stat_key  # (mtime_ns, size)，用于热加载时判断文件是否变化
+        self.artifact_status = None  # 编译产物状态：hit / missing / stale / corrupt，未启用产物时为 None
+        self.version = hashlib.sha1(source.encode('utf-8')).hexdigest()[:12]
+        if ast:
+            self.scene, self.intent = ast.scene.name, ast.intent.name
+        else:
+            self.scene, self.intent = read_header(source)
+        self._optimized = None
+        self.reordered: Dict[int, ScriptNode] = {}  # id(AST) -> 按分支命中率重排后的 AST
+
+    @property
+    def facts(self) -> Dict[str, str]:
+        """执行该脚本时可能成立的事实：意图与 ON_INTENT 一致，专属场景脚本的类别与 SCENE 一致"""
+        facts = {'intent': self.intent}
+        if self.scene != GENERIC_SCENE:
+            facts['scene'] = self.scene
+        return facts
+
+    @property
+    def optimized(self) -> Optional[OptimizedScript]:
+        """按事实优化后的脚本（首次使用时生成）"""
+        if self._optimized is None and self.ast is not None:
+            self._optimized = optimize(self.ast, self.facts)
+        return self._optimized
+
+    def ast_for(self, sym_tbl) -> ScriptNode:
+        """事实成立时返回优化后的 AST，否则返回原始 AST"""
+        ast = self.ast
+        optimized = self.optimized
+        if optimized is not None and optimized.applies(sym_tbl):
+            ast = optimized.ast
+        return self.reordered.get(id(ast), ast) if self.reordered else ast
+
+
+class RegistrySnapshot:
+    """注册表的不可变快照：脚本表与索引整体替换，读者始终看到一致的版本"""
+    def __init__(self, scripts: Dict[str, CompiledScript], generation: int = 0):
+        self.scripts = scripts
+        self.generation = generation
+        self.index: Dict[Tuple[str, str], str] = {}
+        self.intent_index: Dict[str, str] = {}
+        self.scene_index: Dict[str, str] = {}
+        for name in sorted(scripts):
+            entry = scripts[name]
+            if (entry.intent, entry.scene) in self.index:
+                print(f"DSL脚本重复注册 ({entry.intent}, {entry.scene})，忽略: {name}")
+                continue
+            self.index[(entry.intent, entry.scene)] = name
+            # 意图默认脚本优先选择通用场景
+            if entry.scene == GENERIC_SCENE or entry.intent not in self.intent_index:
+                self.intent_index[entry.intent] = name
+            if entry.scene != GENERIC_SCENE:
+                self.scene_index.setdefault(entry.scene, name)
+
+
+class DSLRegistry:
+    """
+    意图感知的 DSL 脚本注册表
+    启动时扫描脚本目录，读取每个脚本的 SCENE/ON_INTENT 头部，预编译全部脚本，
+    并按 (intent, scene) 建立索引，供 DSLManager.select_dsl_script O(1) 分发。
+    支持热加载：后台轮询目录，只重新编译有变化的文件，校验通过后整体替换快照；
+    编译失败的脚本不会替换正在使用的旧版本。
+    """
+    def __init__(self, directory: str, compile_fn: Callable[[str], ScriptNode] = compile_script,
+                 max_workers: int = 4, source_cache_size: int = 256, parallel_compile: bool = False,
+                 artifact_dir: Optional[str] = None):
+        self.directory = directory
+        self.artifact_dir = artifact_dir  # 编译产物目录；为 None 时每次启动都重新解析
+        self.compile_fn = compile_fn
+        self.parallel_compile = parallel_compile
+        self.max_workers = max_workers
+        self.source_cache_size = source_cache_size
+        self._snapshot = RegistrySnapshot({})
+        self.report = {'scripts': 0, 'compiled': [], 'failed': {}, 'artifacts': {}, 'elapsed_ms': 0.0}
+        # 编译失败文件的 stat，文件未再变化时不重复编译
+        self._failed_stats: Dict[str, Tuple[int, int]] = {}
+        # 源码文本 -> 编译结果（同一份源码只编译一次）
+        self._by_source: Dict[str, CompiledScript] = {}
+        # PLY 解析器为全局单例，非线程安全：除非声明可并行，否则编译串行进行
+        self._compile_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    @property
+    def scripts(self) -> Dict[str, CompiledScript]:
+        return self._snapshot.scripts
+
+    @property
+    def generation(self) -> int:
+        return self._snapshot.generation
+
+    def _stat(self, name: str) -> Tuple[str, Tuple[int, int]]:
+        path = os.path.join(self.directory, name)
+        st = os.stat(path)
+        return path, (st.st_mtime_ns, st.st_size)
+
+    def _read(self, name: str) -> Tuple[str, str, Tuple[int, int]]:
+        path, stat_key = self._stat(name)
+        with open(path, 'r', encoding='utf-8') as f:
+            return path, f.read(), stat_key
+
+    def _compile(self, source: str) -> ScriptNode:
+        if self.parallel_compile:
+            return self.compile_fn(source)
+        with self._compile_lock:
+            return self.compile_fn(source)
+
+    def _list_scripts(self) -> List[str]:
+        try:
+            return sorted(n for n in os.listdir(self.directory) if n.endswith('.dsl'))
+        except FileNotFoundError:
+            print(f"DSL脚本目录不存在: {self.directory}")
+            return []
+
+    def _compile_entry(self, name: str, path: str, source: str,
+                       stat_key: Tuple[int, int]) -> CompiledScript:
+        """编译并校验单个脚本，失败时抛出异常"""
+        artifact_status = None
+        try:
+            if self.artifact_dir:
+                ast, artifact_status = load_or_compile(name, source, self.artifact_dir, self._compile)
+            else:
+                ast = self._compile(source)
+        except Exception as e:
+            scene, intent = read_header(source)
+            raise SyntaxError(f"[{intent}/{scene}] {e}") from e
+        entry = CompiledScript(name, source, ast, path, stat_key)
+        entry.artifact_status = artifact_status
+        return entry
+
+    def load_all(self) -> Dict:
+        """扫描目录并预编译全部脚本，返回启动报告"""
+        start = time.perf_counter()
+        names = self._list_scripts()
+
+        def load_one(name):
+            path, source, stat_key = self._read(name)
+            try:
+                return self._compile_entry(name, path, source, stat_key), None, stat_key
+            except SyntaxError as e:
+                return None, str(e), stat_key
+
+        # 文件读取与编译在线程池中进行；PLY 后端由编译锁保证串行
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            results = list(pool.map(load_one, names))
+
+        scripts, compiled, failed, artifacts = {}, [], {}, {}
+        for name, (entry, error, stat_key) in zip(names, results):
+            if entry is None:
+                failed[name] = error
+                self._failed_stats[name] = stat_key
+                continue
+            scripts[name] = entry
+            self._by_source[entry.source] = entry
+            compiled.append(name)
+            if entry.artifact_status:
+                artifacts[entry.artifact_status] = artifacts.get(entry.artifact_status, 0) + 1
+
+        self._snapshot = RegistrySnapshot(scripts, self._snapshot.generation + 1)
+        self.report = {
+            'scripts': len(names),
+            'compiled': compiled,
+            'failed': failed,
+            'artifacts': artifacts,
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 3),
+        }
+        return self.report
+
+    def reload_changed(self) -> Dict:
+        """
+        增量重新加载：只编译 stat 或内容发生变化的文件。
+        新版本编译成功后才会替换旧版本；正在执行的请求持有旧 AST，不受影响。
+        """
+        with self._reload_lock:
+            current = self._snapshot.scripts
+            scripts = dict(current)
+            result = {'reloaded': [], 'added': [], 'removed': [], 'failed': {}}
+            names = self._list_scripts()
+
+            for name in names:
+                try:
+                    path, stat_key = self._stat(name)
+                except FileNotFoundError:
+                    continue
+                old = current.get(name)
+                if old is not None and old.stat_key == stat_key:
+                    continue
+                if self._failed_stats.get(name) == stat_key:
+                    continue
+                try:
+                    path, source, stat_key = self._read(name)
+                except (FileNotFoundError, UnicodeDecodeError) as e:
+                    result['failed'][name] = str(e)
+                    continue
+                if old is not None and old.source == source:
+                    old.stat_key = stat_key  # 仅修改时间变化（如 touch），无需重新编译
+                    continue
+                try:
+                    entry = self._compile_entry(name, path, source, stat_key)
+                except SyntaxError as e:
+                    # 坏脚本不替换正在使用的版本
+                    result['failed'][name] = str(e)
+                    self._failed_stats[name] = stat_key
+                    print(f"DSL脚本热加载失败，继续使用旧版本 {name}: {e}")
+                    continue
+                self._failed_stats.pop(name, None)
+                scripts[name] = entry
+                self._by_source[source] = entry
+                result['reloaded' if old is not None else 'added'].append(name)
+
+            for name in set(current) - set(names):
+                del scripts[name]
+                result['removed'].append(name)
+
+            if result['reloaded'] or result['added'] or result['removed']:
+                # 原子替换：一次赋值同时更新脚本表与全部索引
+                self._snapshot = RegistrySnapshot(scripts, self._snapshot.generation + 1)
+                print(f"DSL脚本热加载完成: {result}")
+            return result
+
+    def start_watching(self, interval: float = 1.0) -> None:
+        """启动后台线程，按固定间隔检查脚本目录的变化"""
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._stop_event.clear()
+
+        def watch():
+            while not self._stop_event.wait(interval):
+                try:
+                    self.reload_changed()
+                except Exception as e:
+                    print(f"DSL脚本目录检查异常: {e}")
+
+        self._watcher = threading.Thread(target=watch, name='dsl-hot-reload', daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop_event.set()
+        if self._watcher:
+            self._watcher.join()
+            self._watcher = None
+
+    def lookup(self, intent: str, scene: str) -> Optional[str]:
+        """按 (意图, 场景) -> 意图 -> 场景 的顺序查找脚本名"""
+        snapshot = self._snapshot
+        name = snapshot.index.get((intent, scene))
+        if name:
+            return name
+        name = snapshot.intent_index.get(intent)
+        if name:
+            return name
+        return snapshot.scene_index.get(scene)
+
+    def get(self, name: str) -> Optional[CompiledScript]:
+        return self._snapshot.scripts.get(name)
+
+    def compile_source(self, source: str) -> CompiledScript:
+        """按源码文本取得编译结果，未命中时编译并缓存"""
+        entry = self._by_source.get(source)
+        if entry is None:
+            if len(self._by_source) >= self.source_cache_size:
+                self._by_source = {e.source: e for e in self.scripts.values()}
+            entry = CompiledScript(None, source, self._compile(source))
+            self._by_source[source] = entry
+        return entry
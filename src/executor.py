@@ -1,10 +1,16 @@
+from bisect import bisect_left
+
 from .ast_nodes import *
+from .symbols import SymbolTable
 from typing import Dict, Union
 
 class ASTExecutor:
     def __init__(self, symbol_table: Dict):
         self.sym_tbl = symbol_table
+        # 槽位化符号表：条件按编译时分配的槽位直接取值，普通 dict 仍按名称查找
+        self.slots = symbol_table.slots() if isinstance(symbol_table, SymbolTable) else None
         self.reply = None
+        self.memo = {}  # 公共子表达式（SharedNode）的求值结果，每次请求一个执行器
 
     def execute(self, node: ASTNode) -> Dict:
         """执行AST节点"""
@@ -12,12 +18,24 @@ class ASTExecutor:
             return self._execute_script(node)
         elif isinstance(node, IfBlocksNode):
             return self._execute_if_blocks(node)
+        elif isinstance(node, GuardedIfBlocksNode):
+            return self._execute_guarded(node)
+        elif isinstance(node, DecisionTableNode):
+            return self._execute_decision_table(node)
         elif isinstance(node, BinaryOpNode):
             return self._execute_binary_op(node)
         elif isinstance(node, CompareNode):
             return self._execute_compare(node)
         elif isinstance(node, ExistsNode):
             return self._execute_exists(node)
+        elif isinstance(node, InNode):
+            return self._execute_in(node)
+        elif isinstance(node, BetweenNode):
+            return self._execute_between(node)
+        elif isinstance(node, ConstNode):
+            return node.value
+        elif isinstance(node, SharedNode):
+            return self._execute_binary_op(node)
         else:
             raise ValueError(f"未知节点类型: {type(node)}")
 
@@ -45,38 +63,114 @@ class ASTExecutor:
         if node.else_block:
             self.reply = node.else_block.reply
 
+    def _execute_guarded(self, node: GuardedIfBlocksNode) -> None:
+        # 重排只在任何条件都不会抛出异常时与原顺序等价：排序比较的取值必须是可比较的类型，IN 的取值必须可哈希
+        slots = self.slots
+        sym_get = self.sym_tbl.get
+        for ident, slot, types in node.guards:
+            value = slots[slot] if slots is not None else sym_get(ident)
+            if value is not None and type(value) not in types:
+                return self._execute_if_blocks(node.original)
+        return self._execute_if_blocks(node.reordered)
+
+    def _execute_decision_table(self, node: DecisionTableNode) -> None:
+        # 查表只在任何条件都不会抛出异常时与逐个求值等价：区间取值必须是数值，键取值必须可哈希
+        slots = self.slots
+        sym_get = self.sym_tbl.get
+        value = None
+        if node.range_key is not None:
+            ident, slot = node.range_key
+            value = slots[slot] if slots is not None else sym_get(ident)
+            if value is not None and (type(value) not in (int, float, bool) or value != value):
+                return self._execute_if_blocks(node.original)
+        key = []
+        for ident, slot in node.keys:
+            item = slots[slot] if slots is not None else sym_get(ident)
+            if item is not None and type(item) not in (str, int, float, bool):
+                return self._execute_if_blocks(node.original)
+            key.append(item)
+
+        bucket = node.buckets.get(tuple(key))
+        reply = None
+        if bucket is not None:
+            points, winners, missing = bucket
+            if value is None:
+                reply = missing
+            else:
+                index = bisect_left(points, value)
+                reply = winners[2 * index + 1 if index < len(points) and points[index] == value else 2 * index]
+        self.reply = reply if reply is not None else node.else_reply
+
     def _execute_binary_op(self, node: BinaryOpNode) -> bool:
-        # left 和 right 都是ASTNode，需要递归执行, 保存着expression的值
-        left_val = self.execute(node.left)
-        right_val = self.execute(node.right)
-        
-        if node.op == 'AND':
-            return left_val and right_val
-        elif node.op == 'OR':
-            return left_val or right_val
-        return False
+        # left 和 right 都需要求值（保持原有的非短路语义），使用显式栈代替递归，
+        # 超长的 AND/OR 链或深层括号不会触发 Python 递归深度限制
+        slots = self.slots
+        sym_get = self.sym_tbl.get
+        memo = self.memo
+        stack = [node]
+        values = []
+        while stack:
+            item = stack.pop()
+            if isinstance(item, BinaryOpNode):
+                stack.append(item.op)
+                stack.append(item.right)
+                stack.append(item.left)
+            elif isinstance(item, str):
+                right_val = values.pop()
+                left_val = values.pop()
+                if item == 'AND':
+                    values.append(left_val and right_val)
+                elif item == 'OR':
+                    values.append(left_val or right_val)
+                else:
+                    values.append(False)
+            elif isinstance(item, SharedNode):
+                value = memo.get(item.index)
+                if value is None:
+                    stack.append(item.index)  # 子表达式求值完成后写入缓存
+                    stack.append(item.node)
+                else:
+                    values.append(value)
+            elif isinstance(item, int):
+                memo[item] = values[-1]
+            elif isinstance(item, ConstNode):
+                values.append(item.value)
+            # 叶子节点内联求值（与 _execute_compare / _execute_exists 一致），省去方法调用
+            elif isinstance(item, CompareNode):
+                left = slots[item.slot] if slots is not None else sym_get(item.ident)
+                values.append(False if left is None else item.fn(left, item.value))
+            elif isinstance(item, ExistsNode):
+                value = slots[item.slot] if slots is not None else sym_get(item.ident)
+                values.append(value is not None and value != "")
+            elif isinstance(item, InNode):
+                value = slots[item.slot] if slots is not None else sym_get(item.ident)
+                values.append(value is not None and value in item.values)
+            elif isinstance(item, BetweenNode):
+                value = slots[item.slot] if slots is not None else sym_get(item.ident)
+                values.append(value is not None and item.low <= value <= item.high)
+            else:
+                raise ValueError(f"未知节点类型: {type(item)}")
+        return values[0]
 
     def _execute_compare(self, node: CompareNode) -> bool:
-        left = self.sym_tbl.get(node.ident)
-        right = node.value
-        
+        slots = self.slots
+        left = slots[node.slot] if slots is not None else self.sym_tbl.get(node.ident)
         if left is None:
             return False
-            
-        if node.op == '<=':
-            return left <= right
-        elif node.op == '>=':
-            return left >= right
-        elif node.op == '<':
-            return left < right
-        elif node.op == '>':
-            return left > right
-        elif node.op == '==':
-            return left == right
-        elif node.op == '!=':
-            return left != right
-        return False
+        # 比较函数已在解析时由运算符确定
+        return node.fn(left, node.value)
 
     def _execute_exists(self, node: ExistsNode) -> bool:
-        value = self.sym_tbl.get(node.ident)
-        return value is not None and value != ""
\ No newline at end of file
+        slots = self.slots
+        value = slots[node.slot] if slots is not None else self.sym_tbl.get(node.ident)
+        return value is not None and value != ""
+
+    def _execute_in(self, node: InNode) -> bool:
+        # 一次哈希查找，等价于 ident == v1 OR ident == v2 ...
+        value = self.slots[node.slot] if self.slots is not None else self.sym_tbl.get(node.ident)
+        return value is not None and value in node.values
+
+    def _execute_between(self, node: BetweenNode) -> bool:
+        # 一次链式比较，等价于 ident >= low AND ident <= high（类型不匹配同样抛出 TypeError）
+        value = self.slots[node.slot] if self.slots is not None else self.sym_tbl.get(node.ident)
+        return value is not None and node.low <= value <= node.high
@@ -0,0 +1,408 @@
+"""
+执行解释与逐节点剖析：记录脚本中每个节点的求值次数、累计耗时、结果（命中的分支 / 条件真假）与读取的符号值
+
+    Explainer         按节点收集统计；一次请求用一个新的 Explainer 即为单次解释，回放时复用同一个即为聚合统计
+    ExplainExecutor   记录统计的执行器，支持编译后的各种形式（优化后的 AST、公共子表达式、重排、决策表），
+                      执行结果与 ASTExecutor 完全相同
+    Explainer.trace   JSON 跟踪（节点树 + 统计）
+    Explainer.listing 带注释的脚本清单
+
+只在 DSL_EXPLAIN=1 或 DSLManager.explain() 时使用 ExplainExecutor，关闭时执行路径仍是 ASTExecutor，没有额外开销。
+耗时包含记录统计本身的开销，只适合比较节点之间的相对耗时。
+
+命令行回放（聚合统计）：python -m src.explain 脚本.dsl 请求记录.jsonl [--json]
+"""
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from .ast_nodes import *
+from .executor import ASTExecutor
+
+# 每个标识符最多分别统计的不同取值个数，其余取值合并计数
+MAX_DISTINCT_VALUES = 10
+OTHER_VALUES = '<其他>'
+
+# IF 链的结果：命中的分支下标（0 为 IF，其后为 ELSE IF，最后为 ELSE），都未命中时为 NO_BRANCH
+NO_BRANCH = -1
+
+CONDITIONS = (BinaryOpNode, SharedNode, CompareNode, ExistsNode, InNode, BetweenNode, ConstNode)
+
+
+def _value_key(value):
+    return value if value is None or type(value) in (str, int, float, bool) else repr(value)
+
+
+class NodeProfile:
+    """一个节点的统计"""
+    __slots__ = ('count', 'seconds', 'outcomes', 'reads')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.outcomes = Counter()
+        self.reads: Dict[str, Counter] = {}  # 标识符 -> 取值计数
+
+    def add_read(self, ident: str, value) -> None:
+        values = self.reads.setdefault(ident, Counter())
+        key = _value_key(value)
+        if key not in values and len(values) >= MAX_DISTINCT_VALUES:
+            key = OTHER_VALUES
+        values[key] += 1
+
+    def to_dict(self) -> Dict:
+        return {'count': self.count, 'total_ms': round(self.seconds * 1000, 4),
+                'outcomes': dict(self.outcomes),
+                'reads': {ident: dict(values) for ident, values in self.reads.items()}}
+
+
+class Explainer:
+    """逐节点统计（线程安全，复合查询的并行子查询可以共用一个）"""
+    def __init__(self):
+        self.profiles: Dict[ASTNode, NodeProfile] = {}
+        self.scripts: Dict[int, ScriptNode] = {}  # 执行过的脚本（按执行顺序）
+        self._lock = threading.Lock()
+
+    def record(self, node: ASTNode, seconds: float, outcome=None, reads: tuple = ()) -> None:
+        """记录一次求值；reads 为 ((标识符, 取值), ...)"""
+        with self._lock:
+            profile = self.profiles.get(node)
+            if profile is None:
+                profile = self.profiles[node] = NodeProfile()
+                if isinstance(node, ScriptNode):
+                    self.scripts[id(node)] = node
+            profile.count += 1
+            profile.seconds += seconds
+            if outcome is not None:
+                profile.outcomes[outcome] += 1
+            for ident, value in reads:
+                profile.add_read(ident, value)
+
+    def profile(self, node: ASTNode) -> NodeProfile:
+        """节点的统计（未执行过的节点返回空统计）"""
+        return self.profiles.get(node) or NodeProfile()
+
+    def prune(self, asts: Iterable[ScriptNode]) -> int:
+        """丢弃不属于 asts 的脚本与节点统计（热加载后旧 AST 随之释放），返回丢弃的节点数"""
+        live = {node for ast in asts for node in iter_nodes(ast)}
+        with self._lock:
+            stale = [node for node in self.profiles if node not in live]
+            for node in stale:
+                del self.profiles[node]
+            self.scripts = {key: script for key, script in self.scripts.items() if script in live}
+        return len(stale)
+
+    def trace(self, ast: Optional[ScriptNode] = None) -> List[Dict]:
+        """JSON 跟踪：给出 ast 时只输出该脚本，否则输出所有执行过的脚本"""
+        scripts = [ast] if ast is not None else list(self.scripts.values())
+        return [self._trace_node(script) for script in scripts]
+
+    def to_json(self, ast: Optional[ScriptNode] = None) -> str:
+        return json.dumps(self.trace(ast), ensure_ascii=False, indent=2)
+
+    def listing(self, ast: Optional[ScriptNode] = None) -> str:
+        """带注释的脚本清单：每个分支、每个条件后附上统计"""
+        scripts = [ast] if ast is not None else list(self.scripts.values())
+        lines = []
+        for script in scripts:
+            lines.append(f"SCENE {script.scene.name}")
+            lines.append(f"ON_INTENT {script.intent.name}{self._note(script)}")
+            self._list_blocks(script.if_blocks, lines, '')
+            lines.append('')
+        return '\n'.join(lines).rstrip('\n')
+
+    def _trace_node(self, node: ASTNode) -> Dict:
+        entry = {'node': type(node).__name__.replace('Node', '')}
+        if isinstance(node, ScriptNode):
+            entry.update(scene=node.scene.name, intent=node.intent.name)
+        elif isinstance(node, CONDITIONS):
+            entry['expr'] = expression(node)
+        entry.update(self.profile(node).to_dict())
+        if isinstance(node, ScriptNode):
+            entry['body'] = self._trace_node(node.if_blocks)
+        elif isinstance(node, (GuardedIfBlocksNode, DecisionTableNode)):
+            entry['original'] = self._trace_node(node.original)
+            if isinstance(node, GuardedIfBlocksNode):
+                entry['reordered'] = self._trace_node(node.reordered)
+        elif isinstance(node, IfBlocksNode):
+            entry['outcomes'] = {branch_label(node, index): count for index, count in entry['outcomes'].items()}
+            entry['branches'] = [{'branch': branch_label(node, index), 'reply': block.reply,
+                                  'condition': self._trace_node(block.condition)}
+                                 for index, block in enumerate([node.if_block] + node.else_if_blocks)]
+            if node.else_block:
+                entry['branches'].append({'branch': 'ELSE', 'reply': node.else_block.reply})
+        elif isinstance(node, BinaryOpNode):
+            entry['children'] = [self._trace_node(node.left), self._trace_node(node.right)]
+        elif isinstance(node, SharedNode):
+            entry['children'] = [self._trace_node(node.node)]
+        return entry
+
+    def _list_blocks(self, node: ASTNode, lines: List[str], indent: str) -> None:
+        if isinstance(node, GuardedIfBlocksNode):
+            lines.append(f"{indent}# 按命中率重排的 IF 链{self._note(node)}")
+            lines.append(f"{indent}# 重排后的顺序：")
+            self._list_blocks(node.reordered, lines, indent + '    ')
+            lines.append(f"{indent}# 原顺序：")
+            self._list_blocks(node.original, lines, indent + '    ')
+            return
+        if isinstance(node, DecisionTableNode):
+            lines.append(f"{indent}# 决策表{self._note(node)}")
+            self._list_blocks(node.original, lines, indent)
+            return
+        lines.append(f"{indent}# IF 链{self._note(node)}")
+        for index, block in enumerate([node.if_block] + node.else_if_blocks):
+            lines.append(f"{indent}{'IF' if index == 0 else 'ELSE IF'} {expression(block.condition)}"
+                         f"{self._condition_note(block.condition)}")
+            if isinstance(_unshared(block.condition), BinaryOpNode):
+                self._list_parts(block.condition, lines, indent + '    ')
+            lines.append(f"{indent}    REPLY {_first_line(block.reply)}")
+        if node.else_block:
+            lines.append(f"{indent}ELSE")
+            lines.append(f"{indent}    REPLY {_first_line(node.else_block.reply)}")
+
+    def _list_parts(self, node: ASTNode, lines: List[str], indent: str) -> None:
+        """复合条件的每个子条件单独一行注释"""
+        stack = [(node, 0)]
+        while stack:
+            item, depth = stack.pop()
+            if item is not node:
+                lines.append(f"{indent}#{'  ' * depth} {expression(item)}{self._condition_note(item, inline=False)}")
+            item = _unshared(item)
+            if isinstance(item, BinaryOpNode):
+                stack.extend(((item.right, depth + 1), (item.left, depth + 1)))
+
+    def _condition_note(self, node: ASTNode, inline: bool = True) -> str:
+        """公共子表达式在各处共用同一份统计：显示内部节点的统计与复用次数"""
+        if not isinstance(node, SharedNode):
+            return self._note(node, inline)
+        note = self._note(node.node, inline)
+        if node in self.profiles:
+            reused = self.profiles[node].count - self.profile(node.node).count
+            note += f"，公共子表达式（各处合计，复用{reused}次）"
+        return note
+
+    def _note(self, node: ASTNode, inline: bool = True) -> str:
+        profile = self.profiles.get(node)
+        if profile is None:
+            return '    # 未执行' if inline else '  未执行'
+        parts = [f"{profile.count}次", f"{profile.seconds * 1000:.3f}ms"]
+        if isinstance(node, IfBlocksNode):
+            parts.append('命中 ' + ' '.join(f"{branch_label(node, index)}×{count}"
+                                            for index, count in sorted(profile.outcomes.items())))
+        elif profile.outcomes:
+            parts.append(' '.join(f"{_outcome_label(outcome)}×{count}"
+                                  for outcome, count in profile.outcomes.most_common()))
+        for ident, values in profile.reads.items():
+            parts.append(f"{ident}=" + ','.join(f"{json.dumps(value, ensure_ascii=False)}×{count}"
+                                                 for value, count in values.most_common()))
+        return ('    # ' if inline else '  ') + '，'.join(parts)
+
+
+def branch_label(blocks: IfBlocksNode, index: int) -> str:
+    if index == NO_BRANCH:
+        return '未命中'
+    if index == 0:
+        return 'IF'
+    if index <= len(blocks.else_if_blocks):
+        return f'ELSE IF {index}'
+    return 'ELSE'
+
+
+def _outcome_label(outcome) -> str:
+    if outcome is True:
+        return '真'
+    if outcome is False:
+        return '假'
+    return str(outcome)
+
+
+def _first_line(reply: Optional[str]) -> str:
+    text = json.dumps(reply if reply is not None else '', ensure_ascii=False)
+    head, _, rest = text.partition('\\n')
+    return head + ('…"' if rest else '')
+
+
+def _unshared(node: ASTNode) -> ASTNode:
+    return node.node if isinstance(node, SharedNode) else node
+
+
+def _literal(value) -> str:
+    return json.dumps(value, ensure_ascii=False) if isinstance(value, str) else repr(value)
+
+
+def expression(node: ASTNode) -> str:
+    """
+    条件的脚本写法（迭代实现）：AND/OR 不分优先级、右结合，
+    左操作数为复合条件、或右操作数的运算符与本层不同时加括号
+    """
+    stack, values = [node], []
+    while stack:
+        item = stack.pop()
+        if isinstance(item, BinaryOpNode):
+            right = _unshared(item.right)
+            stack.append((item.op, isinstance(_unshared(item.left), BinaryOpNode),
+                          isinstance(right, BinaryOpNode) and right.op != item.op))
+            stack.append(item.right)
+            stack.append(item.left)
+        elif isinstance(item, tuple):
+            op, wrap_left, wrap_right = item
+            right = values.pop()
+            left = values.pop()
+            values.append(f"{f'({left})' if wrap_left else left} {op} {f'({right})' if wrap_right else right}")
+        elif isinstance(item, SharedNode):
+            stack.append(item.node)
+        elif isinstance(item, CompareNode):
+            values.append(f"{item.ident} {item.op} {_literal(item.value)}")
+        elif isinstance(item, ExistsNode):
+            values.append(item.ident)
+        elif isinstance(item, InNode):
+            values.append(f"{item.ident} IN ({', '.join(_literal(v) for v in item.items)})")
+        elif isinstance(item, BetweenNode):
+            values.append(f"{item.ident} BETWEEN {_literal(item.low)} AND {_literal(item.high)}")
+        elif isinstance(item, ConstNode):
+            values.append('<恒真>' if item.value else '<恒假>')
+        else:
+            raise ValueError(f"未知节点类型: {type(item)}")
+    return values[0]
+
+
+class ExplainExecutor(ASTExecutor):
+    """逐节点记录统计的执行器"""
+    def __init__(self, symbol_table: Dict, explainer: Explainer):
+        super().__init__(symbol_table)
+        self.explainer = explainer
+
+    def execute(self, node: ASTNode) -> Dict:
+        if isinstance(node, CONDITIONS):
+            return self._condition(node)
+        return super().execute(node)
+
+    def _read(self, ident: str, slot: int):
+        return self.slots[slot] if self.slots is not None else self.sym_tbl.get(ident)
+
+    def _execute_script(self, node: ScriptNode) -> Dict:
+        start = time.perf_counter()
+        result = super()._execute_script(node)
+        self.explainer.record(node, time.perf_counter() - start)
+        return result
+
+    def _execute_if_blocks(self, node: IfBlocksNode) -> None:
+        start = time.perf_counter()
+        branch = NO_BRANCH
+        for index, block in enumerate([node.if_block] + node.else_if_blocks):
+            if self._condition(block.condition):
+                self.reply = block.reply
+                branch = index
+                break
+        else:
+            if node.else_block:
+                self.reply = node.else_block.reply
+                branch = len(node.else_if_blocks) + 1
+        self.explainer.record(node, time.perf_counter() - start, branch)
+
+    def _execute_guarded(self, node: GuardedIfBlocksNode) -> None:
+        start = time.perf_counter()
+        before = self.explainer.profile(node.original).count
+        super()._execute_guarded(node)
+        # 取值类型不适合重排时回到原顺序执行
+        outcome = '原顺序' if self.explainer.profile(node.original).count > before else '重排'
+        self.explainer.record(node, time.perf_counter() - start, outcome)
+
+    def _execute_decision_table(self, node: DecisionTableNode) -> None:
+        start = time.perf_counter()
+        before = self.explainer.profile(node.original).count
+        super()._execute_decision_table(node)
+        outcome = '原IF链' if self.explainer.profile(node.original).count > before else '查表'
+        keys = node.keys + ((node.range_key,) if node.range_key is not None else ())
+        reads = tuple((ident, self._read(ident, slot)) for ident, slot in keys)
+        self.explainer.record(node, time.perf_counter() - start, outcome, reads)
+
+    def _condition(self, node: ASTNode) -> bool:
+        """逐节点求值条件并记录（与 _execute_binary_op 相同：AND/OR 两侧都求值，显式栈代替递归）"""
+        clock = time.perf_counter
+        record = self.explainer.record
+        memo = self.memo
+        stack = [node]
+        values = []
+        while stack:
+            item = stack.pop()
+            if isinstance(item, tuple):
+                # (复合节点, 开始时刻)：子节点已求值完成
+                done, start = item
+                if isinstance(done, BinaryOpNode):
+                    right_val = values.pop()
+                    left_val = values.pop()
+                    if done.op == 'AND':
+                        values.append(left_val and right_val)
+                    elif done.op == 'OR':
+                        values.append(left_val or right_val)
+                    else:
+                        values.append(False)
+                else:
+                    memo[done.index] = values[-1]
+                record(done, clock() - start, bool(values[-1]))
+            elif isinstance(item, BinaryOpNode):
+                stack.append((item, clock()))
+                stack.append(item.right)
+                stack.append(item.left)
+            elif isinstance(item, SharedNode):
+                start = clock()
+                value = memo.get(item.index)
+                if value is None:
+                    stack.append((item, start))
+                    stack.append(item.node)
+                else:
+                    values.append(value)
+                    record(item, clock() - start, bool(value))
+            elif isinstance(item, ConstNode):
+                values.append(item.value)
+                record(item, 0.0, bool(item.value))
+            else:
+                start = clock()
+                if isinstance(item, CompareNode):
+                    value = self._execute_compare(item)
+                elif isinstance(item, ExistsNode):
+                    value = self._execute_exists(item)
+                elif isinstance(item, InNode):
+                    value = self._execute_in(item)
+                elif isinstance(item, BetweenNode):
+                    value = self._execute_between(item)
+                else:
+                    raise ValueError(f"未知节点类型: {type(item)}")
+                elapsed = clock() - start
+                values.append(value)
+                record(item, elapsed, bool(value), ((item.ident, self._read(item.ident, item.slot)),))
+        return values[0]
+
+
+def replay(ast: ScriptNode, records: Iterable[Dict], explainer: Optional[Explainer] = None) -> Explainer:
+    """对每条请求记录（符号表）执行脚本，返回聚合统计"""
+    explainer = explainer or Explainer()
+    for record in records:
+        ExplainExecutor(record, explainer).execute(ast)
+    return explainer
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from .compiler import compile_script
+
+    argv = argv if argv is not None else sys.argv[1:]
+    as_json = '--json' in argv
+    paths = [arg for arg in argv if arg != '--json']
+    if len(paths) != 2:
+        print("用法: python -m src.explain 脚本.dsl 请求记录.jsonl [--json]")
+        return 2
+    with open(paths[0], encoding='utf-8') as f:
+        ast = compile_script(f.read())
+    with open(paths[1], encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    explainer = replay(ast, records)
+    print(explainer.to_json(ast) if as_json else explainer.listing(ast))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,309 @@
+"""
+近似匹配索引：按字符三元组（trigram）相似度查找商品型号与品牌
+
+    TrigramIndex    通用索引：键归一化（小写、去空格与标点）后拆成字符三元组建倒排表，
+                    每个倒排表按键的三元组个数分桶；查询按 Dice 系数 2|Q∩C|/(|Q|+|C|) 排序。
+                    长度过滤：相似度不低于 t 的键长度 c 在 [t·|Q|/(2-t), (2-t)·|Q|/t] 内，只查这些分桶；
+                    逐个长度做前缀过滤：长度为 c 的键至少共享 m = ⌈t·(|Q|+c)/2⌉ 个三元组，
+                    因此在该长度最稀有的 |Q|-m+2 个分桶中至少出现两次（集合运算求出，不逐键计数），
+                    再在其余分桶中二分查找补全共享数（补不够的候选提前淘汰）；
+                    查询时阈值由高到低逐级放宽，高阈值下前缀更短、候选更少；
+                    每次查询的工作量取决于各长度分桶中最稀有的几个，与整个倒排表的长度无关
+    CatalogIndex    商品目录上的型号索引与品牌索引，供价格/库存查询在精确匹配失败时兜底
+"""
+import math
+import re
+import struct
+from array import array
+from bisect import bisect_left
+from typing import Dict, Generic, Hashable, List, Optional, Sequence, Tuple, TypeVar
+
+# 低于该相似度的候选不返回
+DEFAULT_MIN_SIMILARITY = 0.5
+# 查询时逐级放宽的相似度阈值
+SEARCH_THRESHOLDS = (0.8, 0.65)
+
+# 索引镜像头部：魔数、键数、三元组数、分桶数、镜像总长度、11 个数据段的偏移
+_FROZEN_MAGIC = b'DSLTRI02'
+_FROZEN_HEADER = struct.Struct('<8s4Q11Q')
+
+_IGNORED = re.compile(r'[\s\-_·.,，。/]+')
+_NO_BUCKETS: Dict[int, Sequence[int]] = {}
+_EMPTY = array('I')
+V = TypeVar('V', bound=Hashable)
+
+# 一个三元组的倒排表：键的三元组个数 -> 递增的键编号
+Buckets = Dict[int, Sequence[int]]
+
+
+def normalize(text: str) -> str:
+    """归一化：小写并去掉空格与常见标点（"iPhone 15 Pro" 与 "iphone15pro" 相同）"""
+    return _IGNORED.sub('', text.lower())
+
+
+def trigrams(text: str) -> frozenset:
+    """归一化文本的字符三元组集合，首尾补边界符，长度为 n 的文本有 n 个三元组"""
+    padded = f'\x02{text}\x03'
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _size_range(q: int, t: float) -> Tuple[int, int]:
+    """相似度不低于 t 的键的三元组个数范围：2·min(q, c)/(q+c) >= t"""
+    return math.ceil(t * q / (2 - t) - 1e-9), int((2 - t) * q / t + 1e-9)
+
+
+class TrigramIndex(Generic[V]):
+    """字符三元组倒排索引：键 -> 值列表"""
+    def __init__(self):
+        self._ids: Dict[str, int] = {}                   # 归一化键 -> 键编号
+        self._values: List[List[V]] = []                 # 键编号 -> 值
+        self._sizes = array('H')                         # 键编号 -> 三元组个数
+        self._postings: Dict[str, Dict[int, array]] = {}  # 三元组 -> {三元组个数: 递增的键编号}
+
+    def add(self, key: str, value: V) -> None:
+        text = normalize(key)
+        if not text:
+            return
+        key_id = self._ids.get(text)
+        if key_id is None:
+            key_id = self._ids[text] = len(self._values)
+            self._values.append([])
+            grams = trigrams(text)
+            size = min(len(grams), 0xFFFF)
+            self._sizes.append(size)
+            for gram in grams:
+                buckets = self._postings.get(gram)
+                if buckets is None:
+                    buckets = self._postings[gram] = {}
+                posting = buckets.get(size)
+                if posting is None:
+                    posting = buckets[size] = array('I')
+                posting.append(key_id)
+        self._values[key_id].append(value)
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    # 索引存储的访问接口（FrozenTrigramIndex 改为从共享缓冲区读取）
+    def _key_id(self, text: str) -> Optional[int]:
+        return self._ids.get(text)
+
+    def _buckets(self, gram: str) -> Buckets:
+        return self._postings.get(gram, _NO_BUCKETS)
+
+    def _values_of(self, key_id: int) -> Sequence[V]:
+        return self._values[key_id]
+
+    def search(self, query: str, limit: int = 1,
+               min_similarity: float = DEFAULT_MIN_SIMILARITY) -> List[Tuple[V, float]]:
+        """
+        查找与 query 最相似的键
+        :return: [(值, 相似度)]，按相似度降序，最多 limit 个键的值
+        """
+        text = normalize(query)
+        if not text:
+            return []
+        exact = self._key_id(text)
+        if exact is not None and limit == 1:
+            return [(value, 1.0) for value in self._values_of(exact)]
+
+        grams = trigrams(text)
+        buckets = [self._buckets(gram) for gram in grams]
+        # 阈值由高到低逐级放宽：高阈值下候选更少，找够 limit 个键就不再放宽
+        scored = []
+        for threshold in [t for t in SEARCH_THRESHOLDS if t > min_similarity] + [min_similarity]:
+            scored = self._candidates(buckets, min(max(threshold, 1e-6), 1.0))
+            if len(scored) >= limit:
+                break
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [(value, round(score, 4)) for score, key_id in scored[:limit] for value in self._values_of(key_id)]
+
+    def _candidates(self, buckets: List[Buckets], t: float) -> List[Tuple[float, int]]:
+        """
+        相似度不低于 t 的全部键，返回 [(相似度, 键编号)]
+        :param buckets: 查询各三元组的分桶倒排表
+        """
+        q = len(buckets)
+        low, high = _size_range(q, t)
+        scored = []
+        for size in range(max(low, 1), high + 1):
+            # 长度为 size 的键至少共享 need 个三元组，最多缺少 q-need 个
+            need = math.ceil(t * (q + size) / 2 - 1e-9)
+            if need > min(q, size):
+                continue
+            postings = sorted((bucket.get(size, _EMPTY) for bucket in buckets), key=len)
+            # 前缀过滤：在最稀有的 prefix 个倒排表中至少出现 overlap 次（前缀多取一个表时为 2 次）
+            prefix = min(q, q - need + 2)
+            overlap = prefix - (q - need)
+            seen, repeated = set(), set()
+            for posting in postings[:prefix]:
+                if overlap > 1:
+                    repeated |= seen.intersection(posting)
+                seen.update(posting)
+            pool = repeated if overlap > 1 else seen
+            if not pool:
+                continue
+            counts = dict.fromkeys(pool, 0)
+            for posting in postings[:prefix]:
+                for key_id in pool.intersection(posting):
+                    counts[key_id] += 1
+            # 其余倒排表按长度递增逐个二分查找补全共享数，剩余表都命中也不够的候选立即淘汰
+            remaining = q - prefix
+            candidates = [(key_id, count) for key_id, count in counts.items() if count + remaining >= need]
+            for posting in postings[prefix:]:
+                if not candidates:
+                    break
+                remaining -= 1
+                survivors = []
+                for key_id, count in candidates:
+                    i = bisect_left(posting, key_id)
+                    if i < len(posting) and posting[i] == key_id:
+                        count += 1
+                    if count + remaining >= need:
+                        survivors.append((key_id, count))
+                candidates = survivors
+            scored.extend((2 * count / (q + size), key_id) for key_id, count in candidates)
+        return scored
+
+
+def _gram_code(gram: str) -> int:
+    """三元组编码为一个 63 位整数（每个字符的码位不超过 21 位）"""
+    return (ord(gram[0]) << 42) | (ord(gram[1]) << 21) | ord(gram[2])
+
+
+def _aligned(out: bytearray, data: bytes) -> int:
+    """按 8 字节对齐追加数据，返回数据的起始偏移"""
+    out.extend(b'\0' * (-len(out) % 8))
+    offset = len(out)
+    out.extend(data)
+    return offset
+
+
+def pack(index: TrigramIndex) -> bytes:
+    """
+    把索引序列化为连续的只读镜像（值必须是非负整数，如商品在目录中的位置），
+    FrozenTrigramIndex 可以直接在该镜像（共享内存、mmap 文件）上查询，不复制数据
+    """
+    keys = [''] * len(index._ids)
+    for text, key_id in index._ids.items():
+        keys[key_id] = text
+    encoded = [key.encode('utf-8') for key in keys]
+    gram_codes = sorted((_gram_code(gram), gram) for gram in index._postings)
+    # 三元组 -> 分桶区间，分桶 -> (三元组个数, 倒排表区间)
+    gram_offsets, bucket_sizes, bucket_offsets, postings = array('I', [0]), array('H'), array('I', [0]), array('I')
+    for _, gram in gram_codes:
+        for size, posting in sorted(index._postings[gram].items()):
+            postings.extend(posting)
+            bucket_sizes.append(size)
+            bucket_offsets.append(len(postings))
+        gram_offsets.append(len(bucket_sizes))
+    value_offsets, values = array('I', [0]), array('I')
+    for key_values in index._values:
+        values.extend(key_values)
+        value_offsets.append(len(values))
+    key_offsets = array('I', [0])
+    for data in encoded:
+        key_offsets.append(key_offsets[-1] + len(data))
+    key_order = array('I', sorted(range(len(keys)), key=encoded.__getitem__))
+
+    sections = [array('Q', [code for code, _ in gram_codes]), gram_offsets, bucket_sizes, bucket_offsets, postings,
+                index._sizes, value_offsets, values, key_order, key_offsets, b''.join(encoded)]
+    out = bytearray(_FROZEN_HEADER.size)
+    offsets = [_aligned(out, bytes(section)) for section in sections]
+    _FROZEN_HEADER.pack_into(out, 0, _FROZEN_MAGIC, len(keys), len(gram_codes), len(bucket_sizes), len(out),
+                             *offsets)
+    return bytes(out)
+
+
+class FrozenTrigramIndex(TrigramIndex[int]):
+    """只读索引：直接读取 pack() 生成的镜像（memoryview，零拷贝），查询结果与原索引相同"""
+    def __init__(self, buffer, offset: int = 0):
+        view = memoryview(buffer)[offset:]
+        magic, keys, grams, buckets, size, *offsets = _FROZEN_HEADER.unpack_from(view, 0)
+        if magic != _FROZEN_MAGIC:
+            raise ValueError('不是三元组索引镜像')
+        self.nbytes = size
+
+        def section(i: int, fmt: str, count: int) -> memoryview:
+            # 各段之间有对齐填充，按元素个数截取
+            return view[offsets[i]:offsets[i] + count * struct.calcsize(fmt)].cast(fmt)
+        self._gram_codes = section(0, 'Q', grams)
+        self._gram_offsets = section(1, 'I', grams + 1)
+        self._bucket_sizes = section(2, 'H', buckets)
+        self._bucket_offsets = section(3, 'I', buckets + 1)
+        self._all_postings = section(4, 'I', self._bucket_offsets[buckets])
+        self._sizes = section(5, 'H', keys)
+        self._value_offsets = section(6, 'I', keys + 1)
+        self._all_values = section(7, 'I', self._value_offsets[keys])
+        self._key_order = section(8, 'I', keys)
+        self._key_offsets = section(9, 'I', keys + 1)
+        self._key_blob = section(10, 'B', self._key_offsets[keys])
+
+    def add(self, key: str, value: int) -> None:
+        raise TypeError('FrozenTrigramIndex 是只读的')
+
+    def _key_text(self, key_id: int) -> bytes:
+        return bytes(self._key_blob[self._key_offsets[key_id]:self._key_offsets[key_id + 1]])
+
+    def _key_id(self, text: str) -> Optional[int]:
+        target = text.encode('utf-8')
+        low, high = 0, len(self._key_order)
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_text(self._key_order[middle]) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self._key_order) and self._key_text(self._key_order[low]) == target:
+            return self._key_order[low]
+        return None
+
+    def _buckets(self, gram: str) -> Buckets:
+        code = _gram_code(gram)
+        i = bisect_left(self._gram_codes, code)
+        if i == len(self._gram_codes) or self._gram_codes[i] != code:
+            return _NO_BUCKETS
+        sizes, offsets, postings = self._bucket_sizes, self._bucket_offsets, self._all_postings
+        return {sizes[b]: postings[offsets[b]:offsets[b + 1]]
+                for b in range(self._gram_offsets[i], self._gram_offsets[i + 1])}
+
+    def _values_of(self, key_id: int) -> Sequence[int]:
+        return self._all_values[self._value_offsets[key_id]:self._value_offsets[key_id + 1]]
+
+
+class CatalogIndex:
+    """商品目录的型号/品牌近似匹配索引（目录变化后需重建）"""
+    def __init__(self, catalog: Sequence[Dict], min_similarity: float = DEFAULT_MIN_SIMILARITY,
+                 models: Optional[TrigramIndex[int]] = None, brands: Optional[TrigramIndex[int]] = None):
+        """两个索引的值都是商品在目录中的位置（品牌索引取该品牌第一个商品）；给出 models/brands 时直接使用"""
+        self.catalog = catalog
+        self.min_similarity = min_similarity
+        if models is None or brands is None:
+            models, brands = TrigramIndex(), TrigramIndex()
+            seen_brands = set()
+            for position, product in enumerate(catalog):
+                if product.get('model'):
+                    models.add(str(product['model']), position)
+                brand = product.get('brand')
+                if brand and brand not in seen_brands:
+                    seen_brands.add(brand)
+                    brands.add(brand, position)
+        self.models = models
+        self.brands = brands
+
+    def best_product(self, model: str, category: Optional[str] = None) -> Optional[Tuple[Dict, float]]:
+        """与型号最相似、且属于 category 的商品（最相似的不在该类别时再看前几名）"""
+        for limit in (1, 8):
+            for position, score in self.models.search(model, limit, self.min_similarity):
+                product = self.catalog[position]
+                if category is None or product.get('category') == category:
+                    return product, score
+        return None
+
+    def best_brand(self, brand: str) -> Optional[Tuple[str, float]]:
+        """与输入最相似的品牌名"""
+        matches = self.brands.search(brand, 1, self.min_similarity)
+        if not matches:
+            return None
+        position, score = matches[0]
+        return self.catalog[position]['brand'], score
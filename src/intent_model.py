@@ -0,0 +1,342 @@
+"""
+蒸馏意图分类器：用记录下来的 LLM 意图识别结果离线训练的字符 n-gram 朴素贝叶斯模型
+
+训练数据为 JSONL，每行一条 recognize_intent 的输入输出对：
+    {"input": "小米14多少钱", "output": {"intent": "商品查询", "category": "手机", "params": {...}}}
+
+训练与评估：
+    python -m src.intent_model train --log intent_log.jsonl --out intent_nb.json
+    python -m src.intent_model evaluate --model intent_nb.json --log heldout.jsonl
+"""
+import argparse
+import json
+import math
+import random
+import sys
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MODEL_FORMAT_VERSION = 1
+
+
+def normalize_text(text: str) -> str:
+    return text.lower().replace(' ', '').strip()
+
+
+def char_ngrams(text: str, n_min: int = 1, n_max: int = 3) -> List[str]:
+    """提取字符 n-gram（首尾加边界符 ^ $）"""
+    padded = f"^{normalize_text(text)}$"
+    grams = []
+    for n in range(n_min, n_max + 1):
+        for i in range(len(padded) - n + 1):
+            grams.append(padded[i:i + n])
+    return grams
+
+
+def append_intent_log(path: str, user_input: str, output: Optional[Dict]) -> None:
+    """向训练日志追加一条 recognize_intent 输入输出对"""
+    if not output:
+        return
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'input': user_input, 'output': output}, ensure_ascii=False) + '\n')
+
+
+def load_intent_log(path: str) -> List[Tuple[str, Dict]]:
+    """读取训练日志，跳过损坏或缺少输出的行"""
+    pairs = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            output = record.get('output')
+            if isinstance(output, dict) and record.get('input'):
+                pairs.append((record['input'], output))
+    return pairs
+
+
+class NaiveBayesHead:
+    """单个标签维度（intent 或 category）的多项式朴素贝叶斯"""
+    def __init__(self, labels: List[str], log_priors: List[float],
+                 log_likelihoods: Dict[str, List[float]], temperature: float = 1.0):
+        self.labels = labels
+        self.log_priors = log_priors
+        self.log_likelihoods = log_likelihoods
+        self.temperature = temperature
+
+    @classmethod
+    def fit(cls, grams_list: List[List[str]], labels: List[str],
+            alpha: float = 0.5, min_count: int = 1) -> 'NaiveBayesHead':
+        label_set = sorted(set(labels))
+        index = {label: i for i, label in enumerate(label_set)}
+        doc_counts = Counter(labels)
+        gram_counts = defaultdict(lambda: [0] * len(label_set))
+        totals = [0] * len(label_set)
+        vocab_counts = Counter()
+        for grams, label in zip(grams_list, labels):
+            k = index[label]
+            for gram in grams:
+                gram_counts[gram][k] += 1
+                totals[k] += 1
+                vocab_counts[gram] += 1
+
+        vocab = [g for g, c in vocab_counts.items() if c >= min_count]
+        vocab_size = len(vocab) + 1
+        denominators = [math.log(totals[k] + alpha * vocab_size) for k in range(len(label_set))]
+        log_likelihoods = {
+            g: [round(math.log(gram_counts[g][k] + alpha) - denominators[k], 5)
+                for k in range(len(label_set))]
+            for g in vocab
+        }
+        n_docs = len(labels)
+        log_priors = [round(math.log(doc_counts[label] / n_docs), 5) for label in label_set]
+        return cls(label_set, log_priors, log_likelihoods)
+
+    def log_scores(self, grams: List[str]) -> List[float]:
+        scores = list(self.log_priors)
+        for gram in grams:
+            row = self.log_likelihoods.get(gram)
+            if row is None:
+                continue  # 未登录 n-gram 不提供区分信息
+            for k, value in enumerate(row):
+                scores[k] += value
+        return scores
+
+    def predict_proba(self, grams: List[str], temperature: Optional[float] = None) -> List[float]:
+        t = temperature if temperature is not None else self.temperature
+        scores = [s / t for s in self.log_scores(grams)]
+        top = max(scores)
+        exps = [math.exp(s - top) for s in scores]
+        total = sum(exps)
+        return [e / total for e in exps]
+
+    def predict(self, grams: List[str]) -> Tuple[str, float]:
+        probs = self.predict_proba(grams)
+        k = max(range(len(probs)), key=probs.__getitem__)
+        return self.labels[k], probs[k]
+
+    def calibrate(self, grams_list: List[List[str]], labels: List[str]) -> float:
+        """温度缩放：在校准集上网格搜索使负对数似然最小的温度"""
+        index = {label: i for i, label in enumerate(self.labels)}
+        scored = [(self.log_scores(g), index.get(label)) for g, label in zip(grams_list, labels)]
+        scored = [(s, k) for s, k in scored if k is not None]
+        if not scored:
+            return self.temperature
+
+        def nll(t: float) -> float:
+            total = 0.0
+            for scores, k in scored:
+                scaled = [s / t for s in scores]
+                top = max(scaled)
+                log_z = top + math.log(sum(math.exp(s - top) for s in scaled))
+                total -= scaled[k] - log_z
+            return total / len(scored)
+
+        candidates = [0.5 * 1.25 ** i for i in range(30)]
+        self.temperature = min(candidates, key=nll)
+        return self.temperature
+
+    def to_dict(self) -> Dict:
+        return {
+            'labels': self.labels,
+            'log_priors': self.log_priors,
+            'log_likelihoods': self.log_likelihoods,
+            'temperature': self.temperature,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'NaiveBayesHead':
+        # 旧模型文件中的 unseen 字段（未登录 n-gram 的对数似然）预测时不使用，读取时忽略
+        return cls(data['labels'], data['log_priors'], data['log_likelihoods'], data.get('temperature', 1.0))
+
+
+class DistilledIntentClassifier:
+    """
+    本地蒸馏意图分类器：预测 intent 与 category，并给出校准后的置信度
+    参数（品牌/型号/预算）复用规则预分类器的实体抽取
+    """
+    def __init__(self, intent_head: NaiveBayesHead, category_head: NaiveBayesHead,
+                 n_min: int = 1, n_max: int = 3, threshold: float = 0.9):
+        self.intent_head = intent_head
+        self.category_head = category_head
+        self.n_min = n_min
+        self.n_max = n_max
+        self.threshold = threshold
+        self.entity_extractor = None
+
+    @classmethod
+    def train(cls, pairs: List[Tuple[str, Dict]], calibration_ratio: float = 0.2,
+              seed: int = 42, alpha: float = 0.5, min_count: int = 1,
+              n_min: int = 1, n_max: int = 3) -> 'DistilledIntentClassifier':
+        pairs = [(text, output) for text, output in pairs
+                 if isinstance(text, str) and normalize_text(text) and isinstance(output, dict)]
+        if not pairs:
+            raise ValueError("没有可用的训练数据：日志为空或全部记录无效")
+        random.Random(seed).shuffle(pairs)
+        n_calib = int(len(pairs) * calibration_ratio) if len(pairs) >= 10 else 0
+        calib, fit = pairs[:n_calib], pairs[n_calib:]
+
+        def columns(rows):
+            grams = [char_ngrams(text, n_min, n_max) for text, _ in rows]
+            intents = [str(out.get('intent', '其他')) for _, out in rows]
+            categories = [str(out.get('category', '无')) for _, out in rows]
+            return grams, intents, categories
+
+        grams, intents, categories = columns(fit)
+        intent_head = NaiveBayesHead.fit(grams, intents, alpha, min_count)
+        category_head = NaiveBayesHead.fit(grams, categories, alpha, min_count)
+        if calib:
+            c_grams, c_intents, c_categories = columns(calib)
+            intent_head.calibrate(c_grams, c_intents)
+            category_head.calibrate(c_grams, c_categories)
+        return cls(intent_head, category_head, n_min, n_max)
+
+    def predict(self, user_input: str) -> Tuple[str, float, str, float]:
+        grams = char_ngrams(user_input, self.n_min, self.n_max)
+        intent, p_intent = self.intent_head.predict(grams)
+        category, p_category = self.category_head.predict(grams)
+        return intent, p_intent, category, p_category
+
+    def classify(self, user_input: str) -> Optional[Dict]:
+        """返回与 LLM 相同格式的意图结果；置信度取 intent 与 category 中较低者"""
+        intent, p_intent, category, p_category = self.predict(user_input)
+        params = {}
+        if self.entity_extractor is not None:
+            text = normalize_text(user_input)
+            product, brand = self.entity_extractor.match_product(text)
+            budget = self.entity_extractor.extract_budget(text)
+            if brand:
+                params['品牌'] = brand
+            if product:
+                params['型号'] = product['model']
+            if budget is not None:
+                params['预算'] = budget
+        return {
+            'category': category,
+            'intent': intent,
+            'params': params,
+            'confidence': round(min(p_intent, p_category), 4),
+            'source': 'model',
+        }
+
+    def save(self, path: str) -> None:
+        data = {
+            'format_version': MODEL_FORMAT_VERSION,
+            'ngram_range': [self.n_min, self.n_max],
+            'threshold': self.threshold,
+            'intent': self.intent_head.to_dict(),
+            'category': self.category_head.to_dict(),
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path: str) -> 'DistilledIntentClassifier':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('format_version') != MODEL_FORMAT_VERSION:
+            raise ValueError(f"不支持的模型文件版本: {data.get('format_version')}")
+        n_min, n_max = data['ngram_range']
+        return cls(NaiveBayesHead.from_dict(data['intent']),
+                   NaiveBayesHead.from_dict(data['category']),
+                   n_min, n_max, data.get('threshold', 0.9))
+
+
+def evaluate(model: DistilledIntentClassifier, pairs: List[Tuple[str, Dict]],
+             thresholds: Iterable[float] = (0.5, 0.7, 0.8, 0.9, 0.95)) -> Dict:
+    """在留出数据上对比模型与 LLM 标签，输出准确率、覆盖率与校准误差"""
+    rows = []
+    for text, output in pairs:
+        intent, p_intent, category, p_category = model.predict(text)
+        rows.append({
+            'intent_ok': intent == str(output.get('intent', '其他')),
+            'category_ok': category == str(output.get('category', '无')),
+            'confidence': min(p_intent, p_category),
+            'p_intent': p_intent,
+        })
+    n = len(rows)
+    if n == 0:
+        return {'samples': 0}
+
+    per_threshold = []
+    for t in thresholds:
+        covered = [r for r in rows if r['confidence'] >= t]
+        both_ok = sum(1 for r in covered if r['intent_ok'] and r['category_ok'])
+        per_threshold.append({
+            'threshold': t,
+            'coverage': round(len(covered) / n, 4),
+            'accuracy': round(both_ok / len(covered), 4) if covered else None,
+        })
+
+    # 期望校准误差（ECE，10 个等宽分桶，基于 intent 置信度）
+    buckets = defaultdict(list)
+    for r in rows:
+        buckets[min(int(r['p_intent'] * 10), 9)].append(r)
+    ece = sum(
+        len(b) / n * abs(sum(r['p_intent'] for r in b) / len(b) - sum(r['intent_ok'] for r in b) / len(b))
+        for b in buckets.values())
+
+    return {
+        'samples': n,
+        'intent_accuracy': round(sum(r['intent_ok'] for r in rows) / n, 4),
+        'category_accuracy': round(sum(r['category_ok'] for r in rows) / n, 4),
+        'intent_ece': round(ece, 4),
+        'thresholds': per_threshold,
+    }
+
+
+def print_report(report: Dict) -> None:
+    print("===== 蒸馏意图分类器评估报告 =====")
+    print(f"留出样本数: {report['samples']}")
+    if not report['samples']:
+        return
+    print(f"intent 准确率: {report['intent_accuracy']:.2%}")
+    print(f"category 准确率: {report['category_accuracy']:.2%}")
+    print(f"intent 校准误差(ECE): {report['intent_ece']:.4f}")
+    print("阈值    覆盖率    覆盖样本准确率")
+    for row in report['thresholds']:
+        acc = f"{row['accuracy']:.2%}" if row['accuracy'] is not None else '-'
+        print(f"{row['threshold']:<7} {row['coverage']:<9.2%} {acc}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(description="蒸馏意图分类器训练/评估")
+    sub = arg_parser.add_subparsers(dest='command', required=True)
+
+    train_cmd = sub.add_parser('train', help='从 LLM 日志训练模型')
+    train_cmd.add_argument('--log', required=True, help='recognize_intent 输入输出日志 (JSONL)')
+    train_cmd.add_argument('--out', required=True, help='模型输出路径 (JSON)')
+    train_cmd.add_argument('--holdout', type=float, default=0.2, help='留出评估比例')
+    train_cmd.add_argument('--threshold', type=float, default=0.9, help='运行时跳过 LLM 的置信度阈值')
+    train_cmd.add_argument('--seed', type=int, default=42)
+
+    eval_cmd = sub.add_parser('evaluate', help='在日志数据上评估已有模型')
+    eval_cmd.add_argument('--model', required=True)
+    eval_cmd.add_argument('--log', required=True)
+
+    args = arg_parser.parse_args(argv)
+    pairs = load_intent_log(args.log)
+    if args.command == 'train':
+        random.Random(args.seed).shuffle(pairs)
+        n_holdout = int(len(pairs) * args.holdout)
+        holdout, train_pairs = pairs[:n_holdout], pairs[n_holdout:]
+        try:
+            model = DistilledIntentClassifier.train(train_pairs, seed=args.seed)
+        except ValueError as e:
+            print(f"训练失败: {e}")
+            return 1
+        model.threshold = args.threshold
+        model.save(args.out)
+        print(f"训练样本 {len(train_pairs)} 条，模型已写入 {args.out}")
+        print_report(evaluate(model, holdout))
+    else:
+        print_report(evaluate(DistilledIntentClassifier.load(args.model), pairs))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
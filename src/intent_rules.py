@@ -0,0 +1,139 @@
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .lexicon import CatalogLexicon
+
+# 默认关键词规则：按优先级排列（与 DSLManager.execute_dsl 中的意图覆盖顺序一致）
+DEFAULT_KEYWORD_RULES = [
+    ('库存查询', ['库存', '还剩', '有货', '存货']),
+    ('价格查询', ['多少钱', '价格', '价位']),
+    ('商品推荐', ['推荐', '想买', '适合', '买什么']),
+    ('自然沟通', ['你好', '您好', '谢谢', '聊天', '功能', '你是谁', '在吗']),
+]
+
+# 可以在一句话中同时出现、并发执行的意图（共享同一个商品实体）
+COMPOUND_INTENTS = ('价格查询', '库存查询')
+
+# 预算抽取：数字 + 元（如“3000元”、“1500.5 元”）
+BUDGET_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*元')
+
+
+class RuleIntentClassifier:
+    """
+    本地规则意图预分类器（在调用 LLM 之前运行）
+    组合关键词规则、商品目录的品牌/型号匹配以及“数字+元”的预算抽取，
+    产出与 LLM 相同格式的意图结果，并附带置信度 confidence。
+    置信度达到 threshold 时，DSLManager 直接使用该结果，跳过 LLM 调用。
+    """
+    def __init__(self, product_catalog: Sequence[Dict],
+                 keyword_rules: Optional[List[Tuple[str, List[str]]]] = None,
+                 threshold: float = 0.8, lexicon: Optional[CatalogLexicon] = None):
+        self.keyword_rules = keyword_rules or DEFAULT_KEYWORD_RULES
+        self.threshold = threshold
+        self.rebuild(product_catalog, lexicon)
+
+    def rebuild(self, product_catalog: Sequence[Dict], lexicon: Optional[CatalogLexicon] = None) -> None:
+        """
+        根据商品目录重建品牌/型号/类别匹配表（目录变更时调用）
+        :param lexicon: 已构建好的目录词表（DSLManager 与预分类器共用一份）；共享目录直接使用镜像中的词表
+        """
+        if lexicon is None:
+            shared = getattr(product_catalog, 'lexicon', None)
+            lexicon = shared() if shared else CatalogLexicon(product_catalog)
+        self.lexicon = lexicon
+        if hasattr(product_catalog, 'categories'):
+            categories = product_catalog.categories  # 共享目录的类别索引，不逐条解码商品
+        else:
+            categories = {p['category'] for p in product_catalog}
+        self.categories = sorted(categories, key=len, reverse=True)
+
+    def match_keyword_intent(self, text: str) -> Optional[str]:
+        """按优先级返回第一个命中关键词的意图"""
+        for intent, keywords in self.keyword_rules:
+            for keyword in keywords:
+                if keyword in text:
+                    return intent
+        return None
+
+    def match_keyword_intents(self, text: str) -> List[str]:
+        """命中关键词的全部意图，按关键词在输入中首次出现的位置排序（用于复合查询）"""
+        positions = {}
+        for intent, keywords in self.keyword_rules:
+            hits = [text.find(keyword) for keyword in keywords if keyword in text]
+            if hits:
+                positions[intent] = min(hits)
+        return sorted(positions, key=positions.get)
+
+    def match_product(self, text: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        匹配商品型号与品牌，返回 (命中的商品, 品牌)
+        最长的型号优先，保证“iPhone 15 Pro”优先于“iPhone 15”等较短的前缀；没有型号时取最长的品牌
+        """
+        product = self.lexicon.best_model(text)
+        if product:
+            return product, product['brand']
+        return None, self.lexicon.best_brand(text)
+
+    def brand_in_category(self, brand: str, category: Optional[str]) -> bool:
+        """该品牌在类别下是否有商品"""
+        return category in self.lexicon.categories_of(brand)
+
+    def match_category(self, text: str) -> Optional[str]:
+        for category in self.categories:
+            if category in text:
+                return category
+        return None
+
+    @staticmethod
+    def extract_budget(text: str) -> Optional[float]:
+        match = BUDGET_PATTERN.search(text)
+        return float(match.group(1)) if match else None
+
+    def classify(self, user_input: str) -> Optional[Dict]:
+        """
+        对用户输入做本地预分类
+        :return: 意图结果（含 intent/category/params/confidence），无法判断时返回 None
+        """
+        text = user_input.lower().replace(' ', '')
+        intent = self.match_keyword_intent(text)
+        if intent is None:
+            return None
+
+        product, brand = self.match_product(text)
+        budget = self.extract_budget(text)
+        category = product['category'] if product else self.match_category(text)
+
+        params = {}
+        if brand:
+            params['品牌'] = brand
+        if product:
+            params['型号'] = product['model']
+        if budget is not None:
+            params['预算'] = budget
+
+        if intent in ('库存查询', '价格查询'):
+            # 查询类意图的关键在于商品实体：命中型号最可靠，仅命中品牌次之
+            if product:
+                confidence = 0.95
+            elif brand:
+                confidence = 0.85
+            else:
+                confidence = 0.5
+        elif intent == '商品推荐':
+            # 推荐意图通常携带功能、用途等自由描述，规则无法完整抽取，默认交给 LLM
+            confidence = 0.6 if (category or brand) and budget is not None else 0.4
+        else:
+            # 自然沟通：只有在未提及任何商品实体时才可信
+            confidence = 0.9 if not (brand or category or budget is not None) else 0.3
+
+        result = {
+            'category': category or '通用',
+            'intent': intent,
+            'params': params,
+            'confidence': confidence,
+            'source': 'rules',
+        }
+        intents = [i for i in self.match_keyword_intents(text) if i in COMPOUND_INTENTS]
+        if len(intents) > 1:
+            result['intents'] = intents  # 复合查询：一句话同时查询价格与库存
+        return result
@@ -0,0 +1,191 @@
+"""
+库存查询：可替换的库存后端 + 读穿透缓存
+
+    InventoryBackend    后端接口：get_stock(skus) 一次批量查询，返回 {sku: 数量}，查不到的 sku 不出现在结果中
+    CatalogInventory    默认后端：按商品目录模拟库存（高端机型与热门食物缺货），结果确定；
+                        按 sku 建库存表（目录版本变化后重建），查询不扫描目录
+    FakeInventory       本地假后端：固定库存表 + 可配置延迟，供测试与基准测试使用
+    CachedInventory     读穿透缓存：短 TTL；查不到的 sku 同样缓存（负缓存）；多个线程同时查询同一个
+                        sku 时只向后端发一次请求，其余线程等待该请求的结果（请求合并）
+"""
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# CatalogInventory 中有货商品的模拟库存数量
+DEFAULT_STOCK = 100
+# 缓存的有效期（秒）：库存变化快，只缓存很短时间；查不到的 sku 变化更少，缓存更久
+DEFAULT_TTL = 2.0
+DEFAULT_NEGATIVE_TTL = 30.0
+
+
+def product_sku(product: Dict) -> str:
+    """商品的库存单位编号：目录中有 sku 字段时直接使用，否则由品牌与型号构成"""
+    return product.get('sku') or f"{product.get('brand')}:{product.get('model')}"
+
+
+class InventoryBackend:
+    """库存后端接口"""
+    # 结果是否会随时间变化；会变化时库存相关的回复不进入完整回复缓存
+    volatile = True
+
+    def get_stock(self, skus: List[str]) -> Dict[str, int]:
+        raise NotImplementedError
+
+
+class CatalogInventory(InventoryBackend):
+    """按商品目录模拟的库存（原 _process_stock_query 中的规则）"""
+    volatile = False
+
+    def __init__(self, catalog: Callable[[], List[Dict]], version: Optional[Callable[[], int]] = None):
+        """
+        :param catalog: 返回当前商品目录的函数，目录整体替换后仍然生效
+        :param version: 返回当前目录版本的函数（如 DSLManager.catalog_version），原地修改目录后据此重建库存表
+        """
+        self.catalog = catalog
+        self.version = version or (lambda: 0)
+        self._table: Optional[Tuple[object, int, Dict[str, int]]] = None  # (目录, 目录版本, sku -> 库存)
+
+    @staticmethod
+    def _stock_of(product: Dict) -> int:
+        # 模拟库存逻辑：高端机型（如 iPhone 15 Pro）或热门食物（如麻辣小龙虾）缺货
+        is_high_demand = product.get('budget', 0) > 8000 or product.get('model') == '麻辣小龙虾'
+        return 0 if is_high_demand else DEFAULT_STOCK
+
+    def _stock_table(self, catalog: List[Dict]) -> Dict[str, int]:
+        """sku -> 库存；同一 sku 对应多个商品时以目录中最后一个为准"""
+        table = self._table
+        version = self.version()
+        if table is None or table[0] is not catalog or table[1] != version:
+            table = self._table = (catalog, version, {product_sku(p): self._stock_of(p) for p in catalog})
+        return table[2]
+
+    def get_stock(self, skus: List[str]) -> Dict[str, int]:
+        wanted = set(skus)
+        catalog = self.catalog()
+        if hasattr(catalog, 'sku_positions'):
+            # 共享目录按镜像中的 sku 表只解码要查的商品
+            return {sku: self._stock_of(catalog[positions[-1]])
+                    for sku in wanted for positions in [catalog.sku_positions(sku)] if positions}
+        table = self._stock_table(catalog)
+        return {sku: table[sku] for sku in wanted if sku in table}
+
+
+class FakeInventory(InventoryBackend):
+    """固定库存表的假后端，每次批量查询耗时 latency 秒"""
+    def __init__(self, stock: Optional[Dict[str, int]] = None, latency: float = 0.0):
+        self.stock = dict(stock or {})
+        self.latency = latency
+        self.calls = 0       # 批量查询次数
+        self.requested = 0   # 累计查询的 sku 数
+        self._lock = threading.Lock()
+
+    def get_stock(self, skus: List[str]) -> Dict[str, int]:
+        with self._lock:
+            self.calls += 1
+            self.requested += len(skus)
+        if self.latency:
+            time.sleep(self.latency)
+        return {sku: self.stock[sku] for sku in skus if sku in self.stock}
+
+
+class _Pending:
+    """正在向后端查询的 sku，等待者在 done 上阻塞"""
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Optional[int] = None
+        self.error: Optional[BaseException] = None
+
+
+class CachedInventory(InventoryBackend):
+    """读穿透库存缓存（线程安全）"""
+    def __init__(self, backend: InventoryBackend, ttl: float = DEFAULT_TTL,
+                 negative_ttl: float = DEFAULT_NEGATIVE_TTL, max_entries: int = 100000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.backend = backend
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: Dict[str, tuple] = {}  # sku -> (数量或 None, 过期时间)
+        self._pending: Dict[str, _Pending] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @property
+    def volatile(self) -> bool:
+        return self.backend.volatile
+
+    def get_stock(self, skus: Iterable[str]) -> Dict[str, int]:
+        result: Dict[str, int] = {}
+        fetch: List[str] = []
+        waits: List[tuple] = []
+        with self._lock:
+            now = self.clock()
+            for sku in dict.fromkeys(skus):
+                entry = self._entries.get(sku)
+                if entry is not None and entry[1] > now:
+                    self.hits += 1
+                    if entry[0] is not None:
+                        result[sku] = entry[0]
+                    continue
+                pending = self._pending.get(sku)
+                if pending is not None:
+                    self.coalesced += 1  # 已有线程在查询该 sku，等待它的结果
+                    waits.append((sku, pending))
+                    continue
+                self.misses += 1
+                self._pending[sku] = _Pending()
+                fetch.append(sku)
+
+        if fetch:
+            result.update(self._fetch(fetch))
+        for sku, pending in waits:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            if pending.value is not None:
+                result[sku] = pending.value
+        return result
+
+    def _fetch(self, skus: List[str]) -> Dict[str, int]:
+        """一次批量查询后端，写入缓存并唤醒等待者"""
+        try:
+            stock = self.backend.get_stock(skus)
+        except BaseException as error:
+            with self._lock:
+                for sku in skus:
+                    pending = self._pending.pop(sku)
+                    pending.error = error
+                    pending.done.set()
+            raise
+        with self._lock:
+            now = self.clock()
+            if len(self._entries) + len(skus) > self.max_entries:
+                self._entries = {sku: entry for sku, entry in self._entries.items() if entry[1] > now}
+            for sku in skus:
+                value = stock.get(sku)
+                if len(self._entries) < self.max_entries:
+                    self._entries[sku] = (value, now + (self.ttl if value is not None else self.negative_ttl))
+                pending = self._pending.pop(sku)
+                pending.value = value
+                pending.done.set()
+        return {sku: stock[sku] for sku in skus if sku in stock}
+
+    def invalidate(self, skus: Optional[Iterable[str]] = None) -> None:
+        """使指定 sku（默认全部）的缓存失效"""
+        with self._lock:
+            if skus is None:
+                self._entries.clear()
+            else:
+                for sku in skus:
+                    self._entries.pop(sku, None)
+
+    def snapshot(self) -> Dict[str, object]:
+        """命中统计（供运行统计输出）"""
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses,
+                'coalesced': self.coalesced}
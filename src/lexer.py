@@ -1,8 +1,9 @@
 import ply.lex as lex
+from .ast_nodes import number_literal
 
 tokens = (
     # 关键字
-    'SCENE','ON_INTENT','IF','REPLY','AND','OR','ELSE',
+    'SCENE','ON_INTENT','IF','REPLY','AND','OR','ELSE','IN','BETWEEN',
     # 运算符
     'LE','GE','LT','GT','EQ','NE',
     # 标识符
@@ -10,7 +11,7 @@ tokens = (
     # 字符串和数字
     'NUMBER','STRING',
     # 其他符号
-    'LPAREN','RPAREN'
+    'LPAREN','RPAREN','COMMA'
 )
 
 # 关键字表
@@ -21,7 +22,9 @@ reserved = {
     'REPLY': 'REPLY',
     'AND': 'AND',
     'OR': 'OR',
-    'ELSE': 'ELSE'
+    'ELSE': 'ELSE',
+    'IN': 'IN',
+    'BETWEEN': 'BETWEEN'
 }
 
 # 正则规则
@@ -33,6 +36,7 @@ t_EQ = r'=='
 t_NE = r'!='
 t_LPAREN = r'\('
 t_RPAREN = r'\)'
+t_COMMA = r','
 
 def t_IDENT(t):
     r'[a-zA-Z_\u4e00-\u9fa5][a-zA-Z0-9_\u4e00-\u9fa5]*'
@@ -41,16 +45,17 @@ def t_IDENT(t):
 
 def t_STRING(t):
     r'\"([^\\\"]|\\.)*\"'
+    t.lexer.lineno += t.value.count('\n')  # 多行字符串
     t.value = t.value[1:-1]  # 去掉引号
     return t
 
 def t_NUMBER(t):
     r'\d+\.?\d*'
     try:
-        t.value = float(t.value)
+        t.value = number_literal(t.value)
     except ValueError:
-        print(f"Float conversion error: {t.value}")
-        t.value = 0.0
+        print(f"Number conversion error: {t.value}")
+        t.value = 0
     return t
 
 # 处理注释
@@ -58,7 +63,7 @@ def t_COMMENT(t):
     r'\#.*'
     pass  # 丢弃注释
 
-t_ignore = ' \t\r\n'
+t_ignore = ' \t\r'  # 换行由 t_newline 处理（计行号）
 
 def t_newline(t):
     r'\n+'
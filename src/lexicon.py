@@ -0,0 +1,249 @@
+"""
+商品目录词表：找出输入文本中出现的品牌与型号（精确子串匹配）
+
+    KeyTable          键 -> 商品位置（按目录顺序）；键为小写、去空格后的品牌或型号（或原样的 sku）
+    FrozenKeyTable    pack() 镜像上的只读键表（开放寻址哈希表，零拷贝读取），供共享目录使用
+    CatalogLexicon    型号表 + 品牌表 + 各品牌所在的类别
+
+查找时按表中出现过的键长度枚举输入的子串逐个查表，耗时只与输入长度有关，与目录大小无关。
+同一输入在一次请求中会被匹配多次（规则预分类、品牌兜底、商品兜底、回复缓存键），最近的结果缓存在词表上。
+"""
+import struct
+import zlib
+from array import array
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .fuzzy_index import _aligned
+
+# 没有对应商品时的位置
+NO_POSITION = -1
+# 缓存最近多少个输入的匹配结果
+SCAN_CACHE_SIZE = 256
+
+# 键表镜像头部：魔数、键数、槽数、位置总数、不同键长度数、镜像总长度、7 个数据段的偏移
+_KEY_MAGIC = b'DSLKEY01'
+_KEY_HEADER = struct.Struct('<8s5Q7Q')
+
+# 一次命中：(键, 首个商品位置, 原写法不含空格的首个商品位置)
+Hit = Tuple[str, int, int]
+
+
+def compact(text: str) -> str:
+    """匹配用的写法：小写并去掉空格"""
+    return text.lower().replace(' ', '')
+
+
+class KeyTable:
+    """内存中的键表"""
+    def __init__(self, normalize: Callable[[str], str] = compact):
+        self.normalize = normalize
+        self._entries: Dict[str, Tuple[List[int], List[int]]] = {}  # 键 -> ([商品位置], [原写法不含空格的首个位置])
+        self.lengths: Tuple[int, ...] = ()
+
+    def add(self, name: str, position: int) -> None:
+        """按目录顺序添加"""
+        key = self.normalize(name)
+        if not key:
+            return
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = ([], [NO_POSITION])
+            self.lengths = tuple(sorted(set(self.lengths) | {len(key)}))
+        entry[0].append(position)
+        if entry[1][0] == NO_POSITION and ' ' not in name:
+            entry[1][0] = position
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Tuple[int, int]]:
+        """(首个商品位置, 原写法不含空格的首个商品位置)"""
+        entry = self._entries.get(key)
+        return (entry[0][0], entry[1][0]) if entry is not None else None
+
+    def positions(self, key: str) -> Sequence[int]:
+        """键对应的全部商品位置（目录顺序）"""
+        entry = self._entries.get(key)
+        return entry[0] if entry is not None else ()
+
+    def items(self) -> Iterable[Tuple[str, Sequence[int], int]]:
+        """(键, 全部商品位置, 原写法不含空格的首个位置)"""
+        for key, (positions, unspaced) in self._entries.items():
+            yield key, positions, unspaced[0]
+
+    def find_all(self, text: str) -> List[Hit]:
+        """text（已 compact）中出现的全部键"""
+        hits = []
+        get = self.get
+        size = len(text)
+        for start in range(size):
+            for length in self.lengths:
+                if start + length > size:
+                    break
+                key = text[start:start + length]
+                entry = get(key)
+                if entry is not None:
+                    hits.append((key, entry[0], entry[1]))
+        return hits
+
+
+def pack(table: KeyTable) -> bytes:
+    """把键表序列化为开放寻址哈希表镜像（哈希为键 UTF-8 编码的 CRC32，线性探测）"""
+    keys = list(table.items())
+    slots = 1
+    while slots < 2 * len(keys) + 1:
+        slots *= 2
+    slot_ids = array('I', [0]) * slots  # 键编号 + 1，0 表示空槽
+    unspaced, position_offsets, positions = array('i'), array('I', [0]), array('I')
+    key_offsets, blob = array('I', [0]), bytearray()
+    for key_id, (key, key_positions, unspaced_position) in enumerate(keys):
+        data = key.encode('utf-8')
+        blob += data
+        key_offsets.append(len(blob))
+        positions.extend(key_positions)
+        position_offsets.append(len(positions))
+        unspaced.append(unspaced_position)
+        slot = zlib.crc32(data) & (slots - 1)
+        while slot_ids[slot]:
+            slot = (slot + 1) & (slots - 1)
+        slot_ids[slot] = key_id + 1
+    lengths = array('H', table.lengths)
+
+    sections = [slot_ids, unspaced, position_offsets, positions, key_offsets, bytes(blob), lengths]
+    out = bytearray(_KEY_HEADER.size)
+    offsets = [_aligned(out, bytes(section)) for section in sections]
+    _KEY_HEADER.pack_into(out, 0, _KEY_MAGIC, len(keys), slots, len(positions), len(lengths), len(out), *offsets)
+    return bytes(out)
+
+
+class FrozenKeyTable(KeyTable):
+    """只读键表：直接读取 pack() 生成的镜像"""
+    def __init__(self, buffer, offset: int = 0):
+        view = memoryview(buffer)[offset:]
+        magic, keys, slots, positions, lengths, size, *offsets = _KEY_HEADER.unpack_from(view, 0)
+        if magic != _KEY_MAGIC:
+            raise ValueError('不是词表镜像')
+        self.nbytes = size
+
+        def section(i: int, fmt: str, count: int) -> memoryview:
+            return view[offsets[i]:offsets[i] + count * struct.calcsize(fmt)].cast(fmt)
+        self._count = keys
+        self._mask = slots - 1
+        self._slot_ids = section(0, 'I', slots)
+        self._unspaced = section(1, 'i', keys)
+        self._position_offsets = section(2, 'I', keys + 1)
+        self._positions = section(3, 'I', positions)
+        self._key_offsets = section(4, 'I', keys + 1)
+        self._blob = section(5, 'B', self._key_offsets[keys])
+        self.lengths = tuple(section(6, 'H', lengths))
+
+    def add(self, name: str, position: int) -> None:
+        raise TypeError('FrozenKeyTable 是只读的')
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _find(self, key: str) -> int:
+        """键编号，不存在时返回 -1"""
+        data = key.encode('utf-8')
+        slot = zlib.crc32(data) & self._mask
+        while True:
+            key_id = self._slot_ids[slot] - 1
+            if key_id < 0:
+                return -1
+            if self._blob[self._key_offsets[key_id]:self._key_offsets[key_id + 1]] == data:
+                return key_id
+            slot = (slot + 1) & self._mask
+
+    def get(self, key: str) -> Optional[Tuple[int, int]]:
+        key_id = self._find(key)
+        if key_id < 0:
+            return None
+        return self._positions[self._position_offsets[key_id]], self._unspaced[key_id]
+
+    def positions(self, key: str) -> Sequence[int]:
+        key_id = self._find(key)
+        if key_id < 0:
+            return ()
+        return self._positions[self._position_offsets[key_id]:self._position_offsets[key_id + 1]]
+
+    def items(self) -> Iterable[Tuple[str, Sequence[int], int]]:
+        for key_id in range(self._count):
+            key = bytes(self._blob[self._key_offsets[key_id]:self._key_offsets[key_id + 1]]).decode('utf-8')
+            yield key, self._positions[self._position_offsets[key_id]:self._position_offsets[key_id + 1]], \
+                self._unspaced[key_id]
+
+
+def _longest(hits: List[Hit]) -> Optional[Hit]:
+    """最长的键；长度相同时取目录中靠前的"""
+    return min(hits, key=lambda hit: (-len(hit[0]), hit[1]), default=None)
+
+
+class CatalogLexicon:
+    """商品目录的品牌/型号词表（目录变化后需重建）"""
+    def __init__(self, catalog: Sequence[Dict], models: Optional[KeyTable] = None,
+                 brands: Optional[KeyTable] = None, brand_categories: Optional[Dict[str, List[str]]] = None):
+        """给出 models/brands/brand_categories 时直接使用（共享目录镜像），否则由 catalog 构建"""
+        self.catalog = catalog
+        if models is None or brands is None or brand_categories is None:
+            models, brands, categories = KeyTable(), KeyTable(), {}
+            for position, product in enumerate(catalog):
+                if product.get('model'):
+                    models.add(str(product['model']), position)
+                if product.get('brand'):
+                    brands.add(product['brand'], position)
+                    categories.setdefault(product['brand'], set()).add(product.get('category'))
+            brand_categories = {brand: sorted(c for c in values if c is not None)
+                                for brand, values in categories.items()}
+        self.models = models
+        self.brands = brands
+        self.brand_categories = brand_categories
+        self._scans: Dict[str, Tuple[List[Hit], List[Hit]]] = {}
+
+    def scan(self, text: str) -> Tuple[List[Hit], List[Hit]]:
+        """text（已 compact）中出现的全部型号与品牌"""
+        result = self._scans.get(text)
+        if result is None:
+            if len(self._scans) >= SCAN_CACHE_SIZE:
+                self._scans.clear()
+            result = self._scans[text] = (self.models.find_all(text), self.brands.find_all(text))
+        return result
+
+    def best_model(self, text: str) -> Optional[Dict]:
+        """出现在输入中的最长型号对应的商品（型号写法中的空格忽略）"""
+        hit = _longest(self.scan(text)[0])
+        return self.catalog[hit[1]] if hit else None
+
+    def best_brand(self, text: str) -> Optional[str]:
+        """出现在输入中的最长品牌（写法中的空格忽略）"""
+        hit = _longest(self.scan(text)[1])
+        return self.catalog[hit[1]]['brand'] if hit else None
+
+    def unspaced_brand_position(self, text: str) -> Optional[int]:
+        """出现在输入中的最长品牌（只看原写法不含空格的品牌）首个商品的位置，不解码商品"""
+        hit = _longest([(key, unspaced, unspaced) for key, _, unspaced in self.scan(text)[1]
+                        if unspaced != NO_POSITION])
+        return hit[1] if hit else None
+
+    def unspaced_brand(self, text: str) -> Optional[str]:
+        """出现在输入中的最长品牌，只看原写法不含空格的品牌"""
+        position = self.unspaced_brand_position(text)
+        return self.catalog[position]['brand'] if position is not None else None
+
+    def first_product(self, text: str) -> Optional[Tuple[int, bool]]:
+        """
+        目录中第一个型号或品牌（原写法不含空格）出现在输入中的商品
+        :return: (商品位置, 是否按型号匹配)；同一商品的型号优先于品牌
+        """
+        models, brands = self.scan(text)
+        by_model = min((unspaced for _, _, unspaced in models if unspaced != NO_POSITION), default=None)
+        by_brand = min((unspaced for _, _, unspaced in brands if unspaced != NO_POSITION), default=None)
+        if by_model is not None and (by_brand is None or by_model <= by_brand):
+            return by_model, True
+        if by_brand is not None:
+            return by_brand, False
+        return None
+
+    def categories_of(self, brand: str) -> List[str]:
+        """品牌有商品的类别"""
+        return self.brand_categories.get(brand, [])
@@ -0,0 +1,141 @@
+import json
+import time
+from collections import Counter, deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .deadline import expired
+
+# 下游 DSLManager 能处理的意图类型；其余（如“其他”）视为未知意图
+KNOWN_INTENTS = {'商品推荐', '商品查询', '价格查询', '库存查询', '自然沟通'}
+
+# 含有这些词的输入通常需要推理或比较，直接交给大模型
+COMPLEX_MARKERS = ['对比', '比较', '区别', '哪个好', '还是', '以及', '并且', '，', ',', '；', ';']
+
+
+def parse_llm_output(llm_output: str) -> Optional[Dict]:
+    """解析模型输出为意图字典，兼容 ```json 代码块包裹，失败返回 None"""
+    text = llm_output.strip()
+    if text.startswith('```'):
+        text = text.strip('`')
+        if text.startswith('json'):
+            text = text[4:]
+    try:
+        result = json.loads(text)
+    except (json.JSONDecodeError, TypeError):
+        return None
+    return result if isinstance(result, dict) else None
+
+
+class ModelTier:
+    """路由层级：名称 + 补全函数（输入用户文本，返回模型原始输出）"""
+    def __init__(self, name: str, complete: Callable[[str], str]):
+        self.name = name
+        self.complete = complete
+
+
+class ModelRouter:
+    """
+    成本/延迟感知的模型路由器
+    简单输入先发给小模型；当小模型输出无法解析为 JSON、意图未知或置信度过低时，升级到大模型。
+    复杂输入直接使用大模型。路由决策与各层级延迟都会被记录。
+    """
+    def __init__(self, small: ModelTier, large: ModelTier,
+                 simple_max_len: int = 20, min_confidence: float = 0.6,
+                 history_size: int = 1000, clock: Callable[[], float] = time.perf_counter):
+        self.small = small
+        self.large = large
+        self.simple_max_len = simple_max_len
+        self.min_confidence = min_confidence
+        self.clock = clock  # 计时函数（秒），测试中可注入假时钟
+        self.stats = {
+            'decisions': Counter(),
+            'escalation_reasons': Counter(),
+            'latency': {tier.name: {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+                        for tier in (small, large)},
+        }
+        # 最近的路由决策（有界，避免长时间运行时内存增长）
+        self.history = deque(maxlen=history_size)
+
+    def is_simple(self, user_input: str) -> bool:
+        text = user_input.strip()
+        if len(text) > self.simple_max_len:
+            return False
+        return not any(marker in text for marker in COMPLEX_MARKERS)
+
+    def escalation_reason(self, result: Optional[Dict]) -> Optional[str]:
+        """判断小模型结果是否需要升级，返回原因；无需升级时返回 None"""
+        if result is None:
+            return 'invalid_json'
+        if result.get('intent') not in KNOWN_INTENTS:
+            return 'unknown_intent'
+        confidence = result.get('confidence')
+        if confidence is None:
+            return None
+        # 模型可能把置信度写成字符串（如 "0.3"）；无法解析为数字时按置信度过低处理
+        try:
+            confidence = float(confidence)
+        except (TypeError, ValueError):
+            return 'low_confidence'
+        if not confidence >= self.min_confidence:  # NaN 同样视为过低
+            return 'low_confidence'
+        return None
+
+    def _call(self, tier: ModelTier, user_input: str) -> Tuple[Optional[Dict], float]:
+        start = self.clock()
+        try:
+            result = parse_llm_output(tier.complete(user_input))
+        except Exception as e:
+            print(f"模型[{tier.name}]调用异常：{str(e)}")
+            result = None
+        elapsed_ms = (self.clock() - start) * 1000
+
+        latency = self.stats['latency'][tier.name]
+        latency['calls'] += 1
+        latency['total_ms'] += elapsed_ms
+        latency['max_ms'] = max(latency['max_ms'], elapsed_ms)
+        return result, elapsed_ms
+
+    def route(self, user_input: str) -> Optional[Dict]:
+        """按路由策略识别意图"""
+        record = {'input_len': len(user_input), 'tiers': []}
+
+        if self.is_simple(user_input):
+            result, elapsed_ms = self._call(self.small, user_input)
+            record['tiers'].append((self.small.name, round(elapsed_ms, 3)))
+            reason = self.escalation_reason(result)
+            if reason is not None and expired():
+                # 请求已超过截止时间：不再升级到大模型，直接使用小模型的结果
+                self.stats['decisions']['deadline'] += 1
+                record['decision'] = 'deadline'
+                record['reason'] = reason
+                self.history.append(record)
+                return result
+            if reason is None:
+                self.stats['decisions']['small'] += 1
+                record['decision'] = 'small'
+                self.history.append(record)
+                return result
+            self.stats['decisions']['escalated'] += 1
+            self.stats['escalation_reasons'][reason] += 1
+            record['decision'] = 'escalated'
+            record['reason'] = reason
+        else:
+            self.stats['decisions']['large_direct'] += 1
+            record['decision'] = 'large_direct'
+
+        result, elapsed_ms = self._call(self.large, user_input)
+        record['tiers'].append((self.large.name, round(elapsed_ms, 3)))
+        self.history.append(record)
+        return result
+
+    def summary(self) -> Dict:
+        """路由统计摘要：决策分布、升级原因与各层级平均延迟"""
+        latency = {
+            name: {**data, 'avg_ms': round(data['total_ms'] / data['calls'], 3) if data['calls'] else 0.0}
+            for name, data in self.stats['latency'].items()
+        }
+        return {
+            'decisions': dict(self.stats['decisions']),
+            'escalation_reasons': dict(self.stats['escalation_reasons']),
+            'latency': latency,
+        }
@@ -0,0 +1,258 @@
+"""
+AST 优化：利用脚本自身的 ON_INTENT / SCENE 事实折叠常量、删除不可达分支，并合并重复的子表达式
+
+    常量折叠      以事实为已知值求值 intent == "自然沟通" 之类的比较，再化简 AND / OR
+    死分支删除    恒假分支、与前面分支条件相同的分支、恒真分支之后的全部分支
+    公共子表达式  在多个分支中重复出现的子表达式包装为 SharedNode，每次请求只求值一次
+    决策表        “等值键 + 数值区间”形状的 IF 链编译为哈希 + 二分查找（见 decision_table）
+
+脚本在注册表找不到匹配时会作为兜底执行（如自然沟通脚本处理任意意图），
+因此优化结果只在符号表满足事实时使用，否则仍执行原始 AST。
+
+执行器对 AND / OR 两侧都会求值，排序比较（<、>= 等）遇到类型不匹配会抛出 TypeError；
+可能抛出异常的子树永远不会因折叠而被删除，优化前后的回复与异常完全一致。
+
+统计报告：
+    python -m src.optimizer [脚本目录]
+"""
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from .ast_nodes import *
+from .decision_table import tabulate
+
+# 操作数类型不匹配时会抛出 TypeError 的比较运算符
+ORDERING_OPS = frozenset(('<', '<=', '>', '>='))
+
+TRUE = ConstNode(True)
+FALSE = ConstNode(False)
+
+# 折叠结果：(节点, 结构键, 是否可能抛出异常)
+Folded = Tuple[ASTNode, int, bool]
+
+
+class OptimizedScript:
+    """优化后的脚本及其成立条件（事实）与统计"""
+    def __init__(self, ast: ScriptNode, facts: Dict[str, str], stats: Dict[str, int]):
+        self.ast = ast
+        self.facts = facts
+        self.stats = stats
+
+    def applies(self, sym_tbl) -> bool:
+        """符号表中的事实与脚本头部一致时，才能执行优化后的 AST"""
+        return all(sym_tbl.get(name) == value for name, value in self.facts.items())
+
+
+class _Optimizer:
+    def __init__(self, facts: Dict[str, str]):
+        self.facts = facts
+        self.keys: Dict[tuple, int] = {}     # 结构 -> 结构键（哈希联合，避免构造深层元组）
+        self.node_keys: Dict[int, int] = {}  # id(节点) -> 结构键
+        self.stats = {'folded': 0, 'branches_removed': 0, 'duplicates_removed': 0,
+                      'shared': 0, 'shared_uses': 0, 'tabulated': 0}
+
+    def key(self, structure: tuple) -> int:
+        return self.keys.setdefault(structure, len(self.keys))
+
+    def result(self, node: ASTNode, structure: tuple, may_raise: bool) -> Folded:
+        key = self.key(structure)
+        self.node_keys[id(node)] = key
+        return node, key, may_raise
+
+    def const(self, value: bool) -> Folded:
+        return self.result(TRUE if value else FALSE, ('K', value), False)
+
+    def fold(self, root: ASTNode) -> Folded:
+        """后序遍历折叠条件表达式（显式栈，支持超深表达式）"""
+        stack, results = [(root, False)], []
+        while stack:
+            node, visited = stack.pop()
+            if isinstance(node, BinaryOpNode):
+                if not visited:
+                    stack.append((node, True))
+                    stack.append((node.right, False))
+                    stack.append((node.left, False))
+                    continue
+                right = results.pop()
+                left = results.pop()
+                results.append(self.combine(node, left, right))
+            else:
+                results.append(self.fold_leaf(node))
+        return results[0]
+
+    def fold_leaf(self, node: ASTNode) -> Folded:
+        if isinstance(node, CompareNode):
+            if node.ident in self.facts:
+                try:
+                    value = node.fn(self.facts[node.ident], node.value)
+                except TypeError:
+                    pass  # 运行时同样会抛出，保留原节点
+                else:
+                    self.stats['folded'] += 1
+                    return self.const(value)
+            return self.result(node, ('C', node.ident, node.op, type(node.value).__name__, node.value),
+                               node.op in ORDERING_OPS)
+        if isinstance(node, ExistsNode):
+            if node.ident in self.facts:
+                self.stats['folded'] += 1
+                fact = self.facts[node.ident]
+                return self.const(fact is not None and fact != "")
+            return self.result(node, ('E', node.ident), False)
+        if isinstance(node, InNode):
+            if node.ident in self.facts:
+                self.stats['folded'] += 1
+                return self.const(self.facts[node.ident] in node.values)
+            return self.result(node, ('I', node.ident, node.values), False)
+        if isinstance(node, BetweenNode):
+            if node.ident in self.facts:
+                try:
+                    value = node.low <= self.facts[node.ident] <= node.high
+                except TypeError:
+                    pass
+                else:
+                    self.stats['folded'] += 1
+                    return self.const(value)
+            return self.result(node, ('R', node.ident, type(node.low).__name__, node.low,
+                                      type(node.high).__name__, node.high), True)
+        if isinstance(node, ConstNode):
+            return self.const(node.value)
+        if isinstance(node, SharedNode):
+            return self.fold(node.node)
+        raise ValueError(f"未知节点类型: {type(node)}")
+
+    def combine(self, node: BinaryOpNode, left: Folded, right: Folded) -> Folded:
+        """化简 AND / OR：只有另一侧不会抛出异常时，才能用常量吸收它"""
+        left_node, left_key, left_raise = left
+        right_node, right_key, right_raise = right
+        left_const = left_node.value if isinstance(left_node, ConstNode) else None
+        right_const = right_node.value if isinstance(right_node, ConstNode) else None
+        if node.op in ('AND', 'OR'):
+            absorbing = node.op == 'OR'  # AND 的吸收元为 False，OR 为 True
+            if (left_const is absorbing and not right_raise) or (right_const is absorbing and not left_raise):
+                self.stats['folded'] += 1
+                return self.const(absorbing)
+            if left_const is (not absorbing):
+                self.stats['folded'] += 1
+                return right
+            if right_const is (not absorbing):
+                self.stats['folded'] += 1
+                return left
+        if left_node is not node.left or right_node is not node.right:
+            node = BinaryOpNode(left_node, node.op, right_node)
+        return self.result(node, ('B', node.op, left_key, right_key), left_raise or right_raise)
+
+    def eliminate(self, blocks: IfBlocksNode) -> Tuple[List[Tuple[ASTNode, int, str]], Optional[str], bool]:
+        """删除恒假、重复与恒真分支之后的分支，返回 (保留的分支, ELSE 回复, 是否有 ELSE)"""
+        branches = [(blocks.if_block.condition, blocks.if_block.reply)]
+        branches += [(block.condition, block.reply) for block in blocks.else_if_blocks]
+        has_else = blocks.else_block is not None
+        else_reply = blocks.else_block.reply if has_else else None
+
+        kept, seen = [], set()
+        for position, (condition, reply) in enumerate(branches):
+            node, key, _ = self.fold(condition)
+            if node is FALSE:
+                self.stats['branches_removed'] += 1
+                continue
+            if key in seen:
+                # 相同条件在前面已求值为假（否则不会走到这里），该分支不可达
+                self.stats['duplicates_removed'] += 1
+                continue
+            seen.add(key)
+            if node is TRUE:
+                # 恒真分支成为新的 ELSE，其后的分支与原 ELSE 都不可达
+                self.stats['branches_removed'] += len(branches) - position - 1 + has_else
+                has_else, else_reply = True, reply
+                break
+            kept.append((node, key, reply))
+        return kept, else_reply, has_else
+
+    def share(self, conditions: List[ASTNode]) -> List[ASTNode]:
+        """把重复出现的子表达式替换为同一个 SharedNode"""
+        counts: Dict[int, int] = {}
+        for condition in conditions:
+            stack = [condition]
+            while stack:
+                node = stack.pop()
+                key = self.node_keys[id(node)]
+                counts[key] = counts.get(key, 0) + 1
+                # 重复出现的子树整体共享，不再统计其内部节点
+                if isinstance(node, BinaryOpNode) and counts[key] == 1:
+                    stack.append(node.right)
+                    stack.append(node.left)
+        const_keys = {self.keys.get(('K', True)), self.keys.get(('K', False))}
+        shared_keys = {key for key, count in counts.items() if count > 1 and key not in const_keys}
+        if not shared_keys:
+            return conditions
+        self.stats['shared'] = len(shared_keys)
+        self.stats['shared_uses'] = sum(counts[key] for key in shared_keys)
+
+        shared: Dict[int, SharedNode] = {}
+        rebuilt = []
+        for condition in conditions:
+            stack, results = [(condition, False)], []
+            while stack:
+                node, visited = stack.pop()
+                key = self.node_keys[id(node)]
+                if not visited and key in shared:
+                    results.append(shared[key])
+                    continue
+                if isinstance(node, BinaryOpNode) and not visited:
+                    stack.append((node, True))
+                    stack.append((node.right, False))
+                    stack.append((node.left, False))
+                    continue
+                if isinstance(node, BinaryOpNode):
+                    right = results.pop()
+                    left = results.pop()
+                    node = BinaryOpNode(left, node.op, right)
+                if key in shared_keys:
+                    node = shared[key] = SharedNode(len(shared), node)
+                results.append(node)
+            rebuilt.append(results[0])
+        return rebuilt
+
+
+def optimize(ast: ScriptNode, facts: Dict[str, str]) -> OptimizedScript:
+    """
+    按事实优化脚本
+    :param facts: 执行时成立的符号表取值，如 {'intent': '自然沟通'}
+    """
+    optimizer = _Optimizer(facts)
+    kept, else_reply, has_else = optimizer.eliminate(ast.if_blocks)
+    conditions = optimizer.share([node for node, _, _ in kept])
+    replies = [reply for _, _, reply in kept]
+
+    else_block = ElseBlockNode(else_reply) if has_else else None
+    if conditions:
+        if_blocks = IfBlocksNode(
+            IfBlockNode(conditions[0], replies[0]),
+            [ElseIfBlockNode(condition, reply) for condition, reply in zip(conditions[1:], replies[1:])],
+            else_block)
+        table = tabulate(if_blocks)
+        if table is not None:
+            optimizer.stats['tabulated'] = len(conditions)
+            if_blocks = table
+    elif has_else:
+        if_blocks = IfBlocksNode(IfBlockNode(TRUE, else_reply))
+    else:
+        # 所有分支恒假且没有 ELSE：不产生回复，与原脚本一致
+        if_blocks = IfBlocksNode(IfBlockNode(FALSE, ast.if_blocks.if_block.reply))
+    return OptimizedScript(ScriptNode(ast.scene, ast.intent, if_blocks), dict(facts), optimizer.stats)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from .compiler import compile_script
+    from .dsl_registry import DSLRegistry
+
+    directory = (argv if argv is not None else sys.argv[1:] or ['src/dsl'])[0]
+    registry = DSLRegistry(directory, compile_fn=compile_script)
+    registry.load_all()
+    for name, entry in sorted(registry.scripts.items()):
+        optimized = entry.optimized
+        print(f"{name}  事实={optimized.facts}  {optimized.stats}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
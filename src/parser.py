@@ -19,9 +19,8 @@ def p_scene_stmt(p):
 
 def p_intent_stmt(p):
     '''intent_stmt : ON_INTENT IDENT'''
-    valid_intents = ['自然沟通','商品推荐', '价格查询', '功能对比', '库存查询']
-    if p[2] not in valid_intents:
-        raise SyntaxError(f'不支持的意图: {p[2]}，支持的意图有: {valid_intents}')
+    if p[2] not in VALID_INTENTS:
+        raise SyntaxError(f'不支持的意图: {p[2]}，支持的意图有: {VALID_INTENTS}')
     p[0] = IntentNode(p[2])
 
 def p_if_blocks(p):
@@ -44,7 +43,9 @@ def p_else_if_blocks(p):
     if len(p) == 2:
         p[0] = [p[1]]
     else:
-        p[0] = p[1] + [p[2]]
+        # 原地追加，避免 p[1] + [p[2]] 每次复制整个列表导致大脚本解析呈平方复杂度
+        p[1].append(p[2])
+        p[0] = p[1]
 
 def p_if_block(p):
     '''if_block : IF expr REPLY STRING'''
@@ -74,6 +75,23 @@ def p_atom_compare(p):
     '''atom : IDENT compare_op value'''
     p[0] = CompareNode(p[1], p[2], p[3])
 
+def p_atom_in(p):
+    '''atom : IDENT IN LPAREN value_list RPAREN'''
+    p[0] = InNode(p[1], p[4])
+
+def p_atom_between(p):
+    '''atom : IDENT BETWEEN value AND value'''
+    p[0] = BetweenNode(p[1], p[3], p[5])
+
+def p_value_list(p):
+    '''value_list : value
+                  | value_list COMMA value'''
+    if len(p) == 2:
+        p[0] = [p[1]]
+    else:
+        p[1].append(p[3])
+        p[0] = p[1]
+
 def p_atom_exists(p):
     '''atom : IDENT'''
     p[0] = ExistsNode(p[1])
@@ -98,14 +116,13 @@ def p_compare_op(p):
     p[0] = p[1]
 
 def p_error(p):
+    # 不做错误恢复：出错的脚本整体编译失败（与 rd 后端一致），不会以改变了的 IF 链被加载
     if p:
-        print(f'Syntax error at token: {p.type} = "{p.value}" (line {p.lineno})')
-        parser.errok()
-    else:
-        print('Syntax error: unexpected end of input')
+        raise SyntaxError(f'Syntax error at token: {p.type} = "{p.value}" (line {p.lineno})')
+    raise SyntaxError('Syntax error: unexpected end of input')
 
 parser = yacc.yacc(debug=False, write_tables=False)
 
 def reset_parser():
-    """重置解析器状态"""
-    pass  # 不再需要重置全局变量
\ No newline at end of file
+    """重置解析器状态（行号从 1 开始计，错误信息中的行号与 rd 后端一致）"""
+    lexer.lineno = 1
\ No newline at end of file
@@ -0,0 +1,273 @@
+"""
+按分支命中率重排 ELSE IF 链
+
+    ProfilingExecutor  统计每个分支的求值次数与命中次数（DSL_PROFILE_BRANCHES=1 时由 DSLManager 使用）
+    reorder            根据统计把热门分支前移，只交换可证明互斥的相邻分支
+
+互斥证明只使用简单推理：同一标识符的 == / IN 取值不相交、== 与 != 冲突、数值区间（含 BETWEEN）不相交。
+互斥且都不抛出异常的两个分支交换顺序后，命中的分支不变；排序比较遇到类型不匹配会抛出 TypeError，
+因此重排结果包装为 GuardedIfBlocksNode，取值类型不匹配时仍按原顺序执行，语义与原脚本完全一致。
+"""
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .ast_nodes import *
+from .executor import ASTExecutor
+from .symbols import LAYOUT
+
+ORDERING_OPS = frozenset(('<', '<=', '>', '>='))
+# 重排守卫允许的取值类型：数值比较、字符串比较、IN 查找（与决策表查表的检查相同）
+NUMERIC_TYPES = (int, float, bool)
+TEXT_TYPES = (str,)
+SCALAR_TYPES = (str, int, float, bool)
+
+# 析取范式展开的上限，超过后视为无法证明
+MAX_TERMS = 16
+MAX_ATOMS = 32
+
+
+class BranchProfile:
+    """一条 IF 链的分支统计：下标 0 为 IF，其后依次为 ELSE IF，最后一个为 ELSE"""
+    def __init__(self, branches: int):
+        self.evaluations = [0] * branches
+        self.hits = [0] * branches
+
+    @property
+    def samples(self) -> int:
+        return sum(self.hits)
+
+
+class BranchProfiler:
+    """按脚本 AST 收集分支统计"""
+    def __init__(self):
+        self.profiles: Dict[IfBlocksNode, BranchProfile] = {}
+
+    def profile_for(self, blocks: IfBlocksNode) -> BranchProfile:
+        profile = self.profiles.get(blocks)
+        if profile is None:
+            profile = self.profiles[blocks] = BranchProfile(len(blocks.else_if_blocks) + 2)
+        return profile
+
+    def prune(self, asts: Iterable[ScriptNode]) -> int:
+        """丢弃不属于 asts 的 IF 链统计（热加载后旧 AST 随之释放），返回丢弃的条数"""
+        live = {node for ast in asts for node in iter_nodes(ast) if isinstance(node, IfBlocksNode)}
+        stale = [blocks for blocks in list(self.profiles) if blocks not in live]
+        for blocks in stale:
+            self.profiles.pop(blocks, None)
+        return len(stale)
+
+
+class ProfilingExecutor(ASTExecutor):
+    """带分支统计的执行器"""
+    def __init__(self, symbol_table: Dict, profiler: BranchProfiler):
+        super().__init__(symbol_table)
+        self.profiler = profiler
+
+    def _execute_if_blocks(self, node: IfBlocksNode) -> None:
+        profile = self.profiler.profile_for(node)
+        branches = [node.if_block] + node.else_if_blocks
+        for index, block in enumerate(branches):
+            profile.evaluations[index] += 1
+            if self.execute(block.condition):
+                profile.hits[index] += 1
+                self.reply = block.reply
+                return
+        if node.else_block:
+            profile.evaluations[-1] += 1
+            profile.hits[-1] += 1
+            self.reply = node.else_block.reply
+
+
+class _Constraint:
+    """一个合取项中对单个标识符的约束"""
+    __slots__ = ('equals', 'members', 'not_equals', 'low', 'low_closed', 'high', 'high_closed')
+
+    def __init__(self):
+        self.equals = []
+        self.members = []  # IN 的取值集合，取值必须同时属于每个集合
+        self.not_equals = []
+        self.low, self.low_closed = -math.inf, False
+        self.high, self.high_closed = math.inf, False
+
+    def add(self, op: str, value) -> None:
+        if op == '==':
+            self.equals.append(value)
+        elif op == 'IN':
+            self.members.append(value)
+        elif op == '!=':
+            self.not_equals.append(value)
+        elif op in ('>', '>='):
+            if value > self.low or (value == self.low and op == '>'):
+                self.low, self.low_closed = value, op == '>='
+        elif value < self.high or (value == self.high and op == '<'):
+            self.high, self.high_closed = value, op == '<='
+
+    def merge(self, other: '_Constraint') -> '_Constraint':
+        merged = _Constraint()
+        merged.equals = self.equals + other.equals
+        merged.members = self.members + other.members
+        merged.not_equals = self.not_equals + other.not_equals
+        for source in (self, other):
+            if source.low > -math.inf:
+                merged.add('>=' if source.low_closed else '>', source.low)
+            if source.high < math.inf:
+                merged.add('<=' if source.high_closed else '<', source.high)
+        return merged
+
+    def in_interval(self, value) -> bool:
+        if value < self.low or (value == self.low and not self.low_closed):
+            return False
+        return value < self.high or (value == self.high and self.high_closed)
+
+    def satisfiable(self) -> bool:
+        if self.low > self.high or (self.low == self.high and not (self.low_closed and self.high_closed)):
+            return False
+        if self.equals:
+            candidates = self.equals[:1]
+        elif self.members:
+            candidates = list(self.members[0])
+        else:
+            return True
+        # 存在同时满足全部约束的候选取值才可满足
+        return any(self._admits(candidate) for candidate in candidates)
+
+    def _admits(self, candidate) -> bool:
+        if any(value != candidate for value in self.equals):
+            return False
+        if any(candidate not in members for members in self.members):
+            return False
+        if any(value == candidate for value in self.not_equals):
+            return False
+        return not _is_number(candidate) or self.in_interval(candidate)
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _atoms(node: ASTNode) -> List[Tuple[str, str, object]]:
+    """可用于推理的原子约束 [(标识符, 运算符, 取值)]；存在性判断等不提供约束"""
+    if isinstance(node, CompareNode) and (node.op not in ORDERING_OPS or _is_number(node.value)):
+        return [(node.ident, node.op, node.value)]
+    if isinstance(node, InNode):
+        return [(node.ident, 'IN', node.values)]
+    if isinstance(node, BetweenNode) and _is_number(node.low) and _is_number(node.high):
+        return [(node.ident, '>=', node.low), (node.ident, '<=', node.high)]
+    return []
+
+
+def to_dnf(condition: ASTNode) -> Optional[List[List[tuple]]]:
+    """把条件展开为析取范式（合取项列表，每项为原子约束列表）；规模超限时返回 None"""
+    stack, results = [(condition, False)], []
+    while stack:
+        node, visited = stack.pop()
+        if isinstance(node, SharedNode):
+            stack.append((node.node, False))
+            continue
+        if isinstance(node, BinaryOpNode):
+            if not visited:
+                stack.append((node, True))
+                stack.append((node.right, False))
+                stack.append((node.left, False))
+                continue
+            right = results.pop()
+            left = results.pop()
+            if left is None or right is None or node.op not in ('AND', 'OR'):
+                results.append(None)
+            elif node.op == 'OR':
+                terms = left + right
+                results.append(terms if len(terms) <= MAX_TERMS else None)
+            else:
+                terms = [a + b for a in left for b in right]
+                too_large = len(terms) > MAX_TERMS or any(len(term) > MAX_ATOMS for term in terms)
+                results.append(None if too_large else terms)
+        elif isinstance(node, ConstNode):
+            results.append([[]] if node.value else [])
+        else:
+            results.append([_atoms(node)])
+    return results[0]
+
+
+def _constraints(term: List[tuple]) -> Dict[str, _Constraint]:
+    constraints: Dict[str, _Constraint] = {}
+    for ident, op, value in term:
+        constraints.setdefault(ident, _Constraint()).add(op, value)
+    return constraints
+
+
+def _terms_exclusive(a: Dict[str, _Constraint], b: Dict[str, _Constraint]) -> bool:
+    for ident in a.keys() & b.keys():
+        if not a[ident].merge(b[ident]).satisfiable():
+            return True
+    return False
+
+
+def exclusive(a: Optional[List[List[tuple]]], b: Optional[List[List[tuple]]]) -> bool:
+    """两个条件（析取范式）是否可证明不会同时为真"""
+    if a is None or b is None:
+        return False
+    constraints_a = [_constraints(term) for term in a]
+    constraints_b = [_constraints(term) for term in b]
+    return all(_terms_exclusive(x, y) for x in constraints_a for y in constraints_b)
+
+
+def _guards(conditions: List[ASTNode]) -> tuple:
+    """收集所有排序比较与 IN 判断，执行时据此检查取值类型"""
+    guards = {}
+    for condition in conditions:
+        stack = [condition]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, BinaryOpNode):
+                stack.append(node.left)
+                stack.append(node.right)
+            elif isinstance(node, SharedNode):
+                stack.append(node.node)
+            elif isinstance(node, CompareNode) and node.op in ORDERING_OPS:
+                types = NUMERIC_TYPES if _is_number(node.value) else TEXT_TYPES
+                guards[(node.ident, types)] = (node.ident, LAYOUT.slot(node.ident), types)
+            elif isinstance(node, BetweenNode):
+                for bound in (node.low, node.high):
+                    types = NUMERIC_TYPES if _is_number(bound) else TEXT_TYPES
+                    guards[(node.ident, types)] = (node.ident, LAYOUT.slot(node.ident), types)
+            elif isinstance(node, InNode):
+                # 集合查找对不可哈希的取值（如列表）抛出 TypeError
+                guards[(node.ident, SCALAR_TYPES)] = (node.ident, LAYOUT.slot(node.ident), SCALAR_TYPES)
+    return tuple(guards.values())
+
+
+def reorder(ast: ScriptNode, profile: BranchProfile) -> Tuple[ScriptNode, int]:
+    """
+    按命中次数前移热门分支
+    :return: (重排后的 AST, 移动的分支数)；无法重排时返回原 AST
+    """
+    blocks = ast.if_blocks
+    if not isinstance(blocks, IfBlocksNode):
+        return ast, 0  # 已经重排过
+    branches = [(blocks.if_block.condition, blocks.if_block.reply)]
+    branches += [(block.condition, block.reply) for block in blocks.else_if_blocks]
+    if len(profile.hits) != len(branches) + 1:
+        return ast, 0
+
+    # 插入排序：分支只越过命中更少且可证明互斥的相邻分支
+    dnf = [to_dnf(condition) for condition, _ in branches]
+    order = list(range(len(branches)))
+    moved = 0
+    for position in range(1, len(order)):
+        current = order[position]
+        target = position
+        while (target > 0 and profile.hits[order[target - 1]] < profile.hits[current]
+               and exclusive(dnf[order[target - 1]], dnf[current])):
+            target -= 1
+        if target != position:
+            order.insert(target, order.pop(position))
+            moved += 1
+    if not moved:
+        return ast, 0
+
+    reordered = IfBlocksNode(
+        IfBlockNode(*branches[order[0]]),
+        [ElseIfBlockNode(*branches[index]) for index in order[1:]],
+        blocks.else_block)
+    guarded = GuardedIfBlocksNode(blocks, reordered, _guards([condition for condition, _ in branches]))
+    return ScriptNode(ast.scene, ast.intent, guarded), moved
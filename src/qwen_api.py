@@ -1,7 +1,8 @@
 import os
 import json
-from openai import OpenAI  # OpenAI SDK v1.0+ 核心客户端
 from typing import Optional, Dict
+from src.model_router import ModelRouter, ModelTier
+from src.deadline import DeadlineExceeded, remaining
 
 class QWENAPI:
     """
@@ -11,16 +12,22 @@ class QWENAPI:
     def __init__(self):
         # 1. 加载.env配置（作业“安全编码”要求：避免密钥硬编码）
         self._load_config()
-        # 2. 初始化OpenAI客户端
-        self.client = OpenAI(
-            api_key=self.api_key,
-            base_url=self.base_url
-        )
+        # 2. OpenAI客户端在首次调用时再创建（导入 openai 较慢，不影响启动）
+        self._client = None
+        # 3. 模型路由：小模型 -> 大模型
+        self.router = None
+        if self.enable_routing:
+            self.router = ModelRouter(
+                ModelTier(self.small_model, lambda text: self._complete(self.small_model, text)),
+                ModelTier(self.model, lambda text: self._complete(self.model, text)),
+            )
 
     def _load_config(self) -> None:
         self.api_key = os.getenv("DASHSCOPE_API_KEY")
         self.base_url="https://dashscope.aliyuncs.com/compatible-mode/v1"
-        self.model = "qwen3-max"  # 在recongnize_intent()方法中指定具体模型
+        self.model = "qwen3-max"  # 大模型：复杂输入及小模型结果不可靠时使用
+        self.small_model = os.getenv("QWEN_SMALL_MODEL", "qwen-turbo")  # 小模型：简单输入优先使用
+        self.enable_routing = os.getenv("QWEN_MODEL_ROUTING", "1") != "0"
         
         # 验证配置是否缺失（避免后续调用失败）
         if not self.api_key:
@@ -30,38 +37,63 @@ class QWENAPI:
         if not self.model:
             raise ValueError("配置QWEN_MODEL失败")
 
+    @property
+    def client(self):
+        """首次访问时导入 OpenAI SDK 并创建客户端"""
+        if self._client is None:
+            from openai import OpenAI  # OpenAI SDK v1.0+ 核心客户端
+            self._client = OpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url
+            )
+        return self._client
+
+    # 1. 构造意图识别Prompt（作业“驱动DSL”关键：明确输出格式，便于后续解析）
+    system_prompt = """
+        你是商品推荐场景的意图识别工具，需对用户输入进行意图分析，并严格按照以下格式输出JSON结果（不添加任何解释文字）：
+        {
+        "category": "商品类别（如“手机”“无线耳机”，无则填“无”）",
+        "intent": "意图类型（仅允许：“商品推荐”“商品查询”“自然沟通”“其他”）",
+        "params": "关键参数（如{\"预算\": 1500, \"功能\": \"降噪\"， \"问题\": \"续航时间\", \"打招呼\": \"你好\"}）"}，无则填“无”）",
+        "confidence": 对本次识别结果的把握程度，0到1之间的数字，不加引号（如 0.85）
+        }
+    """
+
+    def _complete(self, model: str, user_input: str) -> str:
+        """调用指定模型，返回模型原始输出文本（服务端请求有截止时间时以剩余时间为超时）"""
+        user_prompt = f"用户输入：{user_input}"
+        options = {}
+        timeout = remaining()
+        if timeout is not None:
+            if timeout <= 0:
+                raise DeadlineExceeded("请求已超过截止时间，放弃调用模型")
+            options['timeout'] = timeout
+        response = self.client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=0.1,  # 降低随机性，确保意图识别结果稳定
+            **options
+        )
+        return response.choices[0].message.content.strip()
+
     def recognize_intent(self, user_input: str) -> Optional[Dict]:
         """
         调用OpenAI模型识别用户意图（作业“LLM意图识别”核心需求）
         :param user_input: 用户自然语言输入（如“推荐1000元内学生用手机”）
         :return: 结构化意图结果（含intent-意图类型、category-商品类别、params-关键参数），失败返回None
         """
-        # 1. 构造意图识别Prompt（作业“驱动DSL”关键：明确输出格式，便于后续解析）
-        system_prompt = """
-            你是商品推荐场景的意图识别工具，需对用户输入进行意图分析，并严格按照以下格式输出JSON结果（不添加任何解释文字）：
-            {
-            "category": "商品类别（如“手机”“无线耳机”，无则填“无”）",
-            "intent": "意图类型（仅允许：“商品推荐”“商品查询”“自然沟通”“其他”）",
-            "params": "关键参数（如{\"预算\": 1500, \"功能\": \"降噪\"， \"问题\": \"续航时间\", \"打招呼\": \"你好\"}）"}，无则填“无”）"
-            }
-        """
-        
-        user_prompt = f"用户输入：{user_input}"
+        # 简单输入先走小模型，必要时升级到大模型
+        if self.router:
+            return self.router.route(user_input)
 
         # 2. 调用OpenAI模型
+        llm_output = None
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.1  # 降低随机性，确保意图识别结果稳定
-            )
-
+            llm_output = self._complete(self.model, user_input)
             # 3. 解析模型输出（提取结构化意图结果）
-            llm_output = response.choices[0].message.content.strip()
-            # 转换为JSON字典
             intent_result = json.loads(llm_output)
             return intent_result
 
@@ -0,0 +1,194 @@
+import re
+from typing import List, Tuple
+
+from .ast_nodes import *
+
+# 词法规则：与 src/lexer.py 的 PLY 规则一一对应，且保持相同的匹配顺序
+# （PLY 先尝试函数规则，再按正则长度降序尝试字符串规则；忽略字符最先处理）
+TOKEN_SPEC = [
+    ('IGNORE', r'[ \t\r\n]+'),
+    ('IDENT', r'[a-zA-Z_\u4e00-\u9fa5][a-zA-Z0-9_\u4e00-\u9fa5]*'),
+    ('STRING', r'\"(?:[^\\\"]|\\.)*\"'),
+    ('NUMBER', r'\d+\.?\d*'),
+    ('COMMENT', r'\#.*'),
+    ('LE', r'<='),
+    ('GE', r'>='),
+    ('EQ', r'=='),
+    ('NE', r'!='),
+    ('LPAREN', r'\('),
+    ('RPAREN', r'\)'),
+    ('COMMA', r','),
+    ('LT', r'<'),
+    ('GT', r'>'),
+    ('ERROR', r'[\s\S]'),  # 其余任意单个字符：非法字符
+]
+MASTER_PATTERN = re.compile('|'.join(f'(?P<{name}>{regex})' for name, regex in TOKEN_SPEC))
+
+RESERVED = {
+    'SCENE': 'SCENE',
+    'ON_INTENT': 'ON_INTENT',
+    'IF': 'IF',
+    'REPLY': 'REPLY',
+    'AND': 'AND',
+    'OR': 'OR',
+    'ELSE': 'ELSE',
+    'IN': 'IN',
+    'BETWEEN': 'BETWEEN'
+}
+
+COMPARE_OPS = {'LE', 'GE', 'LT', 'GT', 'EQ', 'NE'}
+LOGICAL_OPS = {'AND', 'OR'}
+
+Token = Tuple[str, object, int]
+
+
+def tokenize(source: str) -> List[Token]:
+    """将脚本文本切分为 (类型, 值, 行号) 列表，末尾附加 EOF"""
+    tokens = []
+    append = tokens.append
+    line = 1
+    for m in MASTER_PATTERN.finditer(source):
+        kind = m.lastgroup
+        text = m.group()
+        if kind == 'IGNORE':
+            line += text.count('\n')
+        elif kind == 'IDENT':
+            append((RESERVED.get(text, 'IDENT'), text, line))
+        elif kind == 'STRING':
+            append(('STRING', text[1:-1], line))
+            line += text.count('\n')
+        elif kind == 'NUMBER':
+            append(('NUMBER', number_literal(text), line))
+        elif kind == 'COMMENT':
+            pass
+        elif kind == 'ERROR':
+            # 与 PLY 的 t_error 一致：提示后跳过非法字符
+            print(f'Illegal character: {text}')
+        else:
+            append((kind, text, line))
+    append(('EOF', None, line))
+    return tokens
+
+
+class RDParser:
+    """
+    递归下降解析器：与 src/parser.py 的 PLY 文法等价，生成相同的 ScriptNode 树
+    注意：PLY 文法中 AND/OR 没有实际生效的优先级（expr logical_op expr 规则不含终结符），
+    移进优先，因此逻辑表达式一律右结合：a AND b OR c 解析为 a AND (b OR c)。
+    """
+    def __init__(self, tokens: List[Token]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self) -> str:
+        return self.tokens[self.pos][0]
+
+    def advance(self) -> Token:
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def expect(self, *types: str):
+        token = self.tokens[self.pos]
+        if token[0] not in types:
+            self.error(token)
+        self.pos += 1
+        return token[1]
+
+    @staticmethod
+    def error(token: Token):
+        if token[0] == 'EOF':
+            raise SyntaxError('Syntax error: unexpected end of input')
+        raise SyntaxError(f'Syntax error at token: {token[0]} = "{token[1]}" (line {token[2]})')
+
+    def parse_script(self) -> ScriptNode:
+        self.expect('SCENE')
+        scene = SceneNode(self.expect('IDENT'))
+        self.expect('ON_INTENT')
+        intent_name = self.expect('IDENT')
+        if intent_name not in VALID_INTENTS:
+            raise SyntaxError(f'不支持的意图: {intent_name}，支持的意图有: {VALID_INTENTS}')
+        intent = IntentNode(intent_name)
+        if_blocks = self.parse_if_blocks()
+        if self.peek() != 'EOF':
+            self.error(self.tokens[self.pos])
+        return ScriptNode(scene, intent, if_blocks)
+
+    def parse_if_blocks(self) -> IfBlocksNode:
+        self.expect('IF')
+        condition = self.parse_expr()
+        self.expect('REPLY')
+        if_block = IfBlockNode(condition, self.expect('STRING'))
+
+        else_if_blocks = []
+        else_block = None
+        while self.peek() == 'ELSE':
+            self.advance()
+            if self.peek() == 'IF':
+                self.advance()
+                condition = self.parse_expr()
+                self.expect('REPLY')
+                else_if_blocks.append(ElseIfBlockNode(condition, self.expect('STRING')))
+            else:
+                self.expect('REPLY')
+                else_block = ElseBlockNode(self.expect('STRING'))
+                break
+        return IfBlocksNode(if_block, else_if_blocks, else_block)
+
+    def parse_expr(self) -> ASTNode:
+        """
+        解析逻辑表达式（迭代实现，括号嵌套与 AND/OR 长链都不受递归深度限制）
+        每一层括号对应一个 (操作数列表, 运算符列表) 帧，层内按右结合折叠。
+        """
+        frames = []
+        operands, ops = [], []
+        while True:
+            if self.peek() == 'LPAREN':
+                self.advance()
+                frames.append((operands, ops))
+                operands, ops = [], []
+                continue
+            operands.append(self.parse_atom())
+            while True:
+                if self.peek() in LOGICAL_OPS:
+                    ops.append(self.advance()[1])
+                    break
+                expr = self.fold_right(operands, ops)
+                if not frames:
+                    return expr
+                self.expect('RPAREN')
+                operands, ops = frames.pop()
+                operands.append(expr)
+
+    @staticmethod
+    def fold_right(operands: List[ASTNode], ops: List[str]) -> ASTNode:
+        node = operands[-1]
+        for i in range(len(ops) - 1, -1, -1):
+            node = BinaryOpNode(operands[i], ops[i], node)
+        return node
+
+    def parse_atom(self) -> ASTNode:
+        ident = self.expect('IDENT')
+        if self.peek() == 'IN':
+            self.advance()
+            self.expect('LPAREN')
+            items = [self.expect('NUMBER', 'STRING')]
+            while self.peek() == 'COMMA':
+                self.advance()
+                items.append(self.expect('NUMBER', 'STRING'))
+            self.expect('RPAREN')
+            return InNode(ident, items)
+        if self.peek() == 'BETWEEN':
+            self.advance()
+            low = self.expect('NUMBER', 'STRING')
+            self.expect('AND')
+            return BetweenNode(ident, low, self.expect('NUMBER', 'STRING'))
+        if self.peek() in COMPARE_OPS:
+            op = self.advance()[1]
+            return CompareNode(ident, op, self.expect('NUMBER', 'STRING'))
+        return ExistsNode(ident)
+
+
+def parse(source: str) -> ScriptNode:
+    """解析脚本文本，语法错误时抛出 SyntaxError"""
+    return RDParser(tokenize(source)).parse_script()
@@ -0,0 +1,140 @@
+"""
+意图识别的录制与回放：基准测试与回归测试离线运行，不调用真实的 LLM 接口
+
+    RecordingRecognizer   包装真实的识别器，把每次 recognize_intent 的输入、输出与耗时追加写入录制文件
+    ReplayRecognizer      按归一化后的输入返回录制的输出（可选按录制的耗时等待），结果确定
+    load_recording        读取录制文件
+    offline_recognizer    设置了 DSL_REPLAY=录制文件 时返回回放识别器，否则返回给定的默认识别器（测试桩）
+
+录制文件为 JSONL，只追加不改写，每行一条紧凑记录（进程中断时最多损坏最后一行，读取时跳过）：
+    {"i":"小米14多少钱","o":{"intent":"价格查询",...},"ms":812.4}
+也可以直接回放 DSL_INTENT_LOG 记录的意图识别日志（{"input": ..., "output": ...}，没有耗时）。
+
+录制：python main.py --record intents.jsonl
+回放：python main.py --replay intents.jsonl，或 DSL_REPLAY=intents.jsonl python run_tests.py
+"""
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from .intent_model import normalize_text
+
+
+class Recording(NamedTuple):
+    input: str
+    output: Optional[Dict]
+    latency: Optional[float]  # 秒；意图识别日志中没有耗时
+
+
+def load_recording(path: str) -> List[Recording]:
+    """按录制顺序读取全部记录，跳过损坏的行"""
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            text = record.get('i', record.get('input'))
+            if not isinstance(text, str):
+                continue
+            latency = record.get('ms')
+            records.append(Recording(text, record.get('o', record.get('output')),
+                                     latency / 1000 if isinstance(latency, (int, float)) else None))
+    return records
+
+
+class RecordingRecognizer:
+    """录制识别器（线程安全）：结果原样返回，同时追加写入录制文件"""
+    def __init__(self, recognizer: Any, path: str, clock: Callable[[], float] = time.perf_counter):
+        self.recognizer = recognizer
+        self.path = path
+        self.clock = clock
+        self.recorded = 0
+        self._lock = threading.Lock()
+        # 行缓冲：每条记录写完即落盘，多进程以追加方式写同一文件时各行不交错
+        self._file = open(path, 'a', encoding='utf-8', buffering=1)
+
+    def recognize_intent(self, user_input: str) -> Optional[Dict]:
+        start = self.clock()
+        output = self.recognizer.recognize_intent(user_input)  # 抛出异常（如超过截止时间）时不录制
+        latency = self.clock() - start
+        line = json.dumps({'i': user_input, 'o': output, 'ms': round(latency * 1000, 1)},
+                          ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            self._file.write(line + '\n')
+            self.recorded += 1
+        return output
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self) -> 'RecordingRecognizer':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class ReplayRecognizer:
+    """回放识别器（线程安全）"""
+    def __init__(self, path: str, fallback: Optional[Any] = None, latency_scale: float = 0.0,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        :param fallback: 录制中没有的输入交给该识别器；未给出时返回 None（与 LLM 调用失败相同）
+        :param latency_scale: 回放前按录制耗时的该倍数等待；0 表示不等待，1 表示与录制时相同
+        """
+        self.fallback = fallback
+        self.latency_scale = latency_scale
+        self.sleep = sleep
+        # 归一化输入 -> 按录制顺序的全部记录；同一输入录制了多次时依次轮流返回
+        self._responses: Dict[str, List[Recording]] = {}
+        for record in load_recording(path):
+            self._responses.setdefault(normalize_text(record.input), []).append(record)
+        self._next: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+    def recognize_intent(self, user_input: str) -> Optional[Dict]:
+        key = normalize_text(user_input)
+        responses = self._responses.get(key)
+        with self._lock:
+            if not responses:
+                self.misses += 1
+            else:
+                self.hits += 1
+                index = self._next.get(key, 0)
+                self._next[key] = (index + 1) % len(responses)
+        if not responses:
+            if self.fallback is not None:
+                return self.fallback.recognize_intent(user_input)
+            print(f"录制中没有该输入：{user_input}")
+            return None
+        record = responses[index]
+        if self.latency_scale and record.latency:
+            self.sleep(record.latency * self.latency_scale)
+        # 返回副本：调用方修改结果不影响之后的回放
+        return json.loads(json.dumps(record.output)) if record.output is not None else None
+
+    def rewind(self) -> None:
+        """回到录制顺序的开头（重复回放同一段流量时结果相同）"""
+        with self._lock:
+            self._next.clear()
+
+
+def offline_recognizer(default: Any) -> Any:
+    """离线运行（测试、基准测试）使用的识别器：DSL_REPLAY 指向录制文件时回放录制，录制中没有的输入交给 default"""
+    path = os.getenv("DSL_REPLAY")
+    if path:
+        return ReplayRecognizer(path, fallback=default)
+    return default
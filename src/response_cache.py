@@ -0,0 +1,63 @@
+"""
+完整回复缓存：意图识别之后的流程（归一化、参数提取、执行脚本、目录查询、模板填充）是确定的，
+相同的输入特征直接返回上次的最终回复
+
+缓存键由 DSLManager 构造：归一化后的意图结果 + 原始输入中会影响结果的特征（关键词、品牌、型号）
++ 脚本版本 + 商品目录版本；脚本或目录变化后键随之变化，旧条目不再命中并按 LRU 淘汰。
+"""
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+DEFAULT_MAX_ENTRIES = 1024
+
+
+def canonical_intent(intent_result: Dict) -> str:
+    """意图结果的规范形式：只保留后续流程用到的字段，键排序后序列化"""
+    fields = {key: intent_result.get(key) for key in ('intent', 'category', 'params')}
+    return json.dumps(fields, sort_keys=True, ensure_ascii=False, default=str)
+
+
+class ResponseCache:
+    """有界 LRU 缓存（线程安全），记录命中率"""
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Hashable, object]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[object]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: object) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def snapshot(self) -> Dict[str, object]:
+        """命中统计（供运行统计输出）"""
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': round(self.hit_rate, 4)}
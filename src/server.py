@@ -0,0 +1,350 @@
+"""
+HTTP/JSON 服务（只用标准库 asyncio）：python main.py --serve [--processes N]
+
+    POST /chat      {"input": "...", "session_id": "...", "timeout": 秒}  ->  {"reply": "..."}
+    GET  /health    存活检查与当前排队情况
+    GET  /metrics   服务端计数、延迟与各工作线程 DSLManager 的运行统计、缓存命中率
+
+DSLManager 每轮请求原地复用符号表，不能被多个线程同时使用，因此每个工作线程独占一个实例；
+脚本注册表（及其热加载线程）、会话表与完整回复缓存在实例之间共享。准入控制：执行中与排队中的请求超过 concurrency + max_queue
+时直接返回 429 与兜底回复（负载削减）。每个请求有截止时间，工作线程通过 deadline_scope 传给意图识别；
+超时的请求返回 504 与兜底回复，排队中已超时的请求不再执行。
+
+多进程模式（serve_prefork）：目录与索引只在父进程构建一次，放进共享内存，fork 出的工作进程零拷贝读取。
+会话表与回复缓存仍在各进程内：同一 session_id 的后续请求被分到另一个进程时，该进程没有上一轮的槽位，
+追问按新问题完整识别（回复仍然正确，只是少了会话追问的加速）。需要会话追问时在前端按 session_id 把请求
+固定分给同一个进程（各进程监听不同端口，由反向代理按 session_id 哈希转发），或使用单进程多线程模式。
+"""
+import asyncio
+import json
+import os
+import queue
+import signal
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from .deadline import deadline_scope
+from .shared_catalog import SharedCatalog, publish
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MAX_QUEUE = 64
+DEFAULT_TIMEOUT = 10.0
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 64 * 1024
+# 客户端连接空闲多久后关闭（秒）
+KEEP_ALIVE_TIMEOUT = 15.0
+
+# 工作线程返回的标记：请求在排队期间已超过截止时间，没有执行
+EXPIRED_IN_QUEUE = object()
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 429: 'Too Many Requests', 500: 'Internal Server Error',
+           504: 'Gateway Timeout'}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class DSLServer:
+    """asyncio HTTP 前端 + 固定数量的工作线程（每个线程一个 DSLManager）"""
+    def __init__(self, manager_factory: Callable[..., Any], concurrency: int = DEFAULT_CONCURRENCY,
+                 max_queue: int = DEFAULT_MAX_QUEUE, timeout: float = DEFAULT_TIMEOUT,
+                 host: str = '127.0.0.1', port: int = 8000, sock: Optional[socket.socket] = None):
+        """
+        :param manager_factory: 创建 DSLManager，接受可选的 registry 参数：第一个实例自行加载脚本注册表，
+                                其余实例传入第一个实例的注册表，脚本只编译一次，热加载线程只有一个
+        :param sock: 已监听的套接字（pre-fork 模式下由父进程创建、各子进程共享）
+        """
+        self.sock = sock
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.host = host
+        self.port = port
+        shared = manager_factory()
+        self.managers = [shared] + [manager_factory(registry=shared.registry) for _ in range(concurrency - 1)]
+        for manager in self.managers[1:]:
+            manager.sessions = shared.sessions
+            manager.response_cache = shared.response_cache
+        self.fallback_reply = shared.error_reply
+        self._idle: 'queue.SimpleQueue' = queue.SimpleQueue()
+        for manager in self.managers:
+            self._idle.put(manager)
+        self._pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='dsl-worker')
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.pending = 0  # 执行中 + 排队中的请求数（只在事件循环线程中修改）
+        self.started = time.monotonic()
+        self.metrics = {'requests': 0, 'replies': 0, 'shed': 0, 'timeouts': 0, 'expired_in_queue': 0,
+                        'errors': 0, 'bad_requests': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+
+    # ---------- 生命周期 ----------
+    async def start(self) -> None:
+        if self.sock is not None:
+            self._server = await asyncio.start_server(self._handle_connection, sock=self.sock,
+                                                      limit=MAX_HEADER_BYTES)
+        else:
+            self._server = await asyncio.start_server(self._handle_connection, self.host, self.port,
+                                                      limit=MAX_HEADER_BYTES)
+        self.port = self._server.sockets[0].getsockname()[1]  # port=0 时取实际端口
+        print(f"DSL服务已启动：http://{self.host}:{self.port}（工作线程{self.concurrency}个，排队上限{self.max_queue}）")
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._pool.shutdown(wait=False)
+
+    # ---------- 请求处理 ----------
+    async def chat(self, user_input: str, session_id: Optional[str] = None,
+                   timeout: Optional[float] = None) -> Tuple[int, Dict[str, Any]]:
+        """执行一轮对话，返回 (HTTP 状态码, 响应体)"""
+        self.metrics['requests'] += 1
+        if self.pending >= self.concurrency + self.max_queue:
+            self.metrics['shed'] += 1
+            return 429, {'reply': self.fallback_reply, 'error': 'overloaded'}
+
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        start = time.monotonic()
+        deadline = start + timeout
+        self.pending += 1
+        future = asyncio.get_running_loop().run_in_executor(self._pool, self._run, user_input, session_id, deadline)
+        try:
+            reply = await asyncio.wait_for(asyncio.shield(future), max(timeout, 0.0))
+        except asyncio.TimeoutError:
+            # 工作线程无法中断，结果到达后丢弃；截止时间已经传给意图识别，它会尽快返回
+            self.metrics['timeouts'] += 1
+            return 504, {'reply': self.fallback_reply, 'error': 'timeout'}
+        except Exception as e:
+            self.metrics['errors'] += 1
+            print(f"请求处理失败: {e}")
+            return 500, {'reply': self.fallback_reply, 'error': 'internal'}
+        finally:
+            if future.done():
+                self.pending -= 1
+            else:
+                future.add_done_callback(self._discard)
+        if reply is EXPIRED_IN_QUEUE:
+            self.metrics['expired_in_queue'] += 1
+            self.metrics['timeouts'] += 1
+            return 504, {'reply': self.fallback_reply, 'error': 'timeout'}
+
+        elapsed_ms = (time.monotonic() - start) * 1000
+        self.metrics['replies'] += 1
+        self.metrics['total_ms'] += elapsed_ms
+        self.metrics['max_ms'] = max(self.metrics['max_ms'], elapsed_ms)
+        return 200, {'reply': reply}
+
+    def _discard(self, future) -> None:
+        """超时（或客户端断开）请求的工作线程结束后释放排队名额"""
+        self.pending -= 1
+        if not future.cancelled() and future.exception() is not None:
+            print(f"超时请求执行失败: {future.exception()}")
+
+    def _run(self, user_input: str, session_id: Optional[str], deadline: float) -> Any:
+        """
+        工作线程：取一个空闲的 DSLManager 执行请求；排队期间已超时的请求直接放弃，返回 EXPIRED_IN_QUEUE
+        （计数只在事件循环线程中修改，由 chat 统计）
+        """
+        if time.monotonic() >= deadline:
+            return EXPIRED_IN_QUEUE
+        manager = self._idle.get()
+        try:
+            with deadline_scope(deadline):
+                return manager.execute_dsl(user_input, session_id=session_id)
+        finally:
+            self._idle.put(manager)
+
+    def health(self) -> Dict[str, Any]:
+        return {'status': 'ok', 'workers': self.concurrency, 'pending': self.pending,
+                'max_pending': self.concurrency + self.max_queue,
+                'uptime_s': round(time.monotonic() - self.started, 3)}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """服务端计数 + 各 DSLManager 运行统计之和 + 缓存命中率"""
+        metrics = dict(self.metrics)
+        metrics['avg_ms'] = round(metrics['total_ms'] / metrics['replies'], 3) if metrics['replies'] else 0.0
+        metrics['total_ms'] = round(metrics['total_ms'], 3)
+        metrics['max_ms'] = round(metrics['max_ms'], 3)
+        metrics['pending'] = self.pending
+        stats: Dict[str, int] = {}
+        for manager in self.managers:
+            for key, value in manager.stats.items():
+                stats[key] = stats.get(key, 0) + value
+        return {'server': metrics, 'dsl': stats, 'cache': self.managers[0].cache_stats(),
+                'sessions': len(self.managers[0].sessions)}
+
+    async def dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        """按路径分发请求"""
+        path = path.split('?', 1)[0]
+        if path == '/health':
+            if method != 'GET':
+                raise HTTPError(405, 'GET only')
+            return 200, self.health()
+        if path == '/metrics':
+            if method != 'GET':
+                raise HTTPError(405, 'GET only')
+            return 200, self.snapshot()
+        if path == '/chat':
+            if method != 'POST':
+                raise HTTPError(405, 'POST only')
+            try:
+                payload = json.loads(body.decode('utf-8'))
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                raise HTTPError(400, '请求体必须是 JSON')
+            user_input = payload.get('input') if isinstance(payload, dict) else None
+            if not isinstance(user_input, str) or not user_input.strip():
+                raise HTTPError(400, '缺少 input')
+            session_id = payload.get('session_id')
+            timeout = payload.get('timeout')
+            if timeout is not None and (not isinstance(timeout, (int, float)) or isinstance(timeout, bool)):
+                raise HTTPError(400, 'timeout 必须是数字')
+            return await self.chat(user_input.strip(), None if session_id is None else str(session_id), timeout)
+        raise HTTPError(404, f'未知路径 {path}')
+
+    # ---------- HTTP/1.1 ----------
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+                except (asyncio.TimeoutError, ConnectionError, ValueError):
+                    break
+                if not request_line:
+                    break
+                keep_alive = await self._handle_request(request_line, reader, writer)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _handle_request(self, request_line: bytes, reader: asyncio.StreamReader,
+                              writer: asyncio.StreamWriter) -> bool:
+        """处理一个请求，返回连接是否保持"""
+        keep_alive = False
+        try:
+            parts = request_line.decode('latin-1').split()
+            if len(parts) != 3 or not parts[2].startswith('HTTP/'):
+                raise HTTPError(400, '请求行格式错误')
+            method, path, version = parts
+            headers = await self._read_headers(reader)
+            connection = headers.get('connection', '').lower()
+            keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+            length = headers.get('content-length', '0')
+            if not length.isdigit():
+                raise HTTPError(400, 'Content-Length 格式错误')
+            if int(length) > MAX_BODY_BYTES:
+                keep_alive = False
+                raise HTTPError(413, '请求体过大')
+            body = await reader.readexactly(int(length)) if int(length) else b''
+            status, payload = await self.dispatch(method.upper(), path, body)
+        except HTTPError as e:
+            self.metrics['bad_requests'] += 1
+            status, payload = e.status, {'error': str(e)}
+        except asyncio.IncompleteReadError:
+            return False
+        await self._write_response(writer, status, payload, keep_alive)
+        return keep_alive
+
+    @staticmethod
+    async def _read_headers(reader: asyncio.StreamReader) -> Dict[str, str]:
+        headers, size = {}, 0
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                raise HTTPError(413, '请求头过大')
+            size += len(line)
+            if size > MAX_HEADER_BYTES:
+                raise HTTPError(413, '请求头过大')
+            if line in (b'\r\n', b'\n', b''):
+                return headers
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+    @staticmethod
+    async def _write_response(writer: asyncio.StreamWriter, status: int, payload: Dict[str, Any],
+                              keep_alive: bool) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n")
+        if status == 429:
+            head += "Retry-After: 1\r\n"
+        writer.write(head.encode('latin-1') + b"\r\n" + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+
+def serve(manager_factory: Callable[[], Any], **options) -> None:
+    """启动服务并一直运行（Ctrl+C 退出）"""
+    server = DSLServer(manager_factory, **options)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("DSL服务已停止")
+
+
+def serve_prefork(manager_factory: Callable[[Sequence[Dict]], Any], catalog: Sequence[Dict],
+                  processes: int, host: str = '127.0.0.1', port: int = 8000, **options) -> None:
+    """
+    多进程模式：父进程把目录及其索引发布到共享内存并创建监听套接字，再 fork 出 processes 个子进程；
+    子进程继承共享内存的映射（零拷贝），各自运行一个 DSLServer，由内核在子进程之间分配连接
+    （按连接分配，不按 session_id：会话只在处理该请求的进程内有效，见模块说明）
+    :param manager_factory: 以共享目录与可选的脚本注册表为参数创建 DSLManager
+    """
+    block = publish(catalog)
+    shared = SharedCatalog(block.buf)
+    sock = socket.create_server((host, port))
+    print(f"商品目录已发布到共享内存 {block.name}（{shared.nbytes} 字节），启动{processes}个工作进程")
+    children = []
+    try:
+        for _ in range(processes):
+            pid = os.fork()
+            if pid == 0:
+                code = 0
+                try:
+                    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                    server = DSLServer(lambda registry=None: manager_factory(shared, registry), sock=sock,
+                                       **options)
+                    asyncio.run(server.serve_forever())
+                except KeyboardInterrupt:
+                    pass
+                except BaseException as e:
+                    print(f"工作进程 {os.getpid()} 异常退出: {e}")
+                    code = 1
+                finally:
+                    os._exit(code)
+            children.append(pid)
+        for pid in children:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        print("DSL服务已停止")
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        sock.close()
+        shared.close()
+        block.close()
+        block.unlink()
@@ -0,0 +1,170 @@
+"""
+多轮会话：按会话 ID 保存上一轮的意图与关键槽位，短追问在本地沿用上一轮槽位，不再调用 LLM
+
+    SessionStore        有界会话表：超过 max_sessions 按 LRU 淘汰，超过 ttl 未活动的会话过期，
+                        每个会话只保存 carry_slots 中的槽位，且字符串取值不超过 max_value_chars
+    resolve_follow_up   识别“那库存呢”“便宜一点的”“那华为呢”之类的短追问，返回本地意图结果；
+                        无法确定时返回 None，由调用方走完整的意图识别
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from .intent_rules import RuleIntentClassifier
+
+# 跨轮沿用的槽位
+CARRY_SLOTS = ('品牌', '型号', '预算')
+
+# 不超过该长度（去掉空格后）的输入才视为追问
+FOLLOW_UP_MAX_CHARS = 12
+FOLLOW_UP_MARKERS = ('呢', '那', '还有', '再', '换')
+# 预算调整：更便宜 / 更贵，按比例调整上一轮的预算
+CHEAPER_WORDS = ('便宜', '实惠', '低一点', '少一点')
+PRICIER_WORDS = ('贵一点', '好一点', '高端', '高一点')
+CHEAPER_RATIO = 0.8
+PRICIER_RATIO = 1.25
+
+
+class Session:
+    """一个会话的上一轮状态"""
+    __slots__ = ('session_id', 'intent', 'category', 'slots', 'updated', 'turns')
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.intent: Optional[str] = None
+        self.category: Optional[str] = None
+        self.slots: Dict[str, object] = {}
+        self.updated = 0.0
+        self.turns = 0
+
+    def copy(self) -> 'Session':
+        """快照：调用方读取时不受其他线程之后的 save 影响"""
+        snapshot = Session(self.session_id)
+        snapshot.intent, snapshot.category = self.intent, self.category
+        snapshot.slots = dict(self.slots)
+        snapshot.updated, snapshot.turns = self.updated, self.turns
+        return snapshot
+
+
+class SessionStore:
+    """有界会话表（线程安全）"""
+    def __init__(self, max_sessions: int = 10000, ttl: float = 1800.0,
+                 carry_slots: Tuple[str, ...] = CARRY_SLOTS, max_value_chars: int = 64,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.carry_slots = carry_slots
+        self.max_value_chars = max_value_chars
+        self.clock = clock
+        self._sessions: 'OrderedDict[str, Session]' = OrderedDict()  # 按最近活动时间排序
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expire(self, now: float) -> None:
+        # 最久未活动的会话在最前面，过期的会话总是从头部开始
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.updated <= self.ttl:
+                break
+            self._sessions.popitem(last=False)
+            self.expirations += 1
+
+    def get(self, session_id: str) -> Optional[Session]:
+        """返回未过期会话的快照，没有时返回 None"""
+        with self._lock:
+            self._expire(self.clock())
+            session = self._sessions.get(session_id)
+            return session.copy() if session is not None else None
+
+    def save(self, session_id: str, intent: Optional[str], symbols) -> Session:
+        """记录本轮的意图与槽位（只保留 carry_slots 中大小受限的取值），返回会话的快照"""
+        # 新的槽位表在锁外构建完成后整体替换，不原地修改已有的槽位表
+        slots = {}
+        for name in self.carry_slots:
+            value = symbols.get(name)
+            if value is None or (isinstance(value, str) and len(value) > self.max_value_chars):
+                continue
+            slots[name] = value
+        with self._lock:
+            now = self.clock()
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = Session(session_id)
+            self._sessions.move_to_end(session_id)
+            session.intent = intent
+            session.category = symbols.get('scene') or session.category
+            session.slots = slots
+            session.updated = now
+            session.turns += 1
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+            return session.copy()
+
+    def discard(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+def _budget_ratio(text: str) -> Optional[float]:
+    """“便宜一点”“贵一点”对应的预算调整比例；没有调整词时返回 None"""
+    if any(word in text for word in CHEAPER_WORDS):
+        return CHEAPER_RATIO
+    if any(word in text for word in PRICIER_WORDS):
+        return PRICIER_RATIO
+    return None
+
+
+def resolve_follow_up(user_input: str, session: Optional[Session],
+                      classifier: RuleIntentClassifier) -> Optional[Dict]:
+    """
+    在本地解析短追问
+    :return: 与 LLM 相同格式的意图结果（source 为 session），需要完整识别时返回 None
+    """
+    text = user_input.lower().replace(' ', '')
+    if session is None or session.intent is None or not text or len(text) > FOLLOW_UP_MAX_CHARS:
+        return None
+    keyword_intent = classifier.match_keyword_intent(text)
+    if keyword_intent == '自然沟通':
+        return None  # 换了话题
+
+    params = dict(session.slots)
+    category = session.category
+    intent = keyword_intent or session.intent
+    product, brand = classifier.match_product(text)
+    mentioned_category = classifier.match_category(text)
+    if mentioned_category and mentioned_category != category and not product:
+        return None  # 提到了新的商品类别，交给完整识别
+    if product:
+        params['品牌'], params['型号'] = product['brand'], product['model']
+        category = product['category']
+    elif brand:
+        if not classifier.brand_in_category(brand, category):
+            return None  # 该品牌在当前类别下没有商品，交给完整识别
+        params['品牌'] = brand
+        params.pop('型号', None)
+
+    budget = classifier.extract_budget(text)
+    ratio = _budget_ratio(text)
+    if budget is not None:
+        params['预算'] = budget
+    elif ratio is not None:
+        previous = params.get('预算')
+        if not isinstance(previous, (int, float)):
+            return None  # 上一轮没有预算，无法在本地调整
+        params['预算'] = round(float(previous) * ratio, 2)
+        params.pop('型号', None)  # 换一款价位不同的商品
+        intent = keyword_intent or '商品推荐'
+
+    # 追问需要有追问语气、预算调整，或是没有提到商品的查询（如“有货吗”）；完整的新问题交给完整识别
+    bare_query = keyword_intent in ('库存查询', '价格查询') and not (product or brand)
+    if not (bare_query or ratio is not None or any(marker in text for marker in FOLLOW_UP_MARKERS)):
+        return None
+    return {'category': category or '通用', 'intent': intent, 'params': params,
+            'confidence': 1.0, 'source': 'session'}
@@ -0,0 +1,157 @@
+"""
+只读共享商品目录：目录与由它派生的索引只构建一次，序列化为一块连续镜像，
+放进 multiprocessing.shared_memory（或 mmap 文件），多个工作进程直接在镜像上读取，不复制数据
+
+    build_image     目录 -> 镜像字节：商品记录（逐条 JSON）+ 类别索引 + 型号/品牌三元组索引 + 型号/品牌词表
+                    + sku 表 + 预算列
+    SharedCatalog   镜像上的只读目录（Sequence[Dict]），按位置解码商品；
+                    budgets 为各商品预算（缺失为 NaN），sku_positions() 按 sku 查商品位置，均不解码记录；
+                    catalog_index() 返回直接读取镜像的 CatalogIndex，供 DSLManager 近似匹配；
+                    lexicon() 返回直接读取镜像的 CatalogLexicon，供品牌/型号精确匹配（不逐条解码商品）
+    publish/attach  在共享内存中发布镜像 / 按名称附加（pre-fork 的子进程继承映射，无需附加）
+    write_image/open_image   镜像写入文件 / 以 mmap 只读打开
+
+镜像只读：目录变化时需要重新发布镜像。
+"""
+import json
+import math
+import mmap
+import numbers
+import struct
+from array import array
+from collections.abc import Sequence
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Iterable, List, Optional
+
+from .fuzzy_index import CatalogIndex, FrozenTrigramIndex, _aligned, pack
+from .inventory import product_sku
+from .lexicon import CatalogLexicon, FrozenKeyTable, KeyTable, pack as pack_lexicon
+
+# 镜像头部：魔数、镜像总长度、商品数，
+# 元数据 / 记录偏移表 / 记录 / 型号索引 / 品牌索引 / 型号词表 / 品牌词表 / sku 表 / 预算列的偏移与长度
+_MAGIC = b'DSLCAT02'
+_HEADER = struct.Struct('<8s2Q18Q')
+
+
+def build_image(catalog: Iterable[Dict]) -> bytes:
+    """把商品目录及其索引序列化为只读镜像"""
+    products = list(catalog)
+    records = [json.dumps(product, ensure_ascii=False, sort_keys=True).encode('utf-8') for product in products]
+    record_offsets = array('Q', [0])
+    for record in records:
+        record_offsets.append(record_offsets[-1] + len(record))
+    categories: Dict[str, List[int]] = {}
+    for position, product in enumerate(products):
+        categories.setdefault(product.get('category'), []).append(position)
+    words = CatalogLexicon(products)
+    skus = KeyTable(normalize=str)
+    budgets = array('d')
+    for position, product in enumerate(products):
+        skus.add(product_sku(product), position)
+        budget = product.get('budget')
+        budgets.append(float(budget) if isinstance(budget, numbers.Real) else math.nan)
+    meta = json.dumps({'categories': categories, 'brand_categories': words.brand_categories},
+                      ensure_ascii=False).encode('utf-8')
+
+    index = CatalogIndex(products)
+    sections = [meta, bytes(record_offsets), b''.join(records), pack(index.models), pack(index.brands),
+                pack_lexicon(words.models), pack_lexicon(words.brands), pack_lexicon(skus), bytes(budgets)]
+    out = bytearray(_HEADER.size)
+    spans = []
+    for section in sections:
+        spans += [_aligned(out, section), len(section)]
+    _HEADER.pack_into(out, 0, _MAGIC, len(out), len(products), *spans)
+    return bytes(out)
+
+
+class SharedCatalog(Sequence):
+    """共享镜像上的只读商品目录"""
+    def __init__(self, buffer, owner: Optional[object] = None):
+        """
+        :param buffer: 镜像所在的缓冲区（共享内存、mmap 或 bytes）
+        :param owner: 需要与目录同生命周期的对象（SharedMemory、mmap），关闭时一并关闭
+        """
+        self._owner = owner
+        view = memoryview(buffer)
+        magic, size, count, *spans = _HEADER.unpack_from(view, 0)
+        if magic != _MAGIC:
+            raise ValueError('不是商品目录镜像')
+        sections = [view[spans[i]:spans[i] + spans[i + 1]] for i in range(0, len(spans), 2)]
+        meta, offsets, self._records, models, brands, model_words, brand_words, skus, budgets = sections
+        meta = json.loads(bytes(meta))
+        self._count = count
+        self._offsets = offsets.cast('Q')
+        self._skus = FrozenKeyTable(skus)
+        self.budgets = budgets.cast('d')
+        self.categories: Dict[str, List[int]] = meta['categories']
+        self._index = CatalogIndex(self, models=FrozenTrigramIndex(models), brands=FrozenTrigramIndex(brands))
+        self._lexicon = CatalogLexicon(self, models=FrozenKeyTable(model_words), brands=FrozenKeyTable(brand_words),
+                                       brand_categories=meta['brand_categories'])
+        self.nbytes = size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(self._count))]
+        if position < 0:
+            position += self._count
+        if not 0 <= position < self._count:
+            raise IndexError(position)
+        return json.loads(bytes(self._records[self._offsets[position]:self._offsets[position + 1]]))
+
+    def in_category(self, category: str) -> List[Dict]:
+        """某个类别下的全部商品（只解码该类别的记录）"""
+        return [self[position] for position in self.categories.get(category, ())]
+
+    def catalog_index(self) -> CatalogIndex:
+        """直接读取镜像的近似匹配索引（不在本进程重建）"""
+        return self._index
+
+    def lexicon(self) -> CatalogLexicon:
+        """直接读取镜像的品牌/型号词表（不在本进程重建）"""
+        return self._lexicon
+
+    def sku_positions(self, sku: str) -> Sequence:
+        """sku 对应的商品位置（目录顺序）"""
+        return self._skus.positions(sku)
+
+    def close(self) -> None:
+        """释放对镜像的引用（之后不能再访问目录）"""
+        # 先丢弃全部视图，缓冲区没有导出的引用后才能关闭
+        self._offsets = self._records = self._index = self._lexicon = self._skus = self.budgets = None
+        if self._owner is not None:
+            self._owner.close()
+            self._owner = None
+
+
+def publish(catalog: Iterable[Dict], name: Optional[str] = None) -> shared_memory.SharedMemory:
+    """在共享内存中发布目录镜像；发布方负责在不再需要时 close() 并 unlink()"""
+    image = build_image(catalog)
+    block = shared_memory.SharedMemory(name=name, create=True, size=len(image))
+    block.buf[:len(image)] = image
+    return block
+
+
+def attach(name: str) -> SharedCatalog:
+    """按名称附加共享内存中的目录（附加方退出时不删除共享内存块）"""
+    block = shared_memory.SharedMemory(name=name)
+    # 共享内存块由发布方管理；附加方不登记到资源跟踪器，否则退出时会被误删
+    resource_tracker.unregister(block._name, 'shared_memory')
+    return SharedCatalog(block.buf, owner=block)
+
+
+def write_image(catalog: Iterable[Dict], path: str) -> int:
+    """把目录镜像写入文件，返回字节数"""
+    image = build_image(catalog)
+    with open(path, 'wb') as f:
+        f.write(image)
+    return len(image)
+
+
+def open_image(path: str) -> SharedCatalog:
+    """以只读 mmap 打开镜像文件，多个进程打开同一文件时共享页缓存"""
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return SharedCatalog(mapped, owner=mapped)
@@ -0,0 +1,129 @@
+"""
+槽位化符号表：编译时为脚本用到的每个标识符分配固定槽位，求值时按下标直接取值
+
+    LAYOUT        全局槽位布局（标识符 -> 下标），由条件节点（比较、存在、IN、BETWEEN）构造时登记；
+                  只有脚本中出现的标识符占用槽位，总数不超过 MAX_SLOTS
+    SymbolTable   列表存储的符号表，对外保持 dict 接口；未分配槽位的参数放在 extras 中
+"""
+import threading
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, List, Optional
+
+# 常用标识符预先分配槽位
+PRESET_IDENTS = ('scene', 'intent', '预算', '价格', '品牌', '型号')
+# 槽位布局的上限：布局只增不减，热加载不断引入新标识符时以编译失败告终，而不是无限增长
+MAX_SLOTS = 1024
+
+
+class SlotLayout:
+    """标识符 -> 槽位下标，只增不减，多个脚本共享同一布局"""
+    def __init__(self, idents=PRESET_IDENTS, max_slots: int = MAX_SLOTS):
+        self.index: Dict[str, int] = {}
+        self.names: List[str] = []
+        self.max_slots = max_slots
+        self.blank: List = []  # 与布局等长的全 None 列表，SymbolTable.clear 用它原地清空
+        self._lock = threading.Lock()
+        for ident in idents:
+            self.slot(ident)
+
+    def slot(self, ident: str) -> int:
+        """返回标识符的槽位，没有则分配一个；布局已满时抛出 ValueError（脚本编译失败）"""
+        slot = self.index.get(ident)
+        if slot is None:
+            with self._lock:
+                slot = self.index.get(ident)
+                if slot is None:
+                    if len(self.names) >= self.max_slots:
+                        raise ValueError(f"脚本中的标识符超过 {self.max_slots} 个，无法为 {ident} 分配槽位")
+                    slot = len(self.names)
+                    self.names.append(ident)
+                    self.blank = [None] * len(self.names)
+                    self.index[ident] = slot
+        return slot
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+LAYOUT = SlotLayout()
+
+
+class SymbolTable(MutableMapping):
+    """
+    列表存储的符号表（每次请求复用，clear 后原地清空）
+    值为 None 的槽位视为不存在，与执行器“缺失即为假”的语义一致
+    """
+    __slots__ = ('layout', 'values', 'extras')
+
+    def __init__(self, data: Optional[Dict] = None, layout: SlotLayout = LAYOUT):
+        self.layout = layout
+        self.values: List = [None] * len(layout)
+        self.extras: Dict = {}  # 脚本中未出现的参数（没有槽位）
+        if data:
+            self.update(data)
+
+    def slots(self) -> List:
+        """返回按槽位下标存取的值列表（布局新增槽位后先扩容，并迁移已有参数）"""
+        values = self.values
+        if len(values) < len(self.layout):
+            values.extend([None] * (len(self.layout) - len(values)))
+            index = self.layout.index
+            for name in [name for name in self.extras if name in index]:
+                values[index[name]] = self.extras.pop(name)
+        return values
+
+    def get(self, key, default=None):
+        slot = self.layout.index.get(key)
+        if slot is None:
+            return self.extras.get(key, default)
+        try:
+            value = self.values[slot]
+        except IndexError:
+            value = self.slots()[slot]
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value) -> None:
+        slot = self.layout.index.get(key)
+        if slot is None:
+            self.extras[key] = value
+            return
+        try:
+            self.values[slot] = value
+        except IndexError:
+            self.slots()[slot] = value
+
+    def __delitem__(self, key) -> None:
+        if key not in self:
+            raise KeyError(key)
+        slot = self.layout.index.get(key)
+        if slot is None:
+            del self.extras[key]
+        else:
+            self.values[slot] = None
+
+    def __contains__(self, key) -> bool:
+        return self.get(key) is not None
+
+    def __iter__(self) -> Iterator:
+        names = self.layout.names
+        for slot, value in enumerate(self.values):
+            if value is not None:
+                yield names[slot]
+        yield from list(self.extras)
+
+    def __len__(self) -> int:
+        return len(self.values) - self.values.count(None) + len(self.extras)
+
+    def clear(self) -> None:
+        # 复制布局的空白行：原地清空并补齐到布局长度，不为每次请求新建列表
+        self.values[:] = self.layout.blank
+        self.extras.clear()
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
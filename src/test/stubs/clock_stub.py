@@ -0,0 +1,13 @@
+# src/test/stubs/clock_stub.py
+
+
+class FakeClock:
+    """可手动推进的时钟（替代 time.monotonic / time.perf_counter）"""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
@@ -1,7 +1,11 @@
 # src/test/stubs/dsl_stub.py
 
+import random
 from typing import Dict, List, Optional
 
+from src.ast_nodes import VALID_INTENTS
+
+
 # 模拟DSL文件内容，避免读取真实的.dsl文件
 def load_mock_dsl(script_name: str) -> str:
     """根据脚本名返回预设的DSL脚本内容"""
@@ -62,4 +66,39 @@ def load_mock_dsl(script_name: str) -> str:
             ON_INTENT 兜底
             ELSE
                 REPLY "未找到对应脚本，请确认您的意图。"
-        """.strip()
\ No newline at end of file
+        """.strip()
+
+
+# 随机脚本的组成部分（标识符含关键字前缀，字面量含各种写法）
+IDENTS = ['预算', '品牌', '型号', 'scene', 'intent', 'a', '_x1', 'IFa', 'ELSEb', 'ANDy', 'ORc', '价格2']
+NUMBERS = ['5000', '12.', '3.50', '0', '007']
+STRINGS = ['"小米"', '""', '"a\\"b"', '"多行\n文本"', '"含 # 号"', '"REPLY"']
+COMPARE_OPS = ['<=', '>=', '<', '>', '==', '!=']
+SEPARATORS = [' ', '\n', '\t', '  \r\n', ' # 注释\n', '\n\n    ']
+
+
+def random_script(rng: random.Random) -> str:
+    """生成符合文法的随机脚本（含注释、换行与各种字面量写法）"""
+    def sep():
+        return rng.choice(SEPARATORS)
+
+    def expr(depth):
+        roll = rng.random()
+        if depth < 4 and roll < 0.2:
+            return f"({sep()}{expr(depth + 1)}{sep()})"
+        if depth < 4 and roll < 0.5:
+            return f"{expr(depth + 1)}{sep()}{rng.choice(['AND', 'OR'])}{sep()}{expr(depth + 1)}"
+        ident = rng.choice(IDENTS)
+        if rng.random() < 0.3:
+            return ident
+        value = rng.choice(NUMBERS + STRINGS)
+        op = rng.choice(COMPARE_OPS)
+        return f"{ident}{rng.choice(['', ' '])}{op}{rng.choice(['', ' '])}{value}"
+
+    parts = [f"SCENE {rng.choice(['通用', '手机', 'x'])}", f"ON_INTENT {rng.choice(VALID_INTENTS)}",
+             f"IF {expr(0)}{sep()}REPLY {rng.choice(STRINGS)}"]
+    for _ in range(rng.randint(0, 4)):
+        parts.append(f"ELSE IF {expr(0)}{sep()}REPLY {rng.choice(STRINGS)}")
+    if rng.random() < 0.6:
+        parts.append(f"ELSE{sep()}REPLY {rng.choice(STRINGS)}")
+    return sep().join(parts)
@@ -0,0 +1,40 @@
+# src/test/stubs/llm_backend_stub.py
+
+import json
+import random
+import time
+from typing import Callable, Optional
+
+from src.test.stubs.qwen_stub import QWENAPIStub
+
+
+class StubLLMBackend:
+    """
+    模拟不同档位模型的补全后端（用于离线测试模型路由）
+    latency: 每次调用的模拟延迟（秒）
+    accuracy: 返回正确 JSON 结果的概率，其余情况随机返回非法 JSON、未知意图或低置信度结果
+    """
+    def __init__(self, latency: float = 0.0, accuracy: float = 1.0, seed: Optional[int] = 0,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.latency = latency
+        self.sleep = sleep  # 模拟延迟的等待函数，测试中可注入假时钟的 advance
+        self.accuracy = accuracy
+        self.rng = random.Random(seed)
+        self.oracle = QWENAPIStub()
+        self.calls = 0
+
+    def __call__(self, user_input: str) -> str:
+        self.calls += 1
+        if self.latency:
+            self.sleep(self.latency)
+        result = dict(self.oracle.recognize_intent(user_input))
+        result['confidence'] = 0.95
+        if self.rng.random() >= self.accuracy:
+            failure = self.rng.choice(['invalid_json', 'unknown_intent', 'low_confidence'])
+            if failure == 'invalid_json':
+                return '好的，这是识别结果：' + json.dumps(result, ensure_ascii=False)
+            if failure == 'unknown_intent':
+                result['intent'] = '其他'
+            else:
+                result['confidence'] = 0.2
+        return json.dumps(result, ensure_ascii=False)
@@ -60,4 +60,15 @@ class QWENAPIStub:
                 "category": "手机",
                 "intent": self.mock_result.get("intent", "商品推荐"),
                 "params": self.mock_result.get("params", {})
-            }
\ No newline at end of file
+            }
+
+
+class CountingStub(QWENAPIStub):
+    """记录调用次数的意图识别桩"""
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def recognize_intent(self, user_input: str):
+        self.calls += 1
+        return super().recognize_intent(user_input)
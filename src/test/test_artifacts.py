@@ -0,0 +1,124 @@
+# src/test/test_artifacts.py
+
+import unittest
+import sys
+import os
+import shutil
+import subprocess
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import artifacts
+from src.artifacts import ArtifactError, artifact_path, dumps, encode_script, load_or_compile, loads
+from src.ast_nodes import dump
+from src.bench.bench_parser import generate_script
+from src.compiler import compile_script
+from src.dsl_registry import DSLRegistry
+
+
+class TestArtifacts(unittest.TestCase):
+    """测试编译产物的序列化、失效检测与冷启动加载"""
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp, '__dslcache__')
+        for name in os.listdir('src/dsl'):
+            if name.endswith('.dsl'):
+                shutil.copy(os.path.join('src/dsl', name), self.tmp)
+        self.compiled = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def counting_compile(self, source):
+        self.compiled.append(source)
+        return compile_script(source)
+
+    def test_roundtrip_preserves_ast(self):
+        for name in os.listdir(self.tmp):
+            if not name.endswith('.dsl'):
+                continue
+            with open(os.path.join(self.tmp, name), encoding='utf-8') as f:
+                source = f.read()
+            ast = compile_script(source)
+            self.assertEqual(dump(loads(dumps(ast, source), source)), dump(ast), name)
+
+    def test_roundtrip_large_and_deep_scripts(self):
+        source = generate_script(3000)
+        ast = compile_script(source, 'rd')
+        self.assertEqual(dump(loads(dumps(ast, source), source)), dump(ast))
+
+        deep = 'SCENE 通用\nON_INTENT 商品推荐\nIF ' + ' AND '.join(['品牌'] * 20000) + ' REPLY "x"'
+        ast = compile_script(deep, 'rd')
+        # 深层嵌套的元组无法直接比较，改为比较扁平的后缀编码
+        self.assertEqual(encode_script(loads(dumps(ast, deep), deep)), encode_script(ast))
+
+    def test_missing_then_hit(self):
+        with open(os.path.join(self.tmp, 'price_query.dsl'), encoding='utf-8') as f:
+            source = f.read()
+        ast, status = load_or_compile('price_query.dsl', source, self.cache_dir, self.counting_compile)
+        self.assertEqual(status, 'missing')
+        cached, status = load_or_compile('price_query.dsl', source, self.cache_dir, self.counting_compile)
+        self.assertEqual(status, 'hit')
+        self.assertEqual(dump(cached), dump(ast))
+        self.assertEqual(len(self.compiled), 1)
+
+    def test_stale_and_corrupt_are_rebuilt(self):
+        with open(os.path.join(self.tmp, 'price_query.dsl'), encoding='utf-8') as f:
+            source = f.read()
+        load_or_compile('price_query.dsl', source, self.cache_dir, self.counting_compile)
+        path = artifact_path(self.cache_dir, 'price_query.dsl')
+
+        # 源码变化
+        edited = source.replace('请问您要查询', '请问您想查询')
+        ast, status = load_or_compile('price_query.dsl', edited, self.cache_dir, self.counting_compile)
+        self.assertEqual(status, 'stale')
+        self.assertEqual(dump(ast), dump(compile_script(edited)))
+
+        # 编译器版本变化
+        original_version = artifacts.COMPILER_VERSION
+        artifacts.COMPILER_VERSION = original_version + 1
+        try:
+            self.assertEqual(load_or_compile('price_query.dsl', edited, self.cache_dir, self.counting_compile)[1], 'stale')
+        finally:
+            artifacts.COMPILER_VERSION = original_version
+        # 降回当前版本后，上面写出的新版本产物同样视为过期
+        self.assertEqual(load_or_compile('price_query.dsl', edited, self.cache_dir, self.counting_compile)[1], 'stale')
+
+        # 负载损坏与文件截断
+        with open(path, 'rb') as f:
+            data = bytearray(f.read())
+        data[-1] ^= 0xFF
+        with open(path, 'wb') as f:
+            f.write(bytes(data))
+        self.assertEqual(load_or_compile('price_query.dsl', edited, self.cache_dir, self.counting_compile)[1], 'corrupt')
+        with open(path, 'wb') as f:
+            f.write(b'DSLC\x01')
+        self.assertEqual(load_or_compile('price_query.dsl', edited, self.cache_dir, self.counting_compile)[1], 'corrupt')
+
+        # 重建后再次命中
+        self.assertEqual(load_or_compile('price_query.dsl', edited, self.cache_dir, self.counting_compile)[1], 'hit')
+        with self.assertRaises(ArtifactError):
+            loads(b'XXXX', edited)
+
+    def test_registry_uses_artifacts(self):
+        first = DSLRegistry(self.tmp, compile_fn=self.counting_compile, artifact_dir=self.cache_dir).load_all()
+        self.assertEqual(first['artifacts'], {'missing': 4})
+        self.assertEqual(len(self.compiled), 4)
+
+        registry = DSLRegistry(self.tmp, compile_fn=self.counting_compile, artifact_dir=self.cache_dir)
+        second = registry.load_all()
+        self.assertEqual(second['artifacts'], {'hit': 4})
+        self.assertEqual(len(self.compiled), 4)
+        self.assertEqual(registry.lookup('价格查询', '通用'), 'price_query.dsl')
+
+    def test_cold_start_does_not_import_ply(self):
+        DSLRegistry(self.tmp, artifact_dir=self.cache_dir).load_all()
+        code = ("import sys; from src.dsl_registry import DSLRegistry; "
+                f"r = DSLRegistry({self.tmp!r}, artifact_dir={self.cache_dir!r}).load_all(); "
+                "print(r['artifacts'], 'ply' in sys.modules)")
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        self.assertEqual(output.stdout.strip().splitlines()[-1], "{'hit': 4} False")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+# src/test/test_ast_nodes.py
+
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import operator
+from src.ast_nodes import *
+from src.compiler import compile_script
+from src.executor import ASTExecutor
+
+HEADER = 'SCENE 通用\nON_INTENT 商品推荐\n'
+
+
+class TestCompactAST(unittest.TestCase):
+    """测试紧凑 AST：__slots__、标识符驻留、预解析运算符与数字字面量类型"""
+    def test_nodes_have_no_instance_dict(self):
+        ast = compile_script(HEADER + 'IF 预算 > 1 AND 品牌 REPLY "x" ELSE REPLY "y"', 'rd')
+        nodes = [ast, ast.scene, ast.intent, ast.if_blocks, ast.if_blocks.if_block, ast.if_blocks.else_block,
+                 ast.if_blocks.if_block.condition, ast.if_blocks.if_block.condition.left,
+                 ast.if_blocks.if_block.condition.right]
+        for node in nodes:
+            self.assertFalse(hasattr(node, '__dict__'), type(node).__name__)
+        with self.assertRaises(AttributeError):
+            ast.extra = 1
+
+    def test_identifiers_are_interned(self):
+        for backend in ('ply', 'rd'):
+            first = compile_script(HEADER + 'IF 预算 > 1 REPLY "a"', backend)
+            second = compile_script(HEADER + 'IF 预算 < 9 REPLY "b"', backend)
+            self.assertIs(first.if_blocks.if_block.condition.ident, second.if_blocks.if_block.condition.ident)
+            self.assertIs(first.scene.name, second.scene.name)
+
+    def test_operator_resolved_at_parse_time(self):
+        node = CompareNode('预算', '>=', 10)
+        self.assertEqual(node.op, '>=')
+        self.assertIs(node.fn, operator.ge)
+        node.op = '<'
+        self.assertIs(node.fn, operator.lt)
+        self.assertFalse(CompareNode('预算', '~', 1).fn(1, 1))
+
+    def test_number_literals_keep_exact_type(self):
+        for backend in ('ply', 'rd'):
+            ast = compile_script(HEADER + 'IF 预算 >= 3000 REPLY "a" ELSE IF 预算 >= 2.5 REPLY "b"', backend)
+            self.assertIs(type(ast.if_blocks.if_block.condition.value), int)
+            self.assertIs(type(ast.if_blocks.else_if_blocks[0].condition.value), float)
+        self.assertEqual(number_literal('7.'), 7.0)
+
+    def test_evaluation_unchanged(self):
+        ast = compile_script(HEADER + 'IF 预算 == 3000 AND 品牌 != "苹果" REPLY "命中" ELSE REPLY "未命中"', 'rd')
+        self.assertEqual(ASTExecutor({'预算': 3000.0, '品牌': '小米'}).execute(ast)['reply'], '命中')
+        self.assertEqual(ASTExecutor({'预算': 3000, '品牌': '苹果'}).execute(ast)['reply'], '未命中')
+        with self.assertRaises(TypeError):
+            ASTExecutor({'预算': '很多'}).execute(compile_script(HEADER + 'IF 预算 > 1 REPLY "x"', 'rd'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+# src/test/test_batch_eval.py
+
+import unittest
+import sys
+import os
+import random
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import numpy as np
+except ImportError:  # 批量求值依赖 NumPy，未安装时跳过
+    np = None
+
+from src.compiler import compile_script
+from src.executor import ASTExecutor
+from src.optimizer import optimize
+from src.test.stubs.dsl_stub import random_script
+
+HEADER = 'SCENE 通用\nON_INTENT 商品推荐\n'
+
+
+def per_row(ast, records):
+    """逐行执行，返回 (回复, 是否抛出 TypeError)"""
+    results = []
+    for record in records:
+        try:
+            results.append((ASTExecutor(dict(record)).execute(ast)['reply'], False))
+        except TypeError:
+            results.append((None, True))
+    return results
+
+
+@unittest.skipUnless(np, '需要 NumPy')
+class TestBatchEvaluation(unittest.TestCase):
+    """测试列式批量求值与逐行执行结果一致"""
+    def assert_matches(self, ast, records, message=None):
+        from src.batch_eval import Columns, evaluate
+        result = evaluate(ast, Columns.from_records(records))
+        batch = list(zip(result.replies.tolist(), result.errors.tolist()))
+        self.assertEqual(batch, per_row(ast, records), message)
+        return result
+
+    def test_branch_indexes_and_missing_values(self):
+        ast = compile_script(HEADER + '''
+            IF 预算 > 5000 REPLY "高"
+            ELSE IF 品牌 REPLY "品牌"
+            ELSE IF 预算 REPLY "预算"
+            ELSE REPLY "默认"''')
+        records = [{'预算': 6000}, {'预算': 100, '品牌': '小米'}, {'预算': 100, '品牌': ''},
+                   {'品牌': None}, {}, {'预算': 0}]
+        result = self.assert_matches(ast, records)
+        self.assertEqual(result.branches.tolist(), [0, 1, 2, 3, 3, 2])
+        self.assertEqual(result.counts(), {0: 1, 1: 1, 2: 2, 3: 2})
+
+    def test_type_errors_follow_first_match(self):
+        ast = compile_script(HEADER + 'IF 品牌 == "a" REPLY "a" ELSE IF 预算 > 100 REPLY "b" ELSE REPLY "c"')
+        records = [{'品牌': 'a', '预算': '很多'}, {'品牌': 'b', '预算': '很多'}, {'预算': 200}, {'预算': [1]}]
+        result = self.assert_matches(ast, records)
+        self.assertEqual(result.errors.tolist(), [False, True, False, True])
+        self.assertEqual(result.branches.tolist(), [0, -1, 1, -1])
+
+    def test_numpy_columns_with_mask(self):
+        from src.batch_eval import Columns, evaluate
+        ast = compile_script(HEADER + 'IF 品牌 IN ("a", "b") AND 预算 BETWEEN 10 AND 20 REPLY "x" ELSE REPLY "y"')
+        columns = Columns({'品牌': (np.array(['a', 'b', 'c', 'a']), np.array([False, False, False, True])),
+                           '预算': np.array([10.0, 25.0, 15.0, 15.0])})
+        self.assertEqual(evaluate(ast, columns).replies.tolist(), ['x', 'y', 'y', 'y'])
+        with self.assertRaises(ValueError):
+            Columns({'品牌': np.array(['a']), '预算': np.array([1.0, 2.0])})
+
+    def test_optimized_and_tabulated_scripts(self):
+        branches = [f'品牌 == "b{i}" AND 预算 >= {i * 10}' for i in range(6)]
+        source = HEADER + f'IF {branches[0]} REPLY "0"\n'
+        source += ''.join(f'ELSE IF {text} REPLY "{i + 1}"\n' for i, text in enumerate(branches[1:]))
+        optimized = optimize(compile_script(source), {'intent': '商品推荐'}).ast
+        records = [{'intent': '商品推荐', '品牌': f'b{i % 7}', '预算': i * 3} for i in range(40)]
+        records.append({'intent': '商品推荐', '品牌': 'b1', '预算': 'x'})
+        self.assert_matches(optimized, records)
+
+    def test_differential_random_scripts(self):
+        rng = random.Random(41)
+        values = [None, '', 0, 5000, 12.0, 12, True, float('nan'), '小米', 'a"b', '商品推荐', '手机', 'b', 'z']
+        idents = ['预算', '品牌', '型号', 'scene', 'intent', 'a', '_x1', 'IFa', 'ELSEb', 'ANDy', 'ORc', '价格2']
+        extras = ['预算 IN (5000, "小米", 12.5)', '品牌 BETWEEN "a" AND "z"', '预算 BETWEEN 0 AND 5000',
+                  'a BETWEEN 1 AND "z"']
+        for _ in range(200):
+            source = random_script(rng)
+            if rng.random() < 0.5:
+                source = source.replace('IF ', f'IF {rng.choice(extras)} {rng.choice(["AND", "OR"])} ', 1)
+            ast = compile_script(source, 'rd')
+            records = [{ident: rng.choice(values) for ident in idents if rng.random() < 0.6} for _ in range(30)]
+            self.assert_matches(ast, records, source)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+# src/test/test_compound.py
+
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DSLManager import DSLManager
+from src.test.stubs.qwen_stub import CountingStub
+
+
+class FixedRecognizer:
+    """总是返回同一个意图结果的识别器"""
+    def __init__(self, result):
+        self.result = result
+
+    def recognize_intent(self, user_input):
+        return dict(self.result)
+
+
+class TestCompoundIntents(unittest.TestCase):
+    """测试复合查询：多个意图并发执行，共享一次目录查询并合并回复"""
+    def setUp(self):
+        self.dsl_manager = DSLManager(recognizer=CountingStub())
+        self.dsl_manager.response_cache = None
+
+    def test_price_and_stock_in_one_query(self):
+        price = self.dsl_manager.execute_dsl("查询小米14的价格")
+        stock = self.dsl_manager.execute_dsl("小米14有货吗")
+
+        lookups = []
+        search = self.dsl_manager.search_catalog_for_query
+        self.dsl_manager.search_catalog_for_query = lambda *args: lookups.append(args) or search(*args)
+        self.assertEqual(self.dsl_manager.execute_dsl("小米14多少钱，有货吗"), price + '\n' + stock)
+        self.assertEqual(len(lookups), 1)
+        # 回复按意图在输入中出现的顺序合并
+        self.assertEqual(self.dsl_manager.execute_dsl("小米14有货吗，价格呢"), stock + '\n' + price)
+        self.assertEqual(self.dsl_manager.stats['compound_queries'], 2)
+        self.assertEqual(self.dsl_manager.sym_tbl['intent'], '库存查询')
+
+    def test_recognizer_intents_and_classifier(self):
+        classifier = self.dsl_manager.intent_fast_path
+        self.assertEqual(classifier.match_keyword_intents("小米14有货吗多少钱"), ['库存查询', '价格查询'])
+        self.assertNotIn('intents', classifier.classify("小米14多少钱"))
+        self.assertEqual(classifier.classify("小米14多少钱，有货吗")['intents'], ['价格查询', '库存查询'])
+
+        manager = DSLManager(recognizer=FixedRecognizer({'category': '手机', 'intent': '价格查询',
+                                                         'intents': ['价格查询', '库存查询', '未知'],
+                                                         'params': {'品牌': '小米', '型号': '小米14'}}))
+        manager.intent_fast_path = None
+        reply = manager.execute_dsl("帮我看看这款")
+        self.assertEqual(len(reply.split('\n')), 2)
+        self.assertIn("4500", reply.split('\n')[0])
+        self.assertIn("库存状态", reply.split('\n')[1])
+
+    def test_single_intent_is_not_fanned_out(self):
+        self.dsl_manager.execute_dsl("查询小米14的价格")
+        self.dsl_manager.execute_dsl("推荐5000元的小米手机")
+        self.assertEqual(self.dsl_manager.stats['compound_queries'], 0)
+        self.assertIsNone(self.dsl_manager._fanout_pool)
+
+    def test_greeting_or_recommendation_with_price_is_not_fanned_out(self):
+        price = self.dsl_manager.execute_dsl("查询小米14的价格")
+        stock = self.dsl_manager.execute_dsl("iPhone 15 Pro有货吗")
+        classifier = self.dsl_manager.intent_fast_path
+        for text in ("你好，小米14多少钱", "谢谢，iPhone 15 Pro还有货吗", "推荐一款手机，小米14多少钱"):
+            self.assertNotIn('intents', classifier.classify(text), text)
+        self.assertEqual(self.dsl_manager.execute_dsl("你好，小米14多少钱", session_id='g'), price)
+        self.assertEqual(self.dsl_manager.sessions.get('g').intent, '价格查询')
+        self.assertEqual(self.dsl_manager.execute_dsl("谢谢，iPhone 15 Pro还有货吗"), stock)
+        self.assertEqual(self.dsl_manager.execute_dsl("推荐一款手机，小米14多少钱"), price)
+        self.assertEqual(self.dsl_manager.stats['compound_queries'], 0)
+
+        # 识别器给出的 intents 同样只拆分价格与库存
+        manager = DSLManager(recognizer=FixedRecognizer({'category': '手机', 'intent': '价格查询',
+                                                         'intents': ['自然沟通', '价格查询'],
+                                                         'params': {'品牌': '小米', '型号': '小米14'}}))
+        manager.intent_fast_path = None
+        self.assertEqual(manager._compound_intents(manager.recognizer.recognize_intent(''), '你好'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
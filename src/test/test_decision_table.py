@@ -0,0 +1,128 @@
+# src/test/test_decision_table.py
+
+import unittest
+import sys
+import os
+import random
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ast_nodes import *
+from src.compiler import compile_script
+from src.decision_table import tabulate
+from src.executor import ASTExecutor
+from src.optimizer import optimize
+from src.symbols import SymbolTable
+
+HEADER = 'SCENE 通用\nON_INTENT 商品推荐\n'
+
+
+def run(ast, symbols):
+    try:
+        return ASTExecutor(symbols).execute(ast)['reply']
+    except Exception as e:
+        return type(e)
+
+
+def ladder(branches, else_reply='else'):
+    source = HEADER + f'IF {branches[0]} REPLY "0"\n'
+    source += ''.join(f'ELSE IF {text} REPLY "{i + 1}"\n' for i, text in enumerate(branches[1:]))
+    if else_reply is not None:
+        source += f'ELSE REPLY "{else_reply}"'
+    return compile_script(source, 'rd')
+
+
+def table_for(ast):
+    table = tabulate(ast.if_blocks)
+    return table and ScriptNode(ast.scene, ast.intent, table)
+
+
+class TestDecisionTable(unittest.TestCase):
+    """测试 IF 链编译为决策表"""
+    def test_shape_detection(self):
+        fitting = [
+            ['品牌 == "a"', '品牌 == "b"', '品牌 IN ("c", "d")', '品牌 == 5'],
+            ['品牌 == "a" AND 预算 < 100', '品牌 == "a" AND 预算 >= 100', '品牌 == "b"', '品牌 == "c" AND 预算 BETWEEN 1 AND 2'],
+            ['品牌 == "a" AND 型号 == "x"', '型号 == "y" AND 品牌 == "a"', '品牌 IN ("b") AND 型号 IN ("x", "y")',
+             '品牌 == "c" AND 型号 == "z" AND 预算 > 10'],
+        ]
+        for branches in fitting:
+            self.assertIsNotNone(table_for(ladder(branches)), branches)
+        not_fitting = [
+            ['品牌 == "a"', '品牌 == "b"', '品牌 == "c"'],                        # 分支太少
+            ['品牌 == "a"', '品牌 == "b" OR 品牌 == "x"', '品牌 == "c"', '品牌 == "d"'],
+            ['品牌 == "a"', '品牌 != "b"', '品牌 == "c"', '品牌 == "d"'],
+            ['品牌 == "a"', '品牌 == "b" AND 型号', '品牌 == "c"', '品牌 == "d"'],
+            ['品牌 == "a"', '型号 == "b"', '品牌 == "c"', '品牌 == "d"'],           # 分支没有约束全部键
+            ['品牌 == "a" AND 型号 == "x" AND scene == "s"', '品牌 == "b"', '品牌 == "c"', '品牌 == "d"'],
+            ['品牌 == "a" AND 预算 > 1', '品牌 == "b" AND 价格 > 1', '品牌 == "c"', '品牌 == "d"'],
+            ['品牌 == "a" AND 预算 > "m"', '品牌 == "b"', '品牌 == "c"', '品牌 == "d"'],
+            ['预算 > 1', '预算 > 2', '预算 > 3', '预算 > 4'],                     # 没有等值键
+        ]
+        for branches in not_fitting:
+            self.assertIsNone(table_for(ladder(branches)), branches)
+
+    def test_first_match_wins_with_overlapping_ranges(self):
+        ast = ladder(['品牌 == "a" AND 预算 >= 100 AND 预算 <= 200', '品牌 == "a" AND 预算 > 50',
+                      '品牌 == "a" AND 预算 BETWEEN 150 AND 300', '品牌 == "a"', '品牌 == "b" AND 预算 < 0'])
+        table = table_for(ast)
+        for budget in [None, 0, 50, 50.5, 100, 150, 200, 200.5, 250, 300, 301, -1, True]:
+            for brand in ['a', 'b', 'c', None]:
+                symbols = {k: v for k, v in (('品牌', brand), ('预算', budget)) if v is not None}
+                self.assertEqual(run(table, dict(symbols)), run(ast, dict(symbols)), symbols)
+                self.assertEqual(run(table, SymbolTable(symbols)), run(ast, dict(symbols)), symbols)
+        self.assertEqual(run(table, {'品牌': 'a', '预算': 120}), '0')
+        self.assertEqual(run(table, {'品牌': 'a', '预算': 250}), '1')
+        self.assertEqual(run(table, {'品牌': 'a'}), '3')
+        self.assertEqual(run(table, {'品牌': 'b'}), 'else')
+
+    def test_type_mismatch_falls_back(self):
+        ast = ladder(['品牌 == "a" AND 预算 > 100', '品牌 == "b"', '品牌 == "c"', '品牌 == "d" AND 预算 < 5'])
+        table = table_for(ast)
+        self.assertIs(run(table, {'品牌': 'b', '预算': '很多'}), TypeError)
+        self.assertIs(run(table, {'品牌': 'b', '预算': float('nan')}), run(ast, {'品牌': 'b', '预算': float('nan')}))
+        # 首个分支不含区间条件且命中时，原脚本不会抛出异常
+        first = ladder(['品牌 == "a"', '品牌 == "b" AND 预算 > 1', '品牌 == "c"', '品牌 == "d"'])
+        self.assertEqual(run(table_for(first), {'品牌': 'a', '预算': '很多'}), '0')
+        self.assertEqual(run(table_for(first), {'品牌': ['a'], '预算': 3}), run(first, {'品牌': ['a'], '预算': 3}))
+
+    def test_optimizer_tabulates_after_folding(self):
+        branches = ['intent == "商品推荐" AND 品牌 == "a"', 'intent == "价格查询"', '品牌 == "b" AND 预算 > 10',
+                    '品牌 IN ("c", "d") AND intent IN ("商品推荐")', '品牌 == "e"']
+        ast = ladder(branches)
+        optimized = optimize(ast, {'intent': '商品推荐'})
+        self.assertIsInstance(optimized.ast.if_blocks, DecisionTableNode)
+        self.assertEqual(optimized.stats['tabulated'], 4)
+        for brand in ['a', 'b', 'c', 'd', 'e', 'f']:
+            symbols = {'intent': '商品推荐', '品牌': brand, '预算': 20}
+            self.assertEqual(run(optimized.ast, symbols), run(ast, symbols))
+
+    def test_differential_random_ladders(self):
+        rng = random.Random(40)
+        keys = ['品牌 == "a"', '品牌 == "b"', '品牌 IN ("a", "c")', '品牌 == 5', '品牌 IN (5.0, "b")']
+        models = ['型号 == "x"', '型号 IN ("x", "y")', '型号 == "y"']
+        ranges = ['预算 < 100', '预算 >= 100', '预算 <= 100.5', '预算 > 499', '预算 BETWEEN 100 AND 500', '预算 == 3']
+        values = {'品牌': ['a', 'b', 'c', 5, 5.0, True, ''], '型号': ['x', 'y', 'z'],
+                  '预算': [0, 99.5, 100, 100.5, 300, 499, 500, 501, True, 'n', '']}
+        built = 0
+        for _ in range(300):
+            two_keys = rng.random() < 0.4
+            branches = []
+            for _ in range(rng.randint(4, 9)):
+                parts = [rng.choice(keys)] + ([rng.choice(models)] if two_keys else [])
+                parts += rng.sample(ranges, rng.randint(0, 2))
+                branches.append(' AND '.join(rng.sample(parts, len(parts))))
+            ast = ladder(branches, rng.choice(['else', None]))
+            table = table_for(ast)
+            if table is None:
+                continue
+            built += 1
+            for _ in range(15):
+                symbols = {ident: rng.choice(options) for ident, options in values.items() if rng.random() < 0.8}
+                expected = run(ast, dict(symbols))
+                self.assertEqual(run(table, dict(symbols)), expected, (branches, symbols))
+                self.assertEqual(run(table, SymbolTable(symbols)), expected, (branches, symbols))
+        self.assertGreater(built, 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+# src/test/test_dsl_registry.py
+
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DSLManager import DSLManager
+from src.dsl_registry import DSLRegistry, read_header
+from src.test.stubs.qwen_stub import QWENAPIStub
+
+PHONE_SCRIPT = """SCENE 手机
+ON_INTENT 商品推荐
+IF 预算 >= 1
+    REPLY "手机专属推荐脚本"
+ELSE
+    REPLY "手机专属兜底"
+"""
+
+# 缺少 REPLY 的语法错误（PLY 后端不做错误恢复，不会编译出改变了的 IF 链）
+BROKEN_SCRIPT = """SCENE 通用
+ON_INTENT 价格查询
+IF 预算 > 3000
+    "不会被加载"
+"""
+
+
+class TestDSLRegistry(unittest.TestCase):
+    """测试 DSL 脚本注册表的扫描、预编译与索引"""
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        for name in os.listdir('src/dsl'):
+            if name.endswith('.dsl'):
+                shutil.copy(os.path.join('src/dsl', name), self.tmp)
+        with open(os.path.join(self.tmp, 'phone_recommendation.dsl'), 'w', encoding='utf-8') as f:
+            f.write(PHONE_SCRIPT)
+        with open(os.path.join(self.tmp, 'broken.dsl'), 'w', encoding='utf-8') as f:
+            f.write(BROKEN_SCRIPT)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_scan_precompiles_and_reports(self):
+        registry = DSLRegistry(self.tmp)
+        report = registry.load_all()
+        self.assertEqual(report['scripts'], 6)
+        self.assertEqual(len(report['compiled']), 5)
+        self.assertIn('broken.dsl', report['failed'])
+        self.assertIn('Syntax error', report['failed']['broken.dsl'])
+        self.assertGreaterEqual(report['elapsed_ms'], 0)
+
+    def test_index_by_intent_and_scene(self):
+        registry = DSLRegistry(self.tmp)
+        registry.load_all()
+        self.assertEqual(registry.lookup('商品推荐', '手机'), 'phone_recommendation.dsl')
+        self.assertEqual(registry.lookup('商品推荐', '衣服'), 'generic_recommendation.dsl')
+        self.assertEqual(registry.lookup('库存查询', '食物'), 'stock_query.dsl')
+        self.assertEqual(registry.lookup('其他', '手机'), 'phone_recommendation.dsl')
+        self.assertIsNone(registry.lookup('其他', '通用'))
+
+    def test_compile_source_reuses_precompiled_ast(self):
+        registry = DSLRegistry(self.tmp)
+        registry.load_all()
+        entry = registry.get('price_query.dsl')
+        self.assertIs(registry.compile_source(entry.source), entry)
+        self.assertEqual(read_header(PHONE_SCRIPT), ('手机', '商品推荐'))
+
+    def test_new_script_dispatched_without_code_change(self):
+        dsl_manager = DSLManager(self.tmp, recognizer=QWENAPIStub())
+        self.assertEqual(dsl_manager.execute_dsl("推荐5000元的小米手机"), "手机专属推荐脚本")
+        self.assertIn("智能商品助手", dsl_manager.execute_dsl("你好，想聊聊天"))
+
+
+class TestDSLHotReload(unittest.TestCase):
+    """测试 DSL 脚本热加载"""
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        for name in os.listdir('src/dsl'):
+            if name.endswith('.dsl'):
+                shutil.copy(os.path.join('src/dsl', name), self.tmp)
+        self.compiled = []
+        registry = DSLRegistry(self.tmp)
+        original_compile = registry.compile_fn
+
+        def counting_compile(source):
+            self.compiled.append(source)
+            return original_compile(source)
+
+        registry.compile_fn = counting_compile
+        registry.load_all()
+        self.registry = registry
+        self.compiled.clear()
+
+    def tearDown(self):
+        self.registry.stop_watching()
+        shutil.rmtree(self.tmp)
+
+    def write(self, name: str, content: str) -> None:
+        path = os.path.join(self.tmp, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        # 保证 mtime 变化可被检测（部分文件系统时间精度较低）
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    def test_only_changed_files_recompiled(self):
+        old_entry = self.registry.get('natural_chat.dsl')
+        self.write('natural_chat.dsl', old_entry.source.replace('您好！', '欢迎光临！'))
+        result = self.registry.reload_changed()
+        self.assertEqual(result['reloaded'], ['natural_chat.dsl'])
+        self.assertEqual(len(self.compiled), 1)
+
+        new_entry = self.registry.get('natural_chat.dsl')
+        self.assertNotEqual(new_entry.version, old_entry.version)
+        self.assertIn('欢迎光临', new_entry.ast.if_blocks.if_block.reply)
+        # 进行中的请求持有的旧 AST 不受影响
+        self.assertIn('您好！', old_entry.ast.if_blocks.if_block.reply)
+
+        self.assertEqual(self.registry.reload_changed()['reloaded'], [])
+        self.assertEqual(len(self.compiled), 1)
+
+    def test_broken_script_never_replaces_working_one(self):
+        old_entry = self.registry.get('price_query.dsl')
+        self.write('price_query.dsl', BROKEN_SCRIPT)
+        result = self.registry.reload_changed()
+        self.assertIn('price_query.dsl', result['failed'])
+        self.assertIs(self.registry.get('price_query.dsl'), old_entry)
+        # 未再修改的坏文件不会被反复编译
+        self.registry.reload_changed()
+        self.assertEqual(len(self.compiled), 1)
+
+    def test_added_and_removed_scripts(self):
+        generation = self.registry.generation
+        self.write('phone_recommendation.dsl', PHONE_SCRIPT)
+        os.remove(os.path.join(self.tmp, 'stock_query.dsl'))
+        result = self.registry.reload_changed()
+        self.assertEqual(result['added'], ['phone_recommendation.dsl'])
+        self.assertEqual(result['removed'], ['stock_query.dsl'])
+        self.assertEqual(self.registry.generation, generation + 1)
+        self.assertEqual(self.registry.lookup('商品推荐', '手机'), 'phone_recommendation.dsl')
+
+    def test_background_watcher_swaps_script(self):
+        dsl_manager = DSLManager(self.tmp, hot_reload_interval=0.02, recognizer=QWENAPIStub())
+        try:
+            self.assertIn("智能商品助手", dsl_manager.execute_dsl("你好"))
+            source = dsl_manager.registry.get('natural_chat.dsl').source
+            self.write('natural_chat.dsl', source.replace('智能商品助手', '热加载助手'))
+            deadline = time.time() + 5
+            while time.time() < deadline and '热加载助手' not in dsl_manager.load_dsl_script('natural_chat.dsl'):
+                time.sleep(0.02)
+            self.assertIn("热加载助手", dsl_manager.execute_dsl("你好"))
+        finally:
+            dsl_manager.registry.stop_watching()
@@ -0,0 +1,98 @@
+# src/test/test_explain.py
+
+import unittest
+import json
+import random
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DSLManager import DSLManager
+from src.ast_nodes import DecisionTableNode, GuardedIfBlocksNode
+from src.bench.bench_reorder import generate_ladder, generate_traffic
+from src.compiler import compile_script
+from src.executor import ASTExecutor
+from src.explain import Explainer, ExplainExecutor, replay
+from src.optimizer import optimize
+from src.profiling import BranchProfiler, ProfilingExecutor, reorder
+from src.symbols import SymbolTable
+from src.test.stubs.qwen_stub import QWENAPIStub
+
+SCRIPT = '''SCENE 手机
+ON_INTENT 价格查询
+IF (品牌 == "小米" OR 品牌 IN ("华为", "苹果")) AND 预算 BETWEEN 1000 AND 3000
+    REPLY "中端"
+ELSE IF 预算 > 3000 AND (品牌 == "小米" OR 品牌 IN ("华为", "苹果"))
+    REPLY "高端"
+ELSE IF 型号
+    REPLY "型号"
+'''
+
+
+class TestExplain(unittest.TestCase):
+    """测试逐节点剖析与解释模式"""
+    def test_same_results_for_all_compiled_forms(self):
+        ladder = compile_script(generate_ladder(30), 'rd')
+        traffic = [dict(symbols, intent='商品推荐') for symbols in generate_traffic(30, 300)]
+        profiler = BranchProfiler()
+        for symbols in traffic:
+            ProfilingExecutor(dict(symbols), profiler).execute(ladder)
+        reordered, moved = reorder(ladder, profiler.profiles[ladder.if_blocks])
+        self.assertGreater(moved, 0)
+        script = compile_script(SCRIPT, 'rd')
+        rng = random.Random(49)
+        records = [{'品牌': rng.choice(['小米', '华为', '苹果', 'OPPO', None]),
+                    '预算': rng.choice([500, 1000, 2999.5, 3000, 5000, None]),
+                    '型号': rng.choice(['小米14', '', None])} for _ in range(200)]
+        cases = [(ladder, traffic), (optimize(ladder, {'intent': '商品推荐'}).ast, traffic),
+                 (reordered, traffic), (script, records), (optimize(script, {'intent': '价格查询'}).ast, records)]
+        forms = set()
+        for ast, symbols in cases:
+            forms.add(type(ast.if_blocks))
+            explainer = Explainer()
+            for record in symbols:
+                table = SymbolTable()
+                table.update({k: v for k, v in record.items() if v is not None})
+                self.assertEqual(ExplainExecutor(table, explainer).execute(ast), ASTExecutor(table).execute(ast))
+            self.assertEqual(explainer.profile(ast).count, len(symbols))
+        self.assertIn(DecisionTableNode, forms)
+        self.assertIn(GuardedIfBlocksNode, forms)
+
+    def test_replay_aggregates_counts_branches_and_reads(self):
+        ast = compile_script(SCRIPT, 'rd')
+        records = [{'品牌': '小米', '预算': 2000}, {'品牌': '华为', '预算': 4000}, {'型号': 'X'}, {}]
+        explainer = replay(ast, records)
+        body = explainer.trace(ast)[0]['body']
+        self.assertEqual(body['count'], 4)
+        self.assertEqual(body['outcomes'], {'IF': 1, 'ELSE IF 1': 1, 'ELSE IF 2': 1, '未命中': 1})
+        condition = body['branches'][0]['condition']
+        self.assertEqual(condition['outcomes'], {True: 1, False: 3})
+        brand = condition['children'][0]['children'][0]
+        self.assertEqual(brand['expr'], '品牌 == "小米"')
+        self.assertEqual(brand['reads'], {'品牌': {'小米': 1, '华为': 1, None: 2}})
+        self.assertEqual(body['branches'][2]['condition']['count'], 2)
+        json.loads(explainer.to_json())
+
+        listing = explainer.listing(ast)
+        self.assertIn('IF (品牌 == "小米" OR 品牌 IN ("华为", "苹果")) AND 预算 BETWEEN 1000 AND 3000', listing)
+        self.assertIn('命中 未命中×1 IF×1 ELSE IF 1×1 ELSE IF 2×1', listing)
+        self.assertIn('预算=null×2,2000×1,4000×1', listing)
+        self.assertIn('ELSE IF 预算 > 3000 AND (品牌 == "小米" OR 品牌 IN ("华为", "苹果"))', listing)
+        self.assertIn('未执行', replay(ast, [{'品牌': '小米', '预算': 2000}]).listing(ast))
+
+    def test_manager_explain_single_request(self):
+        manager = DSLManager(recognizer=QWENAPIStub())
+        self.assertIsNone(manager.explainer)
+        expected = manager.execute_dsl("小米14价格是多少")
+        reply, explainer = manager.explain("小米14价格是多少")
+        self.assertEqual(reply, expected)
+        self.assertIsNone(manager.explainer)
+        (script,) = explainer.trace()
+        self.assertEqual(script['intent'], '价格查询')
+        self.assertEqual(script['count'], 1)
+        self.assertEqual(script['body']['outcomes'], {'IF': 1})
+        self.assertIn('型号="小米14"×1', explainer.listing())
+
+
+if __name__ == '__main__':
+    unittest.main()
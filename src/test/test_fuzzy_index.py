@@ -0,0 +1,70 @@
+# src/test/test_fuzzy_index.py
+
+import unittest
+import random
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DSLManager import DSLManager
+from src.fuzzy_index import TrigramIndex, normalize, trigrams
+from src.test.stubs.qwen_stub import QWENAPIStub
+
+
+def dice(a: str, b: str) -> float:
+    x, y = trigrams(normalize(a)), trigrams(normalize(b))
+    return 2 * len(x & y) / (len(x) + len(y))
+
+
+class TestFuzzyIndex(unittest.TestCase):
+    """测试三元组近似匹配索引与价格/库存查询的近似匹配兜底"""
+    def setUp(self):
+        self.index = TrigramIndex()
+        for position, model in enumerate(["小米14", "iPhone 15 Pro", "iPhone SE", "Pura 70", "超轻羽绒服"]):
+            self.index.add(model, position)
+
+    def test_normalized_and_typo_queries(self):
+        self.assertEqual(self.index.search("iphone15pro"), [(1, 1.0)])
+        self.assertEqual(self.index.search(" 小米 14 "), [(0, 1.0)])
+        self.assertEqual(self.index.search("iphnoe 15 pro")[0][0], 1)
+        self.assertEqual([value for value, _ in self.index.search("iphone15", limit=2)], [1, 2])
+        self.assertEqual(self.index.search("14"), [])
+        self.assertEqual(self.index.search(""), [])
+
+    def test_matches_brute_force(self):
+        rng = random.Random(46)
+        alphabet = 'abcdefg12'
+        keys = sorted({''.join(rng.choice(alphabet) for _ in range(rng.randrange(1, 9))) for _ in range(400)})
+        index = TrigramIndex()
+        for key in keys:
+            index.add(key, key)
+        for _ in range(300):
+            query = ''.join(rng.choice(alphabet) for _ in range(rng.randrange(1, 9)))
+            threshold = rng.choice([0.3, 0.5, 0.7])
+            expected = {key: round(dice(query, key), 4) for key in keys if dice(query, key) >= threshold}
+            found = dict(index.search(query, limit=len(keys), min_similarity=threshold))
+            self.assertEqual(found, expected, (query, threshold))
+            best = index.search(query, min_similarity=threshold)
+            if expected:
+                self.assertEqual(best[0][1], max(expected.values()))
+
+    def test_price_and_stock_queries_fall_back_to_fuzzy_match(self):
+        manager = DSLManager(recognizer=QWENAPIStub({'category': '手机', 'intent': '价格查询',
+                                                     'params': {'品牌': '华为', '型号': 'Pura70'}}))
+        manager.intent_fast_path = None
+        manager.response_cache = None
+        self.assertIn("6000", manager.execute_dsl("看看这款"))
+        self.assertEqual(manager.search_catalog_for_query('手机', None, 'iphone15pro')['model'], 'iPhone 15 Pro')
+        self.assertEqual(manager.search_catalog_for_query('手机', '小米', '小米 14 ')['model'], '小米14')
+        self.assertEqual(manager.search_catalog_for_query('食物', '三只松属', None)['brand'], '三只松鼠')
+        self.assertIsNone(manager.search_catalog_for_query('衣服', None, 'iphone15pro'))
+        self.assertEqual(manager.stats['fuzzy_matches'], 3)
+
+        catalog = [dict(p) for p in manager.product_catalog]
+        catalog[0]['model'] = '小米15'
+        manager.product_catalog = catalog
+        self.assertEqual(manager.search_catalog_for_query('手机', None, '小米 15')['model'], '小米15')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+# src/test/test_intent_model.py
+
+import unittest
+import sys
+import os
+import json
+import random
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DSLManager import DSLManager
+from src.intent_model import (DistilledIntentClassifier, evaluate, load_intent_log,
+                              append_intent_log, main)
+from src.test.stubs.qwen_stub import QWENAPIStub
+from src.test.stubs.dsl_stub import load_mock_dsl
+
+
+def make_llm_log(n: int = 300, seed: int = 7):
+    """构造模拟的 LLM 意图识别日志"""
+    rng = random.Random(seed)
+    products = [('手机', '小米', '小米14'), ('手机', '华为', 'Pura 70'),
+                ('食物', '三只松鼠', '坚果礼盒'), ('衣服', '优衣库', '超轻羽绒服')]
+    templates = [
+        ('商品查询', '{model}卖多少'), ('商品查询', '{model}现在什么价'),
+        ('商品推荐', '帮我挑一款{category}，预算{budget}左右'), ('商品推荐', '想要{brand}的{category}，有啥好的'),
+        ('自然沟通', '早上好呀'), ('自然沟通', '你是机器人吗'), ('自然沟通', '今天心情不错'),
+    ]
+    pairs = []
+    for _ in range(n):
+        intent, template = rng.choice(templates)
+        category, brand, model = rng.choice(products)
+        text = template.format(model=model, brand=brand, category=category,
+                               budget=rng.choice([1000, 3000, 5000]))
+        output_category = '通用' if intent == '自然沟通' else category
+        pairs.append((text, {'intent': intent, 'category': output_category, 'params': {}}))
+    return pairs
+
+
+class TestDistilledIntentClassifier(unittest.TestCase):
+    """测试蒸馏意图分类器的训练、存取与运行时接入"""
+    def setUp(self):
+        pairs = make_llm_log()
+        self.train_pairs, self.holdout = pairs[:240], pairs[240:]
+        self.model = DistilledIntentClassifier.train(self.train_pairs)
+
+    def test_heldout_agreement_with_llm(self):
+        report = evaluate(self.model, self.holdout)
+        self.assertEqual(report['samples'], 60)
+        self.assertGreaterEqual(report['intent_accuracy'], 0.95)
+        self.assertGreaterEqual(report['category_accuracy'], 0.9)
+        self.assertTrue(all(0 <= row['coverage'] <= 1 for row in report['thresholds']))
+
+    def test_save_and_load_roundtrip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'model.json')
+            self.model.save(path)
+            loaded = DistilledIntentClassifier.load(path)
+        for text, _ in self.holdout[:10]:
+            self.assertEqual(loaded.predict(text), self.model.predict(text))
+
+    def test_log_roundtrip_and_cli(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log_path = os.path.join(tmp, 'log.jsonl')
+            for text, output in self.train_pairs:
+                append_intent_log(log_path, text, output)
+            append_intent_log(log_path, '失败的调用', None)
+            with open(log_path, 'a', encoding='utf-8') as f:
+                f.write('{损坏的行\n')
+            self.assertEqual(len(load_intent_log(log_path)), len(self.train_pairs))
+
+            model_path = os.path.join(tmp, 'model.json')
+            self.assertEqual(main(['train', '--log', log_path, '--out', model_path]), 0)
+            with open(model_path, encoding='utf-8') as f:
+                self.assertEqual(json.load(f)['format_version'], 1)
+
+            # 只有无效记录的日志：训练失败，不写出模型
+            empty_path = os.path.join(tmp, 'empty.jsonl')
+            with open(empty_path, 'w', encoding='utf-8') as f:
+                f.write('{损坏的行\n{"input": "", "output": {"intent": "自然沟通"}}\n')
+            empty_model = os.path.join(tmp, 'empty_model.json')
+            self.assertEqual(main(['train', '--log', empty_path, '--out', empty_model]), 1)
+            self.assertFalse(os.path.exists(empty_model))
+
+    def test_train_rejects_empty_data(self):
+        for pairs in ([], [('', {'intent': '自然沟通'}), ('  ', {'intent': '自然沟通'}), ('你好', None)]):
+            with self.assertRaises(ValueError):
+                DistilledIntentClassifier.train(pairs)
+
+    def test_high_confidence_prediction_skips_llm(self):
+        dsl_manager = DSLManager(recognizer=QWENAPIStub())
+        dsl_manager.load_dsl_script = load_mock_dsl
+        self.model.threshold = 0.5
+        self.model.entity_extractor = dsl_manager.intent_fast_path
+        dsl_manager.intent_model = self.model
+
+        result = dsl_manager.execute_dsl("早上好呀")
+        self.assertIn("智能商品助手", result)
+        self.assertEqual(dsl_manager.stats['model_hits'], 1)
+        self.assertEqual(dsl_manager.stats['llm_calls'], 0)
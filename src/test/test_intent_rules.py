@@ -0,0 +1,62 @@
+# src/test/test_intent_rules.py
+
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DSLManager import DSLManager
+from src.intent_rules import RuleIntentClassifier
+from src.test.stubs.qwen_stub import CountingStub, QWENAPIStub
+from src.test.stubs.dsl_stub import load_mock_dsl
+
+
+class TestRuleIntentClassifier(unittest.TestCase):
+    """测试本地规则意图预分类"""
+    def setUp(self):
+        self.dsl_manager = DSLManager()
+        self.classifier = RuleIntentClassifier(self.dsl_manager.product_catalog)
+
+    def test_price_query_with_model(self):
+        result = self.classifier.classify("小米14 多少钱")
+        self.assertEqual(result['intent'], '价格查询')
+        self.assertEqual(result['category'], '手机')
+        self.assertEqual(result['params'], {'品牌': '小米', '型号': '小米14'})
+        self.assertGreaterEqual(result['confidence'], self.classifier.threshold)
+
+    def test_stock_keyword_has_priority(self):
+        result = self.classifier.classify("iPhone 15 Pro 的价格，还有库存吗")
+        self.assertEqual(result['intent'], '库存查询')
+        self.assertEqual(result['params']['型号'], 'iPhone 15 Pro')
+
+    def test_budget_extraction(self):
+        result = self.classifier.classify("推荐3000元的华为手机")
+        self.assertEqual(result['intent'], '商品推荐')
+        self.assertEqual(result['params'], {'品牌': '华为', '预算': 3000.0})
+        # 推荐意图默认交给 LLM
+        self.assertLess(result['confidence'], self.classifier.threshold)
+
+    def test_query_without_product_is_low_confidence(self):
+        result = self.classifier.classify("这个多少钱")
+        self.assertLess(result['confidence'], self.classifier.threshold)
+        self.assertIsNone(self.classifier.classify("随便看看"))
+
+    def test_fast_path_skips_llm(self):
+        stub = CountingStub()
+        self.dsl_manager.recognizer = stub
+        self.dsl_manager.load_dsl_script = load_mock_dsl
+        result = self.dsl_manager.execute_dsl("查询小米14的价格")
+        self.assertIn("当前价格是 4500 元", result)
+        self.assertEqual(stub.calls, 0)
+        self.assertEqual(self.dsl_manager.stats['fast_path_hits'], 1)
+
+        self.dsl_manager.execute_dsl("推荐5000元的小米手机")
+        self.assertEqual(stub.calls, 1)
+
+    def test_threshold_is_configurable(self):
+        stub = CountingStub()
+        self.dsl_manager.recognizer = stub
+        self.dsl_manager.load_dsl_script = load_mock_dsl
+        self.dsl_manager.intent_fast_path.threshold = 1.1
+        self.dsl_manager.execute_dsl("查询小米14的价格")
+        self.assertEqual(stub.calls, 1)
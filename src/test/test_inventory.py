@@ -0,0 +1,110 @@
+# src/test/test_inventory.py
+
+import threading
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DSLManager import DSLManager
+from src.inventory import CachedInventory, FakeInventory
+from src.response_cache import ResponseCache
+from src.test.stubs.qwen_stub import QWENAPIStub
+from src.test.stubs.clock_stub import FakeClock
+
+
+class FailingInventory(FakeInventory):
+    def get_stock(self, skus):
+        super().get_stock(skus)
+        raise ConnectionError('库存系统不可用')
+
+
+class TestInventory(unittest.TestCase):
+    """测试库存后端、读穿透缓存与库存查询流程"""
+    def test_ttl_and_negative_caching(self):
+        clock = FakeClock()
+        backend = FakeInventory({'a': 3, 'b': 0})
+        cache = CachedInventory(backend, ttl=1, negative_ttl=10, clock=clock)
+        self.assertEqual(cache.get_stock(['a', 'b', 'x', 'a']), {'a': 3, 'b': 0})
+        self.assertEqual((backend.calls, backend.requested), (1, 3))
+        backend.stock['a'] = 5
+        backend.stock['x'] = 7
+        self.assertEqual(cache.get_stock(['a', 'x']), {'a': 3})
+        clock.now = 2  # 有库存的条目过期，查不到的 sku 仍在负缓存中
+        self.assertEqual(cache.get_stock(['a', 'x']), {'a': 5})
+        self.assertEqual(backend.requested, 4)
+        cache.invalidate(['x'])
+        self.assertEqual(cache.get_stock(['x']), {'x': 7})
+        self.assertEqual(cache.snapshot(), {'entries': 3, 'hits': 3, 'misses': 5, 'coalesced': 0})
+
+    def test_concurrent_requests_are_coalesced(self):
+        backend = FakeInventory({'a': 1}, latency=0.05)
+        cache = CachedInventory(backend)
+        barrier = threading.Barrier(8)
+        results = []
+
+        def query():
+            barrier.wait()
+            results.append(cache.get_stock(['a', 'missing']))
+        threads = [threading.Thread(target=query) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [{'a': 1}] * 8)
+        self.assertEqual(backend.calls, 1)
+        self.assertEqual(cache.misses + cache.coalesced + cache.hits, 16)
+
+    def test_backend_errors_reach_waiters_and_are_not_cached(self):
+        backend = FailingInventory({'a': 1})
+        cache = CachedInventory(backend)
+        with self.assertRaises(ConnectionError):
+            cache.get_stock(['a'])
+        with self.assertRaises(ConnectionError):
+            cache.get_stock(['a'])
+        self.assertEqual(backend.calls, 2)
+
+    def test_stock_query_uses_backend(self):
+        default = DSLManager(recognizer=QWENAPIStub())
+        self.assertIn("暂时缺货", default.execute_dsl("王小二麻辣小龙虾有货吗？"))
+        self.assertIn("有充足现货", default.execute_dsl("小米14有货吗"))
+
+        backend = FakeInventory({'王小二:麻辣小龙虾': 20})
+        manager = DSLManager(recognizer=QWENAPIStub(), inventory=CachedInventory(backend))
+        manager.response_cache = ResponseCache()
+        for _ in range(2):
+            self.assertIn("有充足现货", manager.execute_dsl("王小二麻辣小龙虾有货吗？"))
+            self.assertIn("暂未查询到库存信息", manager.execute_dsl("小米14有货吗"))
+        # 库存会变化，库存查询的回复不进入完整回复缓存
+        self.assertEqual(manager.stats['response_cache_misses'], 0)
+        self.assertEqual(manager.cache_stats()['inventory']['hits'], 2)
+
+        manager.inventory = FailingInventory()
+        self.assertEqual(manager.execute_dsl("王小二麻辣小龙虾有货吗？"), "库存系统繁忙，请稍后再试。")
+
+    def test_recommendation_skips_out_of_stock(self):
+        backend = FakeInventory({'小米:小米14': 0, '苹果:iPhone SE': 5})
+        manager = DSLManager(recognizer=QWENAPIStub(), inventory=backend)
+        manager.response_cache = None
+        sym_tbl = {'预算': 5000}
+        self.assertEqual(manager.search_catalog('手机', sym_tbl)['model'], '小米14')
+        manager.filter_out_of_stock = True
+        self.assertEqual(manager.search_catalog('手机', sym_tbl)['model'], 'iPhone SE')
+        self.assertEqual(backend.calls, 1)
+        # 库存系统不可用时退回不过滤的候选
+        manager.inventory = FailingInventory()
+        self.assertEqual(manager.search_catalog('手机', sym_tbl)['model'], '小米14')
+
+    def test_catalog_inventory_tracks_catalog_version(self):
+        manager = DSLManager(recognizer=QWENAPIStub())
+        self.assertEqual(manager.inventory.get_stock(['小米:小米14', '苹果:iPhone 15 Pro', '不存在:商品']),
+                         {'小米:小米14': 100, '苹果:iPhone 15 Pro': 0})
+        manager.product_catalog[0]['budget'] = 9000
+        manager.catalog_changed()
+        self.assertEqual(manager.inventory.get_stock(['小米:小米14']), {'小米:小米14': 0})
+        manager.product_catalog = [{'category': '手机', 'brand': '小米', 'model': '小米15', 'budget': 4000}]
+        self.assertEqual(manager.inventory.get_stock(['小米:小米14', '小米:小米15']), {'小米:小米15': 100})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+# src/test/test_large_scripts.py
+
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ast_nodes import dump
+from src.bench.bench_parser import generate_script
+from src.compiler import compile_script
+from src.executor import ASTExecutor
+
+HEADER = 'SCENE 通用\nON_INTENT 商品推荐\n'
+
+
+class TestLargeScripts(unittest.TestCase):
+    """测试超大脚本的解析与栈安全的求值"""
+    def test_many_else_if_branches(self):
+        source = generate_script(5000)
+        rd_ast = compile_script(source, 'rd')
+        self.assertEqual(len(rd_ast.if_blocks.else_if_blocks), 5000)
+        self.assertEqual(dump(rd_ast), dump(compile_script(source, 'ply')))
+
+        result = ASTExecutor({'预算': 49990.0, '型号': '型号4999'}).execute(rd_ast)
+        self.assertEqual(result['reply'], '规则4999')
+
+    def test_long_and_chain(self):
+        n = 20000
+        condition = ' AND '.join(f'a{i % 7} >= 0' for i in range(n))
+        source = HEADER + f'IF {condition} REPLY "全部满足" ELSE REPLY "不满足"'
+        for backend in ('rd', 'ply'):
+            ast = compile_script(source, backend)
+            symbols = {f'a{i}': 1.0 for i in range(7)}
+            self.assertEqual(ASTExecutor(symbols).execute(ast)['reply'], '全部满足')
+            symbols['a3'] = -1.0
+            self.assertEqual(ASTExecutor(symbols).execute(ast)['reply'], '不满足')
+
+    def test_deeply_nested_parentheses(self):
+        depth = 5000
+        source = HEADER + 'IF ' + '(' * depth + '品牌 OR 型号' + ')' * depth + ' REPLY "命中"'
+        rd_ast = compile_script(source, 'rd')
+        self.assertEqual(dump(rd_ast), dump(compile_script(source, 'ply')))
+        self.assertEqual(ASTExecutor({'型号': 'x'}).execute(rd_ast)['reply'], '命中')
+
+        with self.assertRaises(SyntaxError):
+            compile_script(HEADER + 'IF ((品牌) REPLY "x"', 'rd')
+
+    def test_operands_still_evaluated_eagerly(self):
+        # 与递归实现一致：AND 左侧为假时右侧仍会求值（类型不匹配照常抛出异常）
+        ast = compile_script(HEADER + 'IF 品牌 == "无" AND 预算 > 5 REPLY "x"', 'rd')
+        with self.assertRaises(TypeError):
+            ASTExecutor({'品牌': '小米', '预算': '很多'}).execute(ast)
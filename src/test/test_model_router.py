@@ -0,0 +1,76 @@
+# src/test/test_model_router.py
+
+import time
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.deadline import deadline_scope
+from src.model_router import ModelRouter, ModelTier, parse_llm_output
+from src.test.stubs.llm_backend_stub import StubLLMBackend
+from src.test.stubs.clock_stub import FakeClock
+
+
+class TestModelRouter(unittest.TestCase):
+    """测试小模型/大模型路由与升级策略"""
+    def make_router(self, small_accuracy: float) -> ModelRouter:
+        # 模拟延迟只推进假时钟，不真正等待
+        self.clock = FakeClock()
+        self.small = StubLLMBackend(latency=0.001, accuracy=small_accuracy, seed=1, sleep=self.clock.advance)
+        self.large = StubLLMBackend(latency=0.005, accuracy=1.0, sleep=self.clock.advance)
+        return ModelRouter(ModelTier('small', self.small), ModelTier('large', self.large), clock=self.clock)
+
+    def test_simple_input_served_by_small_model(self):
+        router = self.make_router(small_accuracy=1.0)
+        result = router.route("你好")
+        self.assertEqual(result['intent'], '自然沟通')
+        self.assertEqual((self.small.calls, self.large.calls), (1, 0))
+        self.assertEqual(router.stats['decisions']['small'], 1)
+
+    def test_complex_input_goes_to_large_model(self):
+        router = self.make_router(small_accuracy=1.0)
+        router.route("帮我对比一下小米14和华为Pura 70，哪个拍照更好，预算5000元左右")
+        self.assertEqual((self.small.calls, self.large.calls), (0, 1))
+        self.assertEqual(router.stats['decisions']['large_direct'], 1)
+
+    def test_escalation_on_bad_small_output(self):
+        router = self.make_router(small_accuracy=0.0)
+        for text in ["你好", "查询小米14的价格", "麻辣小龙虾库存", "推荐手机"]:
+            result = router.route(text)
+            self.assertIn(result['intent'], ('自然沟通', '价格查询', '库存查询', '商品推荐'))
+        self.assertEqual(router.stats['decisions']['escalated'], 4)
+        self.assertEqual(sum(router.stats['escalation_reasons'].values()), 4)
+        self.assertEqual(self.large.calls, 4)
+
+    def test_no_escalation_after_deadline(self):
+        router = self.make_router(small_accuracy=0.0)
+        with deadline_scope(time.monotonic() - 1):
+            router.route("你好")
+        self.assertEqual((self.small.calls, self.large.calls), (1, 0))
+        self.assertEqual(router.stats['decisions']['deadline'], 1)
+
+    def test_latency_recorded_per_tier(self):
+        router = self.make_router(small_accuracy=0.5)
+        for _ in range(10):
+            router.route("你好")
+        summary = router.summary()
+        self.assertEqual(summary['latency']['small']['calls'], 10)
+        self.assertAlmostEqual(summary['latency']['small']['avg_ms'], 1.0)
+        self.assertAlmostEqual(summary['latency']['large']['avg_ms'], 5.0)
+        self.assertEqual(summary['latency']['large']['calls'], router.stats['decisions']['escalated'])
+        self.assertEqual(len(router.history), 10)
+
+    def test_string_confidence_is_coerced(self):
+        router = self.make_router(small_accuracy=1.0)
+        base = {'intent': '自然沟通', 'category': '无', 'params': {}}
+        self.assertIsNone(router.escalation_reason({**base, 'confidence': '0.9'}))
+        self.assertIsNone(router.escalation_reason({**base, 'confidence': 1}))
+        self.assertIsNone(router.escalation_reason(base))  # 未给出置信度时不升级
+        for confidence in ('0.3', 0.3, '很高', '', [0.9], 'nan'):
+            self.assertEqual(router.escalation_reason({**base, 'confidence': confidence}), 'low_confidence', confidence)
+
+    def test_parse_llm_output(self):
+        self.assertEqual(parse_llm_output('```json\n{"intent": "自然沟通"}\n```'), {'intent': '自然沟通'})
+        self.assertIsNone(parse_llm_output('不是JSON'))
+        self.assertIsNone(parse_llm_output('[1, 2]'))
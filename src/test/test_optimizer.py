@@ -0,0 +1,122 @@
+# src/test/test_optimizer.py
+
+import unittest
+import sys
+import os
+import random
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ast_nodes import *
+from src.compiler import compile_script
+from src.dsl_registry import CompiledScript
+from src.executor import ASTExecutor
+from src.optimizer import optimize
+from src.symbols import SymbolTable
+from src.test.stubs.dsl_stub import random_script
+
+HEADER = 'SCENE 通用\nON_INTENT 商品推荐\n'
+FACTS = {'intent': '商品推荐'}
+
+
+class CountingDict(dict):
+    """记录每个标识符被查找的次数"""
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.lookups = {}
+
+    def get(self, key, default=None):
+        self.lookups[key] = self.lookups.get(key, 0) + 1
+        return super().get(key, default)
+
+
+def run(ast, symbols):
+    """执行脚本，返回回复或异常类型"""
+    try:
+        return ASTExecutor(symbols).execute(ast)['reply']
+    except Exception as e:
+        return type(e)
+
+
+class TestOptimizer(unittest.TestCase):
+    """测试 AST 优化：常量折叠、死分支删除与公共子表达式"""
+    def test_folds_on_intent_fact(self):
+        with open('src/dsl/natural_chat.dsl', encoding='utf-8') as f:
+            source = f.read()
+        entry = CompiledScript('natural_chat.dsl', source, compile_script(source))
+        optimized = entry.optimized
+        self.assertEqual(optimized.facts, {'intent': '自然沟通'})
+        self.assertEqual(optimized.stats['folded'], 1)
+        self.assertIs(optimized.ast.if_blocks.if_block.condition.value, True)
+
+        # 事实成立时使用优化后的 AST；兜底执行其他意图时仍走原始 AST
+        chat = {'intent': '自然沟通'}
+        self.assertIs(entry.ast_for(chat), optimized.ast)
+        self.assertEqual(run(optimized.ast, chat), run(entry.ast, chat))
+        other = {'intent': '其他'}
+        self.assertIs(entry.ast_for(other), entry.ast)
+
+    def test_dead_and_duplicate_branches_removed(self):
+        source = HEADER + '''
+            IF intent == "价格查询" REPLY "不可达"
+            ELSE IF 品牌 AND 预算 > 100 REPLY "a"
+            ELSE IF 品牌 AND 预算 > 100 REPLY "重复"
+            ELSE IF intent == "商品推荐" OR 型号 REPLY "兜底"
+            ELSE IF 型号 REPLY "不可达2"
+            ELSE REPLY "else"'''
+        optimized = optimize(compile_script(source), FACTS)
+        blocks = optimized.ast.if_blocks
+        self.assertEqual(blocks.if_block.reply, 'a')
+        self.assertEqual(blocks.else_if_blocks, [])
+        self.assertEqual(blocks.else_block.reply, '兜底')
+        self.assertEqual(optimized.stats['duplicates_removed'], 1)
+        self.assertEqual(optimized.stats['branches_removed'], 3)
+
+    def test_raising_subtrees_are_kept(self):
+        source = HEADER + 'IF intent == "商品推荐" OR 预算 > 5 REPLY "a" ELSE REPLY "b"'
+        ast = compile_script(source)
+        optimized = optimize(ast, FACTS)
+        self.assertIsInstance(optimized.ast.if_blocks.if_block.condition, BinaryOpNode)
+        symbols = {'intent': '商品推荐', '预算': '很多'}
+        self.assertIs(run(optimized.ast, symbols), TypeError)
+        self.assertIs(run(ast, symbols), TypeError)
+
+    def test_shared_subexpressions_evaluated_once(self):
+        source = HEADER + '''
+            IF 品牌 == "小米" AND 型号 REPLY "a"
+            ELSE IF 品牌 == "小米" AND 预算 > 1 REPLY "b"
+            ELSE IF 型号 OR 品牌 == "小米" REPLY "c"'''
+        ast = compile_script(source)
+        optimized = optimize(ast, FACTS)
+        self.assertEqual(optimized.stats['shared'], 2)
+        symbols = CountingDict({'intent': '商品推荐', '品牌': '华为', '预算': 0})
+        self.assertEqual(run(optimized.ast, symbols), None)
+        self.assertEqual(symbols.lookups, {'品牌': 1, '型号': 1, '预算': 1})
+        self.assertEqual(run(ast, dict(symbols)), None)
+
+    def test_deep_expression(self):
+        condition = ' AND '.join(['品牌'] * 10000 + ['intent == "商品推荐"'])
+        ast = compile_script(HEADER + f'IF {condition} REPLY "x" ELSE REPLY "y"', 'rd')
+        optimized = optimize(ast, FACTS)
+        self.assertEqual(run(optimized.ast, {'intent': '商品推荐', '品牌': 'a'}), 'x')
+        self.assertEqual(run(optimized.ast, {'intent': '商品推荐'}), 'y')
+
+    def test_differential_against_unoptimized(self):
+        rng = random.Random(37)
+        values = [None, '', 0, 5000, 12.0, '小米', 'a"b', '商品推荐', '自然沟通', '通用', '手机']
+        idents = ['预算', '品牌', '型号', 'scene', 'intent', 'a', '_x1', 'IFa', 'ELSEb', 'ANDy', 'ORc', '价格2']
+        for _ in range(300):
+            source = random_script(rng)
+            ast = compile_script(source, 'rd')
+            entry = CompiledScript(None, source, ast)
+            optimized = entry.optimized
+            for _ in range(8):
+                symbols = {ident: rng.choice(values) for ident in idents if rng.random() < 0.6}
+                symbols.update(optimized.facts)
+                symbols = {k: v for k, v in symbols.items() if v is not None}
+                self.assertTrue(optimized.applies(symbols))
+                for table in (dict(symbols), SymbolTable(symbols)):
+                    self.assertEqual(run(optimized.ast, table), run(ast, dict(symbols)), source)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+# src/test/test_profiling.py
+
+import unittest
+import sys
+import os
+import random
+import shutil
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DSLManager import DSLManager
+from src.ast_nodes import GuardedIfBlocksNode
+from src.compiler import compile_script
+from src.explain import Explainer
+from src.executor import ASTExecutor
+from src.profiling import BranchProfile, BranchProfiler, ProfilingExecutor, exclusive, reorder, to_dnf
+from src.symbols import SymbolTable
+from src.test.stubs.qwen_stub import QWENAPIStub
+
+HEADER = 'SCENE 通用\nON_INTENT 商品推荐\n'
+
+
+def condition(text):
+    return compile_script(HEADER + f'IF {text} REPLY "x"', 'rd').if_blocks.if_block.condition
+
+
+def run(ast, symbols):
+    try:
+        return ASTExecutor(symbols).execute(ast)['reply']
+    except Exception as e:
+        return type(e)
+
+
+def profile_with(hits):
+    profile = BranchProfile(len(hits))
+    profile.hits = list(hits)
+    return profile
+
+
+class TestBranchReordering(unittest.TestCase):
+    """测试分支统计与按命中率重排"""
+    def test_profiling_counts(self):
+        ast = compile_script(HEADER + 'IF 品牌 == "a" REPLY "a" ELSE IF 品牌 == "b" REPLY "b" ELSE REPLY "c"')
+        profiler = BranchProfiler()
+        for brand in ['b', 'b', 'c', 'a']:
+            ProfilingExecutor({'品牌': brand}, profiler).execute(ast)
+        profile = profiler.profiles[ast.if_blocks]
+        self.assertEqual(profile.hits, [1, 2, 1])
+        self.assertEqual(profile.evaluations, [4, 3, 1])
+        self.assertEqual(profile.samples, 4)
+
+    def test_exclusivity_proofs(self):
+        def proven(a, b):
+            return exclusive(to_dnf(condition(a)), to_dnf(condition(b)))
+        self.assertTrue(proven('品牌 == "a"', '品牌 == "b"'))
+        self.assertTrue(proven('品牌 == "a"', '品牌 != "a" AND 预算 > 1'))
+        self.assertTrue(proven('预算 >= 10 AND 预算 < 20', '预算 >= 20'))
+        self.assertTrue(proven('预算 == 5', '预算 > 5'))
+        self.assertTrue(proven('品牌 == "a" OR 品牌 == "b"', '品牌 == "c" AND 型号'))
+        self.assertFalse(proven('预算 >= 10 AND 预算 <= 20', '预算 >= 20'))
+        self.assertFalse(proven('品牌 == "a"', '型号 == "b"'))
+        self.assertFalse(proven('品牌 == "a" OR 预算 > 1', '品牌 == "b"'))
+        self.assertFalse(proven('品牌', '品牌 == "a"'))
+        self.assertFalse(proven('预算 == 5', '预算 == 5.0'))
+
+    def test_hot_branches_move_forward(self):
+        source = HEADER + '''
+            IF 品牌 == "a" REPLY "a"
+            ELSE IF 品牌 == "b" REPLY "b"
+            ELSE IF 型号 REPLY "型号"
+            ELSE IF 品牌 == "c" REPLY "c"
+            ELSE IF 品牌 == "d" REPLY "d"
+            ELSE REPLY "else"'''
+        ast = compile_script(source)
+        reordered, moved = reorder(ast, profile_with([1, 5, 0, 1, 50, 3]))
+        blocks = reordered.if_blocks.reordered
+        replies = [blocks.if_block.reply] + [b.reply for b in blocks.else_if_blocks]
+        # d 越过 c，但不能越过与之不互斥的“型号”分支
+        self.assertEqual(replies, ['b', 'a', '型号', 'd', 'c'])
+        self.assertEqual(moved, 2)
+        for symbols in ({'品牌': 'd', '型号': 'x'}, {'品牌': 'd'}, {'品牌': 'c'}, {}):
+            self.assertEqual(run(reordered, symbols), run(ast, symbols))
+        self.assertEqual(reorder(ast, profile_with([9, 5, 0, 1, 0, 3])), (ast, 0))
+
+    def test_guard_preserves_exceptions(self):
+        source = HEADER + 'IF 预算 > 100 AND 品牌 == "a" REPLY "a" ELSE IF 品牌 == "b" REPLY "b"'
+        ast = compile_script(source)
+        reordered, moved = reorder(ast, profile_with([0, 10, 0]))
+        self.assertIsInstance(reordered.if_blocks, GuardedIfBlocksNode)
+        symbols = {'预算': '很多', '品牌': 'b'}
+        self.assertIs(run(ast, symbols), TypeError)
+        self.assertIs(run(reordered, symbols), TypeError)
+        self.assertIs(run(reordered, SymbolTable(symbols)), TypeError)
+        self.assertEqual(run(reordered, {'预算': 1, '品牌': 'b'}), 'b')
+
+        # IN 对不可哈希的取值抛出 TypeError，重排后同样回到原顺序
+        source = HEADER + 'IF 功能 IN ("a", "b") REPLY "in" ELSE IF 功能 != "a" AND 功能 != "b" REPLY "ne"'
+        ast = compile_script(source)
+        reordered, moved = reorder(ast, profile_with([1, 100, 0]))
+        self.assertEqual(moved, 1)
+        symbols = {'功能': ['拍照']}
+        self.assertIs(run(ast, symbols), TypeError)
+        self.assertIs(run(reordered, symbols), TypeError)
+        self.assertIs(run(reordered, SymbolTable(symbols)), TypeError)
+        self.assertEqual(run(reordered, {'功能': '拍照'}), 'ne')
+        self.assertEqual(run(reordered, {'功能': 'a'}), 'in')
+
+    def test_differential_random_ladders(self):
+        rng = random.Random(38)
+        atoms = ['品牌 == "a"', '品牌 == "b"', '品牌 == "c"', '品牌 != "a"', '型号', '预算 < 100',
+                 '预算 >= 100 AND 预算 < 500', '预算 >= 500', '预算 == 100', '型号 == "x"', '预算 > "m"']
+        values = {'品牌': ['a', 'b', 'c', '', 5], '型号': ['x', 'y', ''], '预算': [50, 100, 100.0, 700, 'n', '']}
+        for _ in range(200):
+            branches = []
+            for i in range(rng.randint(2, 7)):
+                parts = rng.sample(atoms, rng.randint(1, 2))
+                branches.append(f' {rng.choice(["AND", "OR"])} '.join(parts))
+            source = HEADER + f'IF {branches[0]} REPLY "0"\n'
+            source += ''.join(f'ELSE IF {text} REPLY "{i + 1}"\n' for i, text in enumerate(branches[1:]))
+            source += 'ELSE REPLY "else"' if rng.random() < 0.5 else ''
+            ast = compile_script(source, 'rd')
+            reordered, _ = reorder(ast, profile_with([rng.randint(0, 20) for _ in range(len(branches) + 1)]))
+            for _ in range(10):
+                symbols = {ident: rng.choice(options) for ident, options in values.items() if rng.random() < 0.8}
+                expected = run(ast, dict(symbols))
+                self.assertEqual(run(reordered, dict(symbols)), expected, (source, symbols))
+                self.assertEqual(run(reordered, SymbolTable(symbols)), expected, (source, symbols))
+
+    def test_manager_reorders_registered_scripts(self):
+        dsl_manager = DSLManager(recognizer=QWENAPIStub())
+        dsl_manager.branch_profiler = BranchProfiler()
+        inputs = ["查询小米14的价格", "王小二麻辣小龙虾有货吗？", "你好，想聊聊天", "推荐5000元的小米手机"]
+        before = [dsl_manager.execute_dsl(text) for text in inputs]
+        self.assertTrue(dsl_manager.branch_profiler.profiles)
+        dsl_manager.reorder_branches(min_samples=1)
+        self.assertEqual([dsl_manager.execute_dsl(text) for text in inputs], before)
+
+    def test_reorder_drops_profiles_of_reloaded_scripts(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        for name in os.listdir('src/dsl'):
+            if name.endswith('.dsl'):
+                shutil.copy(os.path.join('src/dsl', name), tmp)
+        dsl_manager = DSLManager(dsl_directory=tmp, recognizer=QWENAPIStub())
+        dsl_manager.response_cache = None
+        dsl_manager.branch_profiler = BranchProfiler()
+        dsl_manager.execute_dsl("查询小米14的价格")
+        dsl_manager.explainer = Explainer()  # 启用 Explainer 时执行器只记录逐节点统计
+        dsl_manager.execute_dsl("查询小米14的价格")
+        old_entry = dsl_manager.registry.get('price_query.dsl')
+        old_ast = old_entry.ast_for(dsl_manager.sym_tbl)
+        self.assertIn(old_ast.if_blocks, dsl_manager.branch_profiler.profiles)
+        self.assertIn(old_ast, dsl_manager.explainer.profiles)
+
+        # 热加载替换脚本后，旧 AST 的统计在下一次重排时丢弃，仍在快照中的脚本保留统计
+        path = os.path.join(tmp, 'price_query.dsl')
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('\n')
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        self.assertEqual(dsl_manager.registry.reload_changed()['reloaded'], ['price_query.dsl'])
+        dsl_manager.execute_dsl("王小二麻辣小龙虾有货吗？")
+        dsl_manager.explainer, explainer = None, dsl_manager.explainer
+        dsl_manager.execute_dsl("王小二麻辣小龙虾有货吗？")
+        dsl_manager.explainer = explainer
+        dsl_manager.reorder_branches(min_samples=1)
+        self.assertNotIn(old_ast.if_blocks, dsl_manager.branch_profiler.profiles)
+        self.assertNotIn(old_ast, dsl_manager.explainer.profiles)
+        self.assertNotIn(old_ast, dsl_manager.explainer.scripts.values())
+        self.assertEqual(len(dsl_manager.branch_profiler.profiles), 1)
+        self.assertEqual(len(dsl_manager.explainer.scripts), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
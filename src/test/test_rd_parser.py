@@ -0,0 +1,83 @@
+# src/test/test_rd_parser.py
+
+import unittest
+import sys
+import os
+import random
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ast_nodes import dump
+from src.compiler import compile_script
+from src.rd_parser import tokenize
+from src.test.stubs.dsl_stub import random_script
+
+
+def source_of(tokens) -> str:
+    """由 tokenize 的结果重新拼出脚本文本"""
+    return ' '.join(f'"{value}"' if kind == 'STRING' else str(value) for kind, value, _ in tokens)
+
+
+def rejects(source: str, backend: str) -> bool:
+    try:
+        compile_script(source, backend)
+    except SyntaxError:
+        return True
+    return False
+
+
+class TestRDParser(unittest.TestCase):
+    """测试手写递归下降解析器与 PLY 解析器的等价性"""
+    def test_real_scripts_equivalent(self):
+        for name in sorted(os.listdir('src/dsl')):
+            if not name.endswith('.dsl'):
+                continue
+            with open(os.path.join('src/dsl', name), encoding='utf-8') as f:
+                source = f.read()
+            self.assertEqual(dump(compile_script(source, 'rd')), dump(compile_script(source, 'ply')), name)
+
+    def test_fuzz_equivalence_with_ply(self):
+        rng = random.Random(2024)
+        for _ in range(400):
+            source = random_script(rng)
+            self.assertEqual(dump(compile_script(source, 'rd')), dump(compile_script(source, 'ply')), source)
+
+    def test_fuzz_malformed_scripts_rejected_by_both(self):
+        rng = random.Random(31)
+        for _ in range(400):
+            tokens = tokenize(random_script(rng))[:-1]
+            i = rng.randrange(len(tokens))
+            # 删掉任意一个记号都会破坏文法，两个后端都必须报错（不能带着改变了的 IF 链编译成功）
+            source = source_of(tokens[:i] + tokens[i + 1:])
+            self.assertTrue(rejects(source, 'rd'), source)
+            self.assertTrue(rejects(source, 'ply'), source)
+            # 在任意位置插入一个记号：两个后端的判断一致
+            source = source_of(tokens[:i] + [rng.choice(tokens)] + tokens[i:])
+            self.assertEqual(rejects(source, 'rd'), rejects(source, 'ply'), source)
+
+    def test_logical_ops_are_right_associative(self):
+        ast = compile_script('SCENE a ON_INTENT 自然沟通 IF a AND b OR c REPLY "x"', 'rd')
+        condition = ast.if_blocks.if_block.condition
+        self.assertEqual(condition.op, 'AND')
+        self.assertEqual(condition.right.op, 'OR')
+
+    def test_tokenizer_matches_ply_lexing_rules(self):
+        tokens = tokenize('IF 预算>=12. # 注释\nREPLY "a\\"b"')
+        self.assertEqual([t[:2] for t in tokens],
+                         [('IF', 'IF'), ('IDENT', '预算'), ('GE', '>='), ('NUMBER', 12.0),
+                          ('REPLY', 'REPLY'), ('STRING', 'a\\"b'), ('EOF', None)])
+        self.assertEqual(tokens[4][2], 2)
+
+    def test_syntax_errors_raise(self):
+        for source in ['SCENE a ON_INTENT 自然沟通 IF a "x"', 'SCENE a ON_INTENT 自然沟通 IF 预算 >> 3 REPLY "x"',
+                       'SCENE a ON_INTENT 自然沟通 IF EXISTS 功能 REPLY "x"']:
+            for backend in ('rd', 'ply'):
+                with self.assertRaises(SyntaxError):
+                    compile_script(source, backend)
+        with self.assertRaisesRegex(SyntaxError, 'line 3'):
+            compile_script('SCENE a\nON_INTENT 自然沟通\nIF a "x"', 'ply')
+        with self.assertRaises(SyntaxError):
+            compile_script('SCENE a ON_INTENT 自然沟通 IF a REPLY', 'rd')
+        with self.assertRaises(SyntaxError):
+            compile_script('SCENE a ON_INTENT 闲聊 IF a REPLY "x"', 'rd')
+        with self.assertRaises(SyntaxError):
+            compile_script('SCENE a ON_INTENT 自然沟通 IF a REPLY "x" ELSE REPLY "y" ELSE REPLY "z"', 'rd')
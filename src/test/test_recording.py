@@ -0,0 +1,111 @@
+# src/test/test_recording.py
+
+import unittest
+import json
+import tempfile
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DSLManager import DSLManager
+from src.intent_model import append_intent_log
+from src.recording import RecordingRecognizer, ReplayRecognizer, load_recording, offline_recognizer
+from src.test.stubs.qwen_stub import QWENAPIStub
+
+
+class SequenceRecognizer:
+    """按调用顺序返回给定结果的识别器"""
+    def __init__(self, results):
+        self.results = list(results)
+        self.calls = 0
+
+    def recognize_intent(self, user_input: str):
+        self.calls += 1
+        return self.results.pop(0)
+
+
+class TestRecording(unittest.TestCase):
+    """测试意图识别的录制与回放"""
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'intents.jsonl')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def record(self, inputs, recognizer=None):
+        ticks = iter(range(0, 1000, 1))
+        recognizer = recognizer or QWENAPIStub()
+        # 每次识别耗时 0.25 秒（假时钟）
+        with RecordingRecognizer(recognizer, self.path, clock=lambda: next(ticks) * 0.25) as recording:
+            outputs = [recording.recognize_intent(text) for text in inputs]
+        self.assertEqual(recording.recorded, len(inputs))
+        return outputs
+
+    def test_record_and_replay(self):
+        inputs = ["查询小米14的价格", "你好，介绍一下你的功能", "推荐3000元的华为手机"]
+        outputs = self.record(inputs)
+        with open(self.path, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertEqual(json.loads(lines[0]), {'i': inputs[0], 'o': outputs[0], 'ms': 250.0})
+        self.assertNotIn(', ', lines[0])
+
+        replay = ReplayRecognizer(self.path)
+        self.assertEqual(len(replay), 3)
+        self.assertEqual(replay.recognize_intent("查询小米14 的价格"), outputs[0])
+        self.assertEqual(replay.recognize_intent("推荐3000元的华为手机"), outputs[2])
+        replay.recognize_intent("查询小米14的价格")['params']['型号'] = '改动'
+        self.assertEqual(replay.recognize_intent("查询小米14的价格"), outputs[0])
+        self.assertIsNone(replay.recognize_intent("没有录制的输入"))
+        self.assertEqual((replay.hits, replay.misses), (4, 1))
+
+        # 追加录制；中断写坏的行被跳过
+        self.record(["推荐一本书"])
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('{"i":"写了一半')
+        self.assertEqual([record.input for record in load_recording(self.path)], inputs + ["推荐一本书"])
+
+    def test_repeated_inputs_and_latency(self):
+        first, second = {'intent': '价格查询'}, {'intent': '库存查询'}
+        self.record(["同一句话", "同一句话"], SequenceRecognizer([first, second]))
+        waits = []
+        replay = ReplayRecognizer(self.path, latency_scale=2.0, sleep=waits.append)
+        results = [replay.recognize_intent("同一句话") for _ in range(3)]
+        self.assertEqual(results, [first, second, first])
+        self.assertEqual(waits, [0.5, 0.5, 0.5])
+        replay.rewind()
+        self.assertEqual(replay.recognize_intent("同一句话"), first)
+
+    def test_intent_log_and_fallback(self):
+        append_intent_log(self.path, "小米14多少钱", {'intent': '价格查询', 'category': '手机', 'params': {}})
+        (record,) = load_recording(self.path)
+        self.assertIsNone(record.latency)
+        stub = SequenceRecognizer([{'intent': '自然沟通'}])
+        replay = ReplayRecognizer(self.path, fallback=stub, latency_scale=1.0, sleep=self.fail)
+        self.assertEqual(replay.recognize_intent("小米14多少钱")['intent'], '价格查询')
+        self.assertEqual(replay.recognize_intent("别的"), {'intent': '自然沟通'})
+        self.assertEqual(stub.calls, 1)
+
+        default = QWENAPIStub()
+        os.environ.pop('DSL_REPLAY', None)
+        self.assertIs(offline_recognizer(default), default)
+        os.environ['DSL_REPLAY'] = self.path
+        try:
+            self.assertIsInstance(offline_recognizer(default), ReplayRecognizer)
+        finally:
+            del os.environ['DSL_REPLAY']
+
+    def test_manager_replies_match_recorded_run(self):
+        inputs = ["查询小米14的价格", "王小二麻辣小龙虾的库存", "推荐3000元的华为手机"]
+        recorded = DSLManager(recognizer=RecordingRecognizer(QWENAPIStub(), self.path))
+        recorded.intent_fast_path = None
+        expected = [recorded.execute_dsl(text) for text in inputs]
+        recorded.recognizer.close()
+        replayed = DSLManager(recognizer=ReplayRecognizer(self.path))
+        replayed.intent_fast_path = None
+        self.assertEqual([replayed.execute_dsl(text) for text in inputs], expected)
+        self.assertEqual((replayed.recognizer.hits, replayed.recognizer.misses), (3, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+# src/test/test_response_cache.py
+
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DSLManager import DSLManager
+from src.explain import Explainer
+from src.profiling import BranchProfiler
+from src.response_cache import ResponseCache, canonical_intent
+from src.test.stubs.qwen_stub import QWENAPIStub
+from src.test.stubs.dsl_stub import load_mock_dsl
+
+INPUTS = ["查询小米14的价格", "王小二麻辣小龙虾有货吗？", "你好，想聊聊天", "推荐5000元的小米手机",
+          "推荐3000元的华为手机", "推荐一本书用于学习", "苹果手机多少钱", "三只松鼠还剩多少", "随便看看"]
+
+
+class TestResponseCache(unittest.TestCase):
+    """测试完整回复缓存"""
+    def setUp(self):
+        self.dsl_manager = DSLManager(recognizer=QWENAPIStub())
+        self.dsl_manager.response_cache = ResponseCache(64)
+
+    def test_hit_skips_execution_and_catalog_search(self):
+        first = self.dsl_manager.execute_dsl("推荐5000元的小米手机")
+        symbols = dict(self.dsl_manager.sym_tbl)
+
+        def fail(*args):
+            raise AssertionError('缓存命中时不应再执行')
+        self.dsl_manager.search_catalog = fail
+        self.dsl_manager.extract_parameters = fail
+        self.assertEqual(self.dsl_manager.execute_dsl("推荐5000元的小米手机"), first)
+        self.assertEqual(dict(self.dsl_manager.sym_tbl), symbols)
+        self.assertEqual(self.dsl_manager.stats['response_cache_hits'], 1)
+        self.assertEqual(self.dsl_manager.stats['response_cache_misses'], 1)
+        self.assertEqual(self.dsl_manager.cache_stats()['hit_rate'], 0.5)
+
+    def test_profilers_see_every_request(self):
+        # 分支统计与逐节点统计开启时绕过缓存，重复的输入同样计数
+        self.dsl_manager.branch_profiler = BranchProfiler()
+        for _ in range(3):
+            self.dsl_manager.execute_dsl("查询小米14的价格")
+        self.assertEqual([p.samples for p in self.dsl_manager.branch_profiler.profiles.values()], [3])
+        self.dsl_manager.explainer = Explainer()
+        for _ in range(2):
+            self.dsl_manager.execute_dsl("查询小米14的价格")
+        self.assertEqual([self.dsl_manager.explainer.profile(s).count
+                          for s in self.dsl_manager.explainer.scripts.values()], [2])
+        self.assertEqual(self.dsl_manager.stats['response_cache_hits'], 0)
+        self.assertEqual(len(self.dsl_manager.response_cache), 0)
+
+    def test_matches_uncached_manager(self):
+        uncached = DSLManager(recognizer=QWENAPIStub())
+        uncached.response_cache = None
+        for _ in range(2):
+            for text in INPUTS:
+                self.assertEqual(self.dsl_manager.execute_dsl(text), uncached.execute_dsl(text), text)
+                self.assertEqual(dict(self.dsl_manager.sym_tbl), dict(uncached.sym_tbl), text)
+        self.assertEqual(self.dsl_manager.stats['response_cache_hits'], len(INPUTS))
+
+    def test_raw_input_features_are_part_of_key(self):
+        # 意图结果相同，但原始输入中的品牌不同
+        self.dsl_manager.recognizer = QWENAPIStub({'category': '手机', 'intent': '价格查询', 'params': {}})
+        apple = self.dsl_manager.execute_dsl("苹果的多少钱")
+        huawei = self.dsl_manager.execute_dsl("华为的多少钱")
+        self.assertNotEqual(apple, huawei)
+        self.assertEqual(self.dsl_manager.stats['response_cache_hits'], 0)
+
+    def test_key_does_no_catalog_work(self):
+        """缓存键只读取词表，不遍历或解码目录"""
+        class Guarded(list):
+            armed = False
+
+            def __getitem__(self, index):
+                if self.armed:
+                    raise AssertionError('计算缓存键时不应访问目录')
+                return super().__getitem__(index)
+
+            def __iter__(self):
+                if self.armed:
+                    raise AssertionError('计算缓存键时不应遍历目录')
+                return super().__iter__()
+        catalog = self.dsl_manager.product_catalog = Guarded(self.dsl_manager.product_catalog)
+        intent_result = {'category': '手机', 'intent': '价格查询', 'params': {}}
+        texts = ("苹果的多少钱", "华为的多少钱", "小米14多少钱")
+        keys = [self.dsl_manager._response_key(intent_result, text, 'v1') for text in texts]
+        self.assertEqual(len(set(keys)), len(texts))
+        catalog.armed = True
+        self.dsl_manager.catalog_lexicon._scans.clear()
+        self.assertEqual([self.dsl_manager._response_key(intent_result, text, 'v1') for text in texts], keys)
+
+    def test_script_and_catalog_changes_invalidate(self):
+        self.dsl_manager.load_dsl_script = load_mock_dsl
+        before = self.dsl_manager.execute_dsl("查询小米14的价格")
+        self.assertIn("4500", before)
+
+        catalog = [dict(p) for p in self.dsl_manager.product_catalog]
+        catalog[0]['budget'] = 3999
+        self.dsl_manager.product_catalog = catalog
+        self.assertIn("3999", self.dsl_manager.execute_dsl("查询小米14的价格"))
+
+        self.dsl_manager.product_catalog[0]['budget'] = 3799
+        self.dsl_manager.catalog_changed()
+        self.assertIn("3799", self.dsl_manager.execute_dsl("查询小米14的价格"))
+
+        self.dsl_manager.load_dsl_script = lambda name: load_mock_dsl(name).replace('IF 品牌 AND 型号', 'IF 预算')
+        self.assertNotIn("3799", self.dsl_manager.execute_dsl("查询小米14的价格"))
+        self.assertEqual(self.dsl_manager.stats['response_cache_hits'], 0)
+
+    def test_lru_bound_and_canonical_key(self):
+        cache = ResponseCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual((len(cache), cache.hits, cache.misses), (2, 1, 1))
+        self.assertEqual(canonical_intent({'params': {'b': 1, 'a': 2}, 'intent': 'x', 'confidence': 0.9}),
+                         canonical_intent({'intent': 'x', 'params': {'a': 2, 'b': 1}, 'source': 'rules'}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+# src/test/test_server.py
+
+import asyncio
+import contextlib
+import io
+import json
+import threading
+import time
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DSLManager import DSLManager
+from src.deadline import remaining
+from src.server import EXPIRED_IN_QUEUE, DSLServer
+from src.test.stubs.qwen_stub import QWENAPIStub
+
+
+class SlowStub(QWENAPIStub):
+    """每次识别阻塞到 release 被设置，记录看到的剩余时间"""
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+        self.seen_remaining = []
+
+    def recognize_intent(self, user_input):
+        self.seen_remaining.append(remaining())
+        self.release.wait(timeout=5)
+        return super().recognize_intent(user_input)
+
+
+async def request(port, method, path, body=None, raw=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    data = raw if raw is not None else (json.dumps(body).encode('utf-8') if body is not None else b'')
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(data)}\r\n"
+                 f"Connection: close\r\n\r\n".encode('latin-1') + data)
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(payload)
+
+
+class TestServer(unittest.TestCase):
+    """测试 HTTP 服务：对话、健康检查、指标、负载削减与截止时间"""
+    def run_server(self, scenario, recognizer_factory=QWENAPIStub, **options):
+        async def main():
+            with contextlib.redirect_stdout(io.StringIO()):
+                server = DSLServer(lambda registry=None: DSLManager(recognizer=recognizer_factory(), registry=registry),
+                                   port=0, **options)
+                await server.start()
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    return await scenario(server)
+            finally:
+                await server.close()
+        return asyncio.run(main())
+
+    def test_chat_health_and_metrics(self):
+        async def scenario(server):
+            price = await request(server.port, 'POST', '/chat', {'input': '查询小米14的价格', 'session_id': 's'})
+            follow_up = await request(server.port, 'POST', '/chat', {'input': '那库存呢', 'session_id': 's'})
+            health = await request(server.port, 'GET', '/health')
+            metrics = await request(server.port, 'GET', '/metrics')
+            return price, follow_up, health, metrics
+        price, follow_up, health, metrics = self.run_server(scenario, concurrency=2)
+        self.assertEqual(price[0], 200)
+        self.assertIn("4500", price[1]['reply'])
+        self.assertIn("库存状态", follow_up[1]['reply'])  # 会话表在工作线程之间共享
+        self.assertEqual(health, (200, {'status': 'ok', 'workers': 2, 'pending': 0, 'max_pending': 66,
+                                        'uptime_s': health[1]['uptime_s']}))
+        self.assertEqual(metrics[1]['server']['replies'], 2)
+        self.assertEqual(metrics[1]['dsl']['session_follow_ups'], 1)
+        self.assertIn('hit_rate', metrics[1]['cache'])
+
+    def test_workers_share_registry(self):
+        async def scenario(server):
+            # 排队期间已超时的请求由工作线程返回标记，计数只在事件循环线程中进行
+            expired = server._run('你好', None, time.monotonic() - 1)
+            return server.managers, expired, server.snapshot()
+        managers, expired, metrics = self.run_server(scenario, concurrency=3)
+        self.assertEqual(len(managers), 3)
+        self.assertTrue(all(m.registry is managers[0].registry for m in managers))
+        self.assertTrue(all(m.dsl_directory == managers[0].dsl_directory for m in managers))
+        self.assertIs(expired, EXPIRED_IN_QUEUE)
+        self.assertEqual(metrics['server']['expired_in_queue'], 0)
+
+    def test_bad_requests(self):
+        async def scenario(server):
+            return [await request(server.port, 'GET', '/chat'),
+                    await request(server.port, 'POST', '/chat', raw=b'not json'),
+                    await request(server.port, 'POST', '/chat', {'input': '  '}),
+                    await request(server.port, 'POST', '/chat', {'input': '你好', 'timeout': 'x'}),
+                    await request(server.port, 'GET', '/nope')]
+        statuses = [status for status, _ in self.run_server(scenario, concurrency=1)]
+        self.assertEqual(statuses, [405, 400, 400, 400, 404])
+
+    def test_load_shedding(self):
+        stubs = []
+
+        def factory():
+            stubs.append(SlowStub())
+            return stubs[-1]
+
+        async def scenario(server):
+            tasks = [asyncio.ensure_future(request(server.port, 'POST', '/chat', {'input': f'随便看看{i}'}))
+                     for i in range(3)]
+            while server.pending < 2:
+                await asyncio.sleep(0.01)
+            shed = await request(server.port, 'POST', '/chat', {'input': '随便看看'})
+            for stub in stubs:
+                stub.release.set()
+            return shed, await asyncio.gather(*tasks)
+        shed, served = self.run_server(scenario, recognizer_factory=factory, concurrency=1, max_queue=1)
+        self.assertEqual(shed, (429, {'reply': '系统正忙，请稍后再试。', 'error': 'overloaded'}))
+        statuses = sorted(status for status, _ in served)
+        self.assertEqual(statuses[:2], [200, 200])
+        self.assertIn(statuses[2], (200, 429))
+
+    def test_deadline_reaches_recognizer(self):
+        stubs = []
+
+        def factory():
+            stubs.append(SlowStub())
+            return stubs[-1]
+
+        async def scenario(server):
+            start = time.monotonic()
+            result = await request(server.port, 'POST', '/chat', {'input': '随便看看', 'timeout': 0.2})
+            stubs[0].release.set()
+            return result, time.monotonic() - start, server.snapshot()
+        (status, payload), elapsed, metrics = self.run_server(scenario, recognizer_factory=factory,
+                                                              concurrency=1, timeout=5)
+        self.assertEqual((status, payload['error']), (504, 'timeout'))
+        self.assertLess(elapsed, 2)
+        self.assertLessEqual(stubs[0].seen_remaining[0], 0.2)
+        self.assertEqual(metrics['server']['timeouts'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
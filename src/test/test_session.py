@@ -0,0 +1,87 @@
+# src/test/test_session.py
+
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DSLManager import DSLManager
+from src.session import SessionStore, resolve_follow_up
+from src.test.stubs.clock_stub import FakeClock
+from src.test.stubs.qwen_stub import CountingStub
+
+
+class TestSessions(unittest.TestCase):
+    """测试多轮会话的槽位沿用与会话表淘汰"""
+    def setUp(self):
+        self.stub = CountingStub()
+        self.dsl_manager = DSLManager(recognizer=self.stub)
+        self.dsl_manager.response_cache = None
+
+    def test_follow_up_reuses_previous_product(self):
+        self.assertIn("4500", self.dsl_manager.execute_dsl("查询小米14的价格", session_id='a'))
+        reply = self.dsl_manager.execute_dsl("那库存呢", session_id='a')
+        self.assertIn("小米14", reply)
+        self.assertIn("库存状态", reply)
+        self.assertEqual(self.dsl_manager.stats['session_follow_ups'], 1)
+        self.assertEqual(self.stub.calls, 0)
+        # 不带会话 ID 时走完整的意图识别
+        self.dsl_manager.execute_dsl("那库存呢")
+        self.assertEqual(self.stub.calls, 1)
+
+    def test_budget_adjustment_without_llm(self):
+        self.dsl_manager.execute_dsl("推荐5000元的小米手机", session_id='b')
+        calls = self.stub.calls
+        self.dsl_manager.execute_dsl("便宜一点的", session_id='b')
+        self.assertEqual(self.stub.calls, calls)
+        self.assertEqual(self.dsl_manager.sym_tbl['预算'], 4000.0)
+        self.assertEqual(self.dsl_manager.sym_tbl['品牌'], '小米')
+        self.assertEqual(self.dsl_manager.sym_tbl['intent'], '商品推荐')
+
+    def test_new_topics_are_reclassified(self):
+        self.dsl_manager.execute_dsl("查询小米14的价格", session_id='c')
+        session = self.dsl_manager.sessions.get('c')
+        classifier = self.dsl_manager.intent_fast_path
+        self.assertIsNone(resolve_follow_up("你好", session, classifier))
+        self.assertIsNone(resolve_follow_up("好的", session, classifier))
+        self.assertIsNone(resolve_follow_up("推荐3000元的华为手机", session, classifier))
+        self.assertIsNone(resolve_follow_up("那衣服呢", session, classifier))
+        self.assertIsNone(resolve_follow_up("那优衣库呢", session, classifier))
+        self.assertIsNone(resolve_follow_up("我想看看别的类别有没有适合送人的礼物", session, classifier))
+        other = resolve_follow_up("那华为呢", session, classifier)
+        self.assertEqual((other['intent'], other['params']), ('价格查询', {'品牌': '华为'}))
+        model = resolve_follow_up("iPhone SE 呢", session, classifier)
+        self.assertEqual(model['params'], {'品牌': '苹果', '型号': 'iPhone SE'})
+
+    def test_store_is_bounded(self):
+        clock = FakeClock()
+        store = SessionStore(max_sessions=2, ttl=10, max_value_chars=4, clock=clock)
+        store.save('x', '价格查询', {'scene': '手机', '品牌': '小米', '型号': '很长的型号名称', '功能': '拍照'})
+        self.assertEqual(store.get('x').slots, {'品牌': '小米'})
+        clock.now = 5
+        store.save('y', '价格查询', {})
+        store.get('x')
+        clock.now = 8
+        store.save('z', '价格查询', {})
+        self.assertIsNone(store.get('x'))  # 最久未更新的会话被淘汰
+        self.assertEqual(store.evictions, 1)
+        clock.now = 16
+        self.assertIsNone(store.get('y'))
+        self.assertIsNotNone(store.get('z'))
+        self.assertEqual(store.expirations, 1)
+        self.assertEqual(len(store), 1)
+
+    def test_get_returns_snapshot(self):
+        store = SessionStore()
+        store.save('s', '价格查询', {'scene': '手机', '品牌': '小米'})
+        before = store.get('s')
+        before.slots['品牌'] = '被调用方修改'
+        store.save('s', '库存查询', {'scene': '手机', '品牌': '华为', '预算': 3000})
+        # 之前取得的快照不随之后的 save 改变，调用方的修改也不写回会话表
+        self.assertEqual((before.intent, before.slots), ('价格查询', {'品牌': '被调用方修改'}))
+        after = store.get('s')
+        self.assertEqual((after.intent, after.slots, after.turns), ('库存查询', {'品牌': '华为', '预算': 3000}, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
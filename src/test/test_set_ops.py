@@ -0,0 +1,126 @@
+# src/test/test_set_ops.py
+
+import unittest
+import sys
+import os
+import random
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.artifacts import dumps, encode_script, loads
+from src.ast_nodes import *
+from src.compiler import compile_script
+from src.executor import ASTExecutor
+from src.optimizer import optimize
+from src.profiling import BranchProfile, exclusive, reorder, to_dnf
+from src.symbols import SymbolTable
+
+HEADER = 'SCENE 通用\nON_INTENT 商品推荐\n'
+
+
+def run(ast, symbols):
+    try:
+        return ASTExecutor(symbols).execute(ast)['reply']
+    except Exception as e:
+        return type(e)
+
+
+def condition(text, backend='rd'):
+    return compile_script(HEADER + f'IF {text} REPLY "x"', backend).if_blocks.if_block.condition
+
+
+class TestSetRangeOperators(unittest.TestCase):
+    """测试 IN 集合判断与 BETWEEN 区间判断"""
+    def test_parse_both_backends(self):
+        text = '品牌 IN ("小米", "华为", 3) AND 预算 BETWEEN 1000 AND 5000.5 OR 型号'
+        self.assertEqual(dump(condition(text, 'ply')), dump(condition(text, 'rd')))
+        node = condition('品牌 IN ("小米", "华为", "小米")')
+        self.assertIsInstance(node, InNode)
+        self.assertEqual(node.items, ('小米', '华为', '小米'))
+        self.assertEqual(node.values, frozenset({'小米', '华为'}))
+        between = condition('预算 BETWEEN 1000 AND 5000')
+        self.assertIsInstance(between, BetweenNode)
+        self.assertEqual((between.low, between.high), (1000, 5000))
+        for backend in ('ply', 'rd'):
+            with self.assertRaises(SyntaxError):
+                condition('品牌 IN ()', backend)
+            with self.assertRaises(SyntaxError):
+                condition('预算 BETWEEN 1000', backend)
+
+    def test_equivalent_to_expanded_forms(self):
+        pairs = [('品牌 IN ("a", "b", 5)', '品牌 == "a" OR 品牌 == "b" OR 品牌 == 5'),
+                 ('预算 BETWEEN 100 AND 500', '预算 >= 100 AND 预算 <= 500'),
+                 ('预算 BETWEEN "b" AND "d"', '预算 >= "b" AND 预算 <= "d"')]
+        values = [None, '', 'a', 'b', 'c', 'e', 5, 5.0, 100, 99.5, 500, 501, 300.0]
+        for short, expanded in pairs:
+            short_ast = compile_script(HEADER + f'IF {short} REPLY "y" ELSE REPLY "n"')
+            long_ast = compile_script(HEADER + f'IF {expanded} REPLY "y" ELSE REPLY "n"')
+            for value in values:
+                symbols = {} if value is None else {'品牌': value, '预算': value}
+                for table in (dict(symbols), SymbolTable(symbols)):
+                    self.assertEqual(run(short_ast, table), run(long_ast, dict(symbols)), (short, value))
+
+    def test_between_type_mismatch_raises(self):
+        ast = compile_script(HEADER + 'IF 预算 BETWEEN 100 AND 500 REPLY "y"')
+        self.assertIs(run(ast, {'预算': '很多'}), TypeError)
+        self.assertIs(run(ast, SymbolTable({'预算': '很多'})), TypeError)
+        self.assertIsNone(run(ast, {}))
+
+    def test_artifact_roundtrip(self):
+        source = HEADER + 'IF 品牌 IN ("a", 2, 3.5) AND 预算 BETWEEN 1 AND 2.5 REPLY "x" ELSE REPLY "y"'
+        ast = compile_script(source)
+        restored = loads(dumps(ast, source), source)
+        self.assertEqual(encode_script(restored), encode_script(ast))
+        self.assertEqual(restored.if_blocks.if_block.condition.left.values, frozenset({'a', 2, 3.5}))
+
+    def test_optimizer_folds_facts(self):
+        source = HEADER + '''
+            IF intent IN ("价格查询", "库存查询") REPLY "不可达"
+            ELSE IF intent IN ("商品推荐") AND 品牌 IN ("a") REPLY "a"
+            ELSE IF 预算 BETWEEN 1 AND 2 REPLY "b"'''
+        optimized = optimize(compile_script(source), {'intent': '商品推荐'})
+        blocks = optimized.ast.if_blocks
+        self.assertIsInstance(blocks.if_block.condition, InNode)
+        self.assertEqual(blocks.if_block.reply, 'a')
+        self.assertEqual(optimized.stats['branches_removed'], 1)
+        # BETWEEN 可能抛出异常，不能被恒真的另一侧吸收
+        raising = optimize(compile_script(HEADER + 'IF intent IN ("商品推荐") OR 预算 BETWEEN 1 AND 2 REPLY "a"'),
+                           {'intent': '商品推荐'})
+        self.assertIsInstance(raising.ast.if_blocks.if_block.condition, BinaryOpNode)
+
+    def test_reorder_exclusivity(self):
+        def proven(a, b):
+            return exclusive(to_dnf(condition(a)), to_dnf(condition(b)))
+        self.assertTrue(proven('品牌 IN ("a", "b")', '品牌 IN ("c", "d")'))
+        self.assertTrue(proven('品牌 IN ("a", "b")', '品牌 == "c"'))
+        self.assertTrue(proven('品牌 IN ("a", "b")', '品牌 != "a" AND 品牌 != "b"'))
+        self.assertTrue(proven('预算 BETWEEN 0 AND 999', '预算 BETWEEN 1000 AND 1999'))
+        self.assertTrue(proven('预算 IN (5, 6)', '预算 BETWEEN 7 AND 9'))
+        self.assertFalse(proven('品牌 IN ("a", "b")', '品牌 IN ("b", "c")'))
+        self.assertFalse(proven('预算 BETWEEN 0 AND 1000', '预算 BETWEEN 1000 AND 1999'))
+        self.assertFalse(proven('预算 IN (5, 6)', '预算 BETWEEN 6 AND 9'))
+        self.assertFalse(proven('预算 BETWEEN "a" AND "c"', '预算 BETWEEN "d" AND "f"'))
+
+    def test_differential_random_reorder(self):
+        rng = random.Random(39)
+        atoms = ['品牌 IN ("a", "b")', '品牌 IN ("c")', '品牌 == "a"', '品牌 != "c"', '型号',
+                 '预算 BETWEEN 0 AND 99', '预算 BETWEEN 100 AND 499.5', '预算 >= 500', '预算 IN (100, 700)',
+                 '预算 BETWEEN "m" AND "z"']
+        values = {'品牌': ['a', 'b', 'c', '', 5], '型号': ['x', ''], '预算': [50, 100, 100.0, 499.5, 700, 'n', '']}
+        for _ in range(200):
+            branches = [f' {rng.choice(["AND", "OR"])} '.join(rng.sample(atoms, rng.randint(1, 2)))
+                        for _ in range(rng.randint(2, 6))]
+            source = HEADER + f'IF {branches[0]} REPLY "0"\n'
+            source += ''.join(f'ELSE IF {text} REPLY "{i + 1}"\n' for i, text in enumerate(branches[1:]))
+            ast = compile_script(source, 'rd')
+            profile = BranchProfile(len(branches) + 1)
+            profile.hits = [rng.randint(0, 20) for _ in range(len(branches) + 1)]
+            reordered, _ = reorder(ast, profile)
+            for _ in range(10):
+                symbols = {ident: rng.choice(options) for ident, options in values.items() if rng.random() < 0.8}
+                expected = run(ast, dict(symbols))
+                self.assertEqual(run(reordered, dict(symbols)), expected, (source, symbols))
+                self.assertEqual(run(reordered, SymbolTable(symbols)), expected, (source, symbols))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+# src/test/test_shared_catalog.py
+
+import unittest
+import random
+import tempfile
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DSLManager import DSLManager
+from src.fuzzy_index import FrozenTrigramIndex, TrigramIndex, pack
+from src.lexicon import CatalogLexicon, FrozenKeyTable, KeyTable, compact, pack as pack_lexicon
+from src.shared_catalog import SharedCatalog, attach, build_image, open_image, publish, write_image
+from src.test.stubs.qwen_stub import QWENAPIStub
+
+
+class TestSharedCatalog(unittest.TestCase):
+    """测试共享只读商品目录镜像与只读三元组索引"""
+    def setUp(self):
+        self.catalog = DSLManager(recognizer=QWENAPIStub()).product_catalog
+        self.shared = SharedCatalog(build_image(self.catalog))
+
+    def test_image_round_trip(self):
+        self.assertEqual(len(self.shared), len(self.catalog))
+        self.assertEqual(list(self.shared), list(self.catalog))
+        self.assertEqual(self.shared[-1], self.catalog[-1])
+        self.assertEqual(self.shared[1:3], list(self.catalog[1:3]))
+        with self.assertRaises(IndexError):
+            self.shared[len(self.catalog)]
+        category = self.catalog[0]['category']
+        self.assertEqual(self.shared.in_category(category),
+                         [product for product in self.catalog if product['category'] == category])
+        self.assertEqual(self.shared.in_category('不存在的类别'), [])
+
+    def test_frozen_index_matches_original(self):
+        rng = random.Random(48)
+        alphabet = 'abcdefg12小米'
+        index = TrigramIndex()
+        for position in range(500):
+            index.add(''.join(rng.choice(alphabet) for _ in range(rng.randrange(1, 9))), position)
+        frozen = FrozenTrigramIndex(pack(index))
+        self.assertEqual(len(frozen), len(index))
+        for _ in range(300):
+            query = ''.join(rng.choice(alphabet) for _ in range(rng.randrange(1, 9)))
+            for limit in (1, 3):
+                self.assertEqual([(int(v), s) for v, s in frozen.search(query, limit)], index.search(query, limit))
+        with self.assertRaises(TypeError):
+            frozen.add('abc', 1)
+
+    def test_frozen_key_table_matches_original(self):
+        rng = random.Random(48)
+        alphabet = 'ab c1小米'
+        table = KeyTable()
+        names = [''.join(rng.choice(alphabet) for _ in range(rng.randrange(1, 6))) for _ in range(300)]
+        for position, name in enumerate(names):
+            table.add(name, position)
+        frozen = FrozenKeyTable(pack_lexicon(table))
+        self.assertEqual(len(frozen), len(table))
+        self.assertEqual(frozen.lengths, table.lengths)
+        for _ in range(300):
+            text = compact(''.join(rng.choice(alphabet) for _ in range(rng.randrange(1, 12))))
+            self.assertEqual(frozen.get(text), table.get(text))
+            self.assertEqual(list(frozen.positions(text)), list(table.positions(text)))
+            self.assertEqual(frozen.find_all(text), table.find_all(text))
+        with self.assertRaises(TypeError):
+            frozen.add('abc', 1)
+
+    def test_lexicon_matches_catalog_scan(self):
+        """词表查找与逐条扫描目录的结果一致（原 _match_product / 型号最长优先的规则）"""
+        rng = random.Random(36)
+        words = ['ab', 'a b', 'abc', 'B', 'x1', 'x 1', '米', '小米']
+        catalog = [{'category': rng.choice('甲乙'), 'brand': rng.choice(words),
+                    'model': rng.choice(words) + rng.choice(words)} for _ in range(60)]
+        for lexicon in (CatalogLexicon(catalog), SharedCatalog(build_image(catalog)).lexicon()):
+            for _ in range(200):
+                text = compact(''.join(rng.choice(words) for _ in range(rng.randrange(1, 4))))
+                expected = None
+                for index, p in enumerate(catalog):
+                    if p['model'].lower() in text:
+                        expected = (index, True)
+                        break
+                    if p['brand'].lower() in text:
+                        expected = (index, False)
+                        break
+                self.assertEqual(lexicon.first_product(text), expected)
+                models = [p for p in catalog if compact(p['model']) in text]
+                longest = max((len(compact(p['model'])) for p in models), default=0)
+                self.assertEqual(lexicon.best_model(text),
+                                 next((p for p in models if len(compact(p['model'])) == longest), None))
+            for p in catalog:
+                self.assertIn(p['category'], lexicon.categories_of(p['brand']))
+
+    def test_sku_table_and_budgets(self):
+        for position, product in enumerate(self.catalog):
+            self.assertIn(position, list(self.shared.sku_positions(f"{product['brand']}:{product['model']}")))
+            self.assertEqual(self.shared.budgets[position], product['budget'])
+        self.assertEqual(list(self.shared.sku_positions('不存在:的商品')), [])
+
+    def test_manager_with_shared_catalog(self):
+        default = DSLManager(recognizer=QWENAPIStub())
+        shared = DSLManager(recognizer=QWENAPIStub(), product_catalog=self.shared)
+        for text in ["查询 iphone15pro 的价格", "小米14有货吗", "推荐一款手机", "帮我推荐零食",
+                     "推荐5000元的小米手机", "苹果手机多少钱", "王小二麻辣小龙虾有货吗？"]:
+            self.assertEqual(shared.execute_dsl(text), default.execute_dsl(text))
+
+    def test_attach_and_mmap(self):
+        block = publish(self.catalog)
+        try:
+            attached = attach(block.name)
+            self.assertEqual(list(attached), list(self.catalog))
+            self.assertEqual(attached.catalog_index().best_product('iphone 15 pr')[0]['model'], 'iPhone 15 Pro')
+            attached.close()
+        finally:
+            block.close()
+            block.unlink()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'catalog.img')
+            self.assertGreater(write_image(self.catalog, path), 0)
+            mapped = open_image(path)
+            self.assertEqual(mapped[0], self.catalog[0])
+            mapped.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
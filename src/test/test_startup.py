@@ -0,0 +1,50 @@
+# src/test/test_startup.py
+
+import unittest
+from unittest import mock
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.bench.common import loaded_modules
+from DSLManager import DSLManager
+from src.qwen_api import QWENAPI
+from src.test.stubs.qwen_stub import QWENAPIStub
+
+
+class TestLazyStartup(unittest.TestCase):
+    """测试启动阶段的延迟导入与识别器注入"""
+    def test_injected_recognizer_never_imports_openai(self):
+        statement = ("from DSLManager import DSLManager; "
+                     "from src.test.stubs.qwen_stub import QWENAPIStub; "
+                     "m = DSLManager(recognizer=QWENAPIStub()); "
+                     "assert '小米14' in m.execute_dsl('推荐5000元的小米手机')")
+        self.assertNotIn('openai', loaded_modules(statement))
+
+    def test_constructor_injection(self):
+        stub = QWENAPIStub()
+        dsl_manager = DSLManager(recognizer=stub)
+        self.assertIs(dsl_manager.recognizer, stub)
+        self.assertIn("4500", dsl_manager.execute_dsl("查询小米14的价格"))
+        # 属性赋值仍可替换注入的识别器
+        replacement = QWENAPIStub()
+        dsl_manager.recognizer = replacement
+        self.assertIs(dsl_manager.recognizer, replacement)
+
+    def test_recognizer_created_on_first_use(self):
+        statement = ("import os; os.environ['DASHSCOPE_API_KEY'] = 'x'; "
+                     "from DSLManager import DSLManager; "
+                     "m = DSLManager(); "
+                     "assert m._recognizer is None; "
+                     "assert m.recognizer is m.recognizer")
+        self.assertNotIn('openai', loaded_modules(statement))
+
+    def test_qwen_client_created_on_first_use(self):
+        with mock.patch.dict(os.environ, {'DASHSCOPE_API_KEY': 'x'}):
+            recognizer = QWENAPI()
+        self.assertIsNone(recognizer._client)
+        self.assertIs(recognizer.client, recognizer.client)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+# src/test/test_symbols.py
+
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ast_nodes import CompareNode, ExistsNode
+from src.compiler import compile_script
+from src.executor import ASTExecutor
+from src.symbols import LAYOUT, SlotLayout, SymbolTable
+
+HEADER = 'SCENE 通用\nON_INTENT 商品推荐\n'
+
+
+class TestSymbolTable(unittest.TestCase):
+    """测试槽位化符号表"""
+    def test_nodes_get_compile_time_slots(self):
+        ast = compile_script(HEADER + 'IF 预算 > 1 AND 品牌 REPLY "x"', 'rd')
+        condition = ast.if_blocks.if_block.condition
+        self.assertEqual(condition.left.slot, LAYOUT.index['预算'])
+        self.assertEqual(condition.right.slot, LAYOUT.index['品牌'])
+        self.assertEqual(CompareNode('预算', '<', 1).slot, ExistsNode('预算').slot)
+
+    def test_dict_interface(self):
+        table = SymbolTable({'预算': 3000.0, '颜色': '黑色'})
+        table['品牌'] = '小米'
+        self.assertEqual(table['预算'], 3000.0)
+        self.assertEqual(table.get('颜色'), '黑色')
+        self.assertIn('品牌', table)
+        self.assertNotIn('型号', table)
+        self.assertEqual(table.get('型号', '无'), '无')
+        self.assertEqual(dict(table), {'预算': 3000.0, '品牌': '小米', '颜色': '黑色'})
+        self.assertEqual(len(table), 3)
+        self.assertEqual({**table, '型号': 'x'}['品牌'], '小米')
+        del table['品牌']
+        with self.assertRaises(KeyError):
+            table['品牌']
+        table.clear()
+        self.assertEqual(len(table), 0)
+        self.assertEqual(repr(table), '{}')
+
+    def test_layout_growth_migrates_extras(self):
+        layout = SlotLayout(('预算',))
+        table = SymbolTable({'颜色': '红色'}, layout=layout)
+        self.assertIn('颜色', table.extras)
+        slot = layout.slot('颜色')
+        self.assertEqual(table.slots()[slot], '红色')
+        self.assertEqual(table.extras, {})
+        self.assertEqual(table['颜色'], '红色')
+
+    def test_executor_matches_dict_semantics(self):
+        source = (HEADER + 'IF 预算 >= 3000 AND 品牌 == "小米" REPLY "a" '
+                  'ELSE IF 新标识符 OR 型号 REPLY "b" ELSE REPLY "c"')
+        ast = compile_script(source, 'rd')
+        for params in ({'预算': 3000, '品牌': '小米'}, {'新标识符': 'x'}, {'型号': ''}, {}):
+            self.assertEqual(ASTExecutor(SymbolTable(params)).execute(ast)['reply'],
+                             ASTExecutor(dict(params)).execute(ast)['reply'], params)
+        # 先创建符号表、后编译出新标识符的脚本，执行时同样能取到值
+        table = SymbolTable({'迟到的标识符': 1})
+        late = compile_script(HEADER + 'IF 迟到的标识符 REPLY "命中"', 'rd')
+        self.assertEqual(ASTExecutor(table).execute(late)['reply'], '命中')
+
+    def test_clear_in_place_and_bounded_layout(self):
+        layout = SlotLayout(('预算', '品牌'), max_slots=3)
+        table = SymbolTable({'预算': 1, '颜色': '红色'}, layout=layout)
+        values = table.values
+        layout.slot('型号')
+        table.clear()
+        self.assertIs(table.values, values)  # 原地清空，并补齐到布局长度
+        self.assertEqual(table.values, [None] * 3)
+        self.assertEqual((len(table), table.extras), (0, {}))
+        with self.assertRaises(ValueError):
+            layout.slot('颜色')
+        self.assertEqual(len(layout), 3)
+        table['颜色'] = '蓝色'  # 没有槽位的参数仍可存取
+        self.assertEqual(table.extras, {'颜色': '蓝色'})
+
+
+if __name__ == '__main__':
+    unittest.main()